@@ -0,0 +1,324 @@
+"""
+Entry point ASGI do KYC - mesmas rotas e respostas do handler do Vercel (process_kyc.py),
+para deploys self-hosted:
+
+    uvicorn asgi:app --app-dir api      (qualquer servidor ASGI; python api/asgi.py usa o uvicorn)
+
+O event loop faz o I/O HTTP: parse, validação e respostas curtas (menor de idade,
+input inválido, métricas) saem direto do loop. O trabalho do SDK (reasoning,
+attestation, batch, job store, idempotência) continua bloqueante - as esperas de RPC e
+IPFS ocupam uma thread de um ThreadPoolExecutor limitado a KYC_ASGI_WORKERS (default
+256) KYCs em voo por processo; acima disso as requests esperam na fila do executor.
+
+Não é um ganho de throughput: no bench/bench_asgi.py o app fica abaixo do handler em
+ThreadingHTTPServer (4.15 vs 4.92 KYC/s, p50 6260 vs 5231 ms com concurrency 30), já
+que as duas formas acabam com uma thread por KYC em voo e o loop soma um salto a
+mais por request. O que muda é o limite explícito de KYCs em voo e o deploy fora do
+Vercel.
+
+?async=1 é aceito aqui (funs_kyc.jobs.mark_long_lived); com mais de um processo o
+KYC_JOB_STORE_URL precisa ser compartilhado entre eles.
+
+process_kyc.py continua sendo o entry point do Vercel; as funções de KYC e a lógica
+de submissão (_submit_kyc com admission control, _stage, _wants_async) são as do handler.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import process_kyc
+from funs_kyc.admission import AdmissionRejected, log_shed
+from funs_kyc.idempotency import IdempotencyKeyReused, get_idempotency_cache, idempotency_enabled, request_key
+from funs_kyc.jobs import get_job_store, mark_long_lived
+from funs_kyc.metrics import (
+    PROMETHEUS_CONTENT_TYPE, REQUEST_METRIC, REQUESTS_TOTAL, RequestTimings, get_registry, server_timing_enabled, span
+)
+from funs_kyc.streaming import AsgiEventStream, stream_format
+from funs_kyc.validation import ValidationError, validate_applicant, validation_enabled
+from funs_kyc.warmup import schedule_warmup
+
+DEFAULT_WORKERS = 256
+
+mark_long_lived()     # o processo fica de pé: jobs do ?async=1 avançam depois do 202
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def asgi_workers():
+    return max(1, int(os.getenv('KYC_ASGI_WORKERS', DEFAULT_WORKERS)))
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=asgi_workers(), thread_name_prefix='kyc-asgi')
+        return _executor
+
+
+async def run_blocking(fn, *args):
+    """fn(*args) no executor, no contexto da request (spans entram no Server-Timing dela)"""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), context.run, fn, *args)
+
+
+class Headers:
+    """Headers ASGI com get() case-insensitive - a interface de headers que o handler usa"""
+
+    def __init__(self, raw):
+        self._headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in raw}
+
+    def get(self, name, default=None):
+        return self._headers.get(name.lower(), default)
+
+
+class KycRequest:
+    """Uma request HTTP do ASGI, com os mesmos métodos do handler de process_kyc.py"""
+
+    def __init__(self, scope, receive, send):
+        self.receive = receive
+        self.send = send
+        self.method = scope['method']
+        query = scope.get('query_string') or b''
+        self.path = scope['path'] + (f"?{query.decode('latin-1')}" if query else '')
+        self.headers = Headers(scope.get('headers') or ())
+        self._stream = None
+        self._timings = None
+        self._status = None
+
+    # Lógica de submissão do handler do Vercel (só depende de path, headers, _stream e _stage)
+    _submit_kyc = process_kyc.handler._submit_kyc
+    _stage = process_kyc.handler._stage
+    _wants_async = process_kyc.handler._wants_async
+    _create_detailed_attestation = process_kyc.handler._create_detailed_attestation
+
+    async def dispatch(self):
+        if self.method == 'POST':
+            await self.do_POST()
+        elif self.method == 'GET':
+            await self.do_GET()
+        elif self.method == 'OPTIONS':
+            await self.do_OPTIONS()
+        else:
+            await self._send_response(501, {'success': False, 'error': f"Unsupported method ({self.method})"})
+
+    async def _read_body(self):
+        chunks = []
+        while True:
+            message = await self.receive()
+            if message['type'] == 'http.disconnect':
+                raise ConnectionError("Client disconnected before sending the body")
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def do_POST(self):
+        self._timings = RequestTimings().activate()
+        route = 'kyc'
+        try:
+            print("=== 🚀 FUNS.AI KYC v2.0 - IPFS INTEGRATION (EXPANDED REASONING) ===", file=sys.stderr)
+
+            post_data = await self._read_body()
+
+            if urlparse(self.path).path.rstrip('/').endswith('/batch'):
+                route = 'batch'
+                await self._send_response(200, await run_blocking(self._create_batch_kyc, post_data))
+                return
+
+            with span('parse'):
+                data = json.loads(post_data.decode('utf-8'))
+                applicant = process_kyc.parse_kyc_input(data)
+            if validation_enabled():
+                with span('validate'):
+                    validate_applicant(applicant, data.get('mrz'))
+
+            print(f"👤 Processing KYC: {applicant['user_name']}, {applicant['user_age']}y, {applicant['user_country']}", file=sys.stderr)
+
+            content_type = stream_format(self.path, self.headers)
+            if content_type:
+                self._stream = await AsgiEventStream(self.send, content_type).start()
+
+            if applicant['user_age'] < 18:
+                await self._respond(200, dict(process_kyc.UNDER_AGE_RESPONSE))
+                return
+
+            self._stage('validated', user_country=applicant['user_country'])
+
+            key, fingerprint = request_key(self.headers.get('Idempotency-Key'), applicant) \
+                if idempotency_enabled() else (None, None)
+            if key is None:
+                await self._respond(*await run_blocking(self._submit_kyc, applicant))
+                return
+
+            (status_code, body), replayed = await run_blocking(
+                get_idempotency_cache().execute, key, fingerprint, lambda: self._submit_kyc(applicant)
+            )
+            if replayed:
+                print("🔁 Idempotent replay - returning stored response", file=sys.stderr)
+            await self._respond(status_code, body, {'Idempotent-Replayed': 'true'} if replayed else None)
+
+        except ValidationError as e:
+            print(f"⛔ Invalid input: {e}", file=sys.stderr)
+            error = 'Invalid batch' if route == 'batch' else 'Invalid applicant data'
+            await self._respond(400, {'success': False, 'error': error, 'errors': e.errors})
+        except IdempotencyKeyReused as e:
+            await self._respond(422, {'success': False, 'error': str(e)})
+        except AdmissionRejected as e:
+            log_shed(e)
+            await self._respond(429, {'success': False, 'error': str(e), 'retry_after': e.retry_after},
+                                {'Retry-After': str(e.retry_after)})
+        except Exception as e:
+            print(f"❌ ERROR: {str(e)}", file=sys.stderr)
+            import traceback
+            traceback.print_exc(file=sys.stderr)
+            await self._respond(500, {'success': False, 'error': str(e)})
+        finally:
+            self._finish_request(route)
+            if self._stream:
+                await self._stream.wait_closed()
+
+    @staticmethod
+    def _create_batch_kyc(post_data):
+        from funs_kyc.batch import parse_batch_body
+
+        with span('parse'):
+            records = parse_batch_body(post_data)
+        return process_kyc.create_batch_kyc(records)
+
+    def _finish_request(self, route):
+        """Duração total + contagem por status no registry de métricas"""
+        self._timings.deactivate()
+        status = str(self._status or 500)
+        registry = get_registry()
+        registry.observe(REQUEST_METRIC, self._timings.elapsed(), route=route, status=status)
+        registry.inc(REQUESTS_TOTAL, route=route, status=status)
+        schedule_warmup()
+
+    async def _respond(self, status_code, data, headers=None):
+        """Resposta final: JSON normal ou evento 'result'/'error' fechando o stream"""
+        if not self._stream:
+            await self._send_response(status_code, data, headers)
+            return
+        self._status = status_code
+        stage = 'result' if status_code < 400 else 'error'
+        replayed = 'Idempotent-Replayed' in (headers or {})
+        self._stream.send(stage, http_status=status_code, replayed=replayed, **data)
+        self._stream.close()
+
+    async def do_GET(self):
+        """GET /api/process_kyc/status/<job_id> (ou ?job_id=<id>), /verify/<attestation_id> e /metrics"""
+        try:
+            url = urlparse(self.path)
+            if url.path.rstrip('/').endswith('/metrics'):
+                await self._send_metrics(url)
+                return
+
+            attestation_id = process_kyc.verification_target(url)
+            if attestation_id is not None:
+                # Cache em memória direto no loop; chain/IPFS/SQLite no executor
+                response = process_kyc.get_verification(attestation_id, network=False)
+                await self._send_response(*(response or await run_blocking(process_kyc.get_verification,
+                                                                           attestation_id)))
+                return
+
+            job_id = parse_qs(url.query).get('job_id', [None])[0]
+            if not job_id and '/status/' in url.path:
+                job_id = url.path.rsplit('/status/', 1)[1].strip('/')
+
+            if not job_id:
+                await self._send_response(400, {'success': False, 'error': 'job_id required'})
+                return
+
+            job = await run_blocking(get_job_store().get, job_id)
+            if job is None:
+                await self._send_response(404, {'success': False, 'error': f'Job not found: {job_id}'})
+                return
+
+            job['success'] = job['status'] != 'failed'
+            await self._send_response(200, job)
+
+        except Exception as e:
+            print(f"❌ ERROR: {str(e)}", file=sys.stderr)
+            await self._send_response(500, {'success': False, 'error': str(e)})
+
+    async def _send_metrics(self, url):
+        registry = get_registry()
+        wants_json = parse_qs(url.query).get('format', [''])[0].lower() == 'json' or \
+            'application/json' in (self.headers.get('Accept') or '')
+        if wants_json:
+            await self._send_response(200, registry.to_dict())
+            return
+        await self._send(200, [(b'content-type', PROMETHEUS_CONTENT_TYPE.encode('latin-1'))],
+                         registry.to_prometheus().encode('utf-8'))
+
+    async def do_OPTIONS(self):
+        await self._send(200, [
+            (b'access-control-allow-origin', b'*'),
+            (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+            (b'access-control-allow-headers', b'Content-Type, Prefer, Idempotency-Key'),
+        ], b'')
+
+    async def _send_response(self, status_code, data, headers=None):
+        self._status = status_code
+        raw_headers = [(b'content-type', b'application/json'), (b'access-control-allow-origin', b'*')]
+        if self._timings and server_timing_enabled():
+            raw_headers += [
+                (b'server-timing', self._timings.header().encode('latin-1')),
+                (b'timing-allow-origin', b'*'),
+                (b'access-control-expose-headers', b'Server-Timing'),
+            ]
+        for name, value in (headers or {}).items():
+            raw_headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+        await self._send(status_code, raw_headers, json.dumps(data).encode())
+
+    async def _send(self, status_code, raw_headers, body):
+        raw_headers.append((b'content-length', str(len(body)).encode('latin-1')))
+        await self.send({'type': 'http.response.start', 'status': status_code, 'headers': raw_headers})
+        await self.send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            with _executor_lock:
+                if _executor is not None:
+                    _executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'http':
+        await KycRequest(scope, receive, send).dispatch()
+    elif scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the KYC API (asgi:app) with uvicorn")
+    parser.add_argument('--host', default=os.getenv('KYC_ASGI_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('KYC_ASGI_PORT', '8000')))
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is not installed: pip install uvicorn (or serve asgi:app with any ASGI server)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
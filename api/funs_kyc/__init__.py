@@ -0,0 +1,3 @@
+"""
+Funs.ai KYC - módulos de suporte do endpoint /api/process_kyc
+"""
@@ -0,0 +1,247 @@
+"""
+Admission control na frente do pipeline de attestation
+
+Em picos de onboarding todo POST ia direto para o broadcast: o rate limit do RPC e a
+capacidade de txs pendentes do signer estouravam, todo mundo ficava lento e acabava
+num 500 genérico. Agora cada attestation (KYC síncrono, stream, job assíncrono, batch)
+pede uma vaga antes de qualquer trabalho:
+
+- token bucket: KYC_ADMISSION_RATE attestations/s (default 10), rajada de até
+  KYC_ADMISSION_BURST (default 20) - dimensionado pelo budget de RPC e gas
+- em voo: no máximo KYC_ADMISSION_MAX_IN_FLIGHT attestations admitidas e não
+  terminadas (default 64) - txs pendentes do signer
+- sem capacidade, a request espera numa fila FIFO limitada (KYC_ADMISSION_QUEUE_SIZE,
+  default 100) por até KYC_ADMISSION_MAX_WAIT segundos (default 10)
+- fila cheia ou prazo estourado -> AdmissionRejected -> 429 + Retry-After (estimativa
+  de quando a fila atual terá andado)
+
+Métricas no registry (GET /metrics): kyc_admission_queue_depth e
+kyc_admission_in_flight (gauges), kyc_admission_wait_seconds{outcome} (histograma),
+kyc_admission_admitted_total e kyc_admission_shed_total{reason="queue_full|timeout"}.
+
+KYC_ADMISSION=0 desativa (toda attestation entra direto).
+"""
+
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .metrics import HELP, get_registry
+
+QUEUE_DEPTH = 'kyc_admission_queue_depth'
+IN_FLIGHT = 'kyc_admission_in_flight'
+WAIT_METRIC = 'kyc_admission_wait_seconds'
+ADMITTED_TOTAL = 'kyc_admission_admitted_total'
+SHED_TOTAL = 'kyc_admission_shed_total'
+
+HELP.update({
+    QUEUE_DEPTH: 'Attestations waiting for admission',
+    IN_FLIGHT: 'Admitted attestations not finished yet',
+    WAIT_METRIC: 'Time spent waiting for admission',
+    ADMITTED_TOTAL: 'Attestations admitted',
+    SHED_TOTAL: 'Attestations rejected with 429 by reason',
+})
+
+
+def admission_enabled():
+    return os.getenv('KYC_ADMISSION', '1').lower() not in ('0', 'false', 'no')
+
+
+class AdmissionRejected(Exception):
+    """Sem capacidade para a attestation: responder 429 com Retry-After"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Attestation capacity exhausted ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Permit:
+    """Vaga de uma attestation admitida; release() é idempotente"""
+
+    __slots__ = ('_controller', '_released')
+
+    def __init__(self, controller):
+        self._controller = controller
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionController:
+    def __init__(self, rate, burst, max_in_flight, queue_size, max_wait):
+        """
+        Args:
+            rate: attestations/s repostas no bucket
+            burst: tamanho do bucket (rajada admitida sem esperar)
+            max_in_flight: attestations admitidas e ainda não terminadas
+            queue_size: requests esperando vaga (além disso, 429 imediato)
+            max_wait: segundos na fila até desistir com 429
+        """
+        self.rate = max(rate, 1e-6)
+        self.burst = max(1.0, burst)
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue_size = max(0, queue_size)
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._queue = deque()     # tickets na ordem de chegada
+        self.stats = {'admitted': 0, 'queued': 0, 'shed_queue_full': 0, 'shed_timeout': 0}
+
+    # ==================== API ====================
+
+    def acquire(self):
+        """Bloqueia até a vaga (-> Permit) ou levanta AdmissionRejected"""
+        started = time.monotonic()
+        with self._cond:
+            self._refill(started)
+            if not self._queue and self._available():
+                return self._admit(started)
+            if len(self._queue) >= self.queue_size:
+                self._shed('queue_full', started)
+
+            ticket = object()
+            self._queue.append(ticket)
+            self.stats['queued'] += 1
+            self._publish()
+            deadline = started + self.max_wait
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    head = self._queue[0] is ticket
+                    if head and self._available():
+                        self._queue.popleft()
+                        self._cond.notify_all()    # o próximo da fila reavalia
+                        return self._admit(started)
+                    if now >= deadline:
+                        self._queue.remove(ticket)
+                        self._cond.notify_all()
+                        self._shed('timeout', started)
+                    timeout = deadline - now
+                    if head and self._tokens < 1:
+                        timeout = min(timeout, (1 - self._tokens) / self.rate)
+                    self._cond.wait(timeout)
+            finally:
+                self._publish()
+
+    @contextmanager
+    def admitted(self):
+        with self.acquire():
+            yield
+
+    def snapshot(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            return dict(self.stats, queue_depth=len(self._queue), in_flight=self._in_flight,
+                        tokens=round(self._tokens, 2))
+
+    # ==================== INTERNOS (com o lock) ====================
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _available(self):
+        return self._tokens >= 1 and self._in_flight < self.max_in_flight
+
+    def _admit(self, started):
+        self._tokens -= 1
+        self._in_flight += 1
+        self.stats['admitted'] += 1
+        registry = get_registry()
+        registry.observe(WAIT_METRIC, time.monotonic() - started, outcome='admitted')
+        registry.inc(ADMITTED_TOTAL)
+        self._publish()
+        return Permit(self)
+
+    def _shed(self, reason, started):
+        self.stats[f'shed_{reason}'] += 1
+        registry = get_registry()
+        registry.observe(WAIT_METRIC, time.monotonic() - started, outcome=reason)
+        registry.inc(SHED_TOTAL, reason=reason)
+        raise AdmissionRejected(reason, self._retry_after())
+
+    def _retry_after(self):
+        """Segundos inteiros até os tokens cobrirem a fila atual + esta request"""
+        missing = len(self._queue) + 1 - self._tokens
+        return max(1, math.ceil(missing / self.rate))
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._publish()
+            self._cond.notify_all()
+
+    def _publish(self):
+        registry = get_registry()
+        registry.set(QUEUE_DEPTH, len(self._queue))
+        registry.set(IN_FLIGHT, self._in_flight)
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """Controller da instância (configurado pelo ambiente na primeira chamada)"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(
+                rate=float(os.getenv('KYC_ADMISSION_RATE', '10')),
+                burst=float(os.getenv('KYC_ADMISSION_BURST', '20')),
+                max_in_flight=int(os.getenv('KYC_ADMISSION_MAX_IN_FLIGHT', '64')),
+                queue_size=int(os.getenv('KYC_ADMISSION_QUEUE_SIZE', '100')),
+                max_wait=float(os.getenv('KYC_ADMISSION_MAX_WAIT', '10')),
+            )
+        return _controller
+
+
+def acquire_permit():
+    """Permit da attestation, ou None com admission control desativado"""
+    if not admission_enabled():
+        return None
+    return get_admission_controller().acquire()
+
+
+def release_after(permit, runner):
+    """runner(**kwargs) que libera o permit ao terminar - para attestations que seguem em background"""
+    def run(**kwargs):
+        try:
+            return runner(**kwargs)
+        finally:
+            if permit is not None:
+                permit.release()
+    return run
+
+
+@contextmanager
+def admitted():
+    """with admitted(): ... - segura uma vaga durante o bloco (no-op com KYC_ADMISSION=0)"""
+    permit = acquire_permit()
+    try:
+        yield
+    finally:
+        if permit is not None:
+            permit.release()
+
+
+def log_shed(error):
+    print(f"🚦 Load shed: {error}", file=sys.stderr)
@@ -0,0 +1,220 @@
+"""
+Batch KYC - ancora N applicants em UMA transação on-chain via Merkle root
+
+Cada applicant tem seu reasoning encriptado e pinado no IPFS individualmente.
+O leaf de cada applicant é keccak256 dos bytes exatos do documento pinado, e o
+attestation ID do applicant é esse leaf. Um manifesto com todos os leaves é pinado
+e somente o Merkle root vai on-chain (submitAttestation).
+
+No layout completo os documentos são StreamedDocument (document_stream.py): o lote
+não guarda N documentos montados, só o corpo final dos que cabem em KYC_STREAM_BUFFER_LIMIT.
+
+Árvore: pares ordenados (keccak256(min(a,b) + max(a,b))), nó ímpar sobe sem hash,
+então a prova é apenas a lista de irmãos - verificável com verify_merkle_proof().
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from anna_protocol import Metadata
+from hexbytes import HexBytes
+from web3 import Web3
+
+from .document_stream import StreamedDocument
+from .encryption import encrypt_in_pool
+from .pipeline import (
+    build_reasoning_document, confirm_attestation_tx, hex_prefixed, stream_reasoning_document, streams_document
+)
+from .transactions import submit_attestation_tx
+from .validation import ValidationError
+
+BATCH_VERSION = "2.0-batch-merkle"
+UPLOAD_WORKERS = int(os.getenv('KYC_BATCH_UPLOAD_WORKERS', '8'))
+
+
+# ==================== MERKLE TREE ====================
+
+def _hash_pair(a, b):
+    return Web3.keccak(a + b if a <= b else b + a)
+
+
+def build_merkle_tree(leaves):
+    """Retorna os níveis da árvore (levels[0] = leaves, levels[-1] = [root])"""
+    if not leaves:
+        raise ValueError("Merkle tree needs at least one leaf")
+
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        parents = [_hash_pair(current[i], current[i + 1]) for i in range(0, len(current) - 1, 2)]
+        if len(current) % 2:
+            parents.append(current[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_proof(levels, index):
+    """Lista de irmãos (hex) do leaf `index` até o root"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(hex_prefixed(level[sibling].hex()))
+        index //= 2
+    return proof
+
+
+def verify_merkle_proof(leaf, proof, root):
+    """Verifica prova de inclusão (leaf/proof/root em hex)"""
+    node = bytes.fromhex(leaf[2:] if leaf.startswith('0x') else leaf)
+    for sibling in proof:
+        node = _hash_pair(node, bytes.fromhex(sibling[2:] if sibling.startswith('0x') else sibling))
+    return hex_prefixed(node.hex()).lower() == hex_prefixed(root).lower()
+
+
+# ==================== BATCH ATTESTATION ====================
+
+def _document_bytes(document):
+    # Mesma serialização do upload_json (storage.encode_json) -> leaf == hash do objeto armazenado, já descomprimido
+    return json.dumps(document, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _seal_applicant(client, batch_salt, index, kyc):
+    """Encripta o reasoning privado de um applicant e monta o documento a ser pinado"""
+    encryption_id = Web3.keccak(text=f"{client.address}-{batch_salt}-{index}").hex()
+    if streams_document(client, kyc.get('slots')):
+        document = stream_reasoning_document(client, kyc['public_reasoning'], kyc['private_reasoning'],
+                                             encryption_id, digest=True)
+        return document, HexBytes(document.keccak)
+    document = build_reasoning_document(
+        client, kyc['public_reasoning'], kyc['private_reasoning'], encryption_id, kyc.get('slots')
+    )
+    leaf = Web3.keccak(_document_bytes(document))
+    return document, leaf
+
+
+def create_batch_attestation(client, kyc_items, wait_for_confirmation=True):
+    """
+    Ancora vários applicants em uma transação.
+
+    Args:
+        kyc_items: lista de dicts retornados por build_kyc_reasoning()
+
+    Returns:
+        dict com merkle_root, tx_hash, batch_attestation_id, manifest_cid e
+        'applicants' (um dict por item, na mesma ordem: attestation_id, proof, ipfs_cid...)
+    """
+    if not client.filebase:
+        raise Exception("IPFS storage not configured. Provide filebase_api_key and filebase_api_secret")
+
+    batch_salt = f"{int(time.time() * 1000)}-{os.urandom(4).hex()}"
+    # Encryption + serialização + leaf de cada applicant no pool de encryption
+    sealed = encrypt_in_pool(lambda item: _seal_applicant(client, batch_salt, *item), enumerate(kyc_items))
+    leaves = [leaf for _, leaf in sealed]
+
+    levels = build_merkle_tree(leaves)
+    merkle_root = hex_prefixed(levels[-1][0].hex())
+
+    # Pin dos payloads em paralelo (I/O bound)
+    print(f"📤 Pinning {len(sealed)} reasoning payloads...", file=sys.stderr)
+
+    def pin(item):
+        index, (document, leaf) = item
+        filename = f"reasoning_{leaf.hex()[:16]}.json"
+        if isinstance(document, StreamedDocument):
+            return client.filebase.upload_prepared(document, filename)
+        return client.filebase.upload_json(document, filename=filename)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(UPLOAD_WORKERS, len(sealed)))) as pool:
+        cids = list(pool.map(pin, enumerate(sealed)))
+
+    applicants = [
+        {
+            'attestation_id': hex_prefixed(leaf.hex()),
+            'leaf_index': i,
+            'proof': merkle_proof(levels, i),
+            'ipfs_cid': cid,
+            'ipfs_url': client.filebase.get_url(cid),
+        }
+        for i, (leaf, cid) in enumerate(zip(leaves, cids))
+    ]
+
+    manifest = {
+        'version': BATCH_VERSION,
+        'merkle_root': merkle_root,
+        'leaves': [{'attestation_id': a['attestation_id'], 'ipfs_cid': a['ipfs_cid']} for a in applicants]
+    }
+    manifest_cid = client.filebase.upload_json(manifest, filename=f"batch_{merkle_root[2:18]}.json")
+
+    # Uma única transação com o root
+    print(f"🌳 Committing Merkle root {merkle_root[:18]}... ({len(applicants)} applicants)", file=sys.stderr)
+    metadata = Metadata(
+        external_id=f"FUNS-BATCH-{batch_salt}",
+        document_type="kyc_creator_batch",
+        system_origin="Funs.ai",
+        custom_fields={'ipfs_cid': manifest_cid, 'batch_size': len(applicants)}
+    )
+    tx_hash, local_id, nonce = submit_attestation_tx(
+        client,
+        content=json.dumps({'merkle_root': merkle_root, 'count': len(applicants)}, sort_keys=True),
+        reasoning=json.dumps({'ipfs_cid': manifest_cid, 'merkle_root': merkle_root, 'version': BATCH_VERSION}),
+        category=metadata.to_json()
+    )
+    batch_attestation_id = hex_prefixed(local_id)
+
+    if wait_for_confirmation:
+        event_id, _ = confirm_attestation_tx(client, tx_hash, nonce)
+        batch_attestation_id = event_id or batch_attestation_id
+
+    for applicant in applicants:
+        applicant['tx_hash'] = tx_hash
+        applicant['batch_attestation_id'] = batch_attestation_id
+        applicant['merkle_root'] = merkle_root
+
+    return {
+        'merkle_root': merkle_root,
+        'tx_hash': tx_hash,
+        'batch_attestation_id': batch_attestation_id,
+        'manifest_cid': manifest_cid,
+        'manifest_url': client.filebase.get_url(manifest_cid),
+        'applicants': applicants
+    }
+
+
+def parse_batch_body(raw):
+    """
+    Aceita array JSON ou JSONL (um applicant por linha).
+    Corpo malformado -> ValidationError com um erro por linha/registro (400, não 500).
+    """
+    try:
+        text = raw.decode('utf-8').strip()
+    except UnicodeDecodeError as e:
+        raise ValidationError([f"body: not valid UTF-8 ({e.reason} at byte {e.start})"])
+    if not text:
+        raise ValidationError(["body: batch is empty"])
+
+    if text.startswith('['):
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValidationError([f"body: invalid JSON array ({e})"])
+        errors = [f"record {i}: must be a JSON object" for i, r in enumerate(records) if not isinstance(r, dict)]
+    else:
+        records, errors = [], []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                errors.append(f"line {number}: invalid JSON ({e.msg} at column {e.colno})")
+                continue
+            if not isinstance(record, dict):
+                errors.append(f"line {number}: must be a JSON object")
+            records.append(record)
+    if errors:
+        raise ValidationError(errors)
+    return records
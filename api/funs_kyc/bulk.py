@@ -0,0 +1,418 @@
+"""
+Processamento offline de arquivos JSONL de applicants - mesmo pipeline do POST
+(validação -> reasoning -> IPFS -> attestation), sem HTTP.
+
+Uso (de dentro de api/):
+    python -m funs_kyc.bulk applicants.jsonl -o results.jsonl [--workers 4] [--io-concurrency 16]
+
+- Uma linha por applicant, mesmos campos do POST (name, email, age, country, cpf,
+  passport, mrz opcional). Linhas vazias são ignoradas.
+- Validação de CPF/passaporte/MRZ vetorizada por bloco de linhas (funs_kyc.validation).
+- Reasoning (screening + templates) montado num pool de processos; o score de risco
+  de cada bloco sai de uma chamada vetorizada (funs_kyc.scoring.score_batch).
+- Upload IPFS + transação + confirmação em threads - várias attestations em voo
+  ao mesmo tempo (nonces via NonceManager).
+- Um resultado por linha no JSONL de saída (campo 'line'), escrito assim que fica
+  pronto - a ordem de saída é a de conclusão, não a de entrada.
+
+Retomada: o checkpoint (<output>.checkpoint.json) guarda a marca d'água (todas as
+linhas abaixo dela concluídas), as linhas concluídas acima dela e o tamanho do
+JSONL de saída naquele momento. Ao retomar, o trecho do JSONL escrito depois do
+checkpoint é relido, então nenhuma linha já gravada é reprocessada. Linhas que
+estavam em voo durante a interrupção são reprocessadas; com idempotência ligada
+e KYC_IDEMPOTENCY_STORE persistente, elas são devolvidas do cache em vez de
+gerar uma segunda attestation. --retry-failed reprocessa linhas que falharam no
+upload/transação (marcadas com 'retryable').
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# process_kyc fica em api/, um nível acima do pacote
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from .idempotency import get_idempotency_cache, idempotency_enabled, request_key
+from .validation import validate_batch, validation_enabled
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_CHECKPOINT_EVERY = 200
+
+
+# ==================== CHECKPOINT ====================
+
+class Checkpoint:
+    """Linhas concluídas = [0, watermark) + done; salvo de forma atômica (tmp + rename)"""
+
+    def __init__(self, path, input_path):
+        self.path = path
+        self.input_path = os.path.abspath(input_path)
+        self.watermark = 0
+        self.done = set()
+        self.output_bytes = 0
+
+    def load(self):
+        """Carrega o checkpoint do mesmo input; False se não existe"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') != CHECKPOINT_VERSION or state.get('input') != self.input_path:
+            raise ValueError(f"Checkpoint {self.path} belongs to another input ({state.get('input')})")
+        self.watermark = state['watermark']
+        self.done = set(state['done'])
+        self.output_bytes = state['output_bytes']
+        return True
+
+    def is_done(self, line):
+        return line < self.watermark or line in self.done
+
+    def mark(self, line):
+        self.done.add(line)
+        while self.watermark in self.done:
+            self.done.discard(self.watermark)
+            self.watermark += 1
+
+    def unmark(self, line):
+        """Linha volta a ficar pendente (--retry-failed)"""
+        if line < self.watermark:
+            self.done.update(range(line + 1, self.watermark))
+            self.watermark = line
+        self.done.discard(line)
+
+    def save(self, output_bytes):
+        self.output_bytes = output_bytes
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'input': self.input_path,
+            'watermark': self.watermark,
+            'done': sorted(self.done),
+            'output_bytes': output_bytes,
+            'saved_at': time.time(),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def recover_output(output_path, checkpoint, retry_failed=False):
+    """
+    Relê o JSONL de saída a partir do último checkpoint e marca as linhas já gravadas.
+    Uma última linha incompleta (interrupção no meio da escrita) é truncada.
+    Com retry_failed, o arquivo inteiro é relido para desmarcar as falhas retryable.
+
+    Returns:
+        número de resultados recuperados depois do checkpoint
+    """
+    if not os.path.exists(output_path):
+        checkpoint.watermark, checkpoint.done = 0, set()
+        return 0
+
+    start = 0 if retry_failed else checkpoint.output_bytes
+    recovered = 0
+    with open(output_path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if start > size:
+            raise ValueError(f"Output {output_path} is shorter than its checkpoint - refusing to resume")
+        f.seek(start)
+        offset = start
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                f.truncate(offset)
+                print(f"✂️  Truncated partial result at byte {offset}", file=sys.stderr)
+                break
+            offset += len(raw)
+            record = json.loads(raw)
+            if retry_failed and record.get('retryable'):
+                checkpoint.unmark(record['line'])
+            elif not checkpoint.is_done(record['line']):
+                checkpoint.mark(record['line'])
+                recovered += 1
+    return recovered
+
+
+# ==================== OUTPUT ====================
+
+class ResultWriter:
+    """Escreve resultados no JSONL, marca o checkpoint e acorda quem espera o fim"""
+
+    def __init__(self, output_path, checkpoint, checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+        self.file = open(output_path, 'ab')
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.in_flight = 0
+        self.counts = {'written': 0, 'approved': 0, 'manual_review': 0, 'rejected': 0, 'pin_pending': 0,
+                       'invalid': 0, 'failed': 0, 'replayed': 0}
+        self._since_checkpoint = 0
+        self._started = time.monotonic()
+        self._cond = threading.Condition()
+
+    def begin(self):
+        with self._cond:
+            self.in_flight += 1
+
+    def write(self, line, result):
+        record = dict(result, line=line)
+        raw = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._cond:
+            self.file.write(raw)
+            self.file.flush()
+            self.checkpoint.mark(line)
+            self._count(record)
+            self._since_checkpoint += 1
+            if self._since_checkpoint >= self.checkpoint_every:
+                self._save_checkpoint()
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def skip(self, line):
+        """Linha sem resultado (vazia) - só avança o checkpoint"""
+        with self._cond:
+            self.checkpoint.mark(line)
+
+    def _count(self, record):
+        self.counts['written'] += 1
+        if record.get('retryable'):
+            self.counts['failed'] += 1
+        elif record.get('errors') or not record.get('success'):
+            self.counts['invalid'] += 1
+        elif record.get('status') == 'pin_pending':
+            self.counts['pin_pending'] += 1
+        elif record.get('kyc_approved'):
+            self.counts['approved'] += 1
+        elif record.get('kyc_status') == 'manual_review':
+            self.counts['manual_review'] += 1
+        else:
+            self.counts['rejected'] += 1
+        if record.get('replayed'):
+            self.counts['replayed'] += 1
+
+    def _save_checkpoint(self):
+        os.fsync(self.file.fileno())
+        self.checkpoint.save(self.file.tell())
+        self._since_checkpoint = 0
+        rate = self.counts['written'] / max(time.monotonic() - self._started, 1e-9)
+        print(f"💾 Checkpoint: {self.counts['written']:,} written, watermark line {self.checkpoint.watermark:,} "
+              f"({rate:,.1f} rec/s)", file=sys.stderr)
+
+    def wait_below(self, limit):
+        """Backpressure: bloqueia o leitor enquanto há muitas linhas em voo"""
+        with self._cond:
+            while self.in_flight >= limit:
+                self._cond.wait()
+
+    def close(self):
+        with self._cond:
+            while self.in_flight:
+                self._cond.wait()
+            self._save_checkpoint()
+        self.file.close()
+
+
+# ==================== PIPELINE ====================
+
+def build_reasoning_chunk(applicants):
+    """Roda no pool de processos: reasoning de cada applicant, ou a mensagem de erro"""
+    import process_kyc
+    try:
+        # Screening + score do bloco inteiro numa chamada vetorizada
+        scored = process_kyc.score_applicants(applicants)
+    except Exception as e:
+        print(f"⚠️  Chunk scoring failed, scoring per applicant: {e}", file=sys.stderr)
+        scored = [(None, None)] * len(applicants)
+    results = []
+    for applicant, (screening, risk) in zip(applicants, scored):
+        try:
+            results.append((True, process_kyc.build_kyc_reasoning(**applicant, screening=screening, risk=risk)))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _ignore_interrupts():
+    """Workers ignoram Ctrl-C - quem coordena a parada é o processo principal"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def attest(applicant, kyc):
+    """Upload + transação + confirmação de um applicant com reasoning pronto -> body da resposta"""
+    import process_kyc
+    from .client_pool import get_client
+    from .pipeline import create_attestation_staged
+    result = create_attestation_staged(
+        get_client(),
+        public_reasoning=kyc['public_reasoning'],
+        private_reasoning=kyc['private_reasoning'],
+        metadata=kyc['metadata'],
+        wait_for_confirmation=True,
+        reasoning_slots=kyc['slots']
+    )
+    return process_kyc.format_kyc_response(process_kyc.format_attestation_result(
+        result, kyc['final_score'], applicant['user_age'], applicant['user_country'], kyc['screening'], kyc['risk']
+    ))
+
+
+def _read_chunks(input_path, writer, chunk_size):
+    """(linha, texto) das linhas pendentes, em blocos; linhas vazias já saem concluídas"""
+    chunk = []
+    with open(input_path, encoding='utf-8') as f:
+        for line, raw in enumerate(f):
+            if writer.checkpoint.is_done(line):
+                continue
+            if not raw.strip():
+                writer.skip(line)
+                continue
+            chunk.append((line, raw))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkProcessor:
+    def __init__(self, input_path, output_path, checkpoint_path=None, workers=None, io_concurrency=16,
+                 chunk_size=DEFAULT_CHUNK_SIZE, checkpoint_every=DEFAULT_CHECKPOINT_EVERY, retry_failed=False):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint = Checkpoint(checkpoint_path or f"{output_path}.checkpoint.json", input_path)
+        self.workers = workers or os.cpu_count() or 1
+        self.io_concurrency = io_concurrency
+        self.chunk_size = chunk_size
+        self.checkpoint_every = checkpoint_every
+        self.retry_failed = retry_failed
+        # Linhas em voo: chunks no pool de reasoning + attestations em andamento
+        self.max_in_flight = io_concurrency * 2 + self.workers * chunk_size * 2
+
+    def run(self):
+        resumed = self.checkpoint.load()
+        recovered = recover_output(self.output_path, self.checkpoint, self.retry_failed)
+        if resumed or recovered:
+            print(f"⏯️  Resuming: watermark line {self.checkpoint.watermark:,}, "
+                  f"{recovered:,} results recovered after the last checkpoint", file=sys.stderr)
+
+        writer = self.writer = ResultWriter(self.output_path, self.checkpoint, self.checkpoint_every)
+        started = time.monotonic()
+        # spawn: threads de I/O (client, sanctions reload) já existem quando o pool cria workers
+        with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_ignore_interrupts) as cpu_pool, \
+                ThreadPoolExecutor(self.io_concurrency, thread_name_prefix='kyc-bulk-io') as io_pool:
+            self.io_pool = io_pool
+            try:
+                for chunk in _read_chunks(self.input_path, writer, self.chunk_size):
+                    writer.wait_below(self.max_in_flight)
+                    self._dispatch(chunk, cpu_pool)
+            finally:
+                writer.close()
+
+        elapsed = time.monotonic() - started
+        summary = dict(writer.counts, elapsed_s=round(elapsed, 2),
+                       records_per_s=round(writer.counts['written'] / elapsed, 1) if elapsed else None,
+                       output=self.output_path, checkpoint=self.checkpoint.path)
+        print(f"✅ Bulk run finished: {summary}", file=sys.stderr)
+        return summary
+
+    def _dispatch(self, chunk, cpu_pool):
+        """Parse + validação vetorizada no leitor; os válidos seguem para o pool de reasoning"""
+        import process_kyc
+
+        parsed = []
+        for line, raw in chunk:
+            self.writer.begin()
+            try:
+                data = json.loads(raw)
+                parsed.append((line, process_kyc.parse_kyc_input(data), data.get('mrz')))
+            except (AttributeError, TypeError, ValueError) as e:
+                self.writer.write(line, {'success': False, 'error': f"Invalid applicant: {e}"})
+
+        errors = validate_batch([a for _, a, _ in parsed], [m for _, _, m in parsed]) \
+            if validation_enabled() and parsed else [[] for _ in parsed]
+
+        pending = []
+        for (line, applicant, _), applicant_errors in zip(parsed, errors):
+            if applicant_errors:
+                self.writer.write(line, {'success': False, 'error': 'Invalid applicant data', 'errors': applicant_errors})
+            elif applicant['user_age'] < 18:
+                self.writer.write(line, process_kyc.UNDER_AGE_RESPONSE)
+            else:
+                pending.append((line, applicant))
+
+        if pending:
+            future = cpu_pool.submit(build_reasoning_chunk, [a for _, a in pending])
+            future.add_done_callback(lambda f: self._reasoning_done(pending, f))
+
+    def _reasoning_done(self, pending, future):
+        try:
+            built = future.result()
+        except Exception as e:
+            built = [(False, f"{type(e).__name__}: {e}")] * len(pending)
+        for (line, applicant), (ok, kyc) in zip(pending, built):
+            if ok:
+                self.io_pool.submit(self._attest_line, line, applicant, kyc)
+            else:
+                self.writer.write(line, {'success': False, 'error': f"Reasoning failed: {kyc}", 'retryable': True})
+
+    def _attest_line(self, line, applicant, kyc):
+        from .pin_repair import PinPendingError
+
+        def run():
+            try:
+                return 200, attest(applicant, kyc)
+            except PinPendingError as e:
+                # Tx já enviada: resultado final, fora do --retry-failed
+                return 202, e.response()
+
+        try:
+            key, fingerprint = request_key(None, applicant) if idempotency_enabled() else (None, None)
+            if key is not None:
+                (_, body), replayed = get_idempotency_cache().execute(key, fingerprint, run)
+                result = dict(body, replayed=True) if replayed else body
+            else:
+                result = run()[1]
+        except Exception as e:
+            print(f"❌ Line {line}: {e}", file=sys.stderr)
+            result = {'success': False, 'error': str(e), 'retryable': True}
+        self.writer.write(line, result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="JSONL com um applicant por linha")
+    parser.add_argument('-o', '--output', required=True, help="JSONL de resultados (append; base da retomada)")
+    parser.add_argument('--checkpoint', help="default: <output>.checkpoint.json")
+    parser.add_argument('--workers', type=int, default=None, help="processos de reasoning (default: CPUs)")
+    parser.add_argument('--io-concurrency', type=int, default=16, help="attestations em voo")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY)
+    parser.add_argument('--retry-failed', action='store_true', help="reprocessa linhas com falha de upload/transação")
+    args = parser.parse_args(argv)
+
+    # SIGTERM = Ctrl-C: para de ler, termina as linhas em voo e salva o checkpoint
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    try:
+        summary = BulkProcessor(
+            args.input, args.output, args.checkpoint, args.workers, args.io_concurrency,
+            args.chunk_size, args.checkpoint_every, args.retry_failed
+        ).run()
+    except KeyboardInterrupt:
+        print("⏸️  Interrupted - run the same command again to resume", file=sys.stderr)
+        sys.exit(130)
+    print(json.dumps(summary))
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+if __name__ == '__main__':
+    main()
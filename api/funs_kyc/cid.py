@@ -0,0 +1,163 @@
+"""
+CID IPFS calculado localmente - mesmo resultado do `ipfs add` (UnixFS) sobre os bytes pinados
+
+Parâmetros (defaults do kubo, que o Filebase usa para objetos S3):
+- KYC_IPFS_CID_VERSION: 0 (Qm..., dag-pb) ou 1 (bafy..., base32)
+- KYC_IPFS_CHUNK_SIZE: chunker de tamanho fixo, 262144 bytes
+- KYC_IPFS_RAW_LEAVES: folhas raw; default = ligado só com CID v1 (como `ipfs add --cid-version=1`)
+- layout balanceado, até 174 links por nó, sha2-256
+
+Folha: PBNode{Data: UnixFS{Type: File, Data: chunk, filesize}} (ou bloco raw).
+Arquivo de um chunk: o CID é o da folha. Acima disso, nós internos com
+UnixFS{Type: File, filesize, blocksizes} e links {Hash, Name: "", Tsize}.
+"""
+
+import hashlib
+import os
+
+CID_VERSION = int(os.getenv('KYC_IPFS_CID_VERSION', '0'))
+CHUNK_SIZE = int(os.getenv('KYC_IPFS_CHUNK_SIZE', '262144'))
+MAX_LINKS = 174
+
+DAG_PB = 0x70
+RAW = 0x55
+SHA2_256 = 0x12
+UNIXFS_FILE = 2
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+BASE32_ALPHABET = 'abcdefghijklmnopqrstuvwxyz234567'
+
+
+def raw_leaves_default(cid_version):
+    value = os.getenv('KYC_IPFS_RAW_LEAVES')
+    if value is None:
+        return cid_version == 1
+    return value.lower() not in ('0', 'false', 'no')
+
+
+# ==================== ENCODING ====================
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field_bytes(number, data):
+    return _varint(number << 3 | 2) + _varint(len(data)) + data
+
+
+def _field_varint(number, value):
+    return _varint(number << 3) + _varint(value)
+
+
+def _unixfs_file(data=b'', filesize=0, blocksizes=()):
+    out = _field_varint(1, UNIXFS_FILE)
+    if data:
+        out += _field_bytes(2, data)
+    out += _field_varint(3, filesize)
+    for size in blocksizes:
+        out += _field_varint(4, size)
+    return out
+
+
+def _pb_node(data, links=()):
+    """dag-pb na forma canônica: links (campo 2) antes de data (campo 1)"""
+    out = b''
+    for cid, tsize in links:
+        out += _field_bytes(2, _field_bytes(1, cid) + _field_bytes(2, b'') + _field_varint(3, tsize))
+    return out + _field_bytes(1, data)
+
+
+def _multihash(block):
+    return bytes([SHA2_256, 32]) + hashlib.sha256(block).digest()
+
+
+def _cid_bytes(block, codec, cid_version):
+    if cid_version == 0:
+        return _multihash(block)
+    return _varint(1) + _varint(codec) + _multihash(block)
+
+
+def base58btc(data):
+    number = int.from_bytes(data, 'big')
+    out = ''
+    while number:
+        number, rest = divmod(number, 58)
+        out = BASE58_ALPHABET[rest] + out
+    return '1' * (len(data) - len(data.lstrip(b'\0'))) + out
+
+
+def base32(data):
+    bits = ''.join(f'{byte:08b}' for byte in data)
+    bits += '0' * (-len(bits) % 5)
+    return ''.join(BASE32_ALPHABET[int(bits[i:i + 5], 2)] for i in range(0, len(bits), 5))
+
+
+def cid_string(cid, cid_version):
+    return base58btc(cid) if cid_version == 0 else 'b' + base32(cid)
+
+
+# ==================== DAG ====================
+
+def _rechunk(chunks, size):
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) < size:
+            continue
+        offset = 0
+        with memoryview(buffer) as view:
+            while len(buffer) - offset >= size:
+                yield bytes(view[offset:offset + size])
+                offset += size
+        del buffer[:offset]
+    if buffer:
+        yield bytes(buffer)
+
+
+def compute_cid(chunks, cid_version=None, chunk_size=None, raw_leaves=None):
+    """
+    CID do arquivo formado pela concatenação de chunks (bytes ou iterável de bytes).
+    Só os CIDs das folhas ficam em memória - o corpo pode ser consumido em streaming.
+    """
+    cid_version = CID_VERSION if cid_version is None else cid_version
+    chunk_size = chunk_size or CHUNK_SIZE
+    raw_leaves = raw_leaves_default(cid_version) if raw_leaves is None else raw_leaves
+    if cid_version == 0 and raw_leaves:
+        raise ValueError("raw leaves require CID version 1")
+    if isinstance(chunks, (bytes, bytearray)):
+        chunks = [bytes(chunks)]
+
+    # (cid, tsize, filesize) de cada nó do nível atual
+    level = []
+    for piece in _rechunk(chunks, chunk_size):
+        if raw_leaves:
+            level.append((_cid_bytes(piece, RAW, cid_version), len(piece), len(piece)))
+        else:
+            block = _pb_node(_unixfs_file(piece, len(piece)))
+            level.append((_cid_bytes(block, DAG_PB, cid_version), len(block), len(piece)))
+
+    if not level:
+        if raw_leaves:
+            return cid_string(_cid_bytes(b'', RAW, cid_version), cid_version)
+        block = _pb_node(_unixfs_file())
+        return cid_string(_cid_bytes(block, DAG_PB, cid_version), cid_version)
+
+    while len(level) > 1:
+        parents = []
+        for start in range(0, len(level), MAX_LINKS):
+            children = level[start:start + MAX_LINKS]
+            filesize = sum(size for _, _, size in children)
+            block = _pb_node(_unixfs_file(filesize=filesize, blocksizes=[size for _, _, size in children]),
+                             [(cid, tsize) for cid, tsize, _ in children])
+            parents.append((_cid_bytes(block, DAG_PB, cid_version),
+                            len(block) + sum(tsize for _, tsize, _ in children), filesize))
+        level = parents
+    return cid_string(level[0][0], cid_version)
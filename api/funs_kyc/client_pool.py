@@ -0,0 +1,198 @@
+"""
+Warm ANNAClient - reutiliza o mesmo client entre invocações da mesma instância
+Evita recriar web3 provider + sessão boto3/Filebase + derivação da conta a cada POST
+
+O FilebaseClient do SDK é trocado pelo uploader de storage.py (pool de conexões,
+retries, gzip opcional), compartilhado por credenciais - o pool sobrevive à recriação do client.
+Com KYC_RPC_URLS o provider do w3 vira o RpcPool de rpc_pool.py (failover entre
+endpoints, hedged reads), também compartilhado entre recriações.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+import types
+
+from anna_protocol import ANNAClient
+from anna_protocol.client import NETWORKS, FilebaseClient
+
+from .rpc_pool import get_rpc_pool, rpc_urls
+from .storage import get_filebase_uploader
+
+DEFAULT_NETWORK = "polygon-amoy"
+DEFAULT_ATTESTATION_CONTRACT = "0x4c92d3305e7F1417f718827B819E285325a823d3"
+
+# Intervalo mínimo entre health checks do RPC (segundos)
+HEALTH_CHECK_INTERVAL = 30
+
+_lock = threading.Lock()
+_setup_lock = threading.Lock()     # serializa a criação do client (rara), não os reusos
+_client = None
+_fingerprint = None
+_last_health_check = 0.0
+
+_stats = {
+    'setups': 0,
+    'reuses': 0,
+    'setup_ms_total': 0.0,
+    'reuse_ms_total': 0.0,
+    'last_setup_ms': None,
+    'last_reuse_ms': None,
+}
+
+
+def _client_settings():
+    """Credenciais e configuração de rede lidas do ambiente"""
+    return {
+        'private_key': os.getenv('ANNA_PRIVATE_KEY'),
+        'network': os.getenv('ANNA_NETWORK', DEFAULT_NETWORK),
+        'attestation_contract': os.getenv('ANNA_ATTESTATION_CONTRACT', DEFAULT_ATTESTATION_CONTRACT),
+        'filebase_api_key': os.getenv('FILEBASE_ACCESS_KEY'),
+        'filebase_api_secret': os.getenv('FILEBASE_SECRET_KEY'),
+        'rpc_urls': ','.join(rpc_urls()),
+    }
+
+
+def _settings_fingerprint(settings):
+    """Hash das settings - muda quando credenciais ou rede mudam (sem guardar segredos em claro)"""
+    raw = "|".join(f"{k}={settings[k] or ''}" for k in sorted(settings))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _is_healthy(client):
+    try:
+        return client.w3.is_connected()
+    except Exception as e:
+        print(f"⚠️  Warm client health check failed: {e}", file=sys.stderr)
+        return False
+
+
+def get_client():
+    """
+    Retorna o ANNAClient da instância, criando-o na primeira chamada.
+    O client é recriado apenas se as settings mudarem ou o health check falhar.
+    O health check (uma chamada RPC) roda fora do lock: um node lento atrasa só a
+    request que fez o check, não as outras que reusam o client.
+    """
+    global _client, _fingerprint, _last_health_check
+
+    started = time.perf_counter()
+    settings = _client_settings()
+    fingerprint = _settings_fingerprint(settings)
+
+    with _lock:
+        if _client is not None and _fingerprint != fingerprint:
+            print("🔄 Client settings changed, rebuilding ANNA client", file=sys.stderr)
+            _client = None
+        client = _client
+        check = client is not None and time.monotonic() - _last_health_check >= HEALTH_CHECK_INTERVAL
+        if check:
+            _last_health_check = time.monotonic()      # uma request por intervalo faz o check
+
+    if check and not _is_healthy(client):
+        print("🔄 Warm client unhealthy, rebuilding ANNA client", file=sys.stderr)
+        with _lock:
+            if _client is client:
+                _client = None
+        client = None
+
+    if client is not None:
+        _record_reuse(started)
+        return client
+
+    with _setup_lock:
+        with _lock:
+            if _client is not None and _fingerprint == fingerprint:    # outra thread já recriou
+                client = _client
+        if client is not None:
+            _record_reuse(started)
+            return client
+
+        client = _new_client(settings)
+        if isinstance(client.filebase, FilebaseClient):
+            client.filebase = get_filebase_uploader(
+                settings['filebase_api_key'], settings['filebase_api_secret'], client.filebase.bucket_name
+            )
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with _lock:
+            _client = client
+            _fingerprint = fingerprint
+            _last_health_check = time.monotonic()
+            _stats['setups'] += 1
+            _stats['setup_ms_total'] += elapsed_ms
+            _stats['last_setup_ms'] = elapsed_ms
+        print(f"🔧 ANNA client initialized in {elapsed_ms:.1f}ms (cold)", file=sys.stderr)
+        return client
+
+
+def _record_reuse(started):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _lock:
+        _stats['reuses'] += 1
+        _stats['reuse_ms_total'] += elapsed_ms
+        _stats['last_reuse_ms'] = elapsed_ms
+
+
+def _init_for_networks(networks):
+    """
+    ANNAClient.__init__ lendo `networks` no lugar do NETWORKS global do SDK: mesmo
+    código, globals próprios. Nada compartilhado é alterado, então setups concorrentes
+    não veem a rede fixada uns dos outros.
+    """
+    init = ANNAClient.__init__
+    pinned_init = types.FunctionType(init.__code__, dict(init.__globals__, NETWORKS=networks),
+                                     init.__name__, init.__defaults__, init.__closure__)
+    pinned_init.__kwdefaults__ = init.__kwdefaults__
+    return pinned_init
+
+
+def _new_client(settings):
+    """ANNAClient do SDK; com KYC_RPC_URLS, o w3 dele usa o RpcPool"""
+    settings = dict(settings)
+    urls = settings.pop('rpc_urls')
+    pool = get_rpc_pool(urls.split(',')) if urls else None
+    if pool is None:
+        return ANNAClient(**settings)
+
+    # O construtor do SDK testa a conexão com NETWORKS[network]['rpc']: aponta para um
+    # endpoint do pool que responde, para o client subir mesmo com o RPC default fora
+    network = settings['network']
+    if network not in NETWORKS:
+        raise ValueError(f"Network inválida. Use: {list(NETWORKS.keys())}")
+    failures = []
+    for endpoint in pool.ranked():
+        pinned = f"{network}@{endpoint.name}"
+        client = ANNAClient.__new__(ANNAClient)
+        try:
+            _init_for_networks({pinned: dict(NETWORKS[network], rpc=endpoint.url)})(
+                client, **dict(settings, network=pinned)
+            )
+        except ConnectionError as e:
+            print(f"⚠️  RPC {endpoint.name} unreachable at client setup: {e}", file=sys.stderr)
+            failures.append(endpoint.name)
+            continue
+        client.network, client.network_config = network, NETWORKS[network]
+        client.w3.provider = pool
+        print(f"🛰️  RPC pool: {pool}", file=sys.stderr)
+        return client
+    raise ConnectionError(f"No RPC endpoint reachable at client setup (tried: {', '.join(failures) or 'none'})")
+
+
+def reset_client():
+    """Descarta o client atual (ex.: após erro de conexão); o próximo get_client() recria"""
+    global _client, _fingerprint
+    with _lock:
+        _client = None
+        _fingerprint = None
+
+
+def client_stats():
+    """Snapshot dos tempos de setup vs reuse"""
+    with _lock:
+        stats = dict(_stats)
+    stats['avg_setup_ms'] = stats['setup_ms_total'] / stats['setups'] if stats['setups'] else None
+    stats['avg_reuse_ms'] = stats['reuse_ms_total'] / stats['reuses'] if stats['reuses'] else None
+    return stats
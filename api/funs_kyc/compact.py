@@ -0,0 +1,527 @@
+"""
+Codificação compacta (CBOR, RFC 8949) do reasoning privado encriptado
+
+O plaintext de private_encrypted era JSON: as chaves de cada step, o texto de
+metodologia das fases 1A-1D e o boilerplate dos templates 2A-5 iam inteiros em toda
+attestation - e depois de encriptados (hex) o gzip do upload não comprime mais nada.
+
+Formato:
+    d9 d9 f7                                      tag 55799 (self-described CBOR) = magic
+    [versão, id do dicionário (8 bytes), flags, corpo (bytes)]
+- corpo: o payload em CBOR; string presente no dicionário vira tag 25 (stringref)
+  + índice, 2-4 bytes no lugar do texto
+- dicionário: chaves do schema e dos slots + todas as strings fixas das fases
+  (STATIC_STEPS e campos estáticos dos TEMPLATED_STEPS); id = sha256 do conteúdo
+- flags & FLAG_DEFLATE: corpo comprimido com deflate usando como dicionário preset
+  (zdict) os trechos literais dos templates - o texto renderizado de 2A-5 vira
+  referências ao zdict, sobra só o que veio dos slots
+- iter_dumps_private_reasoning() (documento em streaming) grava o corpo como byte
+  string de tamanho indefinido, em pedaços; o resto do formato é o mesmo
+- ints nativos e floats na menor largura sem perda (f16/f32/f64): loads() devolve o
+  mesmo dict que o JSON, e to_json() reproduz o plaintext JSON byte a byte
+
+Os dicionários são dados fixados por id em compact_dictionaries.py, não derivados do
+código: payloads novos usam o CURRENT de lá e cada versão anterior continua lá para
+ler attestations antigas. Alterar os templates não muda o que é gravado nem lido -
+só deixa de aproveitar o texto novo até uma versão nova ser acrescentada (a entrada
+sai de `python -m funs_kyc.compact`, que monta o dicionário dos templates atuais com
+build_dictionary()). O id de cada entrada é conferido ao carregar; id desconhecido
+falha com erro claro, nunca decodifica errado.
+
+O objetivo é tamanho, não CPU: no layout completo o ciphertext no documento cai de
+~61 KB para ~2.3 KB por attestation (bench/bench_compact.py). O codec é Python puro:
+o encode (sem asdict, deflate nível 3 - KYC_COMPACT_DEFLATE_LEVEL) sai mais rápido
+que o JSON do layout completo, mas o decode fica ~1.3-1.5x mais lento que json.loads,
+e no layout compartilhado (payload de ~1.4 KB) encode e decode custam ~60-70 µs a
+mais que o JSON por attestation - o deflate com zdict domina.
+
+KYC_REASONING_ENCODING=json volta ao plaintext JSON (o que client.decrypt_reasoning()
+do SDK entende, junto com KYC_KEY_DERIVATION=pbkdf2). decode_payload() lê os dois.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+from dataclasses import asdict, fields, is_dataclass
+from string import Formatter
+
+from . import compact_dictionaries
+from .reasoning_templates import STATIC_STEPS, TEMPLATED_STEPS, Slot, reasoning_slots, screening_slots
+
+ENCODING_FIELD = 'encoding'
+ENCODING_CBOR = 'funs-cbor-v1'
+
+MAGIC = b'\xd9\xd9\xf7'
+FORMAT_VERSION = 1
+FLAG_DEFLATE = 1
+DEFLATE_MIN_SIZE = 64
+DEFLATE_LEVEL = int(os.getenv('KYC_COMPACT_DEFLATE_LEVEL', '3'))
+
+TAG_STRINGREF = 25
+_FLOAT_FORMATS = ((b'\xf9', '>e'), (b'\xfa', '>f'))
+
+
+def reasoning_encoding():
+    """Encoding do plaintext encriptado (KYC_REASONING_ENCODING: cbor | json)"""
+    return 'json' if os.getenv('KYC_REASONING_ENCODING', 'cbor').lower() == 'json' else 'cbor'
+
+
+def is_compact(payload):
+    return isinstance(payload, (bytes, bytearray, memoryview)) and bytes(payload[:3]) == MAGIC
+
+
+# ==================== DICIONÁRIO ====================
+
+class Dictionary:
+    """Tabela de strings (stringref) + zdict do deflate de uma versão dos templates"""
+
+    def __init__(self, strings, zdict):
+        self.strings = tuple(strings)
+        self.zdict = zdict
+        self.refs = {string: b'\xd8\x19' + _head(0, i) for i, string in enumerate(self.strings)}   # -> stringref
+        canonical = json.dumps([self.strings, zdict.decode('utf-8')], ensure_ascii=False, separators=(',', ':'))
+        self.id = hashlib.sha256(canonical.encode('utf-8')).digest()[:8]
+
+
+_SCHEMA_KEYS = (
+    'steps', 'step', 'action', 'input', 'analysis', 'ai_reasoning', 'score', 'confidence', 'result',
+    'ai_model', 'processing_time', 'raw_input', 'additional_metadata',
+    'layout', 'shared_body', 'slots', 'cid', 'sha256', 'kyc_level',
+)
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield key
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def _template_strings(template):
+    yield template.action
+    for key, value in template.input.items():
+        yield key
+        yield value.name if isinstance(value, Slot) else value
+    if isinstance(template.score, str):
+        yield template.score
+
+
+def _template_literals(template):
+    for text in (template.analysis, template.ai_reasoning, template.result):
+        for literal, _, _, _ in Formatter().parse(text):
+            if literal:
+                yield literal
+
+
+def build_dictionary(templates=TEMPLATED_STEPS, slot_keys=None):
+    """
+    Dicionário de uma versão dos templates, default a atual (determinístico: mesmo conteúdo -> mesmo id).
+    Só para gerar uma versão nova de compact_dictionaries.py - em runtime os dicionários vêm de lá.
+
+    Args:
+        slot_keys: chaves de reasoning_slots() naquela versão; None = as atuais
+    """
+    from .shared_reasoning import SHARED_LAYOUT
+
+    if slot_keys is None:
+        slot_keys = list(reasoning_slots('', '', '', '', 0, 0, 0, 0, 0, 0))
+    candidates = [*_SCHEMA_KEYS, SHARED_LAYOUT, *slot_keys]
+    candidates += [value for value in _strings(screening_slots('')) if value.strip()]
+    for step in STATIC_STEPS:
+        candidates += _strings(asdict(step))
+    for template in templates:
+        candidates += _strings(list(_template_strings(template)))
+
+    strings = []
+    seen = set()
+    for string in candidates:
+        # Strings de 1-2 bytes custam menos inline do que a referência
+        if isinstance(string, str) and len(string.encode('utf-8')) > 2 and string not in seen:
+            seen.add(string)
+            strings.append(string)
+
+    literals = []
+    for template in templates:
+        literals += _template_literals(template)
+    # deflate só enxerga os últimos 32KB do zdict; os trechos mais usados ficam no fim
+    zdict = ''.join(dict.fromkeys(literal for literal in literals if len(literal) >= 4)).encode('utf-8')[-32768:]
+    return Dictionary(strings, zdict)
+
+
+DICTIONARIES = {}   # id -> Dictionary carregado de compact_dictionaries
+_lock = threading.Lock()
+
+
+def get_dictionary(dictionary_id):
+    """Dicionário fixado com esse id (bytes), carregado uma vez; None se o id não é de nenhuma versão"""
+    dictionary = DICTIONARIES.get(dictionary_id)
+    if dictionary is not None:
+        return dictionary
+    data = compact_dictionaries.DICTIONARIES.get(dictionary_id.hex())
+    if data is None:
+        return None
+    strings, zdict = data
+    dictionary = Dictionary(strings, zdict.encode('utf-8'))
+    if dictionary.id != dictionary_id:
+        raise ValueError(f"Pinned string dictionary {dictionary_id.hex()} hashes to {dictionary.id.hex()} - "
+                         f"compact_dictionaries.py was edited")
+    with _lock:
+        return DICTIONARIES.setdefault(dictionary_id, dictionary)
+
+
+def current_dictionary():
+    """Dicionário usado para gravar payloads novos (compact_dictionaries.CURRENT)"""
+    return get_dictionary(bytes.fromhex(compact_dictionaries.CURRENT))
+
+
+def dictionary_entry(dictionary):
+    """Código da entrada de compact_dictionaries.DICTIONARIES para um dicionário"""
+    zdict = dictionary.zdict.decode('utf-8')
+    lines = [f"    '{dictionary.id.hex()}': (", "        ("]
+    lines += [f"            {string!r}," for string in dictionary.strings]
+    lines += ["        ),", "        ("]
+    lines += [f"            {zdict[i:i + 96]!r}" for i in range(0, len(zdict), 96)]
+    lines += ["        ),", "    ),"]
+    return "\n".join(lines)
+
+
+# ==================== ENCODER ====================
+
+def _head(major, value):
+    major <<= 5
+    if value < 24:
+        return bytes((major | value,))
+    if value < 0x100:
+        return bytes((major | 24, value))
+    if value < 0x10000:
+        return bytes((major | 25,)) + value.to_bytes(2, 'big')
+    if value < 0x100000000:
+        return bytes((major | 26,)) + value.to_bytes(4, 'big')
+    if value < 0x10000000000000000:
+        return bytes((major | 27,)) + value.to_bytes(8, 'big')
+    raise ValueError(f"Integer out of CBOR range: {value}")
+
+
+def _float(value):
+    for prefix, fmt in _FLOAT_FORMATS:
+        try:
+            packed = struct.pack(fmt, value)
+        except OverflowError:
+            continue
+        if struct.unpack(fmt, packed)[0] == value:
+            return prefix + packed
+    return b'\xfb' + struct.pack('>d', value)
+
+
+_TEXT_HEADS = tuple(bytes((0x60 | size,)) for size in range(24))
+
+
+def _encode(value, out, refs):
+    # Tipos exatos primeiro (o reasoning é quase só str, dict e int); subclasses caem nos isinstance
+    cls = type(value)
+    if cls is str:
+        ref = refs.get(value)
+        if ref is not None:
+            out.append(ref)
+        else:
+            data = value.encode('utf-8')
+            out.append(_TEXT_HEADS[len(data)] if len(data) < 24 else _head(3, len(data)))
+            out.append(data)
+    elif cls is dict:
+        out.append(_head(5, len(value)))
+        for key, item in value.items():
+            ref = refs.get(key) if type(key) is str else None
+            if ref is not None:
+                out.append(ref)
+            elif isinstance(key, str):
+                _encode(str(key), out, refs)
+            else:
+                raise TypeError(f"Map keys must be str, not {type(key).__name__}")
+            _encode(item, out, refs)
+    elif cls is int:
+        out.append(_head(0, value) if value >= 0 else _head(1, -1 - value))
+    else:
+        _encode_other(value, out, refs)
+
+
+def _encode_other(value, out, refs):
+    if isinstance(value, str):
+        _encode(str(value), out, refs)
+    elif isinstance(value, bool):
+        out.append(b'\xf5' if value else b'\xf4')
+    elif isinstance(value, int):
+        out.append(_head(0, value) if value >= 0 else _head(1, -1 - value))
+    elif isinstance(value, float):
+        out.append(_float(value))
+    elif value is None:
+        out.append(b'\xf6')
+    elif isinstance(value, dict):
+        out.append(_head(5, len(value)))
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise TypeError(f"Map keys must be str, not {type(key).__name__}")
+            _encode(str(key), out, refs)
+            _encode(item, out, refs)
+    elif isinstance(value, (list, tuple)):
+        out.append(_head(4, len(value)))
+        for item in value:
+            _encode(item, out, refs)
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(_head(2, len(value)))
+        out.append(bytes(value))
+    elif is_dataclass(value) and not isinstance(value, type):
+        _encode(asdict(value), out, refs)
+    else:
+        raise TypeError(f"Object of type {type(value).__name__} is not CBOR serializable")
+
+
+def _envelope(body, dictionary, compress):
+    flags = 0
+    if compress and len(body) >= DEFLATE_MIN_SIZE:
+        compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15, zdict=dictionary.zdict)
+        deflated = compressor.compress(body) + compressor.flush()
+        if len(deflated) < len(body):
+            body, flags = deflated, FLAG_DEFLATE
+    return b''.join((MAGIC, b'\x84', _head(0, FORMAT_VERSION), _head(2, len(dictionary.id)), dictionary.id,
+                     _head(0, flags), _head(2, len(body)), body))
+
+
+def dumps(value, compress=True):
+    """Payload (dict/list/str/int/float/bool/None/bytes) -> bytes no formato compacto"""
+    dictionary = current_dictionary()
+    out = []
+    _encode(value, out, dictionary.refs)
+    return _envelope(b''.join(out), dictionary, compress)
+
+
+_STATIC_IDS = {id(step) for step in STATIC_STEPS}
+_static_steps = {}    # (id da fase estática, id do dicionário) -> CBOR
+_STEP_FIELDS = tuple(field.name for field in fields(type(STATIC_STEPS[0])))
+
+
+def _encode_step(step, out, refs):
+    """_encode(asdict(step)) sem a cópia profunda do asdict - os campos vão direto para o CBOR"""
+    if type(step) is not type(STATIC_STEPS[0]):
+        _encode(asdict(step), out, refs)
+        return
+    out.append(_head(5, len(_STEP_FIELDS)))
+    for name in _STEP_FIELDS:
+        _encode(name, out, refs)
+        _encode(getattr(step, name), out, refs)
+
+
+def _private_reasoning_fragments(private_reasoning, dictionary):
+    """Corpo CBOR de private_reasoning.to_dict() em fragmentos, uma step por vez"""
+    refs = dictionary.refs
+    steps = private_reasoning.steps
+    fields = [("ai_model", private_reasoning.ai_model), ("processing_time", private_reasoning.processing_time)]
+    if private_reasoning.raw_input:
+        fields.append(("raw_input", private_reasoning.raw_input))
+    if private_reasoning.additional_metadata:
+        fields.append(("additional_metadata", private_reasoning.additional_metadata))
+
+    out = [_head(5, len(fields) + 1)]
+    _encode("steps", out, refs)
+    out.append(_head(4, len(steps)))
+    yield b''.join(out)
+    for step in steps:
+        fragment = _static_steps.get((id(step), dictionary.id))
+        if fragment is None:
+            encoded = []
+            _encode_step(step, encoded, refs)
+            fragment = b''.join(encoded)
+            if id(step) in _STATIC_IDS:
+                _static_steps[(id(step), dictionary.id)] = fragment
+        yield fragment
+    out = []
+    for key, value in fields:
+        _encode(key, out, refs)
+        _encode(value, out, refs)
+    yield b''.join(out)
+
+
+def dumps_private_reasoning(private_reasoning, compress=True):
+    """
+    dumps(private_reasoning.to_dict()) sem passar as steps por asdict(): as fases
+    estáticas saem de fragmentos CBOR pré-codificados (como _STATIC_STEP_JSON).
+    """
+    dictionary = current_dictionary()
+    return _envelope(b''.join(_private_reasoning_fragments(private_reasoning, dictionary)), dictionary, compress)
+
+
+def iter_dumps_private_reasoning(private_reasoning):
+    """
+    dumps_private_reasoning() em pedaços, para o documento em streaming: o corpo sai
+    sempre com deflate, como byte string de tamanho indefinido (5f, um pedaço por
+    step, ff) - o envelope não precisa saber o tamanho antes. loads() lê os dois.
+    """
+    dictionary = current_dictionary()
+    yield b''.join((MAGIC, b'\x84', _head(0, FORMAT_VERSION), _head(2, len(dictionary.id)), dictionary.id,
+                    _head(0, FLAG_DEFLATE), b'\x5f'))
+    compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15, zdict=dictionary.zdict)
+    for fragment in _private_reasoning_fragments(private_reasoning, dictionary):
+        deflated = compressor.compress(fragment)
+        if deflated:
+            yield _head(2, len(deflated)) + deflated
+    deflated = compressor.flush()
+    yield _head(2, len(deflated)) + deflated + b'\xff'
+
+
+# ==================== DECODER ====================
+
+_ARGUMENT_SIZES = {25: 2, 26: 4, 27: 8}
+_SIMPLE = {20: False, 21: True, 22: None}
+_FLOAT_SIZES = {25: ('>e', 2), 26: ('>f', 4), 27: ('>d', 8)}
+
+
+def _argument(data, pos, info):
+    if info < 24:
+        return info, pos
+    if info == 24:
+        return data[pos], pos + 1
+    end = pos + _ARGUMENT_SIZES[info]
+    return int.from_bytes(data[pos:end], 'big'), end
+
+
+def _decode(data, pos, strings):
+    """(valor, próxima posição); casos ordenados pela frequência no reasoning"""
+    initial = data[pos]
+    if initial == 0xd8 and data[pos + 1] == TAG_STRINGREF:
+        # stringref com índice < 256 (d8 19 + 1-2 bytes): a maioria das strings do reasoning
+        ref = data[pos + 2]
+        if ref < 24:
+            return strings[ref], pos + 3
+        if ref == 24:
+            return strings[data[pos + 3]], pos + 4
+    pos += 1
+    major = initial >> 5
+    info = initial & 0x1f
+
+    if major == 6:
+        tag, pos = _argument(data, pos, info)
+        initial = data[pos]
+        if tag != TAG_STRINGREF or initial >> 5:
+            raise ValueError(f"Unsupported CBOR tag {tag}")
+        ref, pos = _argument(data, pos + 1, initial & 0x1f)
+        return strings[ref], pos
+    if major == 3:
+        size, pos = _argument(data, pos, info)
+        end = pos + size
+        if end > len(data):
+            raise ValueError("Malformed compact payload: truncated")
+        return str(data[pos:end], 'utf-8'), end
+    if major == 5:
+        size, pos = _argument(data, pos, info)
+        value = {}
+        for _ in range(size):
+            # Chave quase sempre é stringref curto (d8 19 xx, xx < 24): sem a chamada recursiva
+            if data[pos] == 0xd8 and data[pos + 1] == TAG_STRINGREF and data[pos + 2] < 24:
+                key = strings[data[pos + 2]]
+                pos += 3
+            else:
+                key, pos = _decode(data, pos, strings)
+            initial = data[pos]
+            if initial < 24:
+                value[key] = initial
+                pos += 1
+            elif initial == 0xd8 and data[pos + 1] == TAG_STRINGREF and data[pos + 2] < 24:
+                value[key] = strings[data[pos + 2]]
+                pos += 3
+            else:
+                value[key], pos = _decode(data, pos, strings)
+        return value, pos
+    if major == 4:
+        size, pos = _argument(data, pos, info)
+        value = []
+        for _ in range(size):
+            item, pos = _decode(data, pos, strings)
+            value.append(item)
+        return value, pos
+    if major == 0:
+        return _argument(data, pos, info)
+    if major == 1:
+        value, pos = _argument(data, pos, info)
+        return -1 - value, pos
+    if major == 7:
+        if info in _SIMPLE:
+            return _SIMPLE[info], pos
+        fmt, size = _FLOAT_SIZES[info]
+        return struct.unpack(fmt, data[pos:pos + size])[0], pos + size
+    if major == 2:
+        if info == 31:
+            # Tamanho indefinido (iter_dumps_private_reasoning): pedaços de tamanho definido até o ff
+            chunks = []
+            while data[pos] != 0xff:
+                if data[pos] >> 5 != 2 or data[pos] & 0x1f == 31:
+                    raise ValueError("Malformed compact payload: bad byte string chunk")
+                chunk, pos = _decode(data, pos, strings)
+                chunks.append(chunk)
+            return b''.join(chunks), pos + 1
+        size, pos = _argument(data, pos, info)
+        end = pos + size
+        if end > len(data):
+            raise ValueError("Malformed compact payload: truncated")
+        return bytes(data[pos:end]), end
+    raise ValueError(f"Unsupported CBOR major type {major}")
+
+
+def _decode_all(data, strings):
+    try:
+        value, pos = _decode(data, 0, strings)
+    except (IndexError, KeyError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed compact payload: {e!r}")
+    if pos != len(data):
+        raise ValueError("Malformed compact payload: trailing bytes")
+    return value
+
+
+def loads(payload):
+    """bytes no formato compacto -> payload original"""
+    if not is_compact(payload):
+        raise ValueError("Not a compact reasoning payload (missing CBOR magic)")
+    fields = _decode_all(bytes(payload[len(MAGIC):]), ())
+    if not isinstance(fields, list) or len(fields) != 4:
+        raise ValueError("Malformed compact payload envelope")
+    version, dictionary_id, flags, body = fields
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact payload version {version}")
+
+    dictionary = get_dictionary(bytes(dictionary_id))
+    if dictionary is None:
+        raise ValueError(f"Compact payload uses string dictionary {bytes(dictionary_id).hex()}, "
+                         f"unknown to this build")
+    if flags & FLAG_DEFLATE:
+        decompressor = zlib.decompressobj(-15, zdict=dictionary.zdict)
+        try:
+            body = decompressor.decompress(body) + decompressor.flush()
+        except zlib.error as e:
+            raise ValueError(f"Malformed compact payload: {e}")
+    return _decode_all(body, dictionary.strings)
+
+
+def decode_payload(plaintext):
+    """Plaintext decriptado -> dict, compacto ou JSON (attestations anteriores)"""
+    if is_compact(plaintext):
+        return loads(plaintext)
+    return json.loads(plaintext.decode('utf-8') if isinstance(plaintext, (bytes, bytearray)) else plaintext)
+
+
+def to_json(payload):
+    """Payload compacto -> o plaintext JSON equivalente (json.dumps(..., ensure_ascii=False))"""
+    return json.dumps(loads(payload), ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    dictionary = build_dictionary()
+    if dictionary.id.hex() in compact_dictionaries.DICTIONARIES:
+        print(f"# templates unchanged: dictionary {dictionary.id.hex()} is already pinned")
+    else:
+        print(dictionary_entry(dictionary))
@@ -0,0 +1,510 @@
+"""
+Dicionários de strings do formato compacto (compact.py), fixados por id
+
+Cada versão é o dado exato com que os payloads dela foram gravados: (strings do
+stringref, zdict do deflate). O id (sha256 do conteúdo) é conferido ao carregar,
+então uma entrada editada falha em vez de decodificar errado. Não editar - uma
+versão nova é acrescentada com `python -m funs_kyc.compact` (imprime a entrada do
+dicionário dos templates atuais) e CURRENT passa a apontar para ela; as anteriores
+ficam aqui para sempre, para ler attestations antigas.
+"""
+
+CURRENT = 'c7568b2f8f7f31f9'
+
+DICTIONARIES = {
+    # v1 - fases 4-5 antes do score calculado (pesos e risco fixos)
+    '3b999dc9c17690fa': (
+        (
+            'steps',
+            'step',
+            'action',
+            'input',
+            'analysis',
+            'ai_reasoning',
+            'score',
+            'confidence',
+            'result',
+            'ai_model',
+            'processing_time',
+            'raw_input',
+            'additional_metadata',
+            'layout',
+            'shared_body',
+            'slots',
+            'cid',
+            'sha256',
+            'kyc_level',
+            'funs-kyc-shared-v1',
+            'user_name',
+            'user_country',
+            'user_cpf',
+            'user_passport',
+            'user_age',
+            'country_code',
+            'mrz_name',
+            'facial_age',
+            'bio_score',
+            'doc_score',
+            'age_score',
+            'compliance_score',
+            'final_score',
+            'bio_weighted',
+            'doc_weighted',
+            'age_weighted',
+            'compliance_weighted',
+            'sanctions_databases',
+            'entities_checked',
+            'screening_method',
+            'top_similarity',
+            'screening_threshold',
+            'screening_matches',
+            'screening_hits',
+            'compliance_result',
+            'OFAC',
+            'Interpol',
+            'PEP',
+            'Levenshtein + Soundex',
+            'No matches.',
+            'No hits above threshold',
+            'COMPLIANCE APPROVED - No sanctions,  allowed',
+            'Phase 1A: Face Detection & Localization',
+            'image_file',
+            'selfie_2025_01_08_xyz.jpg',
+            'image_dimensions',
+            '1920x1080 pixels (2.07 MP)',
+            'file_size',
+            '1.2 MB',
+            'format',
+            'JPEG',
+            'color_space',
+            'RGB',
+            'bit_depth',
+            '24-bit',
+            'exif_data',
+            'camera_model',
+            'iPhone 14 Pro',
+            'capture_timestamp',
+            '2025-01-08T14:23:45Z',
+            'gps_location',
+            'redacted',
+            'focal_length',
+            '26mm',
+            'aperture',
+            'f/1.78',
+            'iso',
+            '320',
+            'flash',
+            'off',
+            'IMAGE PREPROCESSING: Loaded RGB image with dimensions 1920x1080. Performed color space validation - confirmed sRGB color space. Checked for common image manipulations: JPEG compression artifacts analysis shows authentic camera capture (no re-compression detected). ELA (Error Level Analysis) shows uniform error distribution (no evidence of splicing/editing). Histogram analysis: balanced distribution across RGB channels, no clipping in highlights/shadows. \n\nFACE DETECTION: Applied Multi-Task Cascaded Convolutional Networks (MTCNN) face detector. Stage 1 (P-Net): Scanned image at multiple scales, generated 1,247 candidate windows. Stage 2 (R-Net): Refined candidates to 38 proposals. Stage 3 (O-Net): Final classification yielded 1 high-confidence face detection. Face bounding box: [x:456, y:198, w:712, h:856]. Face area: 609,472 pixels (31.2% of total image). Optimal face size detected (recommended 25-40% of frame). \n\nFACE QUALITY ASSESSMENT: Computed face quality metrics - Pose quality: 0.94 (frontal face, minimal rotation). Illumination quality: 0.91 (well-lit, no harsh shadows). Resolution quality: 0.96 (sufficient detail for recognition). Sharpness: 0.93 (high focus, minimal blur). Overall quality score: 0.935/1.0 (EXCELLENT). \n\nOCCLUSION DETECTION: Analyzed face for occlusions using segmentation network. No sunglasses detected. No face mask detected. No hand occlusion. No hair occlusion over eyes. Visibility of key regions: Eyes 100%, Nose 100%, Mouth 100%, Forehead 98%, Chin 100%. CONCLUSION: Clean, unoccluded facial image suitable for high-assurance biometric matching.',
+            'ALGORITHM ARCHITECTURE - FACE DETECTION:\nUsing MTCNN (Multi-Task Cascaded CNN) - Zhang et al., 2016 implementation.\nArchitecture: 3-stage cascaded CNN for joint face detection and alignment.\n- P-Net (Proposal Network): 12-layer shallow CNN, ~7k parameters\n- R-Net (Refine Network): Deeper network with 24 layers, ~50k parameters\n- O-Net (Output Network): Complex network with 48 layers, ~400k parameters\n\nDETECTION PROCESS:\n1. Image Pyramid: Created 12 scaled versions from 1920x1080 to 96x54\n2. P-Net Sliding Window: 12x12 kernel, stride 2, generated 1,247 candidates\n3. Non-Maximum Suppression (NMS): Threshold 0.7, reduced to 38 proposals\n4. R-Net Refinement: 24x24 input, refined bounding boxes\n5. NMS again: Threshold 0.7, reduced to 8 candidates\n6. O-Net Final: 48x48 input, outputs face/non-face classification + bbox regression + 5 facial landmarks\n7. Final NMS: Threshold 0.7, confidence >0.95, yielded 1 detection\n\nDETECTION METRICS:\nFace confidence score: 0.9847 (threshold: 0.90)\nBounding box IoU with ground truth: 0.94 (excellent localization)\nProcessing time: 127ms (real-time capable)\n\nQUALITY CONTROL:\nImplemented ISO/IEC 19794-5 quality assessment framework.\nChecked 14 quality attributes: pose, expression, illumination, resolution, focus, compression, dynamic range, interlacing, pixelation, JPEG blocking, unnatural color, ghosting, motion blur, exposure.\nAll attributes passed minimum thresholds for identity verification use case.\n\nANTI-SPOOFING PRE-CHECK:\nAnalyzed image metadata for manipulation indicators:\n- EXIF data intact and consistent with claimed device (iPhone 14 Pro)\n- No evidence of screen moire patterns (would indicate photo-of-screen attack)\n- No edge artifacts suggesting photo-of-photo attack\n- Sensor noise pattern consistent with iPhone 14 Pro sensor (Sony IMX803)\n\nDECISION: APPROVED for biometric feature extraction\nRationale: High-quality frontal face detected with excellent pose, lighting, and resolution. No occlusions or quality issues detected. Image passes anti-spoofing pre-screening.',
+            'PHASE 1A PASSED: Face detected with 98.47% confidence, quality score 93.5%, no occlusions, anti-spoofing pre-check passed',
+            'Phase 1B: Facial Landmark Detection & Alignment',
+            'face_roi',
+            '456x198+712x856 pixels',
+            'landmark_model',
+            'Dlib 68-point shape predictor',
+            'alignment_method',
+            'similarity_transform',
+            'LANDMARK DETECTION: Applied Dlib 68-point facial landmark predictor (trained on iBUG 300-W dataset). Detected all 68 landmarks with high confidence. Landmarks grouped by facial region: Jaw (17 points: 0-16), Right eyebrow (5 points: 17-21), Left eyebrow (5 points: 22-26), Nose bridge (4 points: 27-30), Nose tip (5 points: 31-35), Right eye (6 points: 36-41), Left eye (6 points: 42-47), Outer lip (12 points: 48-59), Inner lip (8 points: 60-67). \n\nKEY LANDMARKS COORDINATES (normalized):\nLeft eye center: (0.382, 0.421) | Right eye center: (0.618, 0.418)\nNose tip: (0.501, 0.612) | Left mouth corner: (0.394, 0.756)\nRight mouth corner: (0.606, 0.753) | Chin center: (0.498, 0.952)\n\nGEOMETRIC ANALYSIS:\nInter-pupillary distance (IPD): 184 pixels (normalized: 0.236)\nEye-to-nose ratio: 1.42 (within normal range 1.3-1.6)\nNose-to-mouth ratio: 0.89 (within normal range 0.8-1.0)\nFace width-to-height ratio: 0.83 (within normal range 0.75-0.90)\nFacial symmetry score: 0.96 (high symmetry, normal for real faces)\n\nALIGNMENT PROCESS:\nComputed similarity transformation (rotation + scale + translation) to align face to canonical pose. Rotation angle: -2.3° (slight head tilt corrected). Scale factor: 1.12 (normalized face to 160x160 standard). Translation: (-12px, +8px) to center face in frame. Applied bilinear interpolation for rotation/scaling (preserves facial texture). Aligned face dimensions: 160x160 pixels (FaceNet standard input size). \n\nLANDMARK CONFIDENCE SCORES:\nAverage landmark confidence: 0.947. Jaw: 0.92, Eyebrows: 0.95, Eyes: 0.98, Nose: 0.96, Mouth: 0.94. All landmarks exceed 0.85 threshold (high quality). \n\nCONCLUSION: All 68 landmarks successfully detected with high confidence. Face successfully aligned to canonical frontal pose. Ready for embedding extraction.',
+            'LANDMARK DETECTION ALGORITHM:\nModel: Dlib shape_predictor_68_face_landmarks.dat (Kazemi & Sullivan, 2014)\nArchitecture: Ensemble of Regression Trees (ERT)\nTraining: iBUG 300-W dataset (3,148 images, 68 landmarks per face)\nInference: Cascade of 10 regressors, each with 500 regression trees\n\nHOW IT WORKS:\n1. Initialize landmarks at face bounding box center\n2. For each regressor (1-10):\n   a. Extract local image features around current landmark estimates (HOG descriptors)\n   b. Predict displacement vectors for each landmark using regression trees\n   c. Update landmark positions based on predictions\n3. Final landmarks = sum of all displacement predictions\n\nLANDMARK PRECISION:\nMean error: 2.1 pixels (excellent precision for 712x856 face)\nNormalized mean error (NME): 0.029 (threshold <0.06 for acceptable quality)\nWorst landmark error: 4.3 pixels (still well within tolerance)\n\nALIGNMENT MATHEMATICS:\nComputed 2D similarity transform: T(x,y) = s*R*[x,y]^T + t\nWhere: s = scale (1.12), R = rotation matrix (θ=-2.3°), t = translation (-12, +8)\nRotation matrix R = [[cos(θ), -sin(θ)], [sin(θ), cos(θ)]]\nApplied to all pixels using bilinear interpolation for sub-pixel accuracy\n\nANTHROPOMETRIC VALIDATION:\nVerified face follows human facial proportions (Farkas, 1994):\n- IPD / Face width: 0.284 (normal range: 0.26-0.32) ✓\n- Eye height / Face height: 0.421 (normal range: 0.40-0.48) ✓\n- Nose width / Face width: 0.212 (normal range: 0.18-0.25) ✓\n- Mouth width / Face width: 0.418 (normal range: 0.38-0.50) ✓\nAll proportions fall within normal human ranges (rules out AI-generated/manipulated faces)\n\nDECISION: APPROVED for embedding extraction\nRationale: All 68 landmarks detected with high precision. Face successfully aligned. Anthropometric proportions confirm real human face. Ready for deep feature extraction.',
+            'PHASE 1B PASSED: 68 landmarks detected, alignment completed, anthropometric validation passed',
+            'Phase 1C: Deep Feature Embedding & Face Matching',
+            'selfie_aligned',
+            '160x160x3 RGB tensor',
+            'document_photo_aligned',
+            'embedding_model',
+            'FaceNet Inception-ResNet-v1',
+            'distance_metric',
+            'cosine_similarity',
+            'EMBEDDING EXTRACTION:\nProcessed both images (selfie + document photo) through FaceNet neural network. Each face converted to 128-dimensional embedding vector (compact representation of facial features). \nSelfie embedding (first 10 dims): [0.142, -0.089, 0.234, -0.156, 0.078, 0.201, -0.112, 0.167, -0.091, 0.188...]\nDocument embedding (first 10 dims): [0.138, -0.084, 0.229, -0.151, 0.081, 0.198, -0.108, 0.172, -0.087, 0.184...]\nEmbedding L2 norm: 1.0000 (both embeddings normalized to unit sphere)\n\nSIMILARITY COMPUTATION:\nCosine similarity = dot_product(embedding1, embedding2) = 0.9847\nEuclidean distance = ||embedding1 - embedding2|| = 0.1753\nAngular distance = arccos(0.9847) = 10.1° (very small angle = high similarity)\n\nFEATURE-LEVEL ANALYSIS:\nDecomposed embeddings into semantic regions using activation analysis:\nEye region features (dims 0-25): similarity 0.972\nNose region features (dims 26-50): similarity 0.991\nMouth region features (dims 51-75): similarity 0.968\nFace shape features (dims 76-100): similarity 0.987\nTexture features (dims 101-128): similarity 0.982\nAll regions show strong similarity (>0.95), indicating genuine match across all facial features.\n\nTHRESHOLD ANALYSIS:\nFaceNet verification threshold: 0.75 (conservative for high-security applications)\nObserved similarity: 0.9847 (WELL ABOVE threshold by 23.5%)\nFalse Accept Rate (FAR) at this threshold: 0.001% (1 in 100,000)\nFalse Reject Rate (FRR) at this threshold: 2.3% (acceptable for user experience)\n\nSTATISTICAL CONFIDENCE:\nProbability of random match: <0.0001% (extremely unlikely)\nProbability of genuine match: 99.99% (extremely likely)\nZ-score: 8.7 (8.7 standard deviations above random similarity mean)\n\nCONCLUSION: STRONG BIOMETRIC MATCH CONFIRMED. Selfie and document photo belong to same individual with very high confidence.',
+            'FACENET ARCHITECTURE:\nModel: Inception-ResNet-v1 (Szegedy et al., 2017)\nTraining: Triplet loss on VGGFace2 (3.31M images, 9,131 identities) + MS-Celeb-1M (10M images)\nParameters: 22.8 million trainable parameters\nOutput: 128-dimensional L2-normalized embedding\n\nNETWORK LAYERS:\n1. Stem: 3 conv blocks (3x3, 3x3, 3x3) with batch norm + ReLU\n2. Inception-ResNet-A blocks (5x): mixed convolutions (1x1, 3x3, 5x5) with residual connections\n3. Reduction-A: strided convolutions for downsampling\n4. Inception-ResNet-B blocks (10x): deeper mixed convolutions\n5. Reduction-B: second downsampling\n6. Inception-ResNet-C blocks (5x): final feature extraction\n7. Global Average Pooling: 1x1 spatial dimension\n8. Fully Connected: 128 units with L2 normalization\n\nTRIPLET LOSS TRAINING:\nLoss function: L = max(||f(a) - f(p)||² - ||f(a) - f(n)||² + α, 0)\nWhere: a=anchor, p=positive (same person), n=negative (different person), α=margin (0.2)\nTraining enforces: distance(same person) < distance(different person) - margin\nEffective embedding space: embeddings of same person cluster tightly, different people spread apart\n\nVERIFICATION PERFORMANCE (LFW benchmark):\nAccuracy: 99.63% on Labeled Faces in the Wild dataset\nTAR@FAR=0.001: 99.12% (True Accept Rate at 0.1% False Accept Rate)\nRank-1 identification accuracy: 98.97%\n\nSIMILARITY SCORE INTERPRETATION:\n0.9847 similarity places this match in top 0.5% of genuine matches\nEmpirical analysis of 1M genuine pairs: mean=0.87, std=0.08, 95th percentile=0.96\nScore 0.9847 = 1.4 std above mean genuine match (very strong match)\nImpostor distribution: mean=0.23, std=0.15 (current score 5.2 std above impostor mean)\n\nROBUSTNESS ANALYSIS:\nTested matching under variations:\n- Pose variation: ±15° rotation → similarity 0.91-0.98 (robust)\n- Lighting changes: ±30% brightness → similarity 0.90-0.98 (robust)\n- Expression changes: neutral↔smile → similarity 0.88-0.96 (robust)\n- Age progression: ±5 years → similarity 0.85-0.95 (acceptable)\nCurrent match 0.9847 significantly above minimum robust threshold (0.85)\n\nDECISION: VERIFIED MATCH\nRationale: Similarity score 0.9847 far exceeds verification threshold 0.75. All facial regions show strong similarity. Statistical analysis confirms genuine match with 99.99% confidence. No indication of presentation attack or identity fraud.',
+            'PHASE 1C PASSED: Face match 98.47%, verified same person, statistical confidence 99.99%',
+            'Phase 1D: Multi-Modal Liveness Detection',
+            'video_frames',
+            'frame_rate',
+            '8 fps',
+            'duration',
+            '3 seconds',
+            'liveness_tests',
+            'blink',
+            'texture',
+            'depth',
+            'motion',
+            'LIVENESS TEST 1 - BLINK DETECTION:\nAnalyzed 24 frames over 3 seconds for spontaneous eye blinks. Computed Eye Aspect Ratio (EAR) for each frame:\nFrame sequence: [0.18, 0.18, 0.17, 0.06, 0.05, 0.18, 0.18, 0.17, 0.16, 0.05, 0.06, 0.18, ...]\nEAR threshold for closed eye: <0.12. Detected 3 blink events (frames 4-5, 10-11, 19-20). Blink rate: 1.0 blinks/second (normal human range: 0.5-1.5 blinks/sec). Blink duration: 125-167ms (normal range: 100-300ms). INTERPRETATION: Natural spontaneous blinking detected. Printed photos/screens cannot blink. TEST PASSED.\n\nLIVENESS TEST 2 - TEXTURE ANALYSIS:\nExtracted Local Binary Patterns (LBP) from facial region. LBP histogram: [bins showing high complexity texture pattern]. Texture complexity score: 0.847 (real skin: 0.7-0.9, printed photo: 0.3-0.6, screen: 0.4-0.7). High-frequency texture analysis: Detected pores, fine lines, skin irregularities (characteristic of real skin). Fourier analysis: Strong high-frequency components (>200 cycles/face) indicating 3D surface texture. Moire pattern detection: No moire patterns (would indicate photo-of-screen attack). INTERPRETATION: Texture analysis confirms real human skin, not flat reproduction. TEST PASSED.\n\nLIVENESS TEST 3 - DEPTH ESTIMATION:\nApplied monocular depth estimation neural network (MiDaS v3.0) to compute depth map. Depth range detected: 85mm from nose tip (closest) to ears (farthest). Average human facial depth: 75-95mm - MATCHES EXPECTED RANGE. Depth gradient analysis: Smooth continuous gradient (nose→cheeks→ears) consistent with 3D face. Flat surfaces (photos/screens) show <5mm depth variation - CURRENT: 85mm (17x threshold). Depth map shows realistic facial geometry with nose prominence, eye sockets, facial contours. INTERPRETATION: Depth analysis confirms 3D real face, rules out 2D attacks. TEST PASSED.\n\nLIVENESS TEST 4 - MOTION CONSISTENCY:\nTracked facial landmarks across 24 frames, analyzed motion patterns. Detected micro-movements: Average displacement 2.8 pixels/frame (range: 1.2-4.5 pixels). Motion frequency analysis: Dominant frequencies 8-12 Hz (matches human physiological tremor). Motion pattern: Organic, non-linear, subtle (characteristic of involuntary micro-tremors). Replay attack detection: No frame-to-frame repetition patterns (would indicate video replay). Temporal consistency: Smooth motion transitions, no sudden jumps (rules out video splicing). INTERPRETATION: Natural involuntary movements detected. Static/replay attacks show no motion. TEST PASSED.\n\nAGGREGATE LIVENESS SCORE:\nBlink test: PASS (weight 25%) | Texture test: PASS (weight 25%) | Depth test: PASS (weight 30%) | Motion test: PASS (weight 20%)\nCombined liveness confidence: 96.2% (threshold: 85% for high-assurance)\nPresentation attack probability: 3.8% (acceptably low)\n\nCONCLUSION: REAL PERSON VERIFIED. All 4 liveness tests passed. No presentation attack indicators detected.',
+            'MULTI-MODAL LIVENESS DETECTION RATIONALE:\n\nTHREAT MODEL - PRESENTATION ATTACKS:\n1. Printed photo attack: High-res photo of legitimate user\n2. Digital screen attack: Photo/video displayed on phone/tablet screen\n3. Video replay attack: Pre-recorded video of user\n4. 3D mask attack: Physical mask replicating face shape\n5. Deepfake attack: AI-generated synthetic video\n\nDEFENSE STRATEGY: Multi-modal approach (each test defends against different attack types)\n\nTEST 1 - BLINK DETECTION:\nDefends against: Printed photos, static digital displays\nAlgorithm: Eye Aspect Ratio (EAR) computation\nEAR = (||p2-p6|| + ||p3-p5||) / (2 × ||p1-p4||)\nWhere p1-p6 are eye landmark coordinates (Soukupová & Čech, 2016)\nThreshold: EAR < 0.12 indicates closed eye\nValidation: Detected 3 blinks with proper timing (125-167ms duration)\nAttack resilience: Printed photos cannot blink (static). Screens cannot simulate natural blink physics.\n\nTEST 2 - TEXTURE ANALYSIS:\nDefends against: Printed photos, low-quality screens, masks\nAlgorithm: Local Binary Patterns + Fourier analysis\nLBP encoding: For each pixel, compare with 8 neighbors, create binary code\nReal skin shows complex LBP patterns (pores, wrinkles, irregularities)\nPrinted photos show uniform patterns (printer dithering creates regular patterns)\nFourier analysis: Real skin has strong high-frequency components (fine details)\nValidation: Texture complexity 0.847 in real skin range (0.7-0.9)\nAttack resilience: Photo reproduction loses high-frequency details. Masks show artificial texture.\n\nTEST 3 - DEPTH ESTIMATION:\nDefends against: All 2D attacks (photos, screens), deepfakes\nAlgorithm: MiDaS v3.0 monocular depth estimation (Ranftl et al., 2020)\nNetwork: Transformer-based dense prediction, trained on 12 diverse datasets\nOutput: Per-pixel depth map (relative depth values)\nReal faces show 75-95mm depth variation (nose prominence, facial contours)\nFlat surfaces (photos/screens) show <5mm depth variation\nValidation: Measured 85mm depth range - consistent with real face geometry\nAttack resilience: 2D reproductions lack depth dimension. Even 3D masks show unnatural depth gradients.\n\nTEST 4 - MOTION ANALYSIS:\nDefends against: Static attacks, video replay, deepfakes\nAlgorithm: Optical flow tracking + frequency analysis\nTracked 68 landmarks across frames, computed displacement vectors\nReal humans exhibit physiological micro-tremor (8-12 Hz, 1-5 pixel amplitude)\nReplay attacks show no micro-movements (frozen) or artificial movements\nDeepfakes often have temporal inconsistencies (jitter, artifacts)\nValidation: Detected organic micro-movements matching human physiology\nAttack resilience: Static attacks show zero motion. Replays lack natural tremor. Deepfakes show temporal artifacts.\n\nCOMBINED DECISION LOGIC:\nRequire ALL 4 tests to pass (conservative approach for high security)\nEach test targets different attack vectors - multi-modal defense\nEven if attacker bypasses 1 test, other 3 provide backup detection\nCurrent result: 4/4 tests passed → HIGH CONFIDENCE in real person\n\nCOMPLIANCE:\nISO/IEC 30107-3: Biometric presentation attack detection (PAD)\n- Level 2 PAD capability: Defends against unsophisticated and some sophisticated attacks\n- APCER (Attack Presentation Classification Error Rate): 3.8%\n- BPCER (Bona fide Presentation Classification Error Rate): 1.2%\nNIST/NISTIR 7859: Evaluation of presentation attack detection\n\nDECISION: APPROVE LIVENESS\nRationale: All 4 independent liveness tests passed. Multi-modal evidence confirms real person. Attack probability 3.8% well below 10% threshold. Compliant with ISO 30107-3 Level 2.',
+            'PHASE 1D PASSED: 4/4 liveness tests passed, 96.2% confidence real person, presentation attack probability 3.8%',
+            'Phase 2A: Document Image Preprocessing & Quality Assessment',
+            'document_scan',
+            'id_document_front.jpg',
+            'scan_resolution',
+            '2400x1600 (3.84 MP)',
+            '2.8 MB',
+            'document_type_claimed',
+            'passport',
+            'issuing_country',
+            'Phase 2B: OCR Data Extraction + Sensitive Information Processing',
+            'document_region',
+            'full_passport_front',
+            'ocr_engine',
+            'Tesseract 5.0 + custom passport model',
+            'mrz_reader',
+            'ICAO 9303 compliant',
+            'sensitive_fields',
+            'name',
+            'passport_number',
+            'cpf',
+            'date_of_birth',
+            'Phase 3: Age Verification & Cross-Validation',
+            'document_dob',
+            '[REDACTED]',
+            'declared_age',
+            'facial_age_estimate',
+            'minimum_age',
+            'Phase 4: Compliance & Sanctions Screening',
+            'country',
+            'databases',
+            'Phase 5: Final Risk Assessment & Decision',
+            'threshold',
+        ),
+        (
+            'IMAGE QUALITY ASSESSMENT:\nResolution: 2400x1600 pixels (300 DPI equivalent) - EXCELLENT (minimum'
+            ' 150 DPI for OCR). File format: JPEG with quality factor 95% - minimal compression artifacts. Co'
+            'lor space: sRGB with proper color profile - suitable for document analysis. Brightness analysis:'
+            ' Mean luminance 142/255 - well-lit (optimal range 120-180). Contrast: Standard deviation 48 - go'
+            'od contrast for text readability. Sharpness (Laplacian variance): 1580 - sharp focus (threshold '
+            '>500 for acceptable). Noise level: SNR 32 dB - low noise, clean scan. Overall quality score: 94/'
+            '100 (EXCELLENT)\n\nDOCUMENT TYPE DETECTION:\nApplied document classification CNN to identify docume'
+            'nt type. Predicted class: PASSPORT (confidence 97.8%). Expected issuing country: . Document dime'
+            'nsions: 125mm x 88mm (standard passport card size ISO/IEC 7810 ID-3). Aspect ratio: 1.42 (matche'
+            's passport standard). Color scheme: Burgundy/red background (common for many countries). Layout '
+            'analysis: Detected machine-readable zone (MRZ) at bottom - confirms passport. \n\nGEOMETRIC CORREC'
+            'TION:\nDetected document corners using Hough transform + RANSAC. Computed perspective transformat'
+            'ion to correct for viewing angle. Original capture angle: 8° skew, 12° tilt (minor perspective d'
+            'istortion). Applied homography matrix to de-warp document to rectangular form. Result: Perfectly'
+            ' rectangular document, ready for feature extraction. \n\nCONCLUSION: High-quality document scan su'
+            'itable for detailed analysis. Document confirmed as passport.DOCUMENT PREPROCESSING PIPELINE:\n\nS'
+            'TEP 1 - QUALITY VALIDATION:\nChecked document image meets minimum requirements for automated proc'
+            'essing:\n- Resolution ≥150 DPI: ✓ (300 DPI detected)\n- Color depth ≥24-bit: ✓ (24-bit RGB)\n- Comp'
+            'ression quality ≥70%: ✓ (95% quality)\n- Sharpness score >500: ✓ (1580 score)\n- Adequate lighting'
+            ': ✓ (brightness 142/255)\n\nSTEP 2 - DOCUMENT LOCALIZATION:\nEdge detection: Canny edge detector wi'
+            'th hysteresis thresholding\nLine detection: Hough transform to find straight lines\nCorner detecti'
+            'on: Intersection of lines → 4 corner points\nValidation: Corners form quadrilateral with proper a'
+            'spect ratio\n\nSTEP 3 - PERSPECTIVE CORRECTION:\nPerspective distortion causes non-rectangular appe'
+            'arance\nComputed homography matrix H (3x3) mapping distorted → ideal rectangle\nUsing 4 corner cor'
+            "respondences (minimum needed)\nApplied transformation: p' = H × p for each pixel p\nInterpolation:"
+            ' Bilinear to preserve document texture\n\nSTEP 4 - DOCUMENT CLASSIFICATION:\nNeural network: ResNet'
+            '-50 trained on 500K government ID documents\nInput: 224x224 RGB document thumbnail\nOutput: Probab'
+            'ility distribution over document types\nClasses: Passport (97.8%), National ID (1.2%), Driver Lic'
+            'ense (0.6%), Other (0.4%)\nPrediction: PASSPORT with very high confidence\n\nSTEP 5 - COUNTRY-SPECI'
+            'FIC VALIDATION:\nIssuing country: \nLoaded  passport template from database\nExpected features: MRZ'
+            ' format, security watermarks, color scheme, layout\nValidation: Document structure matches  passp'
+            'ort specification\n\nDECISION: Document preprocessing successful\nRationale: High-quality scan with'
+            ' excellent resolution and lighting. Document correctly identified as passport. Geometric distort'
+            'ions corrected. Ready for OCR and security feature analysis.PHASE 2A PASSED: Passport identified'
+            ' (97.8%), quality 94/100,  template matchedOCR EXTRACTION - VISUAL TEXT ZONE (VIZ):\nTesseract OC'
+            'R confidence: 99.4% (excellent). Extracted fields:\n- Full Name:  (confidence: 99.8%)\n- Date of B'
+            'irth: [REDACTED] (confidence: 99.2%)\n- Place of Birth: [REDACTED] (confidence: 98.1%)\n- Gender: '
+            '[REDACTED] (confidence: 99.9%)\n- Nationality:  (confidence: 100.0%)\n- Passport Number:  (confide'
+            'nce: 99.6%) **SENSITIVE**\n- Issue Date: [REDACTED] (confidence: 98.9%)\n- Expiry Date: [REDACTED]'
+            ' (confidence: 99.1%)\n- Tax ID (CPF):  (confidence: 99.3%) **SENSITIVE**\n\nOCR EXTRACTION - MACHIN'
+            'E READABLE ZONE (MRZ):\nMRZ format: TD3 (2 lines, 44 characters each) - standard for passports. M'
+            'RZ Line 1: P<<<[REDACTED]\nMRZ Line 2: [REDACTED]M[REDACTED]<<<<<<<<<\nMRZ checksum validation:\n- '
+            'Passport number checksum: VALID ✓\n- Date of birth checksum: VALID ✓\n- Expiry date checksum: VALI'
+            'D ✓\n- Composite checksum: VALID ✓\nAll MRZ checksums passed - document integrity verified.\n\nCROSS'
+            "-VALIDATION: VIZ vs MRZ:\nPassport number: VIZ='' vs MRZ='' → MATCH ✓\nName: VIZ='' → MATCH ✓\nNati"
+            "onality: VIZ='' → MATCH ✓\nNo discrepancies detected. VIZ and MRZ data fully consistent.\n\nSENSITI"
+            'VE DATA HANDLING:\n**CRITICAL**: Following fields classified as PII and will be encrypted:\n1. Pas'
+            'sport Number:  - Unique identifier, can be used for identity theft\n2. Tax ID (CPF):  - Sensitive'
+            ' financial/tax information\n3. Date of Birth: [REDACTED] - Reduces to age only for verification\nE'
+            "ncryption: AES-256-GCM with owner's private key\nStorage: IPFS with encrypted payload\nAccess: Onl"
+            'y owner can decrypt with private key\nPrivacy guarantee: These fields NEVER appear in public reas'
+            'oning or on-chain\n\nAGE CALCULATION:\nExtracted DOB: [REDACTED]\nCurrent date: 2025-01-08\nCalculate'
+            'd age:  years (matches user claim) ✓\n\nCONCLUSION: OCR extraction successful. All checksums valid'
+            '. Sensitive data identified and will be encrypted.OCR ALGORITHM DETAILS:\n\nENGINE: Tesseract 5.0 '
+            '(Google open-source OCR)\nLanguage model: English +  specific\nPage segmentation mode: PSM 6 (unif'
+            'orm block of text)\nCharacter whitelist: A-Z, 0-9, <> (for passport-specific characters)\nTraining'
+            ' data: LSTM neural network trained on government documents\n\nPREPROCESSING FOR OCR:\n1. Grayscale '
+            "conversion (color not needed for text)\n2. Adaptive thresholding (Otsu's method) → binary image\n3"
+            '. Morphological operations: remove noise, connect broken characters\n4. Deskewing: correct text r'
+            'otation (<2° detected and corrected)\n\nMRZ PARSING:\nICAO 9303 standard: Machine Readable Zone spe'
+            'cification\nTD3 format: 2 lines × 44 characters (passport card)\nStructure: Document type, Country'
+            ', Name, Passport#, DOB, Gender, Expiry, checksums\nChecksums: Modulo 10 algorithm with weights 7-'
+            '3-1 repeating\nChecksum formula: Σ(digit × weight) mod 10\nExample passport# check:  → computed ch'
+            'ecksum matches printed checksum\n\nCROSS-VALIDATION IMPORTANCE:\nVIZ (Visual Inspection Zone) = hum'
+            'an-readable text\nMRZ (Machine Readable Zone) = structured barcode-like format\nForgers often alte'
+            'r VIZ but forget to update MRZ\nOur validation: Extract from BOTH, compare, flag discrepancies\nCu'
+            'rrent result: Perfect match → authentic document\n\nSENSITIVE DATA PROTECTION:\nGDPR Article 9: Spe'
+            'cial categories of personal data\n- Passport number: Unique identifier (can enable identity theft'
+            ')\n- Tax ID/CPF: Financial identifier (enables tax fraud, account access)\n- Full DOB: Combined wi'
+            'th name enables impersonation\nProtection strategy: Encrypt before IPFS storage, never expose pub'
+            'licly\nEncryption: AES-256-GCM (authenticated encryption)\n- Key derivation: HKDF-SHA256(master ke'
+            'y, attestation_id); master = PBKDF2(owner_private_key, 100K iterations)\n- Nonce: 96-bit random ('
+            'unique per encryption)\n- Authentication tag: 128-bit (prevents tampering)\nAccess control: Only o'
+            'wner (with private key) can decrypt\nCompliance: GDPR, LGPD (Brazilian data protection), CCPA\n\nDE'
+            'CISION: OCR extraction approved\nRationale: High-confidence text extraction (99.4% avg). All MRZ '
+            'checksums valid. VIZ-MRZ cross-validation passed. Sensitive data identified and marked for encry'
+            'ption.PHASE 2B PASSED: OCR 99.4%, MRZ checksums valid, VIZ-MRZ match, sensitive data () encrypte'
+            'dDocument age:  years. Declared age:  years. Facial estimate:  years (±3y tolerance). Age check:'
+            '  ≥ 18 = TRUE.Age verification using 3 independent sources: document DOB extraction, user declar'
+            'ation, AI facial age estimation. All sources agree within acceptable tolerance. Age requirement '
+            'met.AGE VERIFIED -  years, meets 18+ requirementScreened against + sanctioned entities. Fuzzy ma'
+            'tching (). Highest similarity: % (threshold %).  is FATF-compliant. Comprehensive sanctions scre'
+            'ening using fuzzy name matching algorithms. . Country risk assessment:  low-risk jurisdiction.We'
+            'ighted score: Bio(35%)=, Doc(25%)=, Age(15%)=, Compliance(25%)=. Total=/100. Risk: LOW.Multi-fac'
+            'tor risk assessment using weighted scoring model. All components passed. Final score  exceeds th'
+            "reshold 80. Recommend approval.FINAL: KYC APPROVED - /100, Badge 'Verified Creator'"
+        ),
+    ),
+    # v2 - score, risco por país e triagem de sanções
+    'c7568b2f8f7f31f9': (
+        (
+            'steps',
+            'step',
+            'action',
+            'input',
+            'analysis',
+            'ai_reasoning',
+            'score',
+            'confidence',
+            'result',
+            'ai_model',
+            'processing_time',
+            'raw_input',
+            'additional_metadata',
+            'layout',
+            'shared_body',
+            'slots',
+            'cid',
+            'sha256',
+            'kyc_level',
+            'funs-kyc-shared-v1',
+            'user_name',
+            'user_country',
+            'user_cpf',
+            'user_passport',
+            'user_age',
+            'country_code',
+            'mrz_name',
+            'facial_age',
+            'bio_score',
+            'doc_score',
+            'age_score',
+            'compliance_score',
+            'final_score',
+            'bio_weighted',
+            'doc_weighted',
+            'age_weighted',
+            'compliance_weighted',
+            'bio_weight',
+            'doc_weight',
+            'age_weight',
+            'compliance_weight',
+            'score_threshold',
+            'country_risk',
+            'country_status',
+            'risk_label',
+            'risk_assessment',
+            'final_result',
+            'sanctions_databases',
+            'entities_checked',
+            'screening_method',
+            'top_similarity',
+            'screening_threshold',
+            'screening_matches',
+            'screening_hits',
+            'compliance_result',
+            'OFAC',
+            'Interpol',
+            'PEP',
+            'Levenshtein + Soundex',
+            'No matches.',
+            'No hits above threshold',
+            'COMPLIANCE APPROVED - No sanctions,  allowed',
+            'Phase 1A: Face Detection & Localization',
+            'image_file',
+            'selfie_2025_01_08_xyz.jpg',
+            'image_dimensions',
+            '1920x1080 pixels (2.07 MP)',
+            'file_size',
+            '1.2 MB',
+            'format',
+            'JPEG',
+            'color_space',
+            'RGB',
+            'bit_depth',
+            '24-bit',
+            'exif_data',
+            'camera_model',
+            'iPhone 14 Pro',
+            'capture_timestamp',
+            '2025-01-08T14:23:45Z',
+            'gps_location',
+            'redacted',
+            'focal_length',
+            '26mm',
+            'aperture',
+            'f/1.78',
+            'iso',
+            '320',
+            'flash',
+            'off',
+            'IMAGE PREPROCESSING: Loaded RGB image with dimensions 1920x1080. Performed color space validation - confirmed sRGB color space. Checked for common image manipulations: JPEG compression artifacts analysis shows authentic camera capture (no re-compression detected). ELA (Error Level Analysis) shows uniform error distribution (no evidence of splicing/editing). Histogram analysis: balanced distribution across RGB channels, no clipping in highlights/shadows. \n\nFACE DETECTION: Applied Multi-Task Cascaded Convolutional Networks (MTCNN) face detector. Stage 1 (P-Net): Scanned image at multiple scales, generated 1,247 candidate windows. Stage 2 (R-Net): Refined candidates to 38 proposals. Stage 3 (O-Net): Final classification yielded 1 high-confidence face detection. Face bounding box: [x:456, y:198, w:712, h:856]. Face area: 609,472 pixels (31.2% of total image). Optimal face size detected (recommended 25-40% of frame). \n\nFACE QUALITY ASSESSMENT: Computed face quality metrics - Pose quality: 0.94 (frontal face, minimal rotation). Illumination quality: 0.91 (well-lit, no harsh shadows). Resolution quality: 0.96 (sufficient detail for recognition). Sharpness: 0.93 (high focus, minimal blur). Overall quality score: 0.935/1.0 (EXCELLENT). \n\nOCCLUSION DETECTION: Analyzed face for occlusions using segmentation network. No sunglasses detected. No face mask detected. No hand occlusion. No hair occlusion over eyes. Visibility of key regions: Eyes 100%, Nose 100%, Mouth 100%, Forehead 98%, Chin 100%. CONCLUSION: Clean, unoccluded facial image suitable for high-assurance biometric matching.',
+            'ALGORITHM ARCHITECTURE - FACE DETECTION:\nUsing MTCNN (Multi-Task Cascaded CNN) - Zhang et al., 2016 implementation.\nArchitecture: 3-stage cascaded CNN for joint face detection and alignment.\n- P-Net (Proposal Network): 12-layer shallow CNN, ~7k parameters\n- R-Net (Refine Network): Deeper network with 24 layers, ~50k parameters\n- O-Net (Output Network): Complex network with 48 layers, ~400k parameters\n\nDETECTION PROCESS:\n1. Image Pyramid: Created 12 scaled versions from 1920x1080 to 96x54\n2. P-Net Sliding Window: 12x12 kernel, stride 2, generated 1,247 candidates\n3. Non-Maximum Suppression (NMS): Threshold 0.7, reduced to 38 proposals\n4. R-Net Refinement: 24x24 input, refined bounding boxes\n5. NMS again: Threshold 0.7, reduced to 8 candidates\n6. O-Net Final: 48x48 input, outputs face/non-face classification + bbox regression + 5 facial landmarks\n7. Final NMS: Threshold 0.7, confidence >0.95, yielded 1 detection\n\nDETECTION METRICS:\nFace confidence score: 0.9847 (threshold: 0.90)\nBounding box IoU with ground truth: 0.94 (excellent localization)\nProcessing time: 127ms (real-time capable)\n\nQUALITY CONTROL:\nImplemented ISO/IEC 19794-5 quality assessment framework.\nChecked 14 quality attributes: pose, expression, illumination, resolution, focus, compression, dynamic range, interlacing, pixelation, JPEG blocking, unnatural color, ghosting, motion blur, exposure.\nAll attributes passed minimum thresholds for identity verification use case.\n\nANTI-SPOOFING PRE-CHECK:\nAnalyzed image metadata for manipulation indicators:\n- EXIF data intact and consistent with claimed device (iPhone 14 Pro)\n- No evidence of screen moire patterns (would indicate photo-of-screen attack)\n- No edge artifacts suggesting photo-of-photo attack\n- Sensor noise pattern consistent with iPhone 14 Pro sensor (Sony IMX803)\n\nDECISION: APPROVED for biometric feature extraction\nRationale: High-quality frontal face detected with excellent pose, lighting, and resolution. No occlusions or quality issues detected. Image passes anti-spoofing pre-screening.',
+            'PHASE 1A PASSED: Face detected with 98.47% confidence, quality score 93.5%, no occlusions, anti-spoofing pre-check passed',
+            'Phase 1B: Facial Landmark Detection & Alignment',
+            'face_roi',
+            '456x198+712x856 pixels',
+            'landmark_model',
+            'Dlib 68-point shape predictor',
+            'alignment_method',
+            'similarity_transform',
+            'LANDMARK DETECTION: Applied Dlib 68-point facial landmark predictor (trained on iBUG 300-W dataset). Detected all 68 landmarks with high confidence. Landmarks grouped by facial region: Jaw (17 points: 0-16), Right eyebrow (5 points: 17-21), Left eyebrow (5 points: 22-26), Nose bridge (4 points: 27-30), Nose tip (5 points: 31-35), Right eye (6 points: 36-41), Left eye (6 points: 42-47), Outer lip (12 points: 48-59), Inner lip (8 points: 60-67). \n\nKEY LANDMARKS COORDINATES (normalized):\nLeft eye center: (0.382, 0.421) | Right eye center: (0.618, 0.418)\nNose tip: (0.501, 0.612) | Left mouth corner: (0.394, 0.756)\nRight mouth corner: (0.606, 0.753) | Chin center: (0.498, 0.952)\n\nGEOMETRIC ANALYSIS:\nInter-pupillary distance (IPD): 184 pixels (normalized: 0.236)\nEye-to-nose ratio: 1.42 (within normal range 1.3-1.6)\nNose-to-mouth ratio: 0.89 (within normal range 0.8-1.0)\nFace width-to-height ratio: 0.83 (within normal range 0.75-0.90)\nFacial symmetry score: 0.96 (high symmetry, normal for real faces)\n\nALIGNMENT PROCESS:\nComputed similarity transformation (rotation + scale + translation) to align face to canonical pose. Rotation angle: -2.3° (slight head tilt corrected). Scale factor: 1.12 (normalized face to 160x160 standard). Translation: (-12px, +8px) to center face in frame. Applied bilinear interpolation for rotation/scaling (preserves facial texture). Aligned face dimensions: 160x160 pixels (FaceNet standard input size). \n\nLANDMARK CONFIDENCE SCORES:\nAverage landmark confidence: 0.947. Jaw: 0.92, Eyebrows: 0.95, Eyes: 0.98, Nose: 0.96, Mouth: 0.94. All landmarks exceed 0.85 threshold (high quality). \n\nCONCLUSION: All 68 landmarks successfully detected with high confidence. Face successfully aligned to canonical frontal pose. Ready for embedding extraction.',
+            'LANDMARK DETECTION ALGORITHM:\nModel: Dlib shape_predictor_68_face_landmarks.dat (Kazemi & Sullivan, 2014)\nArchitecture: Ensemble of Regression Trees (ERT)\nTraining: iBUG 300-W dataset (3,148 images, 68 landmarks per face)\nInference: Cascade of 10 regressors, each with 500 regression trees\n\nHOW IT WORKS:\n1. Initialize landmarks at face bounding box center\n2. For each regressor (1-10):\n   a. Extract local image features around current landmark estimates (HOG descriptors)\n   b. Predict displacement vectors for each landmark using regression trees\n   c. Update landmark positions based on predictions\n3. Final landmarks = sum of all displacement predictions\n\nLANDMARK PRECISION:\nMean error: 2.1 pixels (excellent precision for 712x856 face)\nNormalized mean error (NME): 0.029 (threshold <0.06 for acceptable quality)\nWorst landmark error: 4.3 pixels (still well within tolerance)\n\nALIGNMENT MATHEMATICS:\nComputed 2D similarity transform: T(x,y) = s*R*[x,y]^T + t\nWhere: s = scale (1.12), R = rotation matrix (θ=-2.3°), t = translation (-12, +8)\nRotation matrix R = [[cos(θ), -sin(θ)], [sin(θ), cos(θ)]]\nApplied to all pixels using bilinear interpolation for sub-pixel accuracy\n\nANTHROPOMETRIC VALIDATION:\nVerified face follows human facial proportions (Farkas, 1994):\n- IPD / Face width: 0.284 (normal range: 0.26-0.32) ✓\n- Eye height / Face height: 0.421 (normal range: 0.40-0.48) ✓\n- Nose width / Face width: 0.212 (normal range: 0.18-0.25) ✓\n- Mouth width / Face width: 0.418 (normal range: 0.38-0.50) ✓\nAll proportions fall within normal human ranges (rules out AI-generated/manipulated faces)\n\nDECISION: APPROVED for embedding extraction\nRationale: All 68 landmarks detected with high precision. Face successfully aligned. Anthropometric proportions confirm real human face. Ready for deep feature extraction.',
+            'PHASE 1B PASSED: 68 landmarks detected, alignment completed, anthropometric validation passed',
+            'Phase 1C: Deep Feature Embedding & Face Matching',
+            'selfie_aligned',
+            '160x160x3 RGB tensor',
+            'document_photo_aligned',
+            'embedding_model',
+            'FaceNet Inception-ResNet-v1',
+            'distance_metric',
+            'cosine_similarity',
+            'EMBEDDING EXTRACTION:\nProcessed both images (selfie + document photo) through FaceNet neural network. Each face converted to 128-dimensional embedding vector (compact representation of facial features). \nSelfie embedding (first 10 dims): [0.142, -0.089, 0.234, -0.156, 0.078, 0.201, -0.112, 0.167, -0.091, 0.188...]\nDocument embedding (first 10 dims): [0.138, -0.084, 0.229, -0.151, 0.081, 0.198, -0.108, 0.172, -0.087, 0.184...]\nEmbedding L2 norm: 1.0000 (both embeddings normalized to unit sphere)\n\nSIMILARITY COMPUTATION:\nCosine similarity = dot_product(embedding1, embedding2) = 0.9847\nEuclidean distance = ||embedding1 - embedding2|| = 0.1753\nAngular distance = arccos(0.9847) = 10.1° (very small angle = high similarity)\n\nFEATURE-LEVEL ANALYSIS:\nDecomposed embeddings into semantic regions using activation analysis:\nEye region features (dims 0-25): similarity 0.972\nNose region features (dims 26-50): similarity 0.991\nMouth region features (dims 51-75): similarity 0.968\nFace shape features (dims 76-100): similarity 0.987\nTexture features (dims 101-128): similarity 0.982\nAll regions show strong similarity (>0.95), indicating genuine match across all facial features.\n\nTHRESHOLD ANALYSIS:\nFaceNet verification threshold: 0.75 (conservative for high-security applications)\nObserved similarity: 0.9847 (WELL ABOVE threshold by 23.5%)\nFalse Accept Rate (FAR) at this threshold: 0.001% (1 in 100,000)\nFalse Reject Rate (FRR) at this threshold: 2.3% (acceptable for user experience)\n\nSTATISTICAL CONFIDENCE:\nProbability of random match: <0.0001% (extremely unlikely)\nProbability of genuine match: 99.99% (extremely likely)\nZ-score: 8.7 (8.7 standard deviations above random similarity mean)\n\nCONCLUSION: STRONG BIOMETRIC MATCH CONFIRMED. Selfie and document photo belong to same individual with very high confidence.',
+            'FACENET ARCHITECTURE:\nModel: Inception-ResNet-v1 (Szegedy et al., 2017)\nTraining: Triplet loss on VGGFace2 (3.31M images, 9,131 identities) + MS-Celeb-1M (10M images)\nParameters: 22.8 million trainable parameters\nOutput: 128-dimensional L2-normalized embedding\n\nNETWORK LAYERS:\n1. Stem: 3 conv blocks (3x3, 3x3, 3x3) with batch norm + ReLU\n2. Inception-ResNet-A blocks (5x): mixed convolutions (1x1, 3x3, 5x5) with residual connections\n3. Reduction-A: strided convolutions for downsampling\n4. Inception-ResNet-B blocks (10x): deeper mixed convolutions\n5. Reduction-B: second downsampling\n6. Inception-ResNet-C blocks (5x): final feature extraction\n7. Global Average Pooling: 1x1 spatial dimension\n8. Fully Connected: 128 units with L2 normalization\n\nTRIPLET LOSS TRAINING:\nLoss function: L = max(||f(a) - f(p)||² - ||f(a) - f(n)||² + α, 0)\nWhere: a=anchor, p=positive (same person), n=negative (different person), α=margin (0.2)\nTraining enforces: distance(same person) < distance(different person) - margin\nEffective embedding space: embeddings of same person cluster tightly, different people spread apart\n\nVERIFICATION PERFORMANCE (LFW benchmark):\nAccuracy: 99.63% on Labeled Faces in the Wild dataset\nTAR@FAR=0.001: 99.12% (True Accept Rate at 0.1% False Accept Rate)\nRank-1 identification accuracy: 98.97%\n\nSIMILARITY SCORE INTERPRETATION:\n0.9847 similarity places this match in top 0.5% of genuine matches\nEmpirical analysis of 1M genuine pairs: mean=0.87, std=0.08, 95th percentile=0.96\nScore 0.9847 = 1.4 std above mean genuine match (very strong match)\nImpostor distribution: mean=0.23, std=0.15 (current score 5.2 std above impostor mean)\n\nROBUSTNESS ANALYSIS:\nTested matching under variations:\n- Pose variation: ±15° rotation → similarity 0.91-0.98 (robust)\n- Lighting changes: ±30% brightness → similarity 0.90-0.98 (robust)\n- Expression changes: neutral↔smile → similarity 0.88-0.96 (robust)\n- Age progression: ±5 years → similarity 0.85-0.95 (acceptable)\nCurrent match 0.9847 significantly above minimum robust threshold (0.85)\n\nDECISION: VERIFIED MATCH\nRationale: Similarity score 0.9847 far exceeds verification threshold 0.75. All facial regions show strong similarity. Statistical analysis confirms genuine match with 99.99% confidence. No indication of presentation attack or identity fraud.',
+            'PHASE 1C PASSED: Face match 98.47%, verified same person, statistical confidence 99.99%',
+            'Phase 1D: Multi-Modal Liveness Detection',
+            'video_frames',
+            'frame_rate',
+            '8 fps',
+            'duration',
+            '3 seconds',
+            'liveness_tests',
+            'blink',
+            'texture',
+            'depth',
+            'motion',
+            'LIVENESS TEST 1 - BLINK DETECTION:\nAnalyzed 24 frames over 3 seconds for spontaneous eye blinks. Computed Eye Aspect Ratio (EAR) for each frame:\nFrame sequence: [0.18, 0.18, 0.17, 0.06, 0.05, 0.18, 0.18, 0.17, 0.16, 0.05, 0.06, 0.18, ...]\nEAR threshold for closed eye: <0.12. Detected 3 blink events (frames 4-5, 10-11, 19-20). Blink rate: 1.0 blinks/second (normal human range: 0.5-1.5 blinks/sec). Blink duration: 125-167ms (normal range: 100-300ms). INTERPRETATION: Natural spontaneous blinking detected. Printed photos/screens cannot blink. TEST PASSED.\n\nLIVENESS TEST 2 - TEXTURE ANALYSIS:\nExtracted Local Binary Patterns (LBP) from facial region. LBP histogram: [bins showing high complexity texture pattern]. Texture complexity score: 0.847 (real skin: 0.7-0.9, printed photo: 0.3-0.6, screen: 0.4-0.7). High-frequency texture analysis: Detected pores, fine lines, skin irregularities (characteristic of real skin). Fourier analysis: Strong high-frequency components (>200 cycles/face) indicating 3D surface texture. Moire pattern detection: No moire patterns (would indicate photo-of-screen attack). INTERPRETATION: Texture analysis confirms real human skin, not flat reproduction. TEST PASSED.\n\nLIVENESS TEST 3 - DEPTH ESTIMATION:\nApplied monocular depth estimation neural network (MiDaS v3.0) to compute depth map. Depth range detected: 85mm from nose tip (closest) to ears (farthest). Average human facial depth: 75-95mm - MATCHES EXPECTED RANGE. Depth gradient analysis: Smooth continuous gradient (nose→cheeks→ears) consistent with 3D face. Flat surfaces (photos/screens) show <5mm depth variation - CURRENT: 85mm (17x threshold). Depth map shows realistic facial geometry with nose prominence, eye sockets, facial contours. INTERPRETATION: Depth analysis confirms 3D real face, rules out 2D attacks. TEST PASSED.\n\nLIVENESS TEST 4 - MOTION CONSISTENCY:\nTracked facial landmarks across 24 frames, analyzed motion patterns. Detected micro-movements: Average displacement 2.8 pixels/frame (range: 1.2-4.5 pixels). Motion frequency analysis: Dominant frequencies 8-12 Hz (matches human physiological tremor). Motion pattern: Organic, non-linear, subtle (characteristic of involuntary micro-tremors). Replay attack detection: No frame-to-frame repetition patterns (would indicate video replay). Temporal consistency: Smooth motion transitions, no sudden jumps (rules out video splicing). INTERPRETATION: Natural involuntary movements detected. Static/replay attacks show no motion. TEST PASSED.\n\nAGGREGATE LIVENESS SCORE:\nBlink test: PASS (weight 25%) | Texture test: PASS (weight 25%) | Depth test: PASS (weight 30%) | Motion test: PASS (weight 20%)\nCombined liveness confidence: 96.2% (threshold: 85% for high-assurance)\nPresentation attack probability: 3.8% (acceptably low)\n\nCONCLUSION: REAL PERSON VERIFIED. All 4 liveness tests passed. No presentation attack indicators detected.',
+            'MULTI-MODAL LIVENESS DETECTION RATIONALE:\n\nTHREAT MODEL - PRESENTATION ATTACKS:\n1. Printed photo attack: High-res photo of legitimate user\n2. Digital screen attack: Photo/video displayed on phone/tablet screen\n3. Video replay attack: Pre-recorded video of user\n4. 3D mask attack: Physical mask replicating face shape\n5. Deepfake attack: AI-generated synthetic video\n\nDEFENSE STRATEGY: Multi-modal approach (each test defends against different attack types)\n\nTEST 1 - BLINK DETECTION:\nDefends against: Printed photos, static digital displays\nAlgorithm: Eye Aspect Ratio (EAR) computation\nEAR = (||p2-p6|| + ||p3-p5||) / (2 × ||p1-p4||)\nWhere p1-p6 are eye landmark coordinates (Soukupová & Čech, 2016)\nThreshold: EAR < 0.12 indicates closed eye\nValidation: Detected 3 blinks with proper timing (125-167ms duration)\nAttack resilience: Printed photos cannot blink (static). Screens cannot simulate natural blink physics.\n\nTEST 2 - TEXTURE ANALYSIS:\nDefends against: Printed photos, low-quality screens, masks\nAlgorithm: Local Binary Patterns + Fourier analysis\nLBP encoding: For each pixel, compare with 8 neighbors, create binary code\nReal skin shows complex LBP patterns (pores, wrinkles, irregularities)\nPrinted photos show uniform patterns (printer dithering creates regular patterns)\nFourier analysis: Real skin has strong high-frequency components (fine details)\nValidation: Texture complexity 0.847 in real skin range (0.7-0.9)\nAttack resilience: Photo reproduction loses high-frequency details. Masks show artificial texture.\n\nTEST 3 - DEPTH ESTIMATION:\nDefends against: All 2D attacks (photos, screens), deepfakes\nAlgorithm: MiDaS v3.0 monocular depth estimation (Ranftl et al., 2020)\nNetwork: Transformer-based dense prediction, trained on 12 diverse datasets\nOutput: Per-pixel depth map (relative depth values)\nReal faces show 75-95mm depth variation (nose prominence, facial contours)\nFlat surfaces (photos/screens) show <5mm depth variation\nValidation: Measured 85mm depth range - consistent with real face geometry\nAttack resilience: 2D reproductions lack depth dimension. Even 3D masks show unnatural depth gradients.\n\nTEST 4 - MOTION ANALYSIS:\nDefends against: Static attacks, video replay, deepfakes\nAlgorithm: Optical flow tracking + frequency analysis\nTracked 68 landmarks across frames, computed displacement vectors\nReal humans exhibit physiological micro-tremor (8-12 Hz, 1-5 pixel amplitude)\nReplay attacks show no micro-movements (frozen) or artificial movements\nDeepfakes often have temporal inconsistencies (jitter, artifacts)\nValidation: Detected organic micro-movements matching human physiology\nAttack resilience: Static attacks show zero motion. Replays lack natural tremor. Deepfakes show temporal artifacts.\n\nCOMBINED DECISION LOGIC:\nRequire ALL 4 tests to pass (conservative approach for high security)\nEach test targets different attack vectors - multi-modal defense\nEven if attacker bypasses 1 test, other 3 provide backup detection\nCurrent result: 4/4 tests passed → HIGH CONFIDENCE in real person\n\nCOMPLIANCE:\nISO/IEC 30107-3: Biometric presentation attack detection (PAD)\n- Level 2 PAD capability: Defends against unsophisticated and some sophisticated attacks\n- APCER (Attack Presentation Classification Error Rate): 3.8%\n- BPCER (Bona fide Presentation Classification Error Rate): 1.2%\nNIST/NISTIR 7859: Evaluation of presentation attack detection\n\nDECISION: APPROVE LIVENESS\nRationale: All 4 independent liveness tests passed. Multi-modal evidence confirms real person. Attack probability 3.8% well below 10% threshold. Compliant with ISO 30107-3 Level 2.',
+            'PHASE 1D PASSED: 4/4 liveness tests passed, 96.2% confidence real person, presentation attack probability 3.8%',
+            'Phase 2A: Document Image Preprocessing & Quality Assessment',
+            'document_scan',
+            'id_document_front.jpg',
+            'scan_resolution',
+            '2400x1600 (3.84 MP)',
+            '2.8 MB',
+            'document_type_claimed',
+            'passport',
+            'issuing_country',
+            'Phase 2B: OCR Data Extraction + Sensitive Information Processing',
+            'document_region',
+            'full_passport_front',
+            'ocr_engine',
+            'Tesseract 5.0 + custom passport model',
+            'mrz_reader',
+            'ICAO 9303 compliant',
+            'sensitive_fields',
+            'name',
+            'passport_number',
+            'cpf',
+            'date_of_birth',
+            'Phase 3: Age Verification & Cross-Validation',
+            'document_dob',
+            '[REDACTED]',
+            'declared_age',
+            'facial_age_estimate',
+            'minimum_age',
+            'Phase 4: Compliance & Sanctions Screening',
+            'country',
+            'databases',
+            'Phase 5: Final Risk Assessment & Decision',
+            'threshold',
+        ),
+        (
+            'IMAGE QUALITY ASSESSMENT:\nResolution: 2400x1600 pixels (300 DPI equivalent) - EXCELLENT (minimum'
+            ' 150 DPI for OCR). File format: JPEG with quality factor 95% - minimal compression artifacts. Co'
+            'lor space: sRGB with proper color profile - suitable for document analysis. Brightness analysis:'
+            ' Mean luminance 142/255 - well-lit (optimal range 120-180). Contrast: Standard deviation 48 - go'
+            'od contrast for text readability. Sharpness (Laplacian variance): 1580 - sharp focus (threshold '
+            '>500 for acceptable). Noise level: SNR 32 dB - low noise, clean scan. Overall quality score: 94/'
+            '100 (EXCELLENT)\n\nDOCUMENT TYPE DETECTION:\nApplied document classification CNN to identify docume'
+            'nt type. Predicted class: PASSPORT (confidence 97.8%). Expected issuing country: . Document dime'
+            'nsions: 125mm x 88mm (standard passport card size ISO/IEC 7810 ID-3). Aspect ratio: 1.42 (matche'
+            's passport standard). Color scheme: Burgundy/red background (common for many countries). Layout '
+            'analysis: Detected machine-readable zone (MRZ) at bottom - confirms passport. \n\nGEOMETRIC CORREC'
+            'TION:\nDetected document corners using Hough transform + RANSAC. Computed perspective transformat'
+            'ion to correct for viewing angle. Original capture angle: 8° skew, 12° tilt (minor perspective d'
+            'istortion). Applied homography matrix to de-warp document to rectangular form. Result: Perfectly'
+            ' rectangular document, ready for feature extraction. \n\nCONCLUSION: High-quality document scan su'
+            'itable for detailed analysis. Document confirmed as passport.DOCUMENT PREPROCESSING PIPELINE:\n\nS'
+            'TEP 1 - QUALITY VALIDATION:\nChecked document image meets minimum requirements for automated proc'
+            'essing:\n- Resolution ≥150 DPI: ✓ (300 DPI detected)\n- Color depth ≥24-bit: ✓ (24-bit RGB)\n- Comp'
+            'ression quality ≥70%: ✓ (95% quality)\n- Sharpness score >500: ✓ (1580 score)\n- Adequate lighting'
+            ': ✓ (brightness 142/255)\n\nSTEP 2 - DOCUMENT LOCALIZATION:\nEdge detection: Canny edge detector wi'
+            'th hysteresis thresholding\nLine detection: Hough transform to find straight lines\nCorner detecti'
+            'on: Intersection of lines → 4 corner points\nValidation: Corners form quadrilateral with proper a'
+            'spect ratio\n\nSTEP 3 - PERSPECTIVE CORRECTION:\nPerspective distortion causes non-rectangular appe'
+            'arance\nComputed homography matrix H (3x3) mapping distorted → ideal rectangle\nUsing 4 corner cor'
+            "respondences (minimum needed)\nApplied transformation: p' = H × p for each pixel p\nInterpolation:"
+            ' Bilinear to preserve document texture\n\nSTEP 4 - DOCUMENT CLASSIFICATION:\nNeural network: ResNet'
+            '-50 trained on 500K government ID documents\nInput: 224x224 RGB document thumbnail\nOutput: Probab'
+            'ility distribution over document types\nClasses: Passport (97.8%), National ID (1.2%), Driver Lic'
+            'ense (0.6%), Other (0.4%)\nPrediction: PASSPORT with very high confidence\n\nSTEP 5 - COUNTRY-SPECI'
+            'FIC VALIDATION:\nIssuing country: \nLoaded  passport template from database\nExpected features: MRZ'
+            ' format, security watermarks, color scheme, layout\nValidation: Document structure matches  passp'
+            'ort specification\n\nDECISION: Document preprocessing successful\nRationale: High-quality scan with'
+            ' excellent resolution and lighting. Document correctly identified as passport. Geometric distort'
+            'ions corrected. Ready for OCR and security feature analysis.PHASE 2A PASSED: Passport identified'
+            ' (97.8%), quality 94/100,  template matchedOCR EXTRACTION - VISUAL TEXT ZONE (VIZ):\nTesseract OC'
+            'R confidence: 99.4% (excellent). Extracted fields:\n- Full Name:  (confidence: 99.8%)\n- Date of B'
+            'irth: [REDACTED] (confidence: 99.2%)\n- Place of Birth: [REDACTED] (confidence: 98.1%)\n- Gender: '
+            '[REDACTED] (confidence: 99.9%)\n- Nationality:  (confidence: 100.0%)\n- Passport Number:  (confide'
+            'nce: 99.6%) **SENSITIVE**\n- Issue Date: [REDACTED] (confidence: 98.9%)\n- Expiry Date: [REDACTED]'
+            ' (confidence: 99.1%)\n- Tax ID (CPF):  (confidence: 99.3%) **SENSITIVE**\n\nOCR EXTRACTION - MACHIN'
+            'E READABLE ZONE (MRZ):\nMRZ format: TD3 (2 lines, 44 characters each) - standard for passports. M'
+            'RZ Line 1: P<<<[REDACTED]\nMRZ Line 2: [REDACTED]M[REDACTED]<<<<<<<<<\nMRZ checksum validation:\n- '
+            'Passport number checksum: VALID ✓\n- Date of birth checksum: VALID ✓\n- Expiry date checksum: VALI'
+            'D ✓\n- Composite checksum: VALID ✓\nAll MRZ checksums passed - document integrity verified.\n\nCROSS'
+            "-VALIDATION: VIZ vs MRZ:\nPassport number: VIZ='' vs MRZ='' → MATCH ✓\nName: VIZ='' → MATCH ✓\nNati"
+            "onality: VIZ='' → MATCH ✓\nNo discrepancies detected. VIZ and MRZ data fully consistent.\n\nSENSITI"
+            'VE DATA HANDLING:\n**CRITICAL**: Following fields classified as PII and will be encrypted:\n1. Pas'
+            'sport Number:  - Unique identifier, can be used for identity theft\n2. Tax ID (CPF):  - Sensitive'
+            ' financial/tax information\n3. Date of Birth: [REDACTED] - Reduces to age only for verification\nE'
+            "ncryption: AES-256-GCM with owner's private key\nStorage: IPFS with encrypted payload\nAccess: Onl"
+            'y owner can decrypt with private key\nPrivacy guarantee: These fields NEVER appear in public reas'
+            'oning or on-chain\n\nAGE CALCULATION:\nExtracted DOB: [REDACTED]\nCurrent date: 2025-01-08\nCalculate'
+            'd age:  years (matches user claim) ✓\n\nCONCLUSION: OCR extraction successful. All checksums valid'
+            '. Sensitive data identified and will be encrypted.OCR ALGORITHM DETAILS:\n\nENGINE: Tesseract 5.0 '
+            '(Google open-source OCR)\nLanguage model: English +  specific\nPage segmentation mode: PSM 6 (unif'
+            'orm block of text)\nCharacter whitelist: A-Z, 0-9, <> (for passport-specific characters)\nTraining'
+            ' data: LSTM neural network trained on government documents\n\nPREPROCESSING FOR OCR:\n1. Grayscale '
+            "conversion (color not needed for text)\n2. Adaptive thresholding (Otsu's method) → binary image\n3"
+            '. Morphological operations: remove noise, connect broken characters\n4. Deskewing: correct text r'
+            'otation (<2° detected and corrected)\n\nMRZ PARSING:\nICAO 9303 standard: Machine Readable Zone spe'
+            'cification\nTD3 format: 2 lines × 44 characters (passport card)\nStructure: Document type, Country'
+            ', Name, Passport#, DOB, Gender, Expiry, checksums\nChecksums: Modulo 10 algorithm with weights 7-'
+            '3-1 repeating\nChecksum formula: Σ(digit × weight) mod 10\nExample passport# check:  → computed ch'
+            'ecksum matches printed checksum\n\nCROSS-VALIDATION IMPORTANCE:\nVIZ (Visual Inspection Zone) = hum'
+            'an-readable text\nMRZ (Machine Readable Zone) = structured barcode-like format\nForgers often alte'
+            'r VIZ but forget to update MRZ\nOur validation: Extract from BOTH, compare, flag discrepancies\nCu'
+            'rrent result: Perfect match → authentic document\n\nSENSITIVE DATA PROTECTION:\nGDPR Article 9: Spe'
+            'cial categories of personal data\n- Passport number: Unique identifier (can enable identity theft'
+            ')\n- Tax ID/CPF: Financial identifier (enables tax fraud, account access)\n- Full DOB: Combined wi'
+            'th name enables impersonation\nProtection strategy: Encrypt before IPFS storage, never expose pub'
+            'licly\nEncryption: AES-256-GCM (authenticated encryption)\n- Key derivation: HKDF-SHA256(master ke'
+            'y, attestation_id); master = PBKDF2(owner_private_key, 100K iterations)\n- Nonce: 96-bit random ('
+            'unique per encryption)\n- Authentication tag: 128-bit (prevents tampering)\nAccess control: Only o'
+            'wner (with private key) can decrypt\nCompliance: GDPR, LGPD (Brazilian data protection), CCPA\n\nDE'
+            'CISION: OCR extraction approved\nRationale: High-confidence text extraction (99.4% avg). All MRZ '
+            'checksums valid. VIZ-MRZ cross-validation passed. Sensitive data identified and marked for encry'
+            'ption.PHASE 2B PASSED: OCR 99.4%, MRZ checksums valid, VIZ-MRZ match, sensitive data () encrypte'
+            'dDocument age:  years. Declared age:  years. Facial estimate:  years (±3y tolerance). Age check:'
+            '  ≥ 18 = TRUE.Age verification using 3 independent sources: document DOB extraction, user declar'
+            'ation, AI facial age estimation. All sources agree within acceptable tolerance. Age requirement '
+            'met.AGE VERIFIED -  years, meets 18+ requirementScreened against + sanctioned entities. Fuzzy ma'
+            'tching (). Highest similarity: % (threshold %). Comprehensive sanctions screening using fuzzy na'
+            'me matching algorithms. . Country risk assessment: -risk jurisdiction.Weighted score: Bio(, Doc('
+            ', Age(, Compliance(. Total=/100. Risk: Multi-factor risk assessment using weighted scoring model'
+            '. '
+        ),
+    ),
+}
@@ -0,0 +1,107 @@
+"""
+Documento de reasoning em streaming: serialização -> AES-GCM -> hex -> (gzip) -> upload
+
+No caminho em memória (build_reasoning_document + prepare_json) o documento existe
+inteiro várias vezes ao mesmo tempo: as steps com todo o texto, o plaintext
+serializado, o ciphertext, o hex dele dentro do dict, o texto JSON do documento e o
+gzip, se ligado - o pico por attestation cresce com o reasoning.
+
+Aqui o corpo é um gerador: as steps (RenderedSteps, renderizadas sob demanda) são
+serializadas uma a uma, o plaintext passa em blocos pelo AES-GCM incremental
+(encryption.encrypt_chunks), o ciphertext entra em hex direto no texto JSON do
+documento, que segue em blocos (pelo gzip, se KYC_FILEBASE_COMPRESSION=gzip) para o
+uploader (storage.upload_stream: multipart com uma parte em memória por vez). Nenhuma etapa guarda o payload inteiro;
+o pico fica limitado por CHUNK_SIZE, pela maior step e pela parte do upload.
+
+O CID IPFS precisa ser conhecido antes do broadcast: StreamedDocument percorre o
+gerador uma vez para o CID (e tamanhos) e de novo no upload. O nonce é sorteado uma
+vez por documento e o gzip é determinístico, então as duas passadas geram os mesmos
+bytes (se não gerassem, upload_prepared falha no CID; só a segunda passada sai do
+processo). Corpos finais de até KYC_STREAM_BUFFER_LIMIT bytes (default 1 MiB)
+ficam guardados da primeira passada e o upload não encripta de novo.
+
+O documento é o mesmo do caminho em memória (FullReasoning.to_dict() serializado
+como storage.encode_json), lido por fetch_private_reasoning() / decrypt_private().
+
+KYC_STREAM_DOCUMENT=0 volta ao caminho em memória.
+"""
+
+import json
+import os
+
+from eth_hash.auto import keccak
+
+from .cid import compute_cid
+from .storage import compression_enabled, gzip_chunks
+
+CIPHERTEXT_PLACEHOLDER = '\x00ciphertext\x00'
+BUFFER_LIMIT = int(os.getenv('KYC_STREAM_BUFFER_LIMIT', str(1024 * 1024)))
+
+
+def stream_document_enabled():
+    return os.getenv('KYC_STREAM_DOCUMENT', '1').lower() not in ('0', 'false', 'no')
+
+
+def iter_document_text(document, ciphertext_hex):
+    """
+    Texto JSON do documento (mesma serialização de storage.encode_json), com o valor
+    CIPHERTEXT_PLACEHOLDER trocado pelos pedaços (str) de ciphertext_hex()
+    """
+    placeholder = json.dumps(CIPHERTEXT_PLACEHOLDER, ensure_ascii=False)
+    for piece in json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(document):
+        if piece == placeholder:
+            yield '"'
+            yield from ciphertext_hex()
+            yield '"'
+        else:
+            yield piece
+
+
+class StreamedDocument:
+    """
+    Mesma interface do PreparedUpload (chunks, content_encoding, raw_size, size, cid),
+    com o corpo regerado a cada leitura de chunks em vez de guardado.
+    Com digest=True, .keccak é o keccak256 do texto JSON (batch: leaf do applicant).
+    """
+
+    def __init__(self, render, digest=False, buffer_limit=BUFFER_LIMIT):
+        """
+        Args:
+            render: () -> pedaços (bytes) do texto JSON do documento; precisa gerar os mesmos bytes a cada chamada
+        """
+        self._render = render
+        self.content_encoding = 'gzip' if compression_enabled() else None
+        self.raw_size = self.size = 0
+        self.keccak = None
+        self._kept = []
+        self._hash = keccak.new(b'') if digest else None
+        self._buffer_limit = buffer_limit
+        self.cid = compute_cid(self._first_pass())
+        if self._hash is not None:
+            self.keccak = self._hash.digest()
+            self._hash = None
+
+    @property
+    def chunks(self):
+        return self._kept if self._kept is not None else self._body(self._render())
+
+    def _body(self, raw):
+        return gzip_chunks(raw) if self.content_encoding else raw
+
+    def _counted(self):
+        for chunk in self._render():
+            self.raw_size += len(chunk)
+            if self._hash is not None:
+                self._hash.update(chunk)
+            yield chunk
+
+    def _first_pass(self):
+        for chunk in self._body(self._counted()):
+            self.size += len(chunk)
+            if self._kept is not None:
+                if self.size > self._buffer_limit:
+                    self._kept = None    # grande demais: o upload gera de novo
+                else:
+                    self._kept.append(chunk)
+            yield chunk
+
@@ -0,0 +1,213 @@
+"""
+Encryption do reasoning privado (AES-256-GCM) com derivação de chave barata por attestation
+
+O EncryptionEngine do SDK roda PBKDF2 (100K iterações) a cada attestation - dezenas de
+ms de CPU por KYC. Aqui:
+- master key: PBKDF2-SHA256 (mesmas 100K iterações) sobre a private key do signer,
+  uma vez por processo
+- chave por attestation: HKDF-SHA256(master, info='anna-v2-<encryption_id>') - µs
+- chaves derivadas num LRU limitado (KYC_KEY_CACHE_SIZE, default 1024): reenvios,
+  leituras e decrypts do mesmo encryption_id não derivam de novo
+- encrypt_in_pool(): payloads de um lote encriptados num thread pool (KYC_ENCRYPT_WORKERS)
+- encrypt_chunks(): o mesmo AES-GCM em pedaços, para o documento em streaming (document_stream.py)
+
+O documento pinado marca private_encrypted.kdf = 'hkdf-sha256'. Sem o campo, é o
+esquema do SDK (PBKDF2 por attestation) - decrypt_private() aceita os dois.
+KYC_KEY_DERIVATION=pbkdf2 volta a encriptar no esquema do SDK (documentos legíveis
+por client.decrypt_reasoning()).
+
+O plaintext pode ser JSON ou o formato compacto de compact.py (private_encrypted.encoding);
+decrypt_private() detecta pelo magic e devolve o mesmo dict nos dois casos.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from anna_protocol import EncryptedData, EncryptionEngine
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+from .compact import decode_payload
+
+KDF_FIELD = 'kdf'
+KDF_HKDF = 'hkdf-sha256'
+KDF_PBKDF2 = 'pbkdf2-sha256'    # EncryptionEngine.derive_key do SDK
+
+MASTER_SALT = b'funs-kyc-master-v1'
+MASTER_ITERATIONS = 100000
+DEFAULT_CACHE_SIZE = 1024
+
+
+def key_derivation():
+    """KDF usada para encriptar (KYC_KEY_DERIVATION: hkdf | pbkdf2)"""
+    return KDF_PBKDF2 if os.getenv('KYC_KEY_DERIVATION', 'hkdf').lower() == 'pbkdf2' else KDF_HKDF
+
+
+def _key_bytes(private_key):
+    return bytes.fromhex(private_key[2:] if private_key.startswith('0x') else private_key)
+
+
+# ==================== CACHE DE CHAVES ====================
+
+class KeyCache:
+    """LRU limitado de chaves derivadas; indexado por fingerprint do signer (sem guardar a private key)"""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._keys = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_derive(self, cache_key, derive):
+        with self._lock:
+            key = self._keys.get(cache_key)
+            if key is not None:
+                self._keys.move_to_end(cache_key)
+                self.hits += 1
+                return key
+            self.misses += 1
+
+        key = derive()   # fora do lock - PBKDF2 do esquema legado leva dezenas de ms
+        with self._lock:
+            self._keys[cache_key] = key
+            self._keys.move_to_end(cache_key)
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+        return key
+
+    def __len__(self):
+        return len(self._keys)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._keys), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+class KeyDeriver:
+    """Master key por signer (PBKDF2, uma vez) + chaves por attestation (HKDF) em cache"""
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        self.cache = KeyCache(cache_size)
+        self._masters = {}
+        self._master_lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(private_key):
+        return hashlib.sha256(_key_bytes(private_key)).hexdigest()[:16]
+
+    def master_key(self, private_key):
+        fingerprint = self.fingerprint(private_key)
+        with self._master_lock:
+            master = self._masters.get(fingerprint)
+            if master is None:
+                master = PBKDF2HMAC(
+                    algorithm=hashes.SHA256(), length=32, salt=MASTER_SALT, iterations=MASTER_ITERATIONS
+                ).derive(_key_bytes(private_key))
+                self._masters[fingerprint] = master
+            return master
+
+    def _derive(self, private_key, encryption_id, kdf):
+        if kdf == KDF_HKDF:
+            return HKDF(
+                algorithm=hashes.SHA256(), length=32, salt=None, info=f"anna-v2-{encryption_id}".encode('utf-8')
+            ).derive(self.master_key(private_key))
+        if kdf == KDF_PBKDF2:
+            return EncryptionEngine.derive_key(private_key, encryption_id)
+        raise ValueError(f"Unknown key derivation: {kdf}")
+
+    def attestation_key(self, private_key, encryption_id, kdf=KDF_HKDF):
+        cache_key = (self.fingerprint(private_key), kdf, encryption_id)
+        return self.cache.get_or_derive(cache_key, lambda: self._derive(private_key, encryption_id, kdf))
+
+
+_deriver = None
+_deriver_lock = threading.Lock()
+
+
+def get_key_deriver():
+    global _deriver
+    with _deriver_lock:
+        if _deriver is None:
+            _deriver = KeyDeriver(int(os.getenv('KYC_KEY_CACHE_SIZE', DEFAULT_CACHE_SIZE)))
+        return _deriver
+
+
+# ==================== ENCRYPT / DECRYPT ====================
+
+def encrypt_plaintext(plaintext, private_key, encryption_id, kdf=None):
+    """AES-256-GCM sobre um payload já serializado (JSON str ou bytes compactos) -> EncryptedData (formato do SDK)"""
+    key = get_key_deriver().attestation_key(private_key, encryption_id, kdf or key_derivation())
+    nonce = os.urandom(12)
+    data = plaintext if isinstance(plaintext, bytes) else plaintext.encode('utf-8')
+    ciphertext = AESGCM(key).encrypt(nonce, data, None)
+    return EncryptedData(nonce=nonce.hex(), ciphertext=ciphertext.hex(), encryption_id=encryption_id)
+
+
+def encrypt_chunks(chunks, key, nonce):
+    """
+    AES-256-GCM incremental sobre um plaintext em pedaços (bytes): os mesmos bytes de
+    AESGCM(key).encrypt(nonce, b''.join(chunks), None) - ciphertext seguido da tag
+    """
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(nonce)).encryptor()
+    for chunk in chunks:
+        out = encryptor.update(chunk)
+        if out:
+            yield out
+    yield encryptor.finalize() + encryptor.tag
+
+
+def decrypt_private(private_encrypted, private_key):
+    """
+    Decripta o private_encrypted de um documento pinado (dict), nos dois esquemas de
+    chave e nos dois encodings do plaintext.
+
+    Returns:
+        dict do reasoning privado
+    """
+    kdf = private_encrypted.get(KDF_FIELD, KDF_PBKDF2)
+    encryption_id = private_encrypted['encryption_id']
+    try:
+        key = get_key_deriver().attestation_key(private_key, encryption_id, kdf)
+        plaintext = AESGCM(key).decrypt(
+            bytes.fromhex(private_encrypted['nonce']), bytes.fromhex(private_encrypted['ciphertext']), None
+        )
+        return decode_payload(plaintext)
+    except Exception:
+        # Mesma mensagem do EncryptionEngine.decrypt
+        raise Exception(
+            "Decryption failed. Possible reasons: "
+            "wrong private key, corrupted data, or tampered ciphertext"
+        )
+
+
+# ==================== POOL ====================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def encrypt_workers():
+    return max(1, int(os.getenv('KYC_ENCRYPT_WORKERS', min(8, os.cpu_count() or 1))))
+
+
+def encrypt_in_pool(fn, items):
+    """
+    list(map(fn, items)) no thread pool de encryption (ordem preservada).
+    AES-GCM, HKDF e keccak rodam em código nativo; com 1 worker ou 1 item roda inline.
+    """
+    global _pool
+    items = list(items)
+    workers = encrypt_workers()
+    if workers == 1 or len(items) < 2:
+        return [fn(item) for item in items]
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='kyc-encrypt')
+    return list(_pool.map(fn, items))
@@ -0,0 +1,293 @@
+"""
+Idempotência do POST /api/process_kyc - reenvios não geram um segundo upload/transação
+
+A chave vem do header Idempotency-Key ou, sem ele, de um HMAC salgado de todos os
+campos do applicant normalizados - o PII nunca é armazenado em claro. Sem header e
+sem nenhum identificador (email, cpf, passport) não há chave implícita: applicants
+diferentes com os mesmos campos vazios não podem receber a attestation um do outro.
+A primeira request executa; repetições recebem a resposta guardada (mesmo status
+e body) e a que chega enquanto a primeira ainda está em voo espera por ela.
+
+Cache em memória (LRU + TTL) por instância, opcionalmente persistido em SQLite
+(KYC_IDEMPOTENCY_STORE=/tmp/funs_kyc_idempotency.sqlite3) para sobreviver a restarts
+e coordenar processos da mesma máquina. Só respostas de sucesso são guardadas.
+
+Configuração: KYC_IDEMPOTENCY=0 desativa, KYC_IDEMPOTENCY_TTL (s, default 86400),
+KYC_IDEMPOTENCY_MAX_ENTRIES (default 1024), KYC_IDEMPOTENCY_WAIT (s, default 300),
+KYC_IDEMPOTENCY_SALT (default derivado de ANNA_PRIVATE_KEY).
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .validation import MISSING_VALUES
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_WAIT = 300
+POLL_INTERVAL = 0.2
+
+
+class IdempotencyKeyReused(ValueError):
+    """Mesmo Idempotency-Key enviado com outro applicant"""
+
+
+def idempotency_enabled():
+    return os.getenv('KYC_IDEMPOTENCY', '1').lower() not in ('0', 'false', 'no')
+
+
+def _salt():
+    salt = os.getenv('KYC_IDEMPOTENCY_SALT')
+    if salt:
+        return salt.encode('utf-8')
+    return hashlib.sha256(f"funs-kyc-idempotency:{os.getenv('ANNA_PRIVATE_KEY', '')}".encode('utf-8')).digest()
+
+
+def _field(applicant, name):
+    value = applicant.get(name)
+    value = '' if value is None else str(value).strip()
+    return '' if value.upper() in MISSING_VALUES else value
+
+
+def _identity(applicant):
+    """(email, cpf, passport) normalizados; '' = não informado"""
+    return (
+        _field(applicant, 'user_email').lower(),
+        re.sub(r'\D', '', _field(applicant, 'user_cpf')),
+        re.sub(r'\s', '', _field(applicant, 'user_passport')).upper(),
+    )
+
+
+def applicant_fingerprint(applicant):
+    """HMAC de todos os campos do applicant normalizados (identificadores + nome, idade, país)"""
+    fields = _identity(applicant) + (
+        ' '.join(_field(applicant, 'user_name').split()).lower(),
+        _field(applicant, 'user_age'),
+        _field(applicant, 'user_country').lower(),
+    )
+    return hmac.new(_salt(), "\x1f".join(fields).encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def request_key(header_value, applicant):
+    """
+    (chave do cache, fingerprint do applicant) para uma request.
+    Chave None = request não deduplicada (sem header e sem email/cpf/passport).
+    """
+    fingerprint = applicant_fingerprint(applicant)
+    if header_value and header_value.strip():
+        key = hashlib.sha256(header_value.strip().encode('utf-8')).hexdigest()
+        return f"key:{key}", fingerprint
+    if not any(_identity(applicant)):
+        return None, fingerprint
+    return f"applicant:{fingerprint}", fingerprint
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class IdempotencyCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, path=None, wait_timeout=DEFAULT_WAIT):
+        """
+        Args:
+            ttl: segundos que uma resposta fica disponível para replay
+            max_entries: limite do LRU em memória
+            path: arquivo SQLite (None = somente memória)
+            wait_timeout: quanto uma duplicata espera pela request em voo
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()  # key -> (expires_at, fingerprint, response)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS kyc_idempotency ("
+                    " key TEXT PRIMARY KEY,"
+                    " fingerprint TEXT NOT NULL,"
+                    " state TEXT NOT NULL,"
+                    " response TEXT,"
+                    " expires_at REAL NOT NULL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ==================== MEMÓRIA ====================
+
+    def _get_memory(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key, fingerprint, response, expires_at):
+        self._entries[key] = (expires_at, fingerprint, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ==================== SQLITE ====================
+
+    def _claim(self, key, fingerprint):
+        """
+        Reserva a chave no SQLite. Retorna ('claimed', None), ('done', entry) ou
+        ('pending', None) se outro processo está executando.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM kyc_idempotency WHERE key = ? AND expires_at <= ?", (key, now))
+            row = conn.execute(
+                "SELECT fingerprint, state, response, expires_at FROM kyc_idempotency WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO kyc_idempotency (key, fingerprint, state, expires_at) VALUES (?, ?, 'pending', ?)",
+                    (key, fingerprint, now + self.wait_timeout)
+                )
+                return 'claimed', None
+        if row[1] == 'done':
+            return 'done', (row[3], row[0], json.loads(row[2]))
+        return 'pending', None
+
+    def _store(self, key, fingerprint, response, expires_at):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kyc_idempotency (key, fingerprint, state, response, expires_at)"
+                " VALUES (?, ?, 'done', ?, ?)",
+                (key, fingerprint, json.dumps(response), expires_at)
+            )
+
+    def _unclaim(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM kyc_idempotency WHERE key = ? AND state = 'pending'", (key,))
+
+    def _wait_other_process(self, key, fingerprint):
+        """Outro processo está executando a mesma chave: espera terminar (ou a reserva expirar)"""
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            state, entry = self._claim(key, fingerprint)
+            if state != 'pending':
+                return state, entry
+        raise TimeoutError(f"Idempotent request still in flight after {self.wait_timeout}s")
+
+    # ==================== API ====================
+
+    def execute(self, key, fingerprint, compute):
+        """
+        Executa compute() uma única vez por chave.
+
+        Returns:
+            (response, replayed) - replayed=True quando a resposta veio do cache
+            ou de uma request idêntica que estava em voo
+        """
+        with self._lock:
+            entry = self._get_memory(key)
+            flight = None if entry else self._inflight.get(key)
+            owner = entry is None and flight is None
+            if owner:
+                flight = self._inflight[key] = _InFlight()
+
+        if entry is not None:
+            return self._replay(entry, fingerprint), True
+
+        if not owner:
+            if not flight.event.wait(self.wait_timeout):
+                raise TimeoutError(f"Idempotent request still in flight after {self.wait_timeout}s")
+            if flight.error is not None:
+                raise flight.error
+            return self._replay(flight.response, fingerprint), True
+
+        try:
+            response, replayed = self._execute_owned(key, fingerprint, compute)
+            flight.response = response
+            return self._replay(response, fingerprint), replayed
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _execute_owned(self, key, fingerprint, compute):
+        if self.path:
+            state, entry = self._claim(key, fingerprint)
+            if state == 'pending':
+                state, entry = self._wait_other_process(key, fingerprint)
+            if state == 'done':
+                with self._lock:
+                    self._put_memory(key, *entry[1:], entry[0])
+                return entry, True
+
+        try:
+            response = compute()
+        except BaseException:
+            if self.path:
+                self._unclaim(key)
+            raise
+
+        expires_at = time.time() + self.ttl
+        if self.path:
+            self._store(key, fingerprint, response, expires_at)
+        with self._lock:
+            self._put_memory(key, fingerprint, response, expires_at)
+        return (expires_at, fingerprint, response), False
+
+    @staticmethod
+    def _replay(entry, fingerprint):
+        if entry[1] != fingerprint:
+            raise IdempotencyKeyReused("Idempotency-Key already used for a different applicant")
+        return entry[2]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'in_flight': len(self._inflight)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_idempotency_cache():
+    """Cache da instância (configurado pelo ambiente na primeira chamada)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = IdempotencyCache(
+                ttl=float(os.getenv('KYC_IDEMPOTENCY_TTL', DEFAULT_TTL)),
+                max_entries=int(os.getenv('KYC_IDEMPOTENCY_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+                path=os.getenv('KYC_IDEMPOTENCY_STORE') or None,
+                wait_timeout=float(os.getenv('KYC_IDEMPOTENCY_WAIT', DEFAULT_WAIT)),
+            )
+            print(f"🔁 Idempotency cache ready (sqlite: {_cache.path or 'off'})", file=sys.stderr)
+        return _cache
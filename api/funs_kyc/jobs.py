@@ -0,0 +1,194 @@
+"""
+Job store para o modo assíncrono do KYC (POST -> 202 + job_id, GET status)
+
+Backends plugáveis: registre com register_job_store("scheme", factory) e selecione
+via KYC_JOB_STORE_URL (ex.: sqlite:///tmp/funs_kyc_jobs.sqlite3 - default local).
+
+O job roda num ThreadPoolExecutor do próprio processo depois que o 202 saiu, então o
+modo assíncrono precisa de:
+- um processo que continua de pé entre requests (asgi.py, ou um servidor próprio).
+  No Vercel a instância é suspensa quando a resposta sai: o job só anda na próxima
+  request da mesma instância e se perde se ela for reciclada
+- um store compartilhado por todas as instâncias que atendem o GET de status. O
+  default em /tmp é de uma instância só; o poll que cai em outra recebe 404
+
+async_jobs_enabled(): KYC_ASYNC_JOBS=1/0 força; sem a variável, só processos marcados
+com mark_long_lived() (asgi.py) aceitam jobs. No handler do Vercel ?async=1 e
+'Prefer: respond-async' caem no caminho síncrono (200 com o resultado).
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+JOB_STATES = ('queued', 'reasoning_built', 'pinned', 'tx_sent', 'confirmed', 'pin_pending', 'failed')
+
+DEFAULT_JOB_STORE_URL = "sqlite:///tmp/funs_kyc_jobs.sqlite3"
+
+_long_lived = False
+
+
+def mark_long_lived():
+    """Entry point que fica de pé entre requests (asgi.py): jobs em background avançam"""
+    global _long_lived
+    _long_lived = True
+
+
+def async_jobs_enabled():
+    """Modo assíncrono disponível: KYC_ASYNC_JOBS=1/0, ou processo marcado com mark_long_lived()"""
+    value = os.getenv('KYC_ASYNC_JOBS', '').strip().lower()
+    if value:
+        return value not in ('0', 'false', 'no')
+    return _long_lived
+
+
+class JobStore:
+    """Interface do job store - backends implementam create/update/get"""
+
+    def create(self, job_id, status='queued'):
+        raise NotImplementedError
+
+    def update(self, job_id, status=None, error=None, **fields):
+        """Atualiza status e faz merge de campos de resultado (attestation_id, tx_hash, ipfs_cid...)"""
+        raise NotImplementedError
+
+    def get(self, job_id):
+        """Retorna dict {job_id, status, error, created_at, updated_at, **fields} ou None"""
+        raise NotImplementedError
+
+
+class SQLiteJobStore(JobStore):
+    """Backend local em SQLite (uma conexão por operação, seguro entre threads e processos)"""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kyc_jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " fields TEXT NOT NULL DEFAULT '{}',"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, job_id, status='queued'):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO kyc_jobs (job_id, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (job_id, status, now, now)
+            )
+
+    def update(self, job_id, status=None, error=None, **fields):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status, fields, error FROM kyc_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise KeyError(job_id)
+            merged = json.loads(row[1])
+            merged.update(fields)
+            conn.execute(
+                "UPDATE kyc_jobs SET status = ?, fields = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status or row[0], json.dumps(merged), error if error is not None else row[2], time.time(), job_id)
+            )
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, fields, error, created_at, updated_at FROM kyc_jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = json.loads(row[1])
+        job.update({
+            'job_id': job_id,
+            'status': row[0],
+            'error': row[2],
+            'created_at': row[3],
+            'updated_at': row[4],
+        })
+        return job
+
+
+_BACKENDS = {
+    'sqlite': lambda location: SQLiteJobStore(location),
+}
+
+_store = None
+_store_lock = threading.Lock()
+_executor = None
+
+
+def register_job_store(scheme, factory):
+    """Registra backend: factory(location) -> JobStore"""
+    _BACKENDS[scheme] = factory
+
+
+def get_job_store():
+    """Job store da instância (criado na primeira chamada a partir de KYC_JOB_STORE_URL)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            url = os.getenv('KYC_JOB_STORE_URL', DEFAULT_JOB_STORE_URL)
+            scheme, _, location = url.partition('://')
+            if scheme not in _BACKENDS:
+                raise ValueError(f"Unknown job store backend: {scheme} (available: {sorted(_BACKENDS)})")
+            _store = _BACKENDS[scheme](location)
+        return _store
+
+
+def _get_executor():
+    global _executor
+    with _store_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('KYC_ASYNC_WORKERS', '4')),
+                thread_name_prefix='kyc-job'
+            )
+        return _executor
+
+
+def _run_job(store, job_id, runner, kwargs):
+    def on_stage(stage, **fields):
+        store.update(job_id, status=stage, **fields)
+
+    try:
+        result = runner(on_stage=on_stage, **kwargs)
+        store.update(job_id, status='confirmed', **result)
+        print(f"✅ Job {job_id} confirmed", file=sys.stderr)
+    except Exception as e:
+        # Erros com job_status/fields (pin_repair.PinPendingError) terminam no próprio estado
+        status = getattr(e, 'job_status', 'failed')
+        print(f"❌ Job {job_id} {status}: {e}", file=sys.stderr)
+        store.update(job_id, status=status, error=str(e), **getattr(e, 'fields', {}))
+
+
+def submit_job(runner, **kwargs):
+    """
+    Enfileira runner(on_stage=..., **kwargs) no pool de background e retorna o job_id.
+    O dict retornado pelo runner é gravado no job quando confirmado.
+    """
+    store = get_job_store()
+    job_id = uuid.uuid4().hex
+    store.create(job_id)
+    _get_executor().submit(_run_job, store, job_id, runner, kwargs)
+    return job_id
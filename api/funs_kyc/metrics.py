@@ -0,0 +1,237 @@
+"""
+Timing por etapa do KYC + registry de histogramas em memória (por instância)
+
+    with span('ipfs'):
+        filebase.upload_json(...)
+
+Cada span vira uma observação no histograma kyc_stage_duration_seconds{stage=...}
+e, se houver uma request ativa na thread (RequestTimings.activate), entra no
+header Server-Timing da resposta. Etapas: parse, validate, client, reasoning,
+screening, encrypt, ipfs, broadcast, confirm, set_txhash.
+
+Export: GET /api/process_kyc/metrics em texto Prometheus (default) ou JSON
+(?format=json ou Accept: application/json). KYC_SERVER_TIMING=0 remove o header.
+"""
+
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+STAGE_METRIC = 'kyc_stage_duration_seconds'
+REQUEST_METRIC = 'kyc_request_duration_seconds'
+REQUESTS_TOTAL = 'kyc_requests_total'
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    STAGE_METRIC: 'Duration of each KYC pipeline stage',
+    REQUEST_METRIC: 'End-to-end duration of KYC HTTP requests',
+    REQUESTS_TOTAL: 'KYC HTTP requests by route and status',
+}
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def server_timing_enabled():
+    return os.getenv('KYC_SERVER_TIMING', '1').lower() not in ('0', 'false', 'no')
+
+
+# ==================== HISTOGRAMAS ====================
+
+class Histogram:
+    """Buckets fixos (le) + sum + count; quantis estimados por interpolação no bucket"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def cumulative(self):
+        total = 0
+        for le, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield le, total
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_le(le):
+    return '+Inf' if le == float('inf') else repr(float(le))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}   # name -> {label_key: Histogram}
+        self._counters = {}     # name -> {label_key: float}
+        self._gauges = {}       # name -> {label_key: float}
+
+    def observe(self, name, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        """Gauge: último valor (profundidade de fila, em voo...)"""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def to_prometheus(self):
+        """Formato de exposição texto do Prometheus (0.0.4)"""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name in sorted(self._gauges):
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} gauge"]
+                for key, value in sorted(self._gauges[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+                for key, histogram in sorted(self._histograms[name].items()):
+                    for le, count in histogram.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_le(le))])} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def to_dict(self):
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(key), 'value': value}
+                for name in sorted(self._counters) for key, value in sorted(self._counters[name].items())
+            ]
+            gauges = [
+                {'name': name, 'labels': dict(key), 'value': value}
+                for name in sorted(self._gauges) for key, value in sorted(self._gauges[name].items())
+            ]
+            histograms = [
+                {
+                    'name': name,
+                    'labels': dict(key),
+                    'count': h.count,
+                    'sum': round(h.sum, 6),
+                    'mean': round(h.sum / h.count, 6) if h.count else None,
+                    'p50': h.quantile(0.50),
+                    'p95': h.quantile(0.95),
+                    'p99': h.quantile(0.99),
+                    'buckets': {_format_le(le): count for le, count in h.cumulative()},
+                }
+                for name in sorted(self._histograms) for key, h in sorted(self._histograms[name].items())
+            ]
+        return {'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+# ==================== SPANS ====================
+
+_current = contextvars.ContextVar('kyc_request_timings', default=None)
+
+
+class RequestTimings:
+    """Spans de uma request (thread atual) para o header Server-Timing"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self._token = None
+
+    def activate(self):
+        self._token = _current.set(self)
+        return self
+
+    def deactivate(self):
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+
+    def add(self, stage, seconds):
+        self.spans.append((stage, seconds))
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def header(self):
+        """Server-Timing: parse;dur=0.4, reasoning;dur=3.1, ..., total;dur=812.0 (ms)"""
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.spans]
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ', '.join(entries)
+
+
+@contextmanager
+def span(stage):
+    """Mede o bloco: histograma do registry + Server-Timing da request ativa (se houver)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _registry.observe(STAGE_METRIC, elapsed, stage=stage)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(stage, elapsed)
@@ -0,0 +1,237 @@
+"""
+Nonce manager para o signer ANNA_PRIVATE_KEY - várias threads/instâncias enviando em paralelo
+
+Os nonces são alocados em ordem a partir de um store SQLite local (BEGIN IMMEDIATE
+serializa threads e processos na mesma máquina). Cada nonce passa por:
+
+    reserved -> sent (tx broadcast, ou envio com resultado incerto) -> removido quando minerado
+    reserved -> released (node rejeitou / falhou antes do broadcast) -> reutilizado pelo próximo allocate()
+    reserved -> devolvido ao contador (release() do último nonce alocado: não deixa gap)
+
+resync() compara com a chain: remove nonces já minerados, avança o contador se outro
+sender usou a conta, e recupera gaps - txs 'sent' que o node não conhece mais (dropped)
+e reservas abandonadas voltam a 'released' para serem preenchidas primeiro. Um nonce
+abaixo do pending count do node já tem tx no mempool e nunca volta a 'released'.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_NONCE_STORE = "/tmp/funs_kyc_nonces.sqlite3"
+DROP_TIMEOUT = float(os.getenv('KYC_NONCE_DROP_TIMEOUT', '120'))
+RESYNC_INTERVAL = float(os.getenv('KYC_NONCE_RESYNC_INTERVAL', '30'))
+
+
+class NonceManager:
+    def __init__(self, w3, address, path=None, drop_timeout=DROP_TIMEOUT, resync_interval=RESYNC_INTERVAL, namespace=''):
+        """
+        Args:
+            w3: instância Web3 (get_transaction_count / get_transaction)
+            address: endereço do signer
+            path: arquivo SQLite compartilhado entre processos
+            drop_timeout: segundos até uma tx 'sent' desconhecida pelo node ser considerada dropped
+            resync_interval: intervalo mínimo entre consultas à chain no allocate()
+            namespace: separa contadores do mesmo endereço em redes diferentes
+        """
+        self.w3 = w3
+        self.address = address
+        self.key = f"{namespace}:{address}" if namespace else address
+        self.path = path or os.getenv('KYC_NONCE_STORE', DEFAULT_NONCE_STORE)
+        self.drop_timeout = drop_timeout
+        self.resync_interval = resync_interval
+        self._last_resync = None
+        self._resync_lock = threading.Lock()
+
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS nonce_accounts ("
+                " address TEXT PRIMARY KEY,"
+                " next_nonce INTEGER NOT NULL,"
+                " chain_nonce INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS nonce_pending ("
+                " address TEXT NOT NULL,"
+                " nonce INTEGER NOT NULL,"
+                " status TEXT NOT NULL,"
+                " tx_hash TEXT,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (address, nonce))"
+            )
+
+    @contextmanager
+    def _transaction(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def _set_status(self, nonce, status, tx_hash=None):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE nonce_pending SET status = ?, tx_hash = COALESCE(?, tx_hash), updated_at = ?"
+                " WHERE address = ? AND nonce = ?",
+                (status, tx_hash, time.time(), self.key, nonce)
+            )
+
+    # ==================== API ====================
+
+    def allocate(self):
+        """Próximo nonce livre (gaps recuperados primeiro, depois o contador)"""
+        if self._last_resync is None or time.monotonic() - self._last_resync >= self.resync_interval:
+            self.resync()
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT n.nonce FROM nonce_pending n JOIN nonce_accounts a ON a.address = n.address"
+                " WHERE n.address = ? AND n.status = 'released' AND n.nonce >= a.chain_nonce"
+                " ORDER BY n.nonce LIMIT 1",
+                (self.key,)
+            ).fetchone()
+            if row:
+                nonce = row[0]
+                conn.execute(
+                    "UPDATE nonce_pending SET status = 'reserved', tx_hash = NULL, updated_at = ?"
+                    " WHERE address = ? AND nonce = ?",
+                    (time.time(), self.key, nonce)
+                )
+                return nonce
+
+            nonce = conn.execute(
+                "SELECT next_nonce FROM nonce_accounts WHERE address = ?", (self.key,)
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO nonce_pending (address, nonce, status, tx_hash, updated_at)"
+                " VALUES (?, ?, 'reserved', NULL, ?)",
+                (self.key, nonce, time.time())
+            )
+            conn.execute("UPDATE nonce_accounts SET next_nonce = ? WHERE address = ?", (nonce + 1, self.key))
+            return nonce
+
+    def mark_sent(self, nonce, tx_hash):
+        """Tx com este nonce foi aceita pelo node"""
+        self._set_status(nonce, 'sent', tx_hash)
+
+    def release(self, nonce):
+        """
+        Tx com certeza não foi aceita pelo node - nonce volta para reuso.
+        Se é o último nonce alocado, o contador recua (junto com released logo abaixo)
+        e não sobra gap; senão fica 'released' e as txs acima esperam alguém usá-lo.
+
+        Returns:
+            True se ficou um gap a preencher
+        """
+        with self._transaction() as conn:
+            next_nonce = conn.execute(
+                "SELECT next_nonce FROM nonce_accounts WHERE address = ?", (self.key,)
+            ).fetchone()[0]
+            if nonce != next_nonce - 1:
+                conn.execute(
+                    "UPDATE nonce_pending SET status = 'released', tx_hash = NULL, updated_at = ?"
+                    " WHERE address = ? AND nonce = ?",
+                    (time.time(), self.key, nonce)
+                )
+                return True
+
+            conn.execute("DELETE FROM nonce_pending WHERE address = ? AND nonce = ?", (self.key, nonce))
+            while nonce > 0 and conn.execute(
+                "DELETE FROM nonce_pending WHERE address = ? AND nonce = ? AND status = 'released'",
+                (self.key, nonce - 1)
+            ).rowcount:
+                nonce -= 1
+            conn.execute("UPDATE nonce_accounts SET next_nonce = ? WHERE address = ?", (nonce, self.key))
+            return False
+
+    def claim(self, nonce):
+        """Reserva um nonce 'released' específico (preencher o gap); False se outro já o pegou"""
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE nonce_pending SET status = 'reserved', updated_at = ?"
+                " WHERE address = ? AND nonce = ? AND status = 'released'",
+                (time.time(), self.key, nonce)
+            ).rowcount == 1
+
+    def confirm(self, nonce):
+        """Tx minerada - nonce sai do tracking"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM nonce_pending WHERE address = ? AND nonce = ?", (self.key, nonce))
+
+    def pending(self):
+        """Snapshot [(nonce, status, tx_hash)] - diagnóstico"""
+        with self._transaction() as conn:
+            return conn.execute(
+                "SELECT nonce, status, tx_hash FROM nonce_pending WHERE address = ? ORDER BY nonce",
+                (self.key,)
+            ).fetchall()
+
+    def resync(self):
+        """Sincroniza com a chain (RPC fora do lock do SQLite)"""
+        with self._resync_lock:
+            mined = self.w3.eth.get_transaction_count(self.address, 'latest')
+            pending_count = self.w3.eth.get_transaction_count(self.address, 'pending')
+
+            cutoff = time.time() - self.drop_timeout
+            with self._transaction() as conn:
+                stale = conn.execute(
+                    "SELECT nonce, status, tx_hash FROM nonce_pending"
+                    " WHERE address = ? AND nonce >= ? AND status IN ('sent', 'reserved') AND updated_at < ?",
+                    (self.key, mined, cutoff)
+                ).fetchall()
+
+            # Abaixo do pending count o node já tem uma tx com o nonce: não é gap
+            dropped = [nonce for nonce, status, tx_hash in stale
+                       if nonce >= pending_count and (status == 'reserved' or not self._known_to_node(tx_hash))]
+
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO nonce_accounts (address, next_nonce, chain_nonce) VALUES (?, ?, ?)",
+                    (self.key, pending_count, mined)
+                )
+                conn.execute(
+                    "UPDATE nonce_accounts SET next_nonce = MAX(next_nonce, ?), chain_nonce = ? WHERE address = ?",
+                    (pending_count, mined, self.key)
+                )
+                conn.execute("DELETE FROM nonce_pending WHERE address = ? AND nonce < ?", (self.key, mined))
+                for nonce in dropped:
+                    conn.execute(
+                        "UPDATE nonce_pending SET status = 'released', updated_at = ?"
+                        " WHERE address = ? AND nonce = ? AND status IN ('sent', 'reserved') AND updated_at < ?",
+                        (time.time(), self.key, nonce, cutoff)
+                    )
+
+            self._last_resync = time.monotonic()
+            return {'mined': mined, 'pending': pending_count, 'recovered_gaps': dropped}
+
+    def _known_to_node(self, tx_hash):
+        if not tx_hash:
+            return False
+        try:
+            return self.w3.eth.get_transaction(tx_hash) is not None
+        except Exception:
+            return False
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_nonce_manager(client):
+    """NonceManager do signer do client (um por endereço/rede na instância)"""
+    key = (client.address, getattr(client, 'network', None))
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None or manager.w3 is not client.w3:
+            manager = NonceManager(client.w3, client.address, namespace=getattr(client, 'network', ''))
+            _managers[key] = manager
+        return manager
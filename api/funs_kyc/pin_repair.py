@@ -0,0 +1,237 @@
+"""
+Pin de documentos cuja attestation já foi enviada on-chain
+
+Com o pin em paralelo (pipeline.create_attestation_staged) a tx sai antes de o upload
+terminar. Se o upload falha depois do broadcast, a attestation aponta para um objeto
+que não existe. finish_pin():
+1. envia de novo o payload já montado (mesmos bytes, mesmo content_cid) até
+   KYC_PIN_RETRIES vezes (default 2), além dos retries por chamada do uploader
+2. se ainda falha, guarda o corpo exato, a key do objeto, o content_cid e o tx_hash
+   em SQLite (KYC_PIN_REPAIR_STORE, default /tmp/funs_kyc_pin_repair.sqlite3) e levanta
+   PinPendingError com tx_hash, attestation_id e ipfs_cid
+
+A attestation já está on-chain, então o erro não pode virar um 500 que o client
+repete: o handler responde 202 'pin_pending' com esses campos (response()), a
+resposta fica no cache de idempotência e um reenvio recebe a mesma resposta em vez
+de assinar uma segunda attestation. Jobs assíncronos terminam em 'pin_pending'.
+
+O default em /tmp some com a instância: em serverless (Vercel) KYC_PIN_REPAIR_STORE
+precisa apontar para armazenamento durável e compartilhado, senão o documento
+guardado para re-pin se perde junto com a instância.
+
+repair_pending_pins() pina de novo os pendentes e os remove do store. Roda em
+background depois de cada pin bem-sucedido enquanto houver pendentes (o Filebase
+voltou) e pode ser chamada por um job de manutenção.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from .metrics import HELP, get_registry, span
+from .storage import PreparedUpload, submit_upload
+
+DEFAULT_REPAIR_STORE = "/tmp/funs_kyc_pin_repair.sqlite3"
+PIN_RETRIES = max(0, int(os.getenv('KYC_PIN_RETRIES', '2')))
+
+PIN_REPAIR_TOTAL = 'kyc_pin_repair_total'
+HELP[PIN_REPAIR_TOTAL] = 'Pins after broadcast by outcome (retried, queued, repaired)'
+PINS_PENDING = 'kyc_pins_pending'
+HELP[PINS_PENDING] = 'Documents of broadcast attestations waiting to be pinned'
+
+
+class PinPendingError(Exception):
+    """Upload falhou depois do broadcast - a attestation existe, o documento ainda não foi pinado"""
+
+    job_status = 'pin_pending'
+
+    def __init__(self, message, tx_hash, attestation_id, ipfs_cid, object_key, queued):
+        super().__init__(message)
+        self.tx_hash = tx_hash
+        self.attestation_id = attestation_id
+        self.ipfs_cid = ipfs_cid
+        self.object_key = object_key
+        self.queued = queued
+
+    @property
+    def fields(self):
+        return {
+            'attestation_id': self.attestation_id,
+            'tx_hash': self.tx_hash,
+            'ipfs_cid': self.ipfs_cid,
+            'object_key': self.object_key,
+            'queued_for_repin': self.queued,
+        }
+
+    def response(self):
+        """Body da resposta 202: não repetível, guardado pela idempotência"""
+        return dict(self.fields, success=True, status='pin_pending', retryable=False, error=str(self))
+
+
+class PinRepairStore:
+    """Documentos de attestations já enviadas que ainda não foram pinados"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('KYC_PIN_REPAIR_STORE', DEFAULT_REPAIR_STORE)
+        self._lock = threading.Lock()
+        self._repairing = threading.Lock()
+        self._pending = None   # contagem conhecida (None = ainda não lida do disco)
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kyc_pending_pins ("
+                " object_key TEXT PRIMARY KEY,"
+                " tx_hash TEXT NOT NULL,"
+                " content_cid TEXT NOT NULL,"
+                " content_encoding TEXT,"
+                " raw_size INTEGER,"
+                " body BLOB NOT NULL,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _set_pending(self, count):
+        self._pending = count
+        get_registry().set(PINS_PENDING, count)
+
+    def record(self, key, tx_hash, prepared, error):
+        """Guarda o corpo exato de um PreparedUpload/StreamedDocument para pinar depois"""
+        body = b''.join(prepared.chunks)
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO kyc_pending_pins (object_key, tx_hash, content_cid, content_encoding,"
+                    " raw_size, body, error, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, tx_hash, prepared.cid, prepared.content_encoding, prepared.raw_size, body, str(error),
+                     time.time())
+                )
+                count = conn.execute("SELECT COUNT(*) FROM kyc_pending_pins").fetchone()[0]
+            self._set_pending(count)
+
+    def pending(self):
+        """[{object_key, tx_hash, content_cid, attempts, error}] dos documentos ainda não pinados"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT object_key, tx_hash, content_cid, attempts, error FROM kyc_pending_pins ORDER BY created_at"
+            ).fetchall()
+        return [dict(zip(('object_key', 'tx_hash', 'content_cid', 'attempts', 'error'), row)) for row in rows]
+
+    def has_pending(self):
+        if self._pending is None:
+            with self._lock:
+                if self._pending is None:
+                    with self._connect() as conn:
+                        self._set_pending(conn.execute("SELECT COUNT(*) FROM kyc_pending_pins").fetchone()[0])
+        return self._pending > 0
+
+    def repair(self, uploader):
+        """
+        Pina de novo cada documento pendente (mesmos bytes e CID) e o remove do store.
+        Só uma execução por vez; outra chamada concorrente retorna sem fazer nada.
+
+        Returns:
+            (pinados, ainda pendentes)
+        """
+        if not self._repairing.acquire(blocking=False):
+            return 0, None
+        try:
+            repaired = failed = 0
+            for entry in self.pending():
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT body, content_encoding, raw_size FROM kyc_pending_pins WHERE object_key = ?",
+                        (entry['object_key'],)
+                    ).fetchone()
+                if row is None:
+                    continue
+                prepared = PreparedUpload([row[0]], row[1], row[2])
+                try:
+                    if prepared.cid != entry['content_cid']:
+                        raise ValueError(f"stored body does not match CID {entry['content_cid']}")
+                    uploader.upload_prepared(prepared, entry['object_key'])
+                except Exception as e:
+                    failed += 1
+                    with self._connect() as conn:
+                        conn.execute("UPDATE kyc_pending_pins SET attempts = attempts + 1, error = ? "
+                                     "WHERE object_key = ?", (str(e), entry['object_key']))
+                    continue
+                repaired += 1
+                get_registry().inc(PIN_REPAIR_TOTAL, outcome='repaired')
+                print(f"📌 Re-pinned {entry['object_key']} (attestation tx {entry['tx_hash']})", file=sys.stderr)
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM kyc_pending_pins WHERE object_key = ?", (entry['object_key'],))
+            with self._lock:
+                with self._connect() as conn:
+                    self._set_pending(conn.execute("SELECT COUNT(*) FROM kyc_pending_pins").fetchone()[0])
+            return repaired, failed
+        finally:
+            self._repairing.release()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_pin_repair_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PinRepairStore()
+    return _store
+
+
+def repair_pending_pins(uploader):
+    """Pina os documentos pendentes com o uploader (storage.FilebaseUploader) -> (pinados, ainda pendentes)"""
+    return get_pin_repair_store().repair(uploader)
+
+
+def finish_pin(uploader, pin, prepared, key, tx_hash, attestation_id=None, ipfs_cid=None):
+    """
+    Espera o upload em paralelo de um documento cuja tx já foi enviada. Em erro, envia o
+    mesmo payload de novo (KYC_PIN_RETRIES vezes); se ainda falha, guarda para
+    repair_pending_pins() e levanta PinPendingError.
+    """
+    try:
+        pin.result()
+    except Exception as e:
+        error = e
+    else:
+        if get_pin_repair_store().has_pending():
+            submit_upload(repair_pending_pins, uploader)
+        return
+
+    for _ in range(PIN_RETRIES):
+        get_registry().inc(PIN_REPAIR_TOTAL, outcome='retried')
+        try:
+            with span('ipfs'):
+                uploader.upload_prepared(prepared, key)
+            return
+        except Exception as e:
+            error = e
+
+    store = get_pin_repair_store()
+    try:
+        store.record(key, tx_hash, prepared, error)
+    except Exception as e:
+        print(f"❌ Could not record {key} for re-pin: {e}", file=sys.stderr)
+        raise PinPendingError(f"{error} (attestation tx {tx_hash} already broadcast, object {key} NOT pinned "
+                              f"and not recorded for repair)", tx_hash, attestation_id, ipfs_cid, key, False)
+    get_registry().inc(PIN_REPAIR_TOTAL, outcome='queued')
+    print(f"⚠️  Pin failed after broadcast; {key} (tx {tx_hash}) queued for re-pin in {store.path}", file=sys.stderr)
+    raise PinPendingError(f"{error} (attestation tx {tx_hash} already broadcast, object {key} queued for re-pin)",
+                          tx_hash, attestation_id, ipfs_cid, key, True)
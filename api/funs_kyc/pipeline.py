@@ -0,0 +1,264 @@
+"""
+Pipeline de attestation em etapas - mesmo fluxo do ANNAClient.create_attestation_v2
+(encrypt -> upload IPFS -> submitAttestation -> confirmação), mas reportando cada etapa
+via callback on_stage(stage, **fields) para modos assíncronos/streaming.
+
+Etapas reportadas: 'pinned' (ipfs_cid), 'tx_sent' (tx_hash), 'confirmed' (attestation_id)
+
+As transações usam nonces do NonceManager (transactions.py), então várias
+attestations do mesmo signer podem estar em voo ao mesmo tempo.
+
+O nome do objeto (ipfs_cid) é escolhido aqui e o CID IPFS do conteúdo é calculado
+localmente (storage.prepare_json), então o upload roda em paralelo com o broadcast
+e é conferido com o CID do Filebase no fim. 'pinned' continua saindo antes de
+'tx_sent'. KYC_PARALLEL_PIN=0 volta ao upload antes do broadcast. Upload que falha
+depois do broadcast é repetido com o mesmo payload e, se ainda falhar, guardado para
+re-pin (pin_repair.py) antes do erro.
+
+O reasoning privado é encriptado no formato compacto de compact.py (CBOR + dicionário
+de strings), marcado em private_encrypted.encoding; KYC_REASONING_ENCODING=json volta ao JSON.
+
+No layout completo o documento é gerado em streaming (document_stream.py, memória
+por attestation constante no tamanho do reasoning); no compartilhado o payload
+encriptado são só os slots e o documento continua montado em memória.
+"""
+
+import json
+import os
+import time
+
+from anna_protocol import EncryptedData, FullReasoning, Metadata
+from web3 import Web3
+
+from . import compact
+from .document_stream import CIPHERTEXT_PLACEHOLDER, StreamedDocument, iter_document_text, stream_document_enabled
+from .encryption import (
+    KDF_FIELD, KDF_PBKDF2, encrypt_chunks, encrypt_plaintext, get_key_deriver, key_derivation
+)
+from .metrics import span
+from .reasoning_templates import encode_private_reasoning, iter_private_reasoning_json
+from .shared_reasoning import ensure_shared_body, shared_layout_enabled, split_private_reasoning
+from .nonces import get_nonce_manager
+from .pin_repair import finish_pin
+from .receipts import wait_for_receipt
+from .storage import encode_text, prepare_json, submit_upload
+from .transactions import set_attestation_txhash, submit_attestation_tx
+
+
+def _noop_stage(stage, **fields):
+    pass
+
+
+def parallel_pin_enabled():
+    return os.getenv('KYC_PARALLEL_PIN', '1').lower() not in ('0', 'false', 'no')
+
+
+def hex_prefixed(value):
+    return value if value.startswith('0x') else f"0x{value}"
+
+
+def encrypt_private_reasoning(private_reasoning, private_key, encryption_id, kdf=None, encoding='json'):
+    """Equivalente a EncryptionEngine.encrypt(private_reasoning.to_dict(), ...), com as fases estáticas pré-serializadas"""
+    if encoding == 'cbor':
+        plaintext = compact.dumps_private_reasoning(private_reasoning)
+    else:
+        plaintext = encode_private_reasoning(private_reasoning)
+    return encrypt_plaintext(plaintext, private_key, encryption_id, kdf)
+
+
+def build_reasoning_document(client, public_reasoning, private_reasoning, encryption_id, slots=None):
+    """
+    Documento a ser pinado no IPFS (FullReasoning). Com slots e layout compartilhado
+    habilitado, só os campos variáveis são encriptados + referência ao shared body.
+    """
+    public_reasoning.attestation_id = encryption_id
+    kdf = key_derivation()
+    encoding = compact.reasoning_encoding()
+
+    if slots is not None and shared_layout_enabled():
+        shared_ref = ensure_shared_body(client.filebase)
+        payload = split_private_reasoning(private_reasoning, slots, shared_ref)
+        plaintext = compact.dumps(payload) if encoding == 'cbor' else json.dumps(payload, ensure_ascii=False)
+        encrypted_private = encrypt_plaintext(plaintext, client.private_key, encryption_id, kdf)
+    else:
+        shared_ref = None
+        encrypted_private = encrypt_private_reasoning(private_reasoning, client.private_key, encryption_id, kdf,
+                                                      encoding)
+
+    document = _document(public_reasoning, encrypted_private, kdf, encoding)
+    if shared_ref:
+        document["shared_body"] = shared_ref
+    return document
+
+
+def _document(public_reasoning, encrypted_private, kdf, encoding):
+    document = FullReasoning(public=public_reasoning, private_encrypted=encrypted_private).to_dict()
+    if kdf != KDF_PBKDF2:
+        document["private_encrypted"][KDF_FIELD] = kdf
+    if encoding == 'cbor':
+        document["private_encrypted"][compact.ENCODING_FIELD] = compact.ENCODING_CBOR
+    return document
+
+
+def streams_document(client, slots=None):
+    """Documento em streaming: layout completo e uploader que envia PreparedUpload"""
+    return stream_document_enabled() and hasattr(client.filebase, 'upload_prepared') and \
+        not (slots is not None and shared_layout_enabled())
+
+
+def stream_reasoning_document(client, public_reasoning, private_reasoning, encryption_id, digest=False):
+    """
+    build_reasoning_document() no layout completo como StreamedDocument: o plaintext
+    é serializado, encriptado e comprimido em pedaços, sem o documento em memória.
+    """
+    public_reasoning.attestation_id = encryption_id
+    kdf = key_derivation()
+    encoding = compact.reasoning_encoding()
+    key = get_key_deriver().attestation_key(client.private_key, encryption_id, kdf)
+    nonce = os.urandom(12)
+    placeholder = EncryptedData(nonce=nonce.hex(), ciphertext=CIPHERTEXT_PLACEHOLDER, encryption_id=encryption_id)
+    document = _document(public_reasoning, placeholder, kdf, encoding)
+
+    def plaintext():
+        if encoding == 'cbor':
+            return compact.iter_dumps_private_reasoning(private_reasoning)
+        return encode_text(iter_private_reasoning_json(private_reasoning))
+
+    def ciphertext_hex():
+        return (chunk.hex() for chunk in encrypt_chunks(plaintext(), key, nonce))
+
+    return StreamedDocument(lambda: encode_text(iter_document_text(document, ciphertext_hex)), digest)
+
+
+def _attestation_id_from_receipt(client, receipt):
+    """Extrai attestationId do evento AttestationSubmitted (topic[1]), como o SDK faz"""
+    for log in receipt['logs']:
+        if log['address'].lower() == client.attestation_contract.lower() and len(log['topics']) >= 2:
+            return log['topics'][1].hex()
+    return None
+
+
+def create_attestation_staged(client, public_reasoning, private_reasoning, metadata=None,
+                              wait_for_confirmation=True, on_stage=None, reasoning_slots=None):
+    """
+    Cria attestation v2.0 reportando progresso.
+
+    Returns:
+        dict com attestation_id, tx_hash, ipfs_cid, ipfs_url
+    """
+    on_stage = on_stage or _noop_stage
+
+    if not client.filebase:
+        raise Exception("IPFS storage not configured. Provide filebase_api_key and filebase_api_secret")
+
+    # 1. ID temporário + encryption do reasoning privado. Único por attestation: o SDK usa
+    # address + segundo, e attestations no mesmo segundo sobrescreviam o documento uma da outra
+    temp_id = Web3.keccak(text=f"{client.address}-{time.time_ns()}-{os.urandom(8).hex()}").hex()
+    document = prepared = None
+    with span('encrypt'):
+        if streams_document(client, reasoning_slots):
+            prepared = stream_reasoning_document(client, public_reasoning, private_reasoning, temp_id)
+        else:
+            document = build_reasoning_document(client, public_reasoning, private_reasoning, temp_id,
+                                                reasoning_slots)
+
+    # 2. Upload IPFS (Filebase) - em background quando o CID pode ser calculado antes
+    filename = f"reasoning_{temp_id.removeprefix('0x')[:16]}.json"
+    pin = None
+    content_cid = None
+    if parallel_pin_enabled() and hasattr(client.filebase, 'upload_prepared'):
+        prepared = prepared or prepare_json(document)
+        content_cid = prepared.cid
+
+        def upload():
+            with span('ipfs'):
+                return client.filebase.upload_prepared(prepared, filename)
+
+        pin = submit_upload(upload)
+        ipfs_cid = filename
+    else:
+        with span('ipfs'):
+            if prepared is not None:
+                ipfs_cid = client.filebase.upload_prepared(prepared, filename)
+            else:
+                ipfs_cid = client.filebase.upload_json(document, filename=filename)
+        on_stage('pinned', ipfs_cid=ipfs_cid, ipfs_url=client.filebase.get_url(ipfs_cid))
+    ipfs_url = client.filebase.get_url(ipfs_cid)
+
+    # 3. Submete on-chain (sem esperar - a confirmação é tratada abaixo)
+    submission = {
+        "ipfs_cid": ipfs_cid,
+        "public": public_reasoning.to_dict(),
+        "version": "2.0-encrypted"
+    }
+    if content_cid:
+        submission["content_cid"] = content_cid
+    reasoning_for_submission = json.dumps(submission)
+    content = json.dumps(public_reasoning.to_dict(), sort_keys=True)
+
+    if metadata is None:
+        metadata = Metadata(
+            external_id=f"ANNA-{int(time.time())}",
+            document_type="ai_decision",
+            system_origin="ANNA Protocol SDK v2.0.5"
+        )
+    if not metadata.custom_fields:
+        metadata.custom_fields = {}
+    metadata.custom_fields['ipfs_cid'] = ipfs_cid
+
+    with span('broadcast'):
+        tx_hash, local_id, nonce = submit_attestation_tx(
+            client,
+            content=content,
+            reasoning=reasoning_for_submission,
+            category=metadata.to_json()
+        )
+
+    if pin is not None:
+        # A tx já foi enviada: repete o upload do mesmo payload ou guarda para re-pin
+        finish_pin(client.filebase, pin, prepared, filename, tx_hash, hex_prefixed(local_id), ipfs_cid)
+        on_stage('pinned', ipfs_cid=ipfs_cid, ipfs_url=ipfs_url, content_cid=content_cid)
+    on_stage('tx_sent', tx_hash=tx_hash, nonce=nonce)
+
+    result = {
+        'attestation_id': hex_prefixed(local_id),
+        'tx_hash': tx_hash,
+        'ipfs_cid': ipfs_cid,
+        'ipfs_url': ipfs_url,
+    }
+    if content_cid:
+        result['ipfs_content_cid'] = content_cid
+    if not wait_for_confirmation:
+        return result
+
+    # 4. Confirmação: ID correto vem do evento, depois registra txHash on-chain (fail-safe)
+    event_id, block_number = confirm_attestation_tx(client, tx_hash, nonce)
+    if event_id:
+        result['attestation_id'] = event_id
+
+    on_stage('confirmed', attestation_id=result['attestation_id'], block_number=block_number)
+    return result
+
+
+def confirm_attestation_tx(client, tx_hash, nonce=None):
+    """
+    Aguarda o receipt de um submitAttestation, extrai o attestationId do evento
+    e registra o txHash on-chain (como o SDK faz com wait_for_confirmation=True).
+    Com nonce, libera o tracking no NonceManager assim que a tx é minerada.
+
+    Returns:
+        (attestation_id ou None, block_number)
+    """
+    with span('confirm'):
+        receipt = wait_for_receipt(client, tx_hash)
+    if nonce is not None:
+        get_nonce_manager(client).confirm(nonce)
+    if receipt['status'] != 1:
+        raise Exception(f"Transaction failed! TX hash: {tx_hash}")
+
+    event_id = _attestation_id_from_receipt(client, receipt)
+    if event_id:
+        event_id = hex_prefixed(event_id)
+        with span('set_txhash'):
+            set_attestation_txhash(client, event_id, tx_hash)
+    return event_id, receipt['blockNumber']
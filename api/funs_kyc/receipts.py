@@ -0,0 +1,263 @@
+"""
+Watcher de confirmações compartilhado - um loop por rede em vez de um polling por request
+
+wait_for_transaction_receipt() consulta o receipt da própria tx a cada 100ms: N KYCs
+em voo = N loops batendo no RPC. Aqui uma thread por client (w3) faz por ciclo:
+- eth_blockNumber uma vez
+- eth_getBlockByNumber (só hashes) de cada bloco novo, uma vez; os hashes dos
+  últimos RECENT_BLOCKS blocos ficam num índice em memória
+- eth_getTransactionReceipt só das txs pendentes que aparecem no índice (em paralelo,
+  KYC_RECEIPT_FETCH_WORKERS)
+e resolve o Future de cada request quando a tx atinge a profundidade pedida.
+
+Ao (re)iniciar, o watcher lê os últimos KYC_RECEIPT_LOOKBACK_BLOCKS (5) blocos, então
+uma tx minerada entre o broadcast e o watch() é encontrada. Tx pendente que não aparece em nenhum bloco lido (registrada
+muito depois do broadcast, bloco que o node não serviu) tem o receipt consultado
+direto a cada KYC_RECEIPT_RECHECK_INTERVAL (s, 15).
+Com depth > 1 o receipt é relido ao atingir a profundidade; se sumiu ou mudou de
+bloco (reorg), a tx volta a pendente. Sem pendentes a thread encerra.
+
+Blocos são lidos com provider.make_request (sem middlewares): o web3 rejeita o
+extraData > 32 bytes dos blocos PoA (Polygon) sem o middleware de PoA.
+
+KYC_CONFIRMATION_DEPTH (default 1 = incluída no head), KYC_CONFIRMATION_TIMEOUT
+(s, default 120 como o web3 -> TimeExhausted), KYC_RECEIPT_POLL_INTERVAL (s, 0.1).
+KYC_RECEIPT_WATCHER=0 volta ao wait_for_transaction_receipt por request.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+DEFAULT_DEPTH = int(os.getenv('KYC_CONFIRMATION_DEPTH', '1'))
+DEFAULT_TIMEOUT = float(os.getenv('KYC_CONFIRMATION_TIMEOUT', '120'))
+POLL_INTERVAL = float(os.getenv('KYC_RECEIPT_POLL_INTERVAL', '0.1'))
+RECHECK_INTERVAL = float(os.getenv('KYC_RECEIPT_RECHECK_INTERVAL', '15'))
+FETCH_WORKERS = int(os.getenv('KYC_RECEIPT_FETCH_WORKERS', '8'))
+LOOKBACK_BLOCKS = int(os.getenv('KYC_RECEIPT_LOOKBACK_BLOCKS', '5'))
+RECENT_BLOCKS = 256
+
+
+def watcher_enabled():
+    return os.getenv('KYC_RECEIPT_WATCHER', '1').lower() not in ('0', 'false', 'no')
+
+
+def _normalize(tx_hash):
+    value = tx_hash.hex() if isinstance(tx_hash, (bytes, bytearray)) else str(tx_hash)
+    return (value if value.startswith('0x') else f"0x{value}").lower()
+
+
+class _Pending:
+    __slots__ = ('tx_hash', 'future', 'timeout', 'deadline', 'depth', 'receipt', 'seen_block', 'recheck_at')
+
+    def __init__(self, tx_hash, timeout, depth, recheck_interval):
+        now = time.monotonic()
+        self.tx_hash = tx_hash
+        self.future = Future()
+        self.timeout = timeout
+        self.deadline = now + timeout
+        self.depth = depth
+        self.receipt = None
+        self.seen_block = None      # bloco do índice em que o receipt já foi consultado
+        self.recheck_at = now + recheck_interval
+
+
+class ReceiptWatcher:
+    def __init__(self, w3, depth=DEFAULT_DEPTH, timeout=DEFAULT_TIMEOUT, poll_interval=POLL_INTERVAL,
+                 recheck_interval=RECHECK_INTERVAL, fetch_workers=FETCH_WORKERS, lookback=LOOKBACK_BLOCKS):
+        """
+        Args:
+            w3: instância Web3 do client
+            depth: confirmações exigidas (1 = tx no bloco head)
+            timeout: segundos até o Future falhar com TimeExhausted
+            poll_interval: intervalo entre leituras do head
+            recheck_interval: consulta direta do receipt de tx não vista em nenhum bloco
+            fetch_workers: receipts buscados em paralelo por ciclo
+            lookback: blocos antes do head lidos ao iniciar (ou após ficar parado)
+        """
+        self.w3 = w3
+        self.depth = max(1, depth)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.recheck_interval = recheck_interval
+        self.fetch_workers = max(1, fetch_workers)
+        self.lookback = max(1, lookback)
+
+        self._lock = threading.Lock()
+        self._pending = {}              # tx_hash -> _Pending
+        self._blocks = OrderedDict()    # número -> hashes das txs (últimos RECENT_BLOCKS)
+        self._seen = {}                 # tx_hash -> número do bloco (índice dos _blocks)
+        self._last_block = None
+        self._thread = None
+        self._pool = None
+        self.stats = {'polls': 0, 'rpc_calls': 0, 'blocks_read': 0, 'receipts_fetched': 0,
+                      'rechecks': 0, 'resolved': 0, 'timeouts': 0, 'reorged': 0}
+
+    # ==================== API ====================
+
+    def watch(self, tx_hash, timeout=None, depth=None):
+        """Registra a tx -> Future que resolve com o receipt (ou TimeExhausted)"""
+        tx_hash = _normalize(tx_hash)
+        with self._lock:
+            pending = self._pending.get(tx_hash)
+            if pending is None:
+                pending = self._pending[tx_hash] = _Pending(
+                    tx_hash, self.timeout if timeout is None else timeout, max(1, depth or self.depth),
+                    self.recheck_interval
+                )
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='kyc-receipts', daemon=True)
+                self._thread.start()
+        return pending.future
+
+    def wait(self, tx_hash, timeout=None, depth=None):
+        """Bloqueia até o receipt com a profundidade pedida (mesmo contrato do wait_for_transaction_receipt)"""
+        return self.watch(tx_hash, timeout, depth).result()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    # ==================== LOOP ====================
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+            started = time.monotonic()
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"⚠️  Receipt watcher poll failed: {e}", file=sys.stderr)
+            self._expire()
+            # Registros novos esperam o próximo ciclo - N submissões não viram N leituras extras do head
+            time.sleep(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+    def _rpc(self, fn, *args):
+        self.stats['rpc_calls'] += 1
+        return fn(*args)
+
+    def _receipt(self, tx_hash):
+        self.stats['receipts_fetched'] += 1
+        try:
+            return self._rpc(self.w3.eth.get_transaction_receipt, tx_hash)
+        except TransactionNotFound:
+            return None
+
+    def _receipts(self, tx_hashes):
+        """{tx_hash: receipt ou None}, em paralelo quando há mais de um"""
+        if len(tx_hashes) <= 1 or self.fetch_workers == 1:
+            return {tx_hash: self._receipt(tx_hash) for tx_hash in tx_hashes}
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix='kyc-receipts-fetch')
+        return dict(zip(tx_hashes, self._pool.map(self._receipt, tx_hashes)))
+
+    def _read_block(self, number):
+        response = self._rpc(self.w3.provider.make_request, 'eth_getBlockByNumber', [hex(number), False])
+        if response.get('error'):
+            raise Exception(response['error'].get('message', response['error']))
+        block = response.get('result')
+        if block is None:
+            return False   # node ainda não serve o bloco; tenta no próximo ciclo
+        self.stats['blocks_read'] += 1
+        hashes = [_normalize(tx if isinstance(tx, str) else tx['hash']) for tx in block['transactions']]
+        self._blocks[number] = hashes
+        for tx_hash in hashes:
+            self._seen[tx_hash] = number
+        while len(self._blocks) > RECENT_BLOCKS:
+            _, evicted = self._blocks.popitem(last=False)
+            for tx_hash in evicted:
+                self._seen.pop(tx_hash, None)
+        return True
+
+    def _poll(self):
+        self.stats['polls'] += 1
+        head = self._rpc(lambda: self.w3.eth.block_number)
+        # Início (ou volta depois de parado): no máximo lookback blocos para trás
+        if self._last_block is None or self._last_block < head - self.lookback:
+            self._last_block = head - self.lookback
+        while self._last_block < head and self._read_block(self._last_block + 1):
+            self._last_block += 1
+
+        now = time.monotonic()
+        with self._lock:
+            pending = list(self._pending.values())
+
+        lookup = []
+        for item in pending:
+            if item.receipt is not None:
+                continue
+            block = self._seen.get(item.tx_hash)
+            if block is not None and block != item.seen_block:
+                item.seen_block = block
+                lookup.append(item)
+            elif now >= item.recheck_at:
+                self.stats['rechecks'] += 1
+                lookup.append(item)
+        for item in lookup:
+            item.recheck_at = now + self.recheck_interval
+        receipts = self._receipts([item.tx_hash for item in lookup])
+        for item in lookup:
+            item.receipt = receipts[item.tx_hash]
+
+        ready = [item for item in pending
+                 if item.receipt is not None and head - item.receipt['blockNumber'] + 1 >= item.depth]
+        # depth > 1: relê o receipt para detectar reorg antes de resolver
+        current = self._receipts([item.tx_hash for item in ready if item.depth > 1])
+        for item in ready:
+            receipt = item.receipt
+            if item.depth > 1:
+                receipt = current[item.tx_hash]
+                if receipt is None or receipt['blockHash'] != item.receipt['blockHash']:
+                    self.stats['reorged'] += 1
+                    item.receipt = receipt
+                    continue
+            self._finish(item, result=receipt)
+            self.stats['resolved'] += 1
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [item for item in self._pending.values() if now >= item.deadline]
+        for item in expired:
+            self.stats['timeouts'] += 1
+            self._finish(item, error=TimeExhausted(
+                f"Transaction {item.tx_hash} is not in the chain after {item.timeout} seconds"
+            ))
+
+    def _finish(self, item, result=None, error=None):
+        with self._lock:
+            self._pending.pop(item.tx_hash, None)
+        if error is not None:
+            item.future.set_exception(error)
+        else:
+            item.future.set_result(result)
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_receipt_watcher(client):
+    """ReceiptWatcher do client (um por rede na instância, recriado se o w3 mudar)"""
+    key = getattr(client, 'network', None)
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is None or watcher.w3 is not client.w3:
+            watcher = ReceiptWatcher(client.w3)
+            _watchers[key] = watcher
+        return watcher
+
+
+def wait_for_receipt(client, tx_hash, timeout=None):
+    """Receipt de uma tx do client - watcher compartilhado ou polling do web3 (KYC_RECEIPT_WATCHER=0)"""
+    if not watcher_enabled():
+        return client.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout or DEFAULT_TIMEOUT)
+    return get_receipt_watcher(client).wait(tx_hash, timeout)
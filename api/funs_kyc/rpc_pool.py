@@ -0,0 +1,414 @@
+"""
+Pool de endpoints RPC: latência e erros por endpoint (EWMA), failover e hedged reads
+
+O ANNAClient fala com um único RPC (NETWORKS[network]['rpc']): um node lento define
+o p99 de toda attestation e uma queda derruba todos os KYCs. Com KYC_RPC_URLS (URLs
+separadas por vírgula) o client_pool troca o provider do w3 por um RpcPool:
+
+- cada endpoint tem EWMA da latência e da taxa de erro (KYC_RPC_EWMA_ALPHA, 0.2); as
+  chamadas vão ao de menor latência / (1 - erros) entre os que estão na rotação. Cada
+  amostra entra limitada a KYC_RPC_HEDGE_MULTIPLIER x a estimativa (um pico isolado é
+  cauda - o hedge cuida dele - e não tira o endpoint da frente; lentidão de verdade
+  sobe a estimativa ~1.4x por chamada) e a estimativa decai com o tempo sem amostra
+  (constante KYC_RPC_DECAY s, 10): endpoint que ficou lento volta a ser tentado e
+  medido em vez de ficar de fora para sempre
+- erro de transporte (conexão, timeout, HTTP 429/5xx) é falha do endpoint; erro
+  JSON-RPC (revert, nonce too low...) é resposta normal. KYC_RPC_MAX_FAILURES (3)
+  falhas seguidas tiram o endpoint da rotação por KYC_RPC_COOLDOWN s (5). A EWMA de
+  erros tira o tráfego do endpoint antes disso, então as falhas seguintes não viriam
+  das chamadas: depois de uma falha o pool sonda o endpoint (eth_blockNumber, em
+  background) até ele responder - a sequência zera - ou sair da rotação, e de novo a
+  cada fim de cooldown até voltar. up nas métricas e no snapshot reflete a sondagem,
+  não só o tráfego que o endpoint ainda recebe
+- leituras idempotentes (receipts, nonces, gas, blocos, eth_call...) são hedged: sem
+  resposta em max(KYC_RPC_HEDGE_MIN, KYC_RPC_HEDGE_MULTIPLIER x EWMA do endpoint) a
+  mesma chamada vai ao próximo (até KYC_RPC_MAX_HEDGES extras) e vale a primeira
+  resposta; falha de transporte passa direto ao próximo
+- eth_sendRawTransaction nunca é hedged. Depois de uma falha de transporte o node
+  pode ter recebido a tx, então antes de reenviar a outro endpoint o pool procura o
+  hash (keccak do raw, calculado aqui): se algum node já conhece a tx, devolve o hash
+  sem reenviar. 'already known' / 'nonce too low' depois de uma falha também vira
+  sucesso se a tx for encontrada - senão transactions.py trataria como conflito de
+  nonce e assinaria uma segunda attestation
+- demais métodos: um endpoint por vez, failover em falha de transporte
+
+Métricas (GET /metrics): kyc_rpc_request_seconds{endpoint,outcome},
+kyc_rpc_endpoint_latency_seconds / kyc_rpc_endpoint_error_rate /
+kyc_rpc_endpoint_up{endpoint} (gauges), kyc_rpc_hedged_total, kyc_rpc_failover_total
+e kyc_rpc_send_recovered_total. O label endpoint é só host:porta (URLs de provider
+costumam levar a API key no path).
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from eth_hash.auto import keccak
+from hexbytes import HexBytes
+from web3.providers.base import JSONBaseProvider
+
+from .metrics import HELP, get_registry
+
+REQUEST_METRIC = 'kyc_rpc_request_seconds'
+LATENCY_GAUGE = 'kyc_rpc_endpoint_latency_seconds'
+ERROR_RATE_GAUGE = 'kyc_rpc_endpoint_error_rate'
+UP_GAUGE = 'kyc_rpc_endpoint_up'
+HEDGED_TOTAL = 'kyc_rpc_hedged_total'
+FAILOVER_TOTAL = 'kyc_rpc_failover_total'
+SEND_RECOVERED_TOTAL = 'kyc_rpc_send_recovered_total'
+
+HELP.update({
+    REQUEST_METRIC: 'Duration of RPC calls by endpoint and outcome',
+    LATENCY_GAUGE: 'EWMA latency of each RPC endpoint',
+    ERROR_RATE_GAUGE: 'EWMA transport error rate of each RPC endpoint',
+    UP_GAUGE: 'Whether the RPC endpoint is in rotation',
+    HEDGED_TOTAL: 'Hedged RPC reads by method',
+    FAILOVER_TOTAL: 'RPC calls retried on another endpoint by method',
+    SEND_RECOVERED_TOTAL: 'Broadcasts found on-chain after a failed send (not re-sent)',
+})
+
+SEND_METHOD = 'eth_sendRawTransaction'
+HEDGED_METHODS = frozenset({
+    'web3_clientVersion', 'net_version', 'eth_chainId', 'eth_blockNumber', 'eth_gasPrice',
+    'eth_maxPriorityFeePerGas', 'eth_feeHistory', 'eth_estimateGas', 'eth_call', 'eth_getBalance',
+    'eth_getCode', 'eth_getTransactionCount', 'eth_getTransactionByHash', 'eth_getTransactionReceipt',
+    'eth_getBlockByNumber', 'eth_getBlockByHash', 'eth_getLogs',
+})
+# Resposta de um node que já tem a tx (ou já minerou o nonce) - pode ser o nosso envio anterior
+_KNOWN_TX_MARKERS = ('already known', 'known transaction', 'nonce too low')
+
+INITIAL_HEDGE_DELAY = 0.5     # endpoint ainda sem medida
+
+
+def rpc_urls():
+    """Endpoints do pool (KYC_RPC_URLS); vazio = provider único do SDK"""
+    return [url.strip() for url in os.getenv('KYC_RPC_URLS', '').split(',') if url.strip()]
+
+
+class EndpointError(ConnectionError):
+    """Falha de transporte de um endpoint (o web3 trata OSError como desconectado)"""
+
+
+class Endpoint:
+    def __init__(self, url, name, timeout, pool_size):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.name = name
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.latency = None        # EWMA (s) das chamadas bem-sucedidas
+        self.measured_at = 0.0     # monotonic da última amostra de latência
+        self.error_rate = 0.0      # EWMA de falhas (0/1)
+        self.failures = 0          # falhas seguidas
+        self.down_until = 0.0
+        self.probing = False       # sondagem em background em andamento
+        self.requests = 0
+        self.errors = 0
+
+    def post(self, payload):
+        import requests
+
+        try:
+            response = self.session.post(self.url, data=payload, timeout=self.timeout,
+                                         headers={'Content-Type': 'application/json'})
+        except requests.RequestException as e:
+            raise EndpointError(f"RPC {self.name}: {e.__class__.__name__}: {e}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise EndpointError(f"RPC {self.name}: HTTP {response.status_code}")
+        try:
+            return json.loads(response.content)
+        except ValueError:
+            raise EndpointError(f"RPC {self.name}: HTTP {response.status_code} with invalid JSON")
+
+
+class RpcPool(JSONBaseProvider):
+    def __init__(self, urls, alpha=0.2, decay=10.0, hedge_min=0.05, hedge_multiplier=3.0, max_hedges=1,
+                 max_failures=3, cooldown=5.0, timeout=10.0, workers=128):
+        """
+        Args:
+            urls: endpoints JSON-RPC da mesma rede
+            alpha: peso da amostra nova nas EWMAs
+            decay: constante de tempo (s) do decaimento da latência estimada sem amostras
+            hedge_min / hedge_multiplier: leitura hedged após max(hedge_min, multiplier x EWMA) s;
+                multiplier x EWMA também limita cada amostra que entra na EWMA
+            max_hedges: chamadas extras por leitura
+            max_failures / cooldown: falhas seguidas até sair da rotação, e por quantos s
+            timeout: timeout HTTP por chamada
+            workers: threads das chamadas hedged (as perdedoras terminam em background)
+        """
+        super().__init__()
+        if not urls:
+            raise ValueError("RpcPool needs at least one endpoint")
+        names = [urlparse(url).netloc or url for url in urls]
+        self.endpoints = [
+            Endpoint(url, name if names.count(name) == 1 else f"{name}#{i}", timeout, workers)
+            for i, (url, name) in enumerate(zip(urls, names))
+        ]
+        self.alpha = alpha
+        self.decay = decay
+        self.hedge_min = hedge_min
+        self.hedge_multiplier = hedge_multiplier
+        self.max_hedges = max_hedges
+        self.max_failures = max(1, max_failures)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='kyc-rpc')
+        self.stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'failovers': 0, 'send_recovered': 0}
+
+    def __repr__(self):
+        return f"RpcPool({', '.join(endpoint.name for endpoint in self.endpoints)})"
+
+    # ==================== API (provider do web3) ====================
+
+    def make_request(self, method, params):
+        payload = self.encode_rpc_request(method, params)
+        self._count(requests=1)
+        if method == SEND_METHOD:
+            return self._send_transaction(payload, params)
+        if method in HEDGED_METHODS:
+            return self._hedged(method, payload)
+        return self._failover(method, payload)
+
+    def ranked(self):
+        """Endpoints na ordem de tentativa: na rotação por custo, depois os fora pelo fim do cooldown"""
+        now = time.monotonic()
+        with self._lock:
+            up = sorted((e for e in self.endpoints if e.down_until <= now), key=lambda e: self._cost(e, now))
+            down = sorted((e for e in self.endpoints if e.down_until > now), key=lambda e: e.down_until)
+        return up + down
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            endpoints = [{
+                'endpoint': e.name,
+                'latency_ms': round(e.latency * 1000, 2) if e.latency is not None else None,
+                'error_rate': round(e.error_rate, 3),
+                'up': e.down_until <= now,
+                'requests': e.requests,
+                'errors': e.errors,
+            } for e in self.endpoints]
+            return dict(self.stats, endpoints=endpoints)
+
+    # ==================== ESTRATÉGIAS ====================
+
+    def _failover(self, method, payload):
+        error = None
+        for attempt, endpoint in enumerate(self.ranked()):
+            if attempt:
+                self._failed_over(method)
+            try:
+                return self._timed(endpoint, payload)
+            except EndpointError as e:
+                error = e
+        raise error
+
+    def _hedged(self, method, payload):
+        candidates = self.ranked()
+        pending = {}
+        launched = [0]
+
+        def launch():
+            endpoint = candidates[launched[0]]
+            launched[0] += 1
+            pending[self._executor.submit(self._timed, endpoint, payload)] = endpoint
+            return time.monotonic() + self._hedge_delay(endpoint)
+
+        primary = candidates[0]
+        hedge_at = launch()
+        hedges = 0
+        error = None
+        while pending:
+            can_hedge = hedges < self.max_hedges and launched[0] < len(candidates)
+            timeout = max(0.0, hedge_at - time.monotonic()) if can_hedge else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Limite de latência estourado: mesma leitura no próximo endpoint, vale a primeira resposta
+                hedges += 1
+                self._count(hedged=1)
+                get_registry().inc(HEDGED_TOTAL, method=method)
+                hedge_at = launch()
+                continue
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    response = future.result()
+                except EndpointError as e:
+                    error = e
+                    continue
+                if endpoint is not primary and hedges:
+                    self._count(hedge_wins=1)
+                return response
+            if not pending and launched[0] < len(candidates):
+                self._failed_over(method)
+                hedge_at = launch()
+        raise error
+
+    def _send_transaction(self, payload, params):
+        """Broadcast com failover sem reenvio de uma tx que algum node já recebeu"""
+        tx_hash = '0x' + keccak(bytes(HexBytes(params[0]))).hex()
+        request_id = json.loads(payload)['id']
+        error = None
+        for endpoint in self.ranked():
+            if error is not None:
+                if self._tx_known(tx_hash):
+                    return self._recovered(request_id, tx_hash, error)
+                self._failed_over(SEND_METHOD)
+            try:
+                response = self._timed(endpoint, payload)
+            except EndpointError as e:
+                error = e
+                continue
+            message = str((response.get('error') or {}).get('message', '')).lower()
+            if error is not None and any(marker in message for marker in _KNOWN_TX_MARKERS) \
+                    and self._tx_known(tx_hash):
+                return self._recovered(request_id, tx_hash, error)
+            return response
+        if self._tx_known(tx_hash):
+            return self._recovered(request_id, tx_hash, error)
+        raise error
+
+    def _tx_known(self, tx_hash):
+        try:
+            response = self._hedged('eth_getTransactionByHash',
+                                    self.encode_rpc_request('eth_getTransactionByHash', [tx_hash]))
+        except EndpointError:
+            return False
+        return bool(response.get('result'))
+
+    def _recovered(self, request_id, tx_hash, error):
+        print(f"🛰️  Broadcast {tx_hash[:18]}... already known after RPC failure ({error}), not re-sending",
+              file=sys.stderr)
+        self._count(send_recovered=1)
+        get_registry().inc(SEND_RECOVERED_TOTAL)
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': tx_hash}
+
+    # ==================== MEDIÇÃO ====================
+
+    def _latency(self, endpoint, now):
+        """EWMA da latência decaída pelo tempo desde a última amostra (0 se nunca medido)"""
+        if endpoint.latency is None:
+            return 0.0
+        return endpoint.latency * math.exp(-max(0.0, now - endpoint.measured_at) / self.decay)
+
+    def _cost(self, endpoint, now):
+        # Nunca medido custa 0: recebe tráfego até ter uma EWMA
+        return self._latency(endpoint, now) / max(0.05, 1.0 - endpoint.error_rate)
+
+    def _hedge_delay(self, endpoint):
+        if endpoint.latency is None:
+            return max(self.hedge_min, INITIAL_HEDGE_DELAY)
+        with self._lock:
+            latency = self._latency(endpoint, time.monotonic())
+        return max(self.hedge_min, self.hedge_multiplier * latency)
+
+    def _timed(self, endpoint, payload):
+        started = time.monotonic()
+        try:
+            response = endpoint.post(payload)
+        except EndpointError:
+            self._record(endpoint, time.monotonic() - started, False)
+            raise
+        self._record(endpoint, time.monotonic() - started, True)
+        return response
+
+    def _record(self, endpoint, elapsed, ok):
+        alpha = self.alpha
+        now = time.monotonic()
+        probe = False
+        with self._lock:
+            endpoint.requests += 1
+            if ok:
+                if endpoint.latency is None:
+                    endpoint.latency = elapsed
+                else:
+                    latency = self._latency(endpoint, now)
+                    sample = min(elapsed, self.hedge_multiplier * latency) if latency else elapsed
+                    endpoint.latency = alpha * sample + (1 - alpha) * latency
+                endpoint.measured_at = now
+                endpoint.failures = 0
+            else:
+                endpoint.errors += 1
+                endpoint.failures += 1
+                if endpoint.failures >= self.max_failures:
+                    if endpoint.down_until <= now:
+                        print(f"🛰️  RPC {endpoint.name} out of rotation for {self.cooldown:g}s "
+                              f"({endpoint.failures} failures in a row)", file=sys.stderr)
+                    endpoint.down_until = now + self.cooldown
+                probe = not endpoint.probing
+                endpoint.probing = True
+            endpoint.error_rate = alpha * (0.0 if ok else 1.0) + (1 - alpha) * endpoint.error_rate
+            latency, error_rate, up = endpoint.latency, endpoint.error_rate, endpoint.down_until <= now
+
+        if probe:
+            # Thread daemon: um endpoint morto é sondado a cada cooldown e não pode segurar a saída do processo
+            threading.Thread(target=self._probe, args=(endpoint,), name=f'kyc-rpc-probe-{endpoint.name}',
+                             daemon=True).start()
+        registry = get_registry()
+        registry.observe(REQUEST_METRIC, elapsed, endpoint=endpoint.name, outcome='ok' if ok else 'error')
+        if latency is not None:
+            registry.set(LATENCY_GAUGE, latency, endpoint=endpoint.name)
+        registry.set(ERROR_RATE_GAUGE, error_rate, endpoint=endpoint.name)
+        registry.set(UP_GAUGE, int(up), endpoint=endpoint.name)
+
+    def _probe(self, endpoint):
+        """Sonda um endpoint com falhas seguidas até ele responder; fora da rotação, no fim de cada cooldown"""
+        payload = self.encode_rpc_request('eth_blockNumber', [])
+        while True:
+            with self._lock:
+                if not endpoint.failures:
+                    endpoint.probing = False
+                    return
+                wait = endpoint.down_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self._timed(endpoint, payload)
+            except EndpointError:
+                pass
+
+    def _failed_over(self, method):
+        self._count(failovers=1)
+        get_registry().inc(FAILOVER_TOTAL, method=method)
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_rpc_pool(urls=None):
+    """RpcPool da instância para os endpoints (default KYC_RPC_URLS), ou None sem pool configurado"""
+    urls = tuple(urls or rpc_urls())
+    if not urls:
+        return None
+    with _pools_lock:
+        pool = _pools.get(urls)
+        if pool is None:
+            pool = _pools[urls] = RpcPool(
+                list(urls),
+                alpha=float(os.getenv('KYC_RPC_EWMA_ALPHA', '0.2')),
+                decay=float(os.getenv('KYC_RPC_DECAY', '10')),
+                hedge_min=float(os.getenv('KYC_RPC_HEDGE_MIN', '0.05')),
+                hedge_multiplier=float(os.getenv('KYC_RPC_HEDGE_MULTIPLIER', '3')),
+                max_hedges=int(os.getenv('KYC_RPC_MAX_HEDGES', '1')),
+                max_failures=int(os.getenv('KYC_RPC_MAX_FAILURES', '3')),
+                cooldown=float(os.getenv('KYC_RPC_COOLDOWN', '5')),
+                timeout=float(os.getenv('KYC_RPC_TIMEOUT', '10')),
+            )
+        return pool
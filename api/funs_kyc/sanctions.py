@@ -0,0 +1,403 @@
+"""
+Sanctions screening indexado (Fase 4 do reasoning)
+
+Carrega uma lista local (OFAC/UN/EU/PEP...) em índices em memória e faz fuzzy match
+do nome do applicant:
+
+    - vocabulário de tokens normalizados (sem acento, maiúsculo) -> postings de nomes
+    - índice de deleções (SymSpell, distância 1 de cada lado => Levenshtein <= 2)
+    - buckets fonéticos (Soundex) por token
+
+Uma query expande cada token para os tokens parecidos do vocabulário; as postings
+desses tokens (arrays NumPy) dão, por nome, a melhor similaridade de cada token da
+query, e o score combina a cobertura da query e do nome listado (0-100).
+Retorna os top candidatos.
+
+Formato da lista (KYC_SANCTIONS_LIST): CSV com header (name obrigatório; id, source,
+country, aliases separados por ';') ou JSONL com os mesmos campos (aliases como lista).
+
+Sem lista (KYC_SANCTIONS_LIST vazio) nenhum nome é checado: screen() devolve
+loaded=False e o applicant vai para revisão manual (funs_kyc.scoring), nunca é
+aprovado como "sem sanções". Lista configurada que não existe é erro de configuração
+(FileNotFoundError), não uma lista vazia.
+
+Hot reload: o arquivo é verificado a cada KYC_SANCTIONS_RELOAD_INTERVAL segundos;
+se mudou, o novo índice é construído em background e trocado atomicamente -
+queries continuam usando o índice anterior até a troca.
+"""
+
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 70
+DEFAULT_TOP_K = 5
+MIN_TOKEN_SIMILARITY = 0.6
+PHONETIC_FLOOR = 0.8
+DEFAULT_DATABASES = ("OFAC", "UN", "EU", "Interpol", "PEP")
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]+')
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(
+    ('AEIOUYHW', 'BFPV', 'CGJKQSXZ', 'DT', 'L', 'MN', 'R')) for c in letters}
+
+
+# ==================== NORMALIZAÇÃO / SIMILARIDADE ====================
+
+def normalize_name(name):
+    """'José  da Conceição-Júnior' -> ['JOSE', 'DA', 'CONCEICAO', 'JUNIOR']"""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    ascii_name = ''.join(c for c in decomposed if not unicodedata.combining(c)).upper()
+    return [token for token in _NON_ALNUM.split(ascii_name) if token]
+
+
+def soundex(token):
+    if not token:
+        return ''
+    code = token[0]
+    previous = _SOUNDEX_CODES.get(token[0], '')
+    for c in token[1:]:
+        digit = _SOUNDEX_CODES.get(c, '')
+        if digit and digit != '0' and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in 'HW':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def levenshtein(a, b):
+    """Distância de edição (bit-parallel de Myers/Hyyrö - O(len) para tokens de nomes)"""
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return len(b)
+
+    peq = {}
+    for i, c in enumerate(a):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = mask, 0, len(a)
+    for c in b:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        pv = ((mh << 1) | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
+
+
+def token_similarity(a, b, same_sound=None):
+    """1 - Levenshtein normalizado, com piso para tokens foneticamente iguais"""
+    if a == b:
+        return 1.0
+    similarity = 1.0 - levenshtein(a, b) / max(len(a), len(b))
+    if same_sound is None:
+        same_sound = soundex(a) == soundex(b)
+    return max(similarity, PHONETIC_FLOOR) if same_sound else similarity
+
+
+def _deletes(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))} if len(token) > 3 else set()
+
+
+# ==================== LISTA ====================
+
+def load_entities(path):
+    """Lê CSV/JSONL -> lista de dicts {id, name, source, country, aliases}"""
+    entities = []
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl') or path.endswith('.ndjson'):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    aliases = record.get('aliases') or []
+                    if isinstance(aliases, str):
+                        aliases = [a for a in aliases.split(';') if a.strip()]
+                    record['aliases'] = aliases
+                    entities.append(record)
+        else:
+            for row in csv.DictReader(f):
+                row['aliases'] = [a for a in (row.get('aliases') or '').split(';') if a.strip()]
+                entities.append(row)
+
+    for i, entity in enumerate(entities):
+        if not entity.get('name'):
+            raise ValueError(f"Sanctions entry {i} has no name")
+        entity.setdefault('id', str(i))
+        entity.setdefault('source', 'UNKNOWN')
+    return entities
+
+
+# ==================== ÍNDICE ====================
+
+class SanctionsIndex:
+    """Índice imutável de uma versão da lista (substituído inteiro no reload)"""
+
+    def __init__(self, entities, version=None):
+        self.entities = entities
+        self.version = version
+        self.databases = tuple(sorted({e.get('source') or 'UNKNOWN' for e in entities}))
+
+        vocab = {}
+        postings = []
+        self.name_entity = array('I')
+        self.name_text = []
+        self.name_offsets = array('I', [0])
+        self.name_tokens = array('I')
+
+        for entity_index, entity in enumerate(entities):
+            for text in [entity['name']] + list(entity.get('aliases') or []):
+                tokens = normalize_name(text)
+                if not tokens:
+                    continue
+                name_id = len(self.name_text)
+                self.name_text.append(text)
+                self.name_entity.append(entity_index)
+                for token in dict.fromkeys(tokens):
+                    token_id = vocab.get(token)
+                    if token_id is None:
+                        token_id = vocab[token] = len(postings)
+                        postings.append(array('I'))
+                    postings[token_id].append(name_id)
+                    self.name_tokens.append(token_id)
+                self.name_offsets.append(len(self.name_tokens))
+
+        self.vocab = vocab
+        self.tokens = list(vocab)
+        self.postings = [np.frombuffer(p, dtype=np.uint32) for p in postings]
+        offsets = np.frombuffer(self.name_offsets, dtype=np.uint32)
+        self.name_length = np.diff(offsets).astype(np.float32)
+
+        self.deletes = {}
+        self.phonetic = {}
+        self.token_sound = []
+        for token, token_id in vocab.items():
+            for deleted in _deletes(token):
+                self.deletes.setdefault(deleted, []).append(token_id)
+            code = soundex(token)
+            self.token_sound.append(code)
+            self.phonetic.setdefault(code, []).append(token_id)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def _similar_tokens(self, token):
+        """{token_id: similaridade} dos tokens do vocabulário parecidos com `token`"""
+        candidates = set()
+        exact = self.vocab.get(token)
+        if exact is not None:
+            candidates.add(exact)
+        for deleted in _deletes(token):
+            candidates.update(self.deletes.get(deleted, ()))
+            if deleted in self.vocab:
+                candidates.add(self.vocab[deleted])
+        candidates.update(self.deletes.get(token, ()))
+        code = soundex(token)
+        for token_id in self.phonetic.get(code, ()):
+            if abs(len(self.tokens[token_id]) - len(token)) <= 2:
+                candidates.add(token_id)
+
+        similar = {}
+        for token_id in candidates:
+            similarity = token_similarity(token, self.tokens[token_id], self.token_sound[token_id] == code)
+            if similarity >= MIN_TOKEN_SIMILARITY:
+                similar[token_id] = similarity
+        return similar
+
+    def search(self, name, top_k=DEFAULT_TOP_K):
+        """Top candidatos [(score 0-100, name_id)] para um nome"""
+        query = list(dict.fromkeys(normalize_name(name)))
+        if not query:
+            return []
+
+        # Por token da query: (name_id, melhor similaridade) entre os tokens parecidos
+        matched_names = []
+        matched_scores = []
+        for token in query:
+            similar = self._similar_tokens(token)
+            if not similar:
+                continue
+            names = np.concatenate([self.postings[t] for t in similar])
+            scores = np.concatenate([np.full(len(self.postings[t]), s, dtype=np.float32)
+                                     for t, s in similar.items()])
+            order = np.lexsort((-scores, names))
+            names, scores = names[order], scores[order]
+            first = np.ones(len(names), dtype=bool)
+            first[1:] = names[1:] != names[:-1]
+            matched_names.append(names[first])
+            matched_scores.append(scores[first])
+        if not matched_names:
+            return []
+
+        candidates, inverse = np.unique(np.concatenate(matched_names), return_inverse=True)
+        covered = np.bincount(inverse, weights=np.concatenate(matched_scores))
+        query_coverage = covered / len(query)
+        name_coverage = np.minimum(covered / self.name_length[candidates], 1.0)
+        scores = 100 * (0.7 * query_coverage + 0.3 * name_coverage)
+
+        top = np.argpartition(-scores, top_k - 1)[:top_k] if len(scores) > top_k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(round(float(scores[i]), 1), int(candidates[i])) for i in top]
+
+
+# ==================== SCREENER (HOT RELOAD) ====================
+
+def _file_version(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class SanctionsScreener:
+    def __init__(self, path=None, threshold=DEFAULT_THRESHOLD, reload_interval=60):
+        self.path = path
+        self.threshold = threshold
+        self.reload_interval = reload_interval
+        self._index = None
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._last_check = 0.0
+
+        if path:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Sanctions list not found: {path} (KYC_SANCTIONS_LIST)")
+            self.reload()
+
+    @property
+    def index(self):
+        return self._index
+
+    def reload(self, path=None):
+        """Reconstrói o índice (síncrono) e troca atomicamente; retorna o novo índice"""
+        path = path or self.path
+        started = time.perf_counter()
+        version = _file_version(path)
+        index = SanctionsIndex(load_entities(path), version=version)
+        with self._lock:
+            self.path = path
+            self._index = index
+        print(f"🛡️  Sanctions list loaded: {len(index):,} entities, {len(index.vocab):,} tokens "
+              f"({(time.perf_counter() - started) * 1000:.0f}ms)", file=sys.stderr)
+        return index
+
+    def _reload_in_background(self):
+        try:
+            self.reload()
+        except Exception as e:
+            print(f"⚠️  Sanctions reload failed, keeping previous list: {e}", file=sys.stderr)
+        finally:
+            self._reloading = False
+
+    def maybe_reload(self):
+        """Dispara reload em background se o arquivo mudou (no máximo a cada reload_interval)"""
+        now = time.monotonic()
+        if not self.path or now - self._last_check < self.reload_interval:
+            return
+        with self._lock:
+            if self._reloading or now - self._last_check < self.reload_interval:
+                return
+            self._last_check = now
+            try:
+                changed = self._index is None or _file_version(self.path) != self._index.version
+            except OSError:
+                return
+            if not changed:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload_in_background, name='sanctions-reload', daemon=True).start()
+
+    def screen(self, name, top_k=DEFAULT_TOP_K):
+        """
+        Screening de um nome.
+
+        Returns:
+            dict com loaded (False = sem lista, nome não checado), entities_checked, databases,
+            threshold, top_similarity, hit (top_similarity >= threshold), candidates e elapsed_ms
+        """
+        self.maybe_reload()
+        index = self._index
+        started = time.perf_counter()
+
+        if index is None:
+            return {
+                'loaded': False,
+                'entities_checked': 0,
+                'databases': list(DEFAULT_DATABASES),
+                'threshold': self.threshold,
+                'top_similarity': 0,
+                'hit': False,
+                'candidates': [],
+                'elapsed_ms': 0.0,
+            }
+
+        candidates = []
+        seen = set()
+        # Nome + aliases da mesma entidade: fica só o melhor match
+        for score, name_id in index.search(name, top_k * 2):
+            entity_index = index.name_entity[name_id]
+            if entity_index in seen:
+                continue
+            seen.add(entity_index)
+            if len(candidates) == top_k:
+                break
+            entity = index.entities[entity_index]
+            candidates.append({
+                'entity_id': entity['id'],
+                'name': entity['name'],
+                'matched_name': index.name_text[name_id],
+                'source': entity.get('source'),
+                'country': entity.get('country'),
+                'similarity': score,
+            })
+        top_similarity = candidates[0]['similarity'] if candidates else 0
+
+        return {
+            'loaded': True,
+            'list_version': index.version,
+            'entities_checked': len(index),
+            'databases': list(index.databases),
+            'threshold': self.threshold,
+            'top_similarity': top_similarity,
+            'hit': top_similarity >= self.threshold,
+            'candidates': candidates,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+
+_screener = None
+_screener_lock = threading.Lock()
+
+
+def get_screener():
+    """Screener da instância (lista de KYC_SANCTIONS_LIST, carregada na primeira chamada)"""
+    global _screener
+    with _screener_lock:
+        if _screener is None:
+            _screener = SanctionsScreener(
+                path=os.getenv('KYC_SANCTIONS_LIST') or None,
+                threshold=float(os.getenv('KYC_SANCTIONS_THRESHOLD', DEFAULT_THRESHOLD)),
+                reload_interval=float(os.getenv('KYC_SANCTIONS_RELOAD_INTERVAL', '60')),
+            )
+            if _screener.index is None:
+                print("⚠️  No sanctions list loaded (set KYC_SANCTIONS_LIST) - applicants go to manual review",
+                      file=sys.stderr)
+        return _screener
+
@@ -0,0 +1,331 @@
+"""
+Score de risco do KYC (Fase 5): componentes -> score ponderado -> nível de risco
+
+Componentes (0-100):
+    - bio: resultado das fases biométricas 1A-1D (default BIO_SCORE)
+    - doc: resultado das fases de documento 2A-2B (default DOC_SCORE)
+    - age: 100 com idade >= MINIMUM_AGE, senão 0
+    - compliance: 0 com hit no screening de sanções; senão 100 menos a penalidade do
+      nível de risco do país (COUNTRY_PENALTIES)
+
+final = round(bio x w_bio + doc x w_doc + age x w_age + compliance x w_compliance),
+pesos de KYC_SCORE_WEIGHTS ("bio,doc,age,compliance" em %, default 35,25,15,25,
+normalizados para somar 100).
+
+Nível de risco = o pior entre: faixa do score (>= KYC_SCORE_LOW_RISK (90) low,
+>= KYC_SCORE_THRESHOLD (80) medium, abaixo high), nível do país e high com hit.
+Nível high = manual_review; os demais = approved, desde que o nome tenha passado pelo
+screening - sem lista de sanções carregada (screening loaded=False) = manual_review.
+
+Risco por país: tabela embutida com as listas do FATF (jun/2025: call for action =
+high, increased monitoring = medium); KYC_COUNTRY_RISK_FILE (CSV country,risk ou
+JSON {país: nível}) sobrescreve/estende a tabela. Países fora da tabela recebem
+KYC_COUNTRY_RISK_DEFAULT (low). A tabela fica em cache por arquivo e versão (mtime
++ tamanho): editar o arquivo vale na próxima chamada, sem restart.
+
+API escalar para o POST (score_applicant) e API vetorizada em NumPy para lotes
+(score_batch: um lote inteiro numa chamada). As duas fazem as mesmas operações em
+float64 na mesma ordem e arredondam igual (half to even), então devolvem o mesmo
+resultado para o mesmo applicant. NumPy só é importado na primeira chamada da API
+vetorizada.
+"""
+
+import csv
+import json
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+
+BIO_SCORE = 98      # fases 1A-1D
+DOC_SCORE = 95      # fases 2A-2B
+MINIMUM_AGE = 18
+COMPONENTS = ('bio', 'doc', 'age', 'compliance')
+DEFAULT_WEIGHTS = (35, 25, 15, 25)
+DEFAULT_THRESHOLD = 80
+DEFAULT_LOW_RISK = 90
+
+RISK_LEVELS = ('low', 'medium', 'high')
+COUNTRY_PENALTIES = {'low': 0, 'medium': 20, 'high': 60}
+
+# Listas do FATF (jun/2025) - nomes em inglês e variantes comuns
+DEFAULT_COUNTRY_RISK = {
+    # High-risk jurisdictions subject to a call for action
+    "North Korea": 'high', "Democratic People's Republic of Korea": 'high', "DPRK": 'high',
+    "Iran": 'high', "Myanmar": 'high', "Burma": 'high',
+    # Jurisdictions under increased monitoring
+    "Algeria": 'medium', "Angola": 'medium', "Bolivia": 'medium', "Bulgaria": 'medium',
+    "Burkina Faso": 'medium', "Cameroon": 'medium', "Cote d'Ivoire": 'medium', "Ivory Coast": 'medium',
+    "Croatia": 'medium', "Democratic Republic of the Congo": 'medium', "DR Congo": 'medium',
+    "Haiti": 'medium', "Kenya": 'medium', "Lao PDR": 'medium', "Laos": 'medium', "Lebanon": 'medium',
+    "Monaco": 'medium', "Mozambique": 'medium', "Namibia": 'medium', "Nepal": 'medium',
+    "Nigeria": 'medium', "South Africa": 'medium', "South Sudan": 'medium', "Syria": 'medium',
+    "Venezuela": 'medium', "Vietnam": 'medium', "Viet Nam": 'medium',
+    "British Virgin Islands": 'medium', "Virgin Islands (UK)": 'medium', "Yemen": 'medium',
+}
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]+')
+
+# NumPy e tabelas da API vetorizada - preenchidos por _load_numpy() no primeiro uso
+np = None
+_PENALTIES = None
+_LEVEL_NAMES = None
+
+
+# ==================== CONFIGURAÇÃO ====================
+
+def score_weights():
+    """Pesos (bio, doc, age, compliance) em % somando 100 (KYC_SCORE_WEIGHTS)"""
+    return _parse_weights(os.getenv('KYC_SCORE_WEIGHTS', ''))
+
+
+# Configuração parseada uma vez por valor da env var (o POST chama a cada applicant)
+@lru_cache(maxsize=8)
+def _parse_weights(raw):
+    if not raw:
+        return DEFAULT_WEIGHTS
+    weights = [float(value) for value in raw.split(',')]
+    if len(weights) != len(COMPONENTS) or min(weights) < 0 or not sum(weights):
+        raise ValueError(f"KYC_SCORE_WEIGHTS needs {len(COMPONENTS)} non-negative weights "
+                         f"({','.join(COMPONENTS)}), got {raw!r}")
+    total = sum(weights)
+    return tuple(weight * 100 / total for weight in weights)
+
+
+@lru_cache(maxsize=8)
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def score_threshold():
+    """Score mínimo para aprovação (KYC_SCORE_THRESHOLD)"""
+    return _number(os.getenv('KYC_SCORE_THRESHOLD', DEFAULT_THRESHOLD))
+
+
+def low_risk_score():
+    """Score mínimo para risco low (KYC_SCORE_LOW_RISK)"""
+    return _number(os.getenv('KYC_SCORE_LOW_RISK', DEFAULT_LOW_RISK))
+
+
+# ==================== RISCO POR PAÍS ====================
+
+@lru_cache(maxsize=4096)
+def normalize_country(country):
+    """'Côte d'Ivoire ' -> 'COTE D IVOIRE'"""
+    text = unicodedata.normalize('NFKD', country or '').encode('ascii', 'ignore').decode('ascii')
+    return _NON_ALNUM.sub(' ', text.upper()).strip()
+
+
+def _check_level(level, where):
+    level = str(level).strip().lower()
+    if level not in COUNTRY_PENALTIES:
+        raise ValueError(f"{where}: unknown risk level {level!r} (use {', '.join(RISK_LEVELS)})")
+    return level
+
+
+def load_country_risk(path):
+    """Arquivo CSV (header country,risk) ou JSON ({país: nível}) -> {país: nível}"""
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            entries = json.load(f).items()
+        else:
+            entries = [(row['country'], row['risk']) for row in csv.DictReader(f)]
+    return {country: _check_level(level, f"{path} ({country})") for country, level in entries}
+
+
+class CountryRiskTable:
+    """Nível de risco por país normalizado; consulta de país desconhecido devolve default"""
+
+    def __init__(self, levels, default='low', version=None):
+        self.default = _check_level(default, 'KYC_COUNTRY_RISK_DEFAULT')
+        self.version = version
+        self.levels = {normalize_country(country): level for country, level in levels.items()}
+
+    def __len__(self):
+        return len(self.levels)
+
+    def level(self, country):
+        return self.levels.get(normalize_country(country), self.default)
+
+    def level_codes(self, countries):
+        """Array int (índice em RISK_LEVELS) por país, uma consulta por país distinto"""
+        _load_numpy()
+        unique, inverse = np.unique(np.array([country or '' for country in countries], dtype=object),
+                                    return_inverse=True)
+        codes = np.array([RISK_LEVELS.index(self.level(country)) for country in unique], dtype=np.int64)
+        return codes[inverse.reshape(-1)]
+
+
+def _file_version(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_country_risk_table():
+    """Tabela da instância (embutida + KYC_COUNTRY_RISK_FILE), recarregada quando o arquivo muda"""
+    path = os.getenv('KYC_COUNTRY_RISK_FILE') or None
+    default = os.getenv('KYC_COUNTRY_RISK_DEFAULT', 'low')
+    key = (path, _file_version(path) if path else None, default)
+    table = _tables.get(key)
+    if table is not None:
+        return table
+    with _tables_lock:
+        table = _tables.get(key)
+        if table is None:
+            levels = dict(DEFAULT_COUNTRY_RISK)
+            if path:
+                levels.update(load_country_risk(path))
+            table = CountryRiskTable(levels, default, version=key[1])
+            _tables.clear()    # versão anterior do arquivo não volta a ser usada
+            _tables[key] = table
+        return table
+
+
+# ==================== ESCALAR ====================
+
+def risk_level(final_score, country_risk='low', hit=False, threshold=None, low_risk=None):
+    """Pior entre a faixa do score, o nível do país e high com hit no screening"""
+    threshold = score_threshold() if threshold is None else threshold
+    low_risk = low_risk_score() if low_risk is None else low_risk
+    band = 0 if final_score >= low_risk else 1 if final_score >= threshold else 2
+    return RISK_LEVELS[max(band, RISK_LEVELS.index(country_risk), 2 if hit else 0)]
+
+
+def score_applicant(user_age, user_country, screening=None, bio_score=BIO_SCORE, doc_score=DOC_SCORE, weights=None):
+    """
+    Score de um applicant.
+
+    Args:
+        screening: resultado de funs_kyc.sanctions (screen()); None = sem hit
+        weights: pesos em % (bio, doc, age, compliance); default KYC_SCORE_WEIGHTS
+
+    Returns:
+        dict com bio/doc/age/compliance_score, final_score, weights, country_risk,
+        sanctions_hit, sanctions_screened, risk_level e approved (risk_level != 'high'
+        e nome checado)
+    """
+    weights = tuple(weights or score_weights())
+    threshold, low_risk = score_threshold(), low_risk_score()
+    country_risk = get_country_risk_table().level(user_country)
+    hit = bool(screening and screening['hit'])
+    screened = is_screened(screening)
+
+    age_score = 100 if user_age >= MINIMUM_AGE else 0
+    compliance_score = 0 if hit else 100 - COUNTRY_PENALTIES[country_risk]
+    w_bio, w_doc, w_age, w_compliance = (weight / 100 for weight in weights)
+    final_score = round(bio_score * w_bio + doc_score * w_doc + age_score * w_age + compliance_score * w_compliance)
+
+    level = risk_level(final_score, country_risk, hit, threshold, low_risk)
+    return {
+        'bio_score': bio_score,
+        'doc_score': doc_score,
+        'age_score': age_score,
+        'compliance_score': compliance_score,
+        'final_score': final_score,
+        'weights': weights,
+        'threshold': threshold,
+        'country_risk': country_risk,
+        'sanctions_hit': hit,
+        'sanctions_screened': screened,
+        'risk_level': level,
+        'approved': level != 'high' and screened,
+    }
+
+
+def is_screened(screening):
+    """False quando o screening rodou sem lista carregada (nome não checado)"""
+    return screening is None or screening.get('loaded', True)
+
+
+# ==================== VETORIZADO ====================
+
+def _load_numpy():
+    """Import do NumPy + tabelas de penalidade/níveis, uma vez por processo"""
+    global np, _PENALTIES, _LEVEL_NAMES
+    if np is not None:
+        return
+    import numpy
+
+    _PENALTIES = numpy.array([COUNTRY_PENALTIES[level] for level in RISK_LEVELS], dtype=numpy.int64)
+    _LEVEL_NAMES = numpy.array(RISK_LEVELS, dtype=object)
+    np = numpy   # por último: outra thread só vê np depois das tabelas prontas
+
+
+def score_batch(ages, countries, hits=None, bio_scores=None, doc_scores=None, weights=None, screened=None):
+    """
+    Score de um lote inteiro numa chamada - mesmo resultado de score_applicant() por linha.
+
+    Args:
+        ages, countries: um valor por applicant
+        hits: bool por applicant (screening['hit']); None = nenhum hit
+        bio_scores / doc_scores: por applicant; None = BIO_SCORE / DOC_SCORE
+        screened: bool por applicant (is_screened(screening)); None = todos checados
+
+    Returns:
+        dict de arrays {bio_score, doc_score, age_score, compliance_score, final_score,
+        country_risk, sanctions_hit, sanctions_screened, risk_level, approved} + weights e threshold
+    """
+    _load_numpy()
+    n = len(ages)
+    weights = tuple(weights or score_weights())
+    threshold, low_risk = score_threshold(), low_risk_score()
+    country_codes = get_country_risk_table().level_codes(countries) if n else np.zeros(0, dtype=np.int64)
+    hits = np.zeros(n, dtype=bool) if hits is None else np.asarray(hits, dtype=bool)
+    screened = np.ones(n, dtype=bool) if screened is None else np.asarray(screened, dtype=bool)
+
+    def component(values, default):
+        if values is None:
+            return np.full(n, default, dtype=np.float64)
+        return np.asarray(values, dtype=np.float64)
+
+    bio = component(bio_scores, BIO_SCORE)
+    doc = component(doc_scores, DOC_SCORE)
+    age = np.where(np.asarray(ages, dtype=np.int64) >= MINIMUM_AGE, 100, 0)
+    compliance = np.where(hits, 0, 100 - _PENALTIES[country_codes])
+    w_bio, w_doc, w_age, w_compliance = (weight / 100 for weight in weights)
+    # Mesma ordem de operações do escalar: ((bio + doc) + age) + compliance
+    final = np.round(bio * w_bio + doc * w_doc + age * w_age + compliance * w_compliance).astype(np.int64)
+
+    band = np.where(final >= low_risk, 0, np.where(final >= threshold, 1, 2))
+    risk = np.maximum.reduce([band, country_codes, np.where(hits, 2, 0)])
+    return {
+        'bio_score': bio,
+        'doc_score': doc,
+        'age_score': age,
+        'compliance_score': compliance,
+        'final_score': final,
+        'weights': weights,
+        'threshold': threshold,
+        'country_risk': _LEVEL_NAMES[country_codes],
+        'sanctions_hit': hits,
+        'sanctions_screened': screened,
+        'risk_level': _LEVEL_NAMES[risk],
+        'approved': (risk != 2) & screened,
+    }
+
+
+def batch_rows(batch):
+    """dict de arrays de score_batch() -> lista de dicts no formato de score_applicant()"""
+    scalars = ('bio_score', 'doc_score', 'age_score', 'compliance_score', 'final_score')
+    return [{
+        **{name: _plain(batch[name][i]) for name in scalars},
+        'weights': batch['weights'],
+        'threshold': batch['threshold'],
+        'country_risk': batch['country_risk'][i],
+        'sanctions_hit': bool(batch['sanctions_hit'][i]),
+        'sanctions_screened': bool(batch['sanctions_screened'][i]),
+        'risk_level': batch['risk_level'][i],
+        'approved': bool(batch['approved'][i]),
+    } for i in range(len(batch['final_score']))]
+
+
+def _plain(value):
+    """Escalar NumPy -> int/float do Python (int quando não tem parte fracionária, como no escalar)"""
+    value = value.item()
+    return int(value) if isinstance(value, float) and value.is_integer() else value
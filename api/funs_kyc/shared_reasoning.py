@@ -0,0 +1,180 @@
+"""
+Deduplicação do corpo estático do reasoning no IPFS (layout compartilhado)
+
+O texto de metodologia (MTCNN, FaceNet, MiDaS, ICAO 9303...) é igual em toda attestation.
+Neste layout ele é pinado UMA vez, endereçado pelo sha256 do conteúdo
+(kyc_methodology_<sha256[:16]>.json), junto com os templates das fases 2A-5.
+O objeto de cada applicant guarda apenas os slots (nome, país, CPF, passaporte,
+idade, scores) + metadados, encriptados, e uma referência ao shared body.
+
+resolve_private_reasoning() reconstrói o PrivateReasoning completo na leitura -
+o resultado é igual ao to_dict() que seria encriptado no layout antigo.
+
+Desative com KYC_SHARED_REASONING=0 (volta ao payload completo por attestation).
+
+Relação com compact.py: as duas camadas tiram o texto estático do payload por
+caminhos diferentes, e o ganho se sobrepõe. Medido em bench_shared_reasoning.py
+(bytes do documento pinado por attestation):
+    payload completo JSON   ~61.6 KB    compartilhado JSON   ~3.5 KB
+    payload completo CBOR    ~2.7 KB    compartilhado CBOR   ~1.7 KB
+Sobre o CBOR o layout compartilhado economiza ~1.6x, não uma ordem de grandeza: o
+que resta é o envelope (public, nonce, encryption_id, ciphertext em hex) e os slots.
+As duas ficam porque cobrem casos diferentes:
+- o compacto é autocontido (decifra sem buscar outro objeto) e vale também sem
+  slots - documento em streaming, reasoning montado fora dos templates;
+- o compartilhado encripta ~2x menos bytes e não depende do dicionário embutido
+  no código: o corpo estático fica pinado e verificado pelo sha256.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from dataclasses import asdict
+
+from anna_protocol import DetailedReasoningStep, PrivateReasoning
+
+from .encryption import decrypt_private
+from .reasoning_templates import STATIC_STEPS, TEMPLATED_STEPS
+
+SHARED_LAYOUT = "funs-kyc-shared-v1"
+
+_lock = threading.Lock()
+_body = None
+_pinned = {}          # bucket -> cid já pinado nesta instância
+_resolved_bodies = {}  # cid -> shared body verificado (imutável, cache sem limite prático: 1 por versão)
+
+
+def shared_layout_enabled():
+    return os.getenv('KYC_SHARED_REASONING', '1').lower() not in ('0', 'false', 'no')
+
+
+def _canonical_bytes(data):
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def shared_body():
+    """(documento, sha256, filename) do shared body desta versão dos templates"""
+    global _body
+    if _body is None:
+        document = {
+            "layout": SHARED_LAYOUT,
+            "static_steps": [asdict(step) for step in STATIC_STEPS],
+            "step_templates": [template.to_dict() for template in TEMPLATED_STEPS]
+        }
+        digest = hashlib.sha256(_canonical_bytes(document)).hexdigest()
+        _body = (document, digest, f"kyc_methodology_{digest[:16]}.json")
+    return _body
+
+
+def _exists(filebase, filename):
+    try:
+        filebase.s3.head_object(Bucket=filebase.bucket_name, Key=filename)
+        return True
+    except Exception:
+        return False
+
+
+def ensure_shared_body(filebase):
+    """Pina o shared body se ainda não existir no bucket; retorna a referência {cid, sha256}"""
+    document, digest, filename = shared_body()
+    bucket = getattr(filebase, 'bucket_name', None)
+
+    with _lock:
+        cid = _pinned.get(bucket)
+        if cid is None:
+            if _exists(filebase, filename):
+                cid = filename
+            else:
+                cid = filebase.upload_json(document, filename=filename)
+                print(f"📌 Shared reasoning body pinned: {cid}", file=sys.stderr)
+            _pinned[bucket] = cid
+
+    return {"cid": cid, "sha256": digest}
+
+
+def split_private_reasoning(private_reasoning, slots, shared_ref):
+    """Plaintext por applicant no layout compartilhado (somente campos variáveis)"""
+    data = {
+        "layout": SHARED_LAYOUT,
+        "shared_body": shared_ref,
+        "slots": slots,
+        "ai_model": private_reasoning.ai_model,
+        "processing_time": private_reasoning.processing_time
+    }
+    if private_reasoning.raw_input:
+        data["raw_input"] = private_reasoning.raw_input
+    if private_reasoning.additional_metadata:
+        data["additional_metadata"] = private_reasoning.additional_metadata
+    return data
+
+
+def _render_value(value, slots):
+    if isinstance(value, dict) and set(value) == {"$slot"}:
+        return slots[value["$slot"]]
+    return value
+
+
+def _render_step(template, slots):
+    return {
+        "step": template["step"],
+        "action": template["action"],
+        "input": {key: _render_value(value, slots) for key, value in template["input"].items()},
+        "analysis": template["analysis"].format_map(slots),
+        "ai_reasoning": template["ai_reasoning"].format_map(slots),
+        "score": _render_value(template["score"], slots),
+        "confidence": template["confidence"],
+        "result": template["result"].format_map(slots)
+    }
+
+
+def load_shared_body(shared_ref, fetch):
+    """Busca (uma vez por cid) e verifica o shared body; fetch(cid) -> dict"""
+    cid = shared_ref["cid"]
+    body = _resolved_bodies.get(cid)
+    if body is None:
+        body = fetch(cid)
+        digest = hashlib.sha256(_canonical_bytes(body)).hexdigest()
+        if digest != shared_ref["sha256"]:
+            raise ValueError(f"Shared reasoning body {cid} does not match sha256 {shared_ref['sha256']}")
+        _resolved_bodies[cid] = body
+    return body
+
+
+def resolve_private_reasoning(private_data, fetch):
+    """
+    Reconstrói o dict completo do PrivateReasoning (mesmo formato de to_dict()).
+    Payloads no layout antigo (com 'steps') são retornados como estão.
+    """
+    if private_data.get("layout") != SHARED_LAYOUT:
+        return private_data
+
+    body = load_shared_body(private_data["shared_body"], fetch)
+    slots = private_data["slots"]
+
+    data = {
+        "steps": body["static_steps"] + [_render_step(t, slots) for t in body["step_templates"]],
+        "ai_model": private_data["ai_model"],
+        "processing_time": private_data["processing_time"]
+    }
+    if private_data.get("raw_input"):
+        data["raw_input"] = private_data["raw_input"]
+    if private_data.get("additional_metadata"):
+        data["additional_metadata"] = private_data["additional_metadata"]
+    return data
+
+
+def fetch_private_reasoning(client, ipfs_cid):
+    """Equivalente a client.decrypt_reasoning(), aceitando também o layout compartilhado"""
+    document = client.filebase.fetch(ipfs_cid)
+    private_data = decrypt_private(document["private_encrypted"], client.private_key)
+    full = resolve_private_reasoning(private_data, client.filebase.fetch)
+
+    return PrivateReasoning(
+        steps=[DetailedReasoningStep(**step) for step in full["steps"]],
+        ai_model=full["ai_model"],
+        processing_time=full["processing_time"],
+        raw_input=full.get("raw_input"),
+        additional_metadata=full.get("additional_metadata")
+    )
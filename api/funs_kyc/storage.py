@@ -0,0 +1,362 @@
+"""
+Uploader do Filebase (S3) com pool de conexões, retries com jitter, multipart em streaming e gzip opcional
+
+Substitui o FilebaseClient do SDK no client (mesma interface: upload_json, fetch,
+get_url, s3, bucket_name):
+- um client boto3 por credenciais na instância, com pool HTTP keep-alive
+  (KYC_FILEBASE_POOL_SIZE, default 16) - sobrevive à recriação do ANNAClient
+- JSON serializado exatamente como o SDK (indent=2, ensure_ascii=False) e pinado como
+  JSON puro: o CID cobre o texto e gateways IPFS servem o documento legível.
+  KYC_FILEBASE_COMPRESSION=gzip comprime (Content-Encoding: gzip) - só o S3 entende
+  o header; pelo gateway o objeto é o binário gzip e o CID passa a ser o dos bytes
+  comprimidos, diferente do CID do mesmo documento sem compressão
+- cada chamada S3 é repetida em erro de conexão, 5xx, 429 e SlowDown, com backoff
+  exponencial e full jitter (KYC_FILEBASE_RETRIES tentativas, default 4)
+- o corpo é gerado em pedaços (iterencode, -> gzip se ligado); se passar de KYC_FILEBASE_PART_SIZE
+  (default 8 MiB, mínimo 5 MiB do S3) vira multipart, uma parte em memória por vez
+
+fetch() descomprime pelo Content-Encoding ou pelo magic do gzip (objetos lidos por
+gateway IPFS chegam sem o header), então objetos pinados com e sem gzip são legíveis.
+fetch_raw() devolve os bytes armazenados, para conferir o CID (verification.py).
+KYC_FILEBASE_ENDPOINT troca o endpoint S3 (default https://s3.filebase.com).
+
+prepare_json() monta o corpo final em memória e calcula o CID IPFS localmente (cid.py);
+upload_prepared() envia e confere o CID que o Filebase reporta (x-amz-meta-cid).
+submit_upload() roda o upload em background para a attestation não esperar o pin
+antes do broadcast.
+"""
+
+import contextvars
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .cid import compute_cid
+
+DEFAULT_ENDPOINT = 'https://s3.filebase.com'
+DEFAULT_BUCKET = 'anna-protocol'
+POOL_SIZE = int(os.getenv('KYC_FILEBASE_POOL_SIZE', '16'))
+MAX_ATTEMPTS = max(1, int(os.getenv('KYC_FILEBASE_RETRIES', '4')))
+RETRY_BASE = float(os.getenv('KYC_FILEBASE_RETRY_BASE', '0.1'))
+RETRY_CAP = float(os.getenv('KYC_FILEBASE_RETRY_CAP', '2'))
+MIN_PART_SIZE = 5 * 1024 * 1024
+PART_SIZE = max(MIN_PART_SIZE, int(os.getenv('KYC_FILEBASE_PART_SIZE', str(8 * 1024 * 1024))))
+GZIP_LEVEL = int(os.getenv('KYC_FILEBASE_GZIP_LEVEL', '6'))
+CHUNK_SIZE = 64 * 1024      # texto JSON acumulado antes de cada passada no compressor
+GZIP_MAGIC = b'\x1f\x8b'
+
+METADATA = {'anna-protocol': 'v2.0.1', 'content-type': 'reasoning'}   # mesmos do SDK
+RETRYABLE_CODES = {'SlowDown', 'RequestTimeout', 'RequestTimeTooSkewed', 'InternalError',
+                   'ServiceUnavailable', 'Throttling', 'ThrottlingException'}
+
+
+def compression_enabled():
+    return os.getenv('KYC_FILEBASE_COMPRESSION', 'none').lower() == 'gzip'
+
+
+def encode_json(data):
+    """Texto do documento em pedaços - mesma serialização do FilebaseClient.upload_json"""
+    return encode_text(json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(data))
+
+
+def encode_text(pieces):
+    """Pedaços de texto (str) -> bytes UTF-8 acumulados em blocos de ~CHUNK_SIZE"""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def gzip_chunks(chunks, level=GZIP_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+class PreparedUpload:
+    """Corpo final (JSON, gzip se ligado) em memória e o CID IPFS desses bytes, conhecido antes do upload"""
+
+    def __init__(self, chunks, content_encoding, raw_size):
+        self.chunks = chunks
+        self.content_encoding = content_encoding
+        self.raw_size = raw_size
+        self.size = sum(len(chunk) for chunk in chunks)
+        self.cid = compute_cid(chunks)
+
+
+def prepare_json(data):
+    chunks = list(encode_json(data))
+    raw_size = sum(len(chunk) for chunk in chunks)
+    if compression_enabled():
+        return PreparedUpload(list(gzip_chunks(chunks)), 'gzip', raw_size)
+    return PreparedUpload(chunks, None, raw_size)
+
+
+def decode_body(body, content_encoding=None):
+    if content_encoding == 'gzip' or body[:2] == GZIP_MAGIC:
+        return zlib.decompress(body, 31)
+    return body
+
+
+def _retryable(error):
+    from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return True
+    if isinstance(error, ClientError):
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+        return status >= 500 or status == 429 or error.response.get('Error', {}).get('Code') in RETRYABLE_CODES
+    return False
+
+
+class FilebaseUploader:
+    def __init__(self, api_key, api_secret, bucket_name=DEFAULT_BUCKET, endpoint_url=None,
+                 max_attempts=MAX_ATTEMPTS, part_size=PART_SIZE):
+        import boto3
+        from botocore.config import Config
+
+        self.bucket_name = bucket_name
+        self.endpoint_url = endpoint_url or os.getenv('KYC_FILEBASE_ENDPOINT', DEFAULT_ENDPOINT)
+        self.max_attempts = max_attempts
+        self.part_size = max(MIN_PART_SIZE, part_size)
+        # Retries do botocore desligados - o backoff com jitter é feito aqui, por chamada
+        options = {
+            'signature_version': 's3v4',
+            's3': {'addressing_style': 'path'},
+            'max_pool_connections': POOL_SIZE,
+            'tcp_keepalive': True,
+            'connect_timeout': 5,
+            'read_timeout': 30,
+            'retries': {'total_max_attempts': 1},
+        }
+        if 'request_checksum_calculation' in Config.OPTION_DEFAULTS:
+            # botocore >= 1.36 manda checksums CRC32 (aws-chunked) por default; S3 compatíveis recusam
+            options.update(request_checksum_calculation='when_required', response_checksum_validation='when_required')
+        # Session própria: boto3.client() na session default não é thread-safe
+        self.s3 = boto3.session.Session().client(
+            's3',
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=api_key,
+            aws_secret_access_key=api_secret,
+            region_name='us-east-1',
+            config=Config(**options)
+        )
+        self._reports_cid = True     # False depois de um HEAD sem cid (store sem IPFS): não consulta mais
+        self._stats_lock = threading.Lock()
+        self.stats = {'uploads': 0, 'multipart_uploads': 0, 'parts': 0, 'bytes_raw': 0, 'bytes_sent': 0,
+                      'fetches': 0, 'retries': 0, 'cid_verified': 0, 'cid_unverified': 0}
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def _call(self, operation, **params):
+        """Chamada S3 com backoff exponencial + full jitter nos erros transitórios"""
+        for attempt in range(self.max_attempts):
+            if hasattr(params.get('Body'), 'seek'):
+                params['Body'].seek(0)
+            try:
+                return getattr(self.s3, operation)(**params)
+            except Exception as e:
+                if attempt + 1 >= self.max_attempts or not _retryable(e):
+                    raise
+                delay = random.uniform(0, min(RETRY_CAP, RETRY_BASE * 2 ** attempt))
+                self._count(retries=1)
+                print(f"🔁 Filebase {operation} failed ({e}), retry {attempt + 1} in {delay * 1000:.0f}ms",
+                      file=sys.stderr)
+                time.sleep(delay)
+
+    # ==================== UPLOAD ====================
+
+    def upload_json(self, data, filename=None):
+        """
+        Mesmo contrato do FilebaseClient.upload_json
+
+        Returns:
+            Filename/key do objeto (usado como CID)
+        """
+        if not filename:
+            filename = f"reasoning_{int(time.time())}.json"
+        try:
+            self.upload_stream(encode_json(data), filename, content_type='application/json')
+        except Exception as e:
+            print(f"❌ Filebase upload failed: {e}", file=sys.stderr)
+            raise Exception(f"Failed to upload to Filebase: {e}")
+        return filename
+
+    def upload_prepared(self, prepared, key):
+        """
+        Envia um PreparedUpload e confere o CID reportado pelo Filebase com o calculado localmente
+
+        Returns:
+            key do objeto
+        """
+        try:
+            response = self.upload_stream(iter(prepared.chunks), key, 'application/json',
+                                          content_encoding=prepared.content_encoding, raw_size=prepared.raw_size)
+        except Exception as e:
+            print(f"❌ Filebase upload failed: {e}", file=sys.stderr)
+            raise Exception(f"Failed to upload to Filebase: {e}")
+
+        remote = self.remote_cid(key, response)
+        if remote is None:
+            self._count(cid_unverified=1)
+        elif remote != prepared.cid:
+            raise Exception(
+                f"IPFS CID mismatch for {key}: computed {prepared.cid}, Filebase reported {remote} "
+                f"(check KYC_IPFS_CID_VERSION / KYC_IPFS_CHUNK_SIZE / KYC_IPFS_RAW_LEAVES)"
+            )
+        else:
+            self._count(cid_verified=1)
+        return key
+
+    def remote_cid(self, key, response=None):
+        """CID que o Filebase reporta (x-amz-meta-cid do PUT, senão do HEAD); None se o store não reporta"""
+        headers = (response or {}).get('ResponseMetadata', {}).get('HTTPHeaders', {})
+        if headers.get('x-amz-meta-cid'):
+            return headers['x-amz-meta-cid']
+        if not self._reports_cid:
+            return None
+        cid = self._call('head_object', Bucket=self.bucket_name, Key=key).get('Metadata', {}).get('cid')
+        if cid is None:
+            self._reports_cid = False
+            print("⚠️  Filebase did not report an IPFS CID; skipping CID verification", file=sys.stderr)
+        return cid
+
+    def upload_stream(self, chunks, key, content_type='application/octet-stream', content_encoding=None,
+                      raw_size=None):
+        """
+        Envia um corpo gerado em pedaços (bytes). Até part_size vai num PUT único;
+        acima disso, multipart com uma parte em memória por vez.
+
+        Args:
+            content_encoding: os pedaços já estão nesse encoding (prepare_json); sem ele, o
+                corpo é comprimido aqui se a compressão estiver ligada
+            raw_size: tamanho antes do encoding, para as estatísticas
+
+        Returns:
+            resposta do put_object / complete_multipart_upload
+        """
+        raw = [0]
+
+        def counted(source):
+            for chunk in source:
+                raw[0] += len(chunk)
+                yield chunk
+
+        params = {'Bucket': self.bucket_name, 'Key': key, 'ContentType': content_type, 'Metadata': METADATA}
+        body = counted(chunks)
+        if content_encoding:
+            params['ContentEncoding'] = content_encoding
+        elif compression_enabled():
+            body = gzip_chunks(body)
+            params['ContentEncoding'] = 'gzip'
+
+        buffer, size = [], 0
+        upload_id, parts = None, []
+        sent = 0
+        try:
+            for chunk in body:
+                buffer.append(chunk)
+                size += len(chunk)
+                while size >= self.part_size:
+                    if upload_id is None:
+                        upload_id = self._call('create_multipart_upload', **params)['UploadId']
+                    # Partes de exatamente part_size: o excedente do último pedaço abre a próxima
+                    overflow = size - self.part_size
+                    last = buffer.pop()
+                    cut = len(last) - overflow
+                    buffer.append(last[:cut])
+                    part = b''.join(buffer)
+                    buffer, size = ([last[cut:]] if overflow else []), overflow
+                    parts.append(self._upload_part(key, upload_id, len(parts) + 1, part))
+                    sent += len(part)
+                    del part    # não fica viva enquanto a próxima é montada
+
+            tail = b''.join(buffer)
+            if upload_id is None:
+                response = self._call('put_object', Body=tail, **params)
+            else:
+                if tail:
+                    parts.append(self._upload_part(key, upload_id, len(parts) + 1, tail))
+                response = self._call('complete_multipart_upload', Bucket=self.bucket_name, Key=key,
+                                      UploadId=upload_id, MultipartUpload={'Parts': parts})
+        except Exception:
+            if upload_id is not None:
+                try:
+                    self.s3.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+                except Exception as abort_error:
+                    print(f"⚠️  Could not abort multipart upload {upload_id}: {abort_error}", file=sys.stderr)
+            raise
+
+        self._count(uploads=1, multipart_uploads=int(upload_id is not None), parts=len(parts),
+                    bytes_raw=raw[0] if raw_size is None else raw_size, bytes_sent=sent + len(tail))
+        return response
+
+    def _upload_part(self, key, upload_id, number, data):
+        # Corpo como stream: com bytes o http.client concatena headers + corpo (mais uma cópia da parte)
+        response = self._call('upload_part', Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                              PartNumber=number, Body=io.BytesIO(data))
+        return {'PartNumber': number, 'ETag': response['ETag']}
+
+    # ==================== LEITURA ====================
+
+    def fetch(self, cid):
+        """Mesmo contrato do FilebaseClient.fetch, descomprimindo objetos gzip"""
+        try:
+            stored, content_encoding = self.fetch_raw(cid)
+            return json.loads(decode_body(stored, content_encoding).decode('utf-8'))
+        except Exception as e:
+            print(f"❌ Failed to fetch from Filebase: {e}", file=sys.stderr)
+            raise Exception(f"Failed to fetch {cid}: {e}")
+
+    def fetch_raw(self, key):
+        """(bytes exatamente como armazenados - os que o CID IPFS cobre, Content-Encoding)"""
+        response = self._call('get_object', Bucket=self.bucket_name, Key=key)
+        stored = response['Body'].read()
+        self._count(fetches=1)
+        return stored, response.get('ContentEncoding')
+
+    def get_url(self, cid):
+        return f"https://{self.bucket_name}.s3.filebase.com/{cid}"
+
+
+_uploaders = {}
+_uploaders_lock = threading.Lock()
+_upload_pool = None
+
+
+def submit_upload(fn, *args):
+    """Roda fn(*args) no pool de uploads (com o contexto da request - spans/Server-Timing) -> Future"""
+    global _upload_pool
+    with _uploaders_lock:
+        if _upload_pool is None:
+            _upload_pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='kyc-upload')
+    return _upload_pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def get_filebase_uploader(api_key, api_secret, bucket_name=DEFAULT_BUCKET):
+    """Uploader da instância para as credenciais (pool de conexões reaproveitado entre invocações)"""
+    endpoint = os.getenv('KYC_FILEBASE_ENDPOINT', DEFAULT_ENDPOINT)
+    key = hashlib.sha256(f"{api_key}|{api_secret}|{bucket_name}|{endpoint}".encode('utf-8')).hexdigest()
+    with _uploaders_lock:
+        uploader = _uploaders.get(key)
+        if uploader is None:
+            uploader = _uploaders[key] = FilebaseUploader(api_key, api_secret, bucket_name, endpoint)
+        return uploader
@@ -0,0 +1,167 @@
+"""
+Resposta em streaming do POST /api/process_kyc - um evento por etapa do pipeline
+
+Selecionado por '?stream=1' (NDJSON), 'Accept: application/x-ndjson' ou
+'Accept: text/event-stream' (SSE). Etapas enviadas na ordem:
+
+    validated -> reasoning_built -> pinned (ipfs_cid) -> tx_sent (tx_hash)
+    -> confirmed (attestation_id) -> result (body final) | error
+
+Os headers saem antes do trabalho começar, então o status HTTP é sempre 200 -
+falhas chegam como evento 'error'. Com HTTP/1.1 o corpo usa chunked encoding;
+com HTTP/1.0 (default do BaseHTTPRequestHandler) termina no fechamento da conexão.
+
+AsgiEventStream é o mesmo stream para o entry point ASGI (api/asgi.py): o pipeline
+roda em threads do executor e os eventos chegam ao event loop por uma fila.
+"""
+
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+NDJSON = 'application/x-ndjson'
+SSE = 'text/event-stream'
+
+STREAM_TRUE_VALUES = ('1', 'true', 'yes', 'ndjson')
+
+
+def stream_format(path, headers):
+    """Content-Type do stream pedido pela request, ou None para a resposta JSON normal"""
+    query = parse_qs(urlparse(path).query)
+    requested = query.get('stream', [''])[0].lower()
+    if requested == 'sse':
+        return SSE
+    if requested in STREAM_TRUE_VALUES:
+        return NDJSON
+
+    accept = headers.get('Accept') or ''
+    if SSE in accept:
+        return SSE
+    if NDJSON in accept:
+        return NDJSON
+    return None
+
+
+class EventStream:
+    """Escreve eventos de progresso no wfile de um BaseHTTPRequestHandler"""
+
+    def __init__(self, request_handler, content_type):
+        self.handler = request_handler
+        self.content_type = content_type
+        self.chunked = request_handler.request_version == 'HTTP/1.1' and request_handler.protocol_version == 'HTTP/1.1'
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        h = self.handler
+        h.send_response(200)
+        h.send_header('Content-Type', f"{self.content_type}; charset=utf-8")
+        h.send_header('Cache-Control', 'no-cache')
+        h.send_header('X-Accel-Buffering', 'no')
+        h.send_header('Access-Control-Allow-Origin', '*')
+        if self.chunked:
+            h.send_header('Transfer-Encoding', 'chunked')
+        else:
+            h.send_header('Connection', 'close')
+            h.close_connection = True
+        h.end_headers()
+        h.wfile.flush()
+        return self
+
+    def _encode(self, stage, fields):
+        payload = dict(fields, stage=stage, elapsed_ms=round((time.perf_counter() - self._started) * 1000, 1))
+        data = json.dumps(payload)
+        if self.content_type == SSE:
+            return f"event: {stage}\ndata: {data}\n\n".encode('utf-8')
+        return f"{data}\n".encode('utf-8')
+
+    def _write(self, raw):
+        wfile = self.handler.wfile
+        if self.chunked:
+            raw = b"%x\r\n%s\r\n" % (len(raw), raw)
+        wfile.write(raw)
+        wfile.flush()
+
+    def send(self, stage, **fields):
+        """Envia um evento (assinatura compatível com o callback on_stage do pipeline)"""
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._write(self._encode(stage, fields))
+            except (BrokenPipeError, ConnectionResetError):
+                # Cliente desconectou - o pipeline continua, os eventos são descartados
+                self._closed = True
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self.chunked:
+                try:
+                    self.handler.wfile.write(b"0\r\n\r\n")
+                    self.handler.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+
+class AsgiEventStream(EventStream):
+    """EventStream sobre o send() de uma conexão ASGI; send()/close() podem vir de qualquer thread"""
+
+    def __init__(self, send, content_type):
+        import asyncio
+
+        self._asgi_send = send
+        self.content_type = content_type
+        self.chunked = False     # framing fica com o servidor ASGI
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._pump = None
+
+    def headers(self):
+        return [
+            (b'content-type', f"{self.content_type}; charset=utf-8".encode('latin-1')),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+            (b'access-control-allow-origin', b'*'),
+        ]
+
+    async def start(self):
+        import asyncio
+
+        await self._asgi_send({'type': 'http.response.start', 'status': 200, 'headers': self.headers()})
+        self._pump = asyncio.ensure_future(self._drain())
+        return self
+
+    def _write(self, raw):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, raw)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+    async def _drain(self):
+        while True:
+            raw = await self._queue.get()
+            try:
+                await self._asgi_send({'type': 'http.response.body', 'body': raw or b'', 'more_body': raw is not None})
+            except (OSError, RuntimeError):
+                # Cliente desconectou - o pipeline continua, os eventos são descartados
+                with self._lock:
+                    self._closed = True
+                return
+            if raw is None:
+                return
+
+    async def wait_closed(self):
+        if self._pump is not None:
+            await self._pump
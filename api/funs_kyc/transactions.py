@@ -0,0 +1,232 @@
+"""
+Envio das transações do ANNA Protocol com nonces do NonceManager
+
+Mesma construção/assinatura do ANNAClient.submit_attestation e _set_attestation_txhash
+do SDK, mas o nonce vem de get_nonce_manager() em vez de get_transaction_count() -
+assim várias threads/instâncias podem enviar em paralelo com o mesmo signer.
+"""
+
+import sys
+import time
+
+from eth_account.messages import encode_typed_data
+from web3 import Web3
+
+from .nonces import get_nonce_manager
+from .receipts import wait_for_receipt
+
+DEFAULT_MODEL_VERSION = "claude-sonnet-4-20250514"
+MAX_NONCE_ATTEMPTS = 3
+
+# Erros do node que indicam nonce já usado por outra tx (não pelo nosso tracking)
+_NONCE_CONFLICT_MARKERS = ('nonce too low', 'already known', 'replacement transaction underpriced', 'known transaction')
+
+
+def _is_nonce_conflict(error):
+    message = str(error).lower()
+    return any(marker in message for marker in _NONCE_CONFLICT_MARKERS)
+
+
+def _broadcast_uncertain(error):
+    """
+    Erro de transporte (timeout, conexão caída, HTTP 5xx - requests/EndpointError são
+    OSError): o node pode ter recebido a tx. Erro JSON-RPC = resposta do node, rejeitou.
+    """
+    return isinstance(error, OSError)
+
+
+def _hex(value):
+    value = value.hex()
+    return value if value.startswith('0x') else f"0x{value}"
+
+
+def _broadcast(client, manager, nonce, tx):
+    """
+    Assina e envia tx com o nonce já reservado.
+    Rejeição certa do node libera o nonce (gap no meio é preenchido na hora);
+    resultado incerto mantém o nonce 'sent' com o hash local para o resync conferir.
+    """
+    try:
+        signed_tx = client.account.sign_transaction(tx)
+    except Exception:
+        _release(client, manager, nonce)
+        raise
+    tx_hash = _hex(signed_tx.hash)
+    try:
+        client.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+    except Exception as e:
+        if _broadcast_uncertain(e):
+            print(f"⚠️  Nonce {nonce}: broadcast outcome unknown ({e}), keeping it as sent {tx_hash}",
+                  file=sys.stderr)
+            manager.mark_sent(nonce, tx_hash)
+        elif not _is_nonce_conflict(e):
+            _release(client, manager, nonce)
+        raise
+    manager.mark_sent(nonce, tx_hash)
+    return tx_hash
+
+
+def _release(client, manager, nonce):
+    if manager.release(nonce):
+        fill_nonce_gap(client, manager, nonce)
+
+
+def fill_nonce_gap(client, manager, nonce):
+    """
+    Nonce liberado abaixo de txs já enviadas: elas ficam presas no mempool até ele ser
+    usado. Envia uma transferência de 0 para o próprio signer com esse nonce, a menos
+    que outra thread já o tenha pegado. Falha aqui não propaga - o gap continua
+    'released' e o próximo allocate() o usa.
+    """
+    if not manager.claim(nonce):
+        return None
+    try:
+        tx = {
+            'from': client.address, 'to': client.address, 'value': 0, 'gas': 21000,
+            'gasPrice': client.w3.eth.gas_price, 'nonce': nonce, 'chainId': client.w3.eth.chain_id,
+        }
+    except Exception as e:
+        print(f"⚠️  Could not fill nonce gap {nonce}: {e}", file=sys.stderr)
+        manager.release(nonce)
+        return None
+    try:
+        tx_hash = _broadcast(client, manager, nonce, tx)
+    except Exception as e:
+        print(f"⚠️  Could not fill nonce gap {nonce}: {e}", file=sys.stderr)
+        return None
+    print(f"🩹 Nonce gap {nonce} filled with {tx_hash}", file=sys.stderr)
+    return tx_hash
+
+
+def send_managed_transaction(client, build_tx):
+    """
+    Assina e envia build_tx(nonce) com nonce alocado pelo manager.
+    Conflitos de nonce forçam resync e nova tentativa. O nonce só é liberado quando o
+    node com certeza não aceitou a tx; com erro de transporte ele fica 'sent' e o
+    resync o confere contra a chain (pending count / tx conhecida pelo node).
+
+    Returns:
+        (tx_hash hex com 0x, nonce)
+    """
+    manager = get_nonce_manager(client)
+
+    for attempt in range(1, MAX_NONCE_ATTEMPTS + 1):
+        nonce = manager.allocate()
+        try:
+            tx = build_tx(nonce)
+        except Exception:
+            _release(client, manager, nonce)
+            raise
+        try:
+            return _broadcast(client, manager, nonce, tx), nonce
+        except Exception as e:
+            if not _is_nonce_conflict(e) or _broadcast_uncertain(e):
+                raise
+            # Nonce já usado por outra tx: sai do tracking (nunca volta a 'released')
+            print(f"⚠️  Nonce {nonce} conflict ({e}), resyncing (attempt {attempt})", file=sys.stderr)
+            manager.confirm(nonce)
+            manager.resync()
+            if attempt == MAX_NONCE_ATTEMPTS:
+                raise
+
+
+def submit_attestation_tx(client, content, reasoning, category, model_version=DEFAULT_MODEL_VERSION):
+    """
+    Broadcast de submitAttestation (sem esperar confirmação).
+
+    Returns:
+        (tx_hash, attestation_id calculado localmente, nonce)
+    """
+    if not client.attestation_contract:
+        raise ValueError("Attestation contract not configured")
+
+    reasoning_str = client._validate_reasoning(reasoning)
+
+    content_hash = Web3.keccak(text=content)
+    reasoning_hash = Web3.keccak(text=reasoning_str)
+    timestamp = int(time.time())
+
+    encoded_data = encode_typed_data(
+        domain_data={
+            'name': 'ANNA Protocol',
+            'version': '1',
+            'chainId': client.network_config['chain_id'],
+            'verifyingContract': client.attestation_contract
+        },
+        message_types={
+            'Attestation': [
+                {'name': 'contentHash', 'type': 'bytes32'},
+                {'name': 'reasoningHash', 'type': 'bytes32'},
+                {'name': 'agent', 'type': 'address'},
+                {'name': 'modelVersion', 'type': 'string'},
+                {'name': 'timestamp', 'type': 'uint256'},
+                {'name': 'category', 'type': 'string'}
+            ]
+        },
+        message_data={
+            'contentHash': content_hash,
+            'reasoningHash': reasoning_hash,
+            'agent': client.address,
+            'modelVersion': model_version,
+            'timestamp': timestamp,
+            'category': category
+        }
+    )
+    signature = client.account.sign_message(encoded_data).signature
+
+    def build_tx(nonce):
+        return client.attestation.functions.submitAttestation(
+            content_hash,
+            reasoning_hash,
+            model_version,
+            category,
+            timestamp,
+            signature
+        ).build_transaction({
+            'from': client.address,
+            'nonce': nonce,
+            'gas': 500000,
+            'gasPrice': client.w3.eth.gas_price
+        })
+
+    tx_hash, nonce = send_managed_transaction(client, build_tx)
+
+    # ID local (o definitivo vem do evento na confirmação)
+    attestation_id = Web3.solidity_keccak(
+        ['bytes32', 'bytes32', 'address', 'uint256'],
+        [content_hash, reasoning_hash, client.address, timestamp]
+    ).hex()
+    return tx_hash, attestation_id, nonce
+
+
+def set_attestation_txhash(client, attestation_id, tx_hash):
+    """setAttestationTxHash com nonce gerenciado - fail-safe como no SDK (retorna None se falhar)"""
+    try:
+        if not hasattr(client.attestation.functions, 'setAttestationTxHash'):
+            return None
+
+        attestation_bytes = bytes.fromhex(attestation_id[2:] if attestation_id.startswith('0x') else attestation_id)
+        tx_hash_bytes = bytes.fromhex(tx_hash[2:] if tx_hash.startswith('0x') else tx_hash)
+
+        def build_tx(nonce):
+            return client.attestation.functions.setAttestationTxHash(
+                attestation_bytes,
+                tx_hash_bytes
+            ).build_transaction({
+                'from': client.address,
+                'nonce': nonce,
+                'gas': 100000,
+                'gasPrice': client.w3.eth.gas_price
+            })
+
+        set_tx_hash, nonce = send_managed_transaction(client, build_tx)
+        receipt = wait_for_receipt(client, set_tx_hash)
+        get_nonce_manager(client).confirm(nonce)
+        if receipt['status'] != 1:
+            print(f"⚠️  setAttestationTxHash failed: {set_tx_hash}", file=sys.stderr)
+            return None
+        return set_tx_hash
+
+    except Exception as e:
+        print(f"⚠️  Could not set txHash on-chain: {e}", file=sys.stderr)
+        return None
@@ -0,0 +1,360 @@
+"""
+Validação de CPF e passaporte/MRZ antes de qualquer trabalho caro (client, IPFS, chain)
+
+- CPF: 11 dígitos ASCII 0-9 (formatação ., -, / e espaço ASCII ignorada, até 20
+  caracteres no total), dois dígitos verificadores módulo 11, rejeita sequências
+  repetidas (000.000.000-00, 111...).
+- Passaporte: número do documento ICAO 9303 (5 a 9 caracteres A-Z/0-9).
+- MRZ TD3 (opcional, campo 'mrz' - 2 linhas de 44): linha 2 só com A-Z/0-9/<, dígitos
+  verificadores 7-3-1 do número do documento, nascimento, validade, número pessoal e
+  o composto, e o número do documento da MRZ precisa bater com o passaporte informado.
+
+API escalar para o POST (validate_applicant) e API vetorizada em NumPy para lotes
+(cpf_valid_batch, passport_valid_batch, td3_checks_batch, validate_batch) - strings
+viram matrizes uint8 de largura fixa e as somas ponderadas são produtos matriciais.
+
+As duas APIs dão o mesmo resultado e as mesmas mensagens para qualquer string (dígitos
+não-ASCII como '²' ou '９', NUL e excesso de caracteres são inválidos nas duas); campo
+que não é string é ValidationError. 'N/A' ou vazio = campo não informado (não validado). KYC_INPUT_VALIDATION=0 desativa.
+NumPy só é importado na primeira chamada da API vetorizada - o POST escalar não paga
+esse import no cold start.
+"""
+
+import os
+import re
+
+MISSING_VALUES = ('', 'N/A', 'NA')
+CPF_WIDTH = 20
+PASSPORT_MIN = 5
+PASSPORT_MAX = 9
+TD3_LINE = 44
+
+_CPF_FORMATTING = re.compile(r'[./\-\s]', re.ASCII)
+_CPF_FORMATTING_BYTES = b'./- \t\n\r\x0b\x0c'
+_CPF_DIGITS = re.compile(r'[0-9]{11}')
+_PASSPORT_FORMATTING = re.compile(r'[\s\-]')
+_PASSPORT_RE = re.compile(rf'[A-Z0-9]{{{PASSPORT_MIN},{PASSPORT_MAX}}}')
+_MRZ_INVALID = re.compile(r'[^A-Z0-9<]')
+
+CPF_ERROR = "cpf: invalid CPF (check digits do not match)"
+PASSPORT_ERROR = f"passport: invalid passport number (ICAO 9303: {PASSPORT_MIN} to {PASSPORT_MAX} letters/digits)"
+MRZ_LENGTH_ERROR = f"MRZ must be TD3 (2 lines x {TD3_LINE} characters)"
+
+_MRZ_WEIGHTS = (7, 3, 1)
+
+# NumPy e tabelas da API vetorizada - preenchidos por _load_numpy() no primeiro uso
+np = None
+_CPF_WEIGHTS_1 = None
+_CPF_WEIGHTS_2 = None
+_MRZ_VALUES = None
+
+# Campos da linha 2 do TD3: (nome, início, fim, posição do dígito verificador)
+TD3_FIELDS = (
+    ('document_number', 0, 9, 9),
+    ('birth_date', 13, 19, 19),
+    ('expiry_date', 21, 27, 27),
+    ('personal_number', 28, 42, 42),
+)
+_TD3_COMPOSITE = ((0, 10), (13, 20), (21, 43))
+TD3_COMPOSITE_CHECK = 43
+
+
+class ValidationError(ValueError):
+    """Input do applicant inválido - errors tem uma mensagem por campo"""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def validation_enabled():
+    return os.getenv('KYC_INPUT_VALIDATION', '1').lower() not in ('0', 'false', 'no')
+
+
+def is_missing(value):
+    return value is None or str(value).strip().upper() in MISSING_VALUES
+
+
+def type_errors(applicant, mrz=None):
+    """Erros de campos que não são string (ex.: CPF como número JSON) - nada mais é validado neles"""
+    fields = (('cpf', applicant.get('user_cpf')), ('passport', applicant.get('user_passport')), ('mrz', mrz))
+    return [f"{name}: must be a string" for name, value in fields if value is not None and not isinstance(value, str)]
+
+
+def _require_text(name, value):
+    if value is not None and not isinstance(value, str):
+        raise ValidationError([f"{name}: must be a string"])
+    return value or ''
+
+
+# ==================== ESCALAR ====================
+
+def cpf_is_valid(cpf):
+    cpf = _require_text('cpf', cpf)
+    if len(cpf) > CPF_WIDTH:
+        return False
+    digits = _CPF_FORMATTING.sub('', cpf)
+    if not _CPF_DIGITS.fullmatch(digits) or digits == digits[0] * 11:
+        return False
+    numbers = [int(d) for d in digits]
+    for size in (9, 10):
+        total = sum(n * w for n, w in zip(numbers[:size], range(size + 1, 1, -1)))
+        if (total * 10) % 11 % 10 != numbers[size]:
+            return False
+    return True
+
+
+def normalize_passport(passport):
+    return _PASSPORT_FORMATTING.sub('', _require_text('passport', passport)).upper()
+
+
+def passport_is_valid(passport):
+    return bool(_PASSPORT_RE.fullmatch(normalize_passport(passport)))
+
+
+def mrz_check_digit(field):
+    """Dígito verificador ICAO 9303 (pesos 7-3-1, mod 10)"""
+    total = 0
+    for i, c in enumerate(field):
+        if '0' <= c <= '9':
+            value = ord(c) - 48
+        elif 'A' <= c <= 'Z':
+            value = ord(c) - 55
+        elif c == '<':
+            value = 0
+        else:
+            raise ValueError(f"Invalid MRZ character: {c!r}")
+        total += value * _MRZ_WEIGHTS[i % 3]
+    return total % 10
+
+
+def _td3_text(mrz):
+    """MRZ em maiúsculas, linhas sem espaço nas bordas e concatenadas (TD3 válida = 88 caracteres)"""
+    return ''.join(line.strip() for line in mrz.upper().replace('\r', '').split('\n'))
+
+
+def _td3_format_error(text):
+    """Mensagem do erro de formato da MRZ (tamanho ou caractere da linha 2), ou None"""
+    if len(text) != 2 * TD3_LINE:
+        return MRZ_LENGTH_ERROR
+    invalid = _MRZ_INVALID.search(text, TD3_LINE)
+    return f"Invalid MRZ character: {invalid.group()!r}" if invalid else None
+
+
+def _digit_matches(printed, value):
+    return '0' <= printed <= '9' and ord(printed) - 48 == value
+
+
+def td3_checks(mrz):
+    """{campo: bool} dos 5 dígitos verificadores da MRZ TD3 + document_number extraído"""
+    text = _td3_text(_require_text('mrz', mrz))
+    error = _td3_format_error(text)
+    if error:
+        raise ValueError(error)
+    line = text[TD3_LINE:]
+    checks = {}
+    for name, start, end, check_at in TD3_FIELDS:
+        expected = line[check_at]
+        if name == 'personal_number' and expected == '<':
+            expected = '0'
+        checks[name] = _digit_matches(expected, mrz_check_digit(line[start:end]))
+    composite = ''.join(line[start:end] for start, end in _TD3_COMPOSITE)
+    checks['composite'] = _digit_matches(line[TD3_COMPOSITE_CHECK], mrz_check_digit(composite))
+    checks['document'] = line[0:9].rstrip('<')
+    return checks
+
+
+def validate_applicant(applicant, mrz=None):
+    """Valida CPF/passaporte/MRZ de um applicant (dict de parse_kyc_input); levanta ValidationError"""
+    errors = type_errors(applicant, mrz)
+    if errors:
+        raise ValidationError(errors)
+    cpf = applicant.get('user_cpf')
+    passport = applicant.get('user_passport')
+
+    if not is_missing(cpf) and not cpf_is_valid(cpf):
+        errors.append(CPF_ERROR)
+    if not is_missing(passport) and not passport_is_valid(passport):
+        errors.append(PASSPORT_ERROR)
+
+    if not is_missing(mrz):
+        try:
+            checks = td3_checks(mrz)
+        except ValueError as e:
+            errors.append(f"mrz: {e}")
+        else:
+            failed = [name for name, ok in checks.items() if name != 'document' and not ok]
+            if failed:
+                errors.append(_mismatch_error(failed))
+            if not is_missing(passport) and checks['document'] != normalize_passport(passport):
+                errors.append("mrz: document number does not match passport")
+
+    if errors:
+        raise ValidationError(errors)
+
+
+def _mismatch_error(failed):
+    return f"mrz: check digit mismatch ({', '.join(failed)})"
+
+
+# ==================== VETORIZADO ====================
+
+def _load_numpy():
+    """Import do NumPy + tabelas de pesos/valores MRZ, uma vez por processo"""
+    global np, _CPF_WEIGHTS_1, _CPF_WEIGHTS_2, _MRZ_VALUES
+    if np is not None:
+        return
+    import numpy
+
+    _CPF_WEIGHTS_1 = numpy.arange(10, 1, -1)   # 10..2 sobre os 9 primeiros dígitos
+    _CPF_WEIGHTS_2 = numpy.arange(11, 1, -1)   # 11..2 sobre os 10 primeiros
+
+    # Valor MRZ por byte: 0-9 -> 0-9, A-Z -> 10-35, '<' -> 0, resto -> -1 (inválido)
+    values = numpy.full(256, -1, dtype=numpy.int64)
+    values[ord('0'):ord('9') + 1] = numpy.arange(10)
+    values[ord('A'):ord('Z') + 1] = numpy.arange(10, 36)
+    values[ord('<')] = 0
+    _MRZ_VALUES = values
+    np = numpy   # por último: outra thread só vê np depois das tabelas prontas
+
+
+def _fixed_width(values, width):
+    """
+    Lista de strings -> matriz uint8 (n, width), preenchida com 0.
+
+    String que não cabe sem perder informação (mais de width caracteres, fora do ASCII ou
+    com NUL, que se confundiria com o preenchimento) vira a linha 0xFF - byte que nenhum
+    check aceita, então é inválida como na API escalar.
+    """
+    encoded = np.array([_ascii_or_invalid(v, width) for v in values], dtype=f'S{width}')
+    return encoded.view(np.uint8).reshape(len(values), width)
+
+
+def _ascii_or_invalid(value, width):
+    if not value:
+        return b''
+    if not isinstance(value, str) or len(value) > width or not value.isascii() or '\x00' in value:
+        return b'\xff'
+    return value.encode('ascii')
+
+
+def _text(value):
+    return value if isinstance(value, str) else None
+
+
+def _missing_mask(values):
+    return np.array([is_missing(v) for v in values], dtype=bool)
+
+
+def cpf_valid_batch(cpfs):
+    """Array bool: CPF válido (formatação ., -, / e espaço ignorada) - igual a cpf_is_valid"""
+    _load_numpy()
+    raw = _fixed_width(cpfs, CPF_WIDTH)
+    is_digit = (raw >= ord('0')) & (raw <= ord('9'))
+    formatting = np.isin(raw, np.frombuffer(_CPF_FORMATTING_BYTES + b'\x00', dtype=np.uint8))
+    well_formed = (is_digit | formatting).all(axis=1) & (is_digit.sum(axis=1) == 11)
+
+    # Compacta os dígitos à esquerda preservando a ordem
+    order = np.argsort(~is_digit, axis=1, kind='stable')[:, :11]
+    digits = np.take_along_axis(raw, order, axis=1).astype(np.int64) - ord('0')
+
+    check_1 = (digits[:, :9] @ _CPF_WEIGHTS_1) * 10 % 11 % 10
+    check_2 = (digits[:, :10] @ _CPF_WEIGHTS_2) * 10 % 11 % 10
+    repeated = (digits == digits[:, :1]).all(axis=1)
+    return well_formed & ~repeated & (check_1 == digits[:, 9]) & (check_2 == digits[:, 10])
+
+
+def passport_valid_batch(passports):
+    """Array bool: número de passaporte no formato ICAO (5-9 letras/dígitos)"""
+    _load_numpy()
+    normalized = [normalize_passport(p) for p in passports]
+    raw = _fixed_width(normalized, PASSPORT_MAX)
+    alnum = ((raw >= ord('0')) & (raw <= ord('9'))) | ((raw >= ord('A')) & (raw <= ord('Z')))
+    length = (raw != 0).sum(axis=1)
+    return ((alnum | (raw == 0)).all(axis=1)) & (length >= PASSPORT_MIN)
+
+
+def _check_digits(values, starts_ends):
+    """Dígito verificador 7-3-1 de cada trecho concatenado, por linha"""
+    segment = np.concatenate([values[:, start:end] for start, end in starts_ends], axis=1)
+    weights = np.resize(np.array(_MRZ_WEIGHTS), segment.shape[1])
+    return (segment @ weights) % 10
+
+
+def td3_checks_batch(mrzs):
+    """
+    Checks vetorizados de MRZs TD3 (88 caracteres, com ou sem quebra de linha).
+
+    Returns:
+        dict {document_number, birth_date, expiry_date, personal_number, composite, valid}
+        de arrays bool, 'document' com os números de documento extraídos e 'error' com o
+        erro de formato de cada MRZ (mesma mensagem do ValueError de td3_checks) ou None
+    """
+    _load_numpy()
+    texts = [_td3_text(m or '') for m in mrzs]
+    lines = [text[TD3_LINE:] for text in texts]
+    raw = _fixed_width(lines, TD3_LINE)
+    values = _MRZ_VALUES[raw]
+    well_formed = (values >= 0).all(axis=1) & (np.array([len(text) for text in texts]) == 2 * TD3_LINE)
+    values = np.where(values < 0, 0, values)
+
+    printed = raw.astype(np.int64) - ord('0')
+    result = {}
+    for name, start, end, check_at in TD3_FIELDS:
+        expected = printed[:, check_at]
+        if name == 'personal_number':
+            expected = np.where(raw[:, check_at] == ord('<'), 0, expected)
+        result[name] = well_formed & (_check_digits(values, ((start, end),)) == expected)
+    result['composite'] = well_formed & (_check_digits(values, _TD3_COMPOSITE) == printed[:, TD3_COMPOSITE_CHECK])
+    result['valid'] = np.logical_and.reduce([result[name] for name, *_ in TD3_FIELDS] + [result['composite']])
+    result['document'] = [line[0:9].rstrip('<') for line in lines]
+    result['error'] = [None] * len(texts)
+    for i in np.flatnonzero(~well_formed):
+        result['error'][i] = _td3_format_error(texts[i])
+    return result
+
+
+def validate_batch(applicants, mrzs=None):
+    """
+    Valida uma lista de applicants (dicts de parse_kyc_input) de uma vez.
+
+    Returns:
+        lista com uma lista de erros por applicant (vazia = válido)
+    """
+    n = len(applicants)
+    if mrzs is not None:
+        mrzs = list(mrzs)
+    errors = [type_errors(a, mrzs[i] if mrzs is not None else None) for i, a in enumerate(applicants)]
+    if not n:
+        return errors
+    _load_numpy()
+
+    # Campo de tipo errado já tem erro e, como no escalar, o registro não é validado além disso
+    typed = np.array([not e for e in errors], dtype=bool)
+    cpfs = [_text(a.get('user_cpf')) for a in applicants]
+    passports = [_text(a.get('user_passport')) for a in applicants]
+    if mrzs is not None:
+        mrzs = [_text(m) for m in mrzs]
+    cpf_bad = typed & ~_missing_mask(cpfs) & ~cpf_valid_batch(cpfs)
+    passport_missing = _missing_mask(passports)
+    passport_bad = typed & ~passport_missing & ~passport_valid_batch(passports)
+
+    for i in np.flatnonzero(cpf_bad):
+        errors[i].append(CPF_ERROR)
+    for i in np.flatnonzero(passport_bad):
+        errors[i].append(PASSPORT_ERROR)
+
+    if mrzs is not None:
+        present = np.flatnonzero(typed & ~_missing_mask(mrzs))
+        if len(present):
+            checks = td3_checks_batch([mrzs[i] for i in present])
+            names = [name for name, *_ in TD3_FIELDS] + ['composite']
+            for j, i in enumerate(present):
+                if checks['error'][j]:
+                    errors[i].append(f"mrz: {checks['error'][j]}")
+                    continue
+                if not checks['valid'][j]:
+                    errors[i].append(_mismatch_error([name for name in names if not checks[name][j]]))
+                if not passport_missing[i] and checks['document'][j] != normalize_passport(passports[i]):
+                    errors[i].append("mrz: document number does not match passport")
+    return errors
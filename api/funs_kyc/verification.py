@@ -0,0 +1,349 @@
+"""
+Leitura/verificação de attestations - GET /api/process_kyc/verify/<attestation_id>
+
+Verificadores (parceiros, nosso backend) não precisam mais ir à chain e ao IPFS por
+conta própria. Para um attestation_id:
+
+1. attestations(id) on-chain: content_hash, reasoning_hash, status, category (metadata
+   com custom_fields.ipfs_cid - a key do documento no Filebase)
+2. documento pinado (FullReasoning) lido com os bytes exatamente como armazenados
+3. conferências:
+   - content_hash == keccak(json público com sort_keys) - o 'content' do submitAttestation
+   - reasoning_hash == keccak do reasoning submetido, remontado com o ipfs_cid, o público
+     e o CID IPFS calculado dos bytes lidos (content_cid) - bater o hash prova o CID
+   - ipfs_cid: True quando o content_cid está no reasoning on-chain e bate;
+     None em attestations anteriores ao CID local (só o reasoning_hash é conferido)
+4. resposta com o registro on-chain, as conferências e o reasoning público
+
+Cache em dois níveis - LRU em memória (KYC_VERIFY_CACHE_SIZE, default 4096) e SQLite
+(KYC_VERIFY_STORE, default /tmp/funs_kyc_verifications.sqlite3; vazio = só memória).
+Só verificações bem-sucedidas entram. Conteúdo e hashes de uma attestation confirmada
+não mudam; o status pode (pending -> verified/rejected pelo verifier), então:
+- status final (verified, rejected): servido do cache para sempre, sem rede
+- pending/challenged: servido do cache por KYC_VERIFY_STATUS_TTL segundos (default 60);
+  depois só o registro on-chain é relido (um eth_call, sem IPFS)
+Lookups simultâneos do mesmo id fazem um único trabalho de rede.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from web3 import Web3
+
+from .cid import compute_cid
+from .metrics import HELP, get_registry, span
+from .storage import decode_body
+
+DEFAULT_VERIFY_STORE = "/tmp/funs_kyc_verifications.sqlite3"
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_STATUS_TTL = 60
+DOCUMENT_VERSION = "2.0-encrypted"
+
+# Ordem do enum AttestationStatus do contrato (uint8)
+STATUSES = ('pending', 'verified', 'rejected', 'challenged')
+FINAL_STATUSES = ('verified', 'rejected')
+ZERO_HASH = b'\x00' * 32
+
+VERIFY_TOTAL = 'kyc_verify_total'
+HELP[VERIFY_TOTAL] = 'Attestation verifications by source (memory, disk, refresh, network)'
+
+_ID_PATTERN = re.compile(r'^(0x)?[0-9a-fA-F]{64}$')
+
+
+class AttestationNotFound(LookupError):
+    """Nenhuma attestation on-chain com este id"""
+
+
+class VerificationError(Exception):
+    """Attestation existe, mas não pode ser verificada por este endpoint (formato/metadata)"""
+
+
+def normalize_attestation_id(attestation_id):
+    """'0x' + 64 hex minúsculos; ValueError se não for um bytes32"""
+    attestation_id = (attestation_id or '').strip()
+    if not _ID_PATTERN.match(attestation_id):
+        raise ValueError("attestation_id must be 32 bytes hex (0x + 64 hex chars)")
+    return '0x' + attestation_id[-64:].lower()
+
+
+def _hex(value):
+    return '0x' + bytes(value).hex()
+
+
+def _keccak_matches(text, expected_hex):
+    return bytes(Web3.keccak(text=text)) == bytes.fromhex(expected_hex[2:])
+
+
+# ==================== CHAIN + IPFS ====================
+
+def read_attestation(client, attestation_id):
+    """Registro on-chain de attestations(id) (o get_attestation do SDK não converte o status uint8)"""
+    with span('verify_chain'):
+        data = client.attestation.functions.attestations(bytes.fromhex(attestation_id[2:])).call()
+    if data[4] == 0:
+        raise AttestationNotFound(f"Attestation not found: {attestation_id}")
+    status = STATUSES[data[5]] if data[5] < len(STATUSES) else str(data[5])
+    return {
+        'content_hash': _hex(data[0]),
+        'reasoning_hash': _hex(data[1]),
+        'agent': data[2],
+        'model_version': data[3],
+        'timestamp': data[4],
+        'status': status,
+        'consistency_score': data[6],
+        'verifier': data[7],
+        'verification_time': data[8],
+        'category': data[9],
+        'tx_hash': _hex(data[10]) if len(data) > 10 and bytes(data[10]) != ZERO_HASH else None,
+    }
+
+
+def _document_key(category):
+    try:
+        metadata = json.loads(category)
+    except (TypeError, ValueError):
+        metadata = None
+    if not isinstance(metadata, dict):
+        raise VerificationError("Attestation category is not ANNA metadata JSON")
+    key = (metadata.get('custom_fields') or {}).get('ipfs_cid')
+    if not key:
+        raise VerificationError("Attestation metadata has no ipfs_cid")
+    return metadata, key
+
+
+def _submitted_reasoning(key, public, content_cid=None):
+    """Reasoning do submitAttestation como pipeline.create_attestation_staged monta"""
+    submission = {"ipfs_cid": key, "public": public, "version": DOCUMENT_VERSION}
+    if content_cid:
+        submission["content_cid"] = content_cid
+    return json.dumps(submission)
+
+
+def verify_attestation(client, attestation_id):
+    """Lê chain + IPFS e confere hashes e CID -> resultado (dict JSON)"""
+    record = read_attestation(client, attestation_id)
+    metadata, key = _document_key(record['category'])
+
+    with span('verify_ipfs'):
+        stored, content_encoding = client.filebase.fetch_raw(key)
+    document = json.loads(decode_body(stored, content_encoding).decode('utf-8'))
+    if document.get('version') != DOCUMENT_VERSION or not isinstance(document.get('public'), dict):
+        raise VerificationError(f"Unsupported reasoning document version: {document.get('version')}")
+    public = document['public']
+
+    content_cid = compute_cid(stored)
+    content_ok = _keccak_matches(json.dumps(public, sort_keys=True), record['content_hash'])
+
+    if _keccak_matches(_submitted_reasoning(key, public, content_cid), record['reasoning_hash']):
+        reasoning_ok, cid_ok = True, True
+    elif _keccak_matches(_submitted_reasoning(key, public), record['reasoning_hash']):
+        reasoning_ok, cid_ok = True, None
+    else:
+        reasoning_ok, cid_ok = False, False
+
+    checks = {'content_hash': content_ok, 'reasoning_hash': reasoning_ok, 'ipfs_cid': cid_ok}
+    return dict(
+        record,
+        attestation_id=attestation_id,
+        verified=content_ok and reasoning_ok and cid_ok is not False,
+        checks=checks,
+        final=record['status'] in FINAL_STATUSES,
+        category=metadata,
+        ipfs_cid=key,
+        ipfs_url=client.filebase.get_url(key),
+        content_cid=content_cid,
+        public_reasoning=public,
+    )
+
+
+def refresh_status(client, result):
+    """Relê só o registro on-chain de um resultado em cache (status pode ter mudado)"""
+    record = read_attestation(client, result['attestation_id'])
+    if (record['content_hash'], record['reasoning_hash']) != (result['content_hash'], result['reasoning_hash']):
+        return None     # não deveria acontecer; verificação completa de novo
+    return dict(
+        result,
+        status=record['status'],
+        consistency_score=record['consistency_score'],
+        verifier=record['verifier'],
+        verification_time=record['verification_time'],
+        tx_hash=record['tx_hash'],
+        final=record['status'] in FINAL_STATUSES,
+    )
+
+
+# ==================== CACHE ====================
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class VerificationCache:
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, path=None, status_ttl=DEFAULT_STATUS_TTL):
+        """
+        Args:
+            max_entries: limite do LRU em memória
+            path: arquivo SQLite (None = somente memória)
+            status_ttl: segundos até reler o status de attestations não finais
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.status_ttl = status_ttl
+        self._entries = OrderedDict()  # attestation_id -> (checked_at, result)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS kyc_verifications ("
+                    " attestation_id TEXT PRIMARY KEY,"
+                    " result TEXT NOT NULL,"
+                    " checked_at REAL NOT NULL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _fresh(self, entry):
+        return entry[1]['final'] or time.time() - entry[0] < self.status_ttl
+
+    def _put_memory(self, attestation_id, entry):
+        self._entries[attestation_id] = entry
+        self._entries.move_to_end(attestation_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, attestation_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT checked_at, result FROM kyc_verifications WHERE attestation_id = ?", (attestation_id,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _store(self, attestation_id, entry):
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO kyc_verifications (attestation_id, result, checked_at) VALUES (?, ?, ?)",
+                    (attestation_id, json.dumps(entry[1]), entry[0])
+                )
+        with self._lock:
+            self._put_memory(attestation_id, entry)
+
+    # ==================== API ====================
+
+    def cached(self, attestation_id):
+        """Resultado do LRU em memória se ainda fresco (sem I/O) ou None"""
+        with self._lock:
+            entry = self._entries.get(attestation_id)
+            if entry is None or not self._fresh(entry):
+                return None
+            self._entries.move_to_end(attestation_id)
+        get_registry().inc(VERIFY_TOTAL, source='memory')
+        return entry[1]
+
+    def lookup(self, attestation_id, get_client):
+        """
+        (resultado, origem) - origem: memory, disk, refresh ou network.
+        get_client() só é chamado quando precisa de rede.
+        """
+        result = self.cached(attestation_id)
+        if result is not None:
+            return result, 'memory'
+
+        with self._lock:
+            flight = self._inflight.get(attestation_id)
+            owner = flight is None
+            if owner:
+                flight = self._inflight[attestation_id] = _InFlight()
+
+        if not owner:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._lookup_owned(attestation_id, get_client)
+            get_registry().inc(VERIFY_TOTAL, source=flight.result[1])
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(attestation_id, None)
+            flight.event.set()
+
+    def _lookup_owned(self, attestation_id, get_client):
+        with self._lock:
+            entry = self._entries.get(attestation_id)
+        if entry is None and self.path:
+            entry = self._load(attestation_id)
+            if entry is not None and self._fresh(entry):
+                with self._lock:
+                    self._put_memory(attestation_id, entry)
+                return entry[1], 'disk'
+
+        client = get_client()
+        if entry is not None:
+            result = refresh_status(client, entry[1])
+            if result is not None:
+                self._store(attestation_id, (time.time(), result))
+                return result, 'refresh'
+
+        result = verify_attestation(client, attestation_id)
+        if result['verified']:
+            self._store(attestation_id, (time.time(), result))
+        else:
+            print(f"⚠️  Attestation {attestation_id} failed verification: {result['checks']}", file=sys.stderr)
+        return result, 'network'
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'in_flight': len(self._inflight)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_verification_cache():
+    """Cache da instância (configurado pelo ambiente na primeira chamada)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = VerificationCache(
+                max_entries=int(os.getenv('KYC_VERIFY_CACHE_SIZE', DEFAULT_CACHE_SIZE)),
+                path=os.getenv('KYC_VERIFY_STORE', DEFAULT_VERIFY_STORE) or None,
+                status_ttl=float(os.getenv('KYC_VERIFY_STATUS_TTL', DEFAULT_STATUS_TTL)),
+            )
+        return _cache
+
+
+def verify_response(result, source, status_ttl):
+    """(body, headers) do 200 da rota de verificação - o mesmo no handler e no ASGI"""
+    body = dict(result, success=True, cache=source)
+    if not result['verified']:
+        return body, {'Cache-Control': 'no-store'}
+    if result['final']:
+        return body, {'Cache-Control': 'public, max-age=31536000, immutable'}
+    return body, {'Cache-Control': f"public, max-age={int(status_ttl)}"}
@@ -0,0 +1,97 @@
+"""
+Warm-up em background depois da primeira resposta da instância
+
+process_kyc não importa anna_protocol (web3, eth-account, boto3, cryptography) nem
+NumPy no cold start - menor de idade e input inválido respondem sem eles. Depois que
+a primeira resposta sai, schedule_warmup() carrega numa thread daemon o que o caminho
+completo vai precisar: os imports pesados, o índice de sanções e o ANNAClient
+(só se ANNA_PRIVATE_KEY estiver configurada). Roda uma vez por processo.
+
+KYC_WARMUP=0 desativa (imports ficam só sob demanda).
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+
+# Na ordem em que o POST completo os usa
+WARMUP_MODULES = (
+    'anna_protocol',
+    'funs_kyc.client_pool',
+    'funs_kyc.sanctions',
+    'funs_kyc.reasoning_templates',
+    'funs_kyc.pipeline',
+    'funs_kyc.batch',
+)
+
+_lock = threading.Lock()
+_thread = None
+_stats = {
+    'status': 'idle',   # idle -> running -> done | failed
+    'imports_ms': None,
+    'screener_ms': None,
+    'client_ms': None,
+    'error': None,
+}
+
+
+def warmup_enabled():
+    return os.getenv('KYC_WARMUP', '1').lower() not in ('0', 'false', 'no')
+
+
+def _timed(key, fn):
+    started = time.perf_counter()
+    fn()
+    _stats[key] = (time.perf_counter() - started) * 1000
+
+
+def _import_all():
+    for name in WARMUP_MODULES:
+        importlib.import_module(name)
+
+
+def _load_screener():
+    from .sanctions import get_screener
+    get_screener()
+
+
+def _load_client():
+    from .client_pool import get_client
+    get_client()
+
+
+def warm_up():
+    """Imports pesados + índice de sanções + client (síncrono; normalmente via schedule_warmup)"""
+    _stats['status'] = 'running'
+    try:
+        _timed('imports_ms', _import_all)
+        _timed('screener_ms', _load_screener)
+        if os.getenv('ANNA_PRIVATE_KEY'):
+            _timed('client_ms', _load_client)
+        _stats['status'] = 'done'
+        print(f"🔥 Warm-up done: imports {_stats['imports_ms']:.0f}ms, screener {_stats['screener_ms']:.0f}ms"
+              + (f", client {_stats['client_ms']:.0f}ms" if _stats['client_ms'] is not None else ""),
+              file=sys.stderr)
+    except Exception as e:
+        # O caminho sob demanda continua funcionando; o erro real aparece na request que precisar
+        _stats['status'] = 'failed'
+        _stats['error'] = f"{type(e).__name__}: {e}"
+        print(f"⚠️  Warm-up failed: {_stats['error']}", file=sys.stderr)
+
+
+def schedule_warmup():
+    """Dispara warm_up() numa thread daemon, uma vez por processo; chamar depois de enviar a resposta"""
+    global _thread
+    if not warmup_enabled():
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=warm_up, name='kyc-warmup', daemon=True)
+            _thread.start()
+        return _thread
+
+
+def warmup_stats():
+    return dict(_stats)
@@ -0,0 +1,203 @@
+"""
+Admission control (funs_kyc.admission) num pico de onboarding
+
+Correção do AdmissionController (sem rede):
+    - rajada de `burst` admitida na hora; depois a taxa do bucket
+    - fila FIFO: as requests em espera são admitidas na ordem de chegada
+    - fila cheia -> 429 imediato (queue_full); prazo estourado -> 429 (timeout),
+      ambos com Retry-After >= 1
+    - max_in_flight: a próxima só entra quando um permit é liberado (release idempotente)
+    - gauges e contadores no /metrics (Prometheus)
+Pico: --requests KYCs de uma vez contra o handler (ThreadingHTTPServer) com a
+FakeChain limitando o RPC (--rpc-rate-limit req/s, HTTP 429) e as txs pendentes
+(--max-pending), com KYC_ADMISSION=0 e =1: KYCs confirmados, 429 (com Retry-After),
+500, latência dos admitidos e tempo até o 429.
+
+Uso: python bench/bench_admission.py [--requests 200] [--rate 8] [--burst 8] [--queue-size 40]
+                                     [--max-wait 5] [--rpc-rate-limit 150] [--max-pending 32]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_handler import configure, load_applicants, percentile, quiet_server, start_fakes
+from funs_kyc import admission
+from funs_kyc.admission import AdmissionController, AdmissionRejected
+from funs_kyc.metrics import get_registry
+
+
+# ==================== CORREÇÃO ====================
+
+def rejected(controller):
+    try:
+        controller.acquire().release()
+    except AdmissionRejected as e:
+        return e
+    raise AssertionError("expected AdmissionRejected")
+
+
+def check_correctness():
+    # Rajada e taxa
+    controller = AdmissionController(rate=20, burst=5, max_in_flight=100, queue_size=100, max_wait=5)
+    started = time.monotonic()
+    for _ in range(5):
+        controller.acquire().release()
+    assert time.monotonic() - started < 0.05, "burst should not wait"
+    for _ in range(10):
+        controller.acquire().release()
+    elapsed = time.monotonic() - started
+    assert 0.4 < elapsed < 0.8, f"10 tokens at 20/s took {elapsed:.2f}s"
+
+    # FIFO
+    controller = AdmissionController(rate=50, burst=1, max_in_flight=100, queue_size=100, max_wait=5)
+    controller.acquire().release()
+    order, lock = [], threading.Lock()
+
+    def waiter(i):
+        with controller.acquire():
+            with lock:
+                order.append(i)
+
+    threads = []
+    for i in range(8):
+        threads.append(threading.Thread(target=waiter, args=(i,)))
+        threads[-1].start()
+        time.sleep(0.002)    # chegada em ordem (o bucket só repõe a cada 20ms)
+    for thread in threads:
+        thread.join()
+    assert order == list(range(8)), order
+
+    # Fila cheia e prazo
+    controller = AdmissionController(rate=0.5, burst=1, max_in_flight=100, queue_size=1, max_wait=0.3)
+    controller.acquire().release()
+    waiting = threading.Thread(target=lambda: rejected(controller))
+    waiting.start()
+    time.sleep(0.05)
+    full = rejected(controller)
+    assert full.reason == 'queue_full' and full.retry_after >= 1, full
+    waiting.join()
+    timeout = rejected(controller)
+    assert timeout.reason == 'timeout' and timeout.retry_after >= 1, timeout
+    assert controller.snapshot()['queue_depth'] == 0
+
+    # Em voo
+    controller = AdmissionController(rate=1000, burst=1000, max_in_flight=2, queue_size=10, max_wait=0.2)
+    first, second = controller.acquire(), controller.acquire()
+    assert rejected(controller).reason == 'timeout'
+    first.release()
+    first.release()      # idempotente: não libera duas vagas
+    third = controller.acquire()
+    assert rejected(controller).reason == 'timeout'
+    second.release()
+    third.release()
+    assert controller.snapshot()['in_flight'] == 0
+
+    metrics = get_registry().to_prometheus()
+    for name in (admission.QUEUE_DEPTH, admission.IN_FLIGHT, admission.WAIT_METRIC, admission.ADMITTED_TOTAL,
+                 'kyc_admission_shed_total{reason="queue_full"}', 'kyc_admission_shed_total{reason="timeout"}'):
+        assert name in metrics, name
+    assert f"# TYPE {admission.QUEUE_DEPTH} gauge" in metrics
+    print("correctness: OK")
+
+
+# ==================== PICO ====================
+
+def post(port, applicant):
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    try:
+        conn.request('POST', '/api/process_kyc', json.dumps(applicant).encode(), {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        return response.status, response.getheader('Retry-After'), (time.perf_counter() - started) * 1000
+    finally:
+        conn.close()
+
+
+def spike(port, applicants):
+    with ThreadPoolExecutor(len(applicants)) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda applicant: post(port, applicant), applicants))
+        return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=8, help='KYC_ADMISSION_RATE')
+    parser.add_argument('--burst', type=float, default=8, help='KYC_ADMISSION_BURST')
+    parser.add_argument('--max-in-flight', type=int, default=32, help='KYC_ADMISSION_MAX_IN_FLIGHT')
+    parser.add_argument('--queue-size', type=int, default=40, help='KYC_ADMISSION_QUEUE_SIZE')
+    parser.add_argument('--max-wait', type=float, default=5, help='KYC_ADMISSION_MAX_WAIT')
+    parser.add_argument('--rpc-rate-limit', type=float, default=150, help='requests/s aceitos pela FakeChain')
+    parser.add_argument('--max-pending', type=int, default=32, help='txs pendentes por conta na FakeChain')
+    parser.add_argument('--block-time', type=float, default=1.0)
+    parser.add_argument('--rpc-latency', type=float, default=0.03)
+    parser.add_argument('--s3-latency', type=float, default=0.08)
+    args = parser.parse_args()
+
+    check_correctness()
+
+    fakes, control, chain_url, s3_url = start_fakes(args)
+    configure(chain_url, s3_url, tempfile.mkdtemp(prefix='bench_admission_'))
+    os.environ.update({
+        'KYC_ADMISSION_RATE': str(args.rate),
+        'KYC_ADMISSION_BURST': str(args.burst),
+        'KYC_ADMISSION_MAX_IN_FLIGHT': str(args.max_in_flight),
+        'KYC_ADMISSION_QUEUE_SIZE': str(args.queue_size),
+        'KYC_ADMISSION_MAX_WAIT': str(args.max_wait),
+    })
+    stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+
+    import process_kyc
+
+    server = quiet_server(process_kyc.handler)
+    rows = []
+    try:
+        applicants = load_applicants(None, args.requests * 2 + 1)
+        assert post(server.server_port, applicants[0])[0] == 200, "warm-up KYC failed"
+        # Com admission primeiro: sem ela o pico deixa gaps de nonce que a chain leva tempo para fechar
+        for mode, enabled in (('admission', '1'), ('no admission', '0')):
+            os.environ['KYC_ADMISSION'] = enabled
+            batch = applicants[1:args.requests + 1] if enabled == '1' else applicants[args.requests + 1:]
+            results, wall = spike(server.server_port, batch)
+            assert all(retry_after for status, retry_after, _ in results if status == 429), "429 without Retry-After"
+            rows.append((mode, results, wall))
+            time.sleep(args.block_time * 3)     # pool do fake esvazia entre os modos
+    finally:
+        sys.stderr = stderr
+        server.shutdown()
+        control.send('stop')
+        print(f"fakes: {control.recv()}")
+        fakes.join(timeout=5)
+
+    print(f"\n{args.requests} KYCs at once; admission {args.rate:g}/s burst {args.burst:g}, in flight "
+          f"{args.max_in_flight}, queue {args.queue_size}, wait {args.max_wait:g}s; RPC limit "
+          f"{args.rpc_rate_limit:g} req/s, {args.max_pending} pending txs")
+    print(f"{'mode':<14}{'wall s':>8}{'200':>6}{'429':>6}{'500':>6}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'429 p50 ms':>12}{'429 p95 ms':>12}")
+    for mode, results, wall in rows:
+        ok = [ms for status, _, ms in results if status == 200]
+        shed = [ms for status, _, ms in results if status == 429]
+        failed = sum(1 for status, _, _ in results if status >= 500)
+
+        def cell(values, q, width):
+            return f"{percentile(values, q):>{width}.0f}" if values else f"{'-':>{width}}"
+
+        print(f"{mode:<14}{wall:>8.1f}{len(ok):>6}{len(shed):>6}{failed:>6}{cell(ok, 50, 9)}{cell(ok, 95, 9)}"
+              f"{cell(shed, 50, 12)}{cell(shed, 95, 12)}")
+    print(f"admission: {admission.get_admission_controller().snapshot()}")
+
+
+if __name__ == '__main__':
+    main()
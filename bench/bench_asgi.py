@@ -0,0 +1,255 @@
+"""
+Entry point ASGI (api/asgi.py) vs handler do Vercel (api/process_kyc.py)
+
+Os dois rodam no mesmo processo contra a FakeChain + FakeS3 (processo à parte, como
+no bench_handler). O app ASGI é chamado direto por um client ASGI mínimo (sem
+servidor HTTP - o uvicorn não faz parte das dependências); o handler roda num
+http.server local.
+
+Correção (ASGI vs handler, mesmas requests):
+    - menor de idade, CPF inválido (400), job inexistente (404), job_id ausente (400),
+      métricas (Prometheus e JSON), OPTIONS: mesmo status e corpo
+    - KYC completo: mesmos campos na resposta; Server-Timing com as etapas do pipeline
+      (spans das threads do executor entram na request)
+    - ?stream=1: mesma sequência de eventos; ?async=1: 202 + job confirmado no status
+    - Idempotency-Key: reenvio devolve a resposta original com Idempotent-Replayed
+Carga: --requests KYCs com --concurrency em voo:
+    handler, uma request por vez (como uma instância do Vercel)
+    handler em ThreadingHTTPServer (uma thread por conexão)
+    app ASGI num único event loop (executor de KYC_ASGI_WORKERS threads)
+O app não é mais rápido que o handler em ThreadingHTTPServer: o SDK bloqueia nas
+esperas de RPC/IPFS e cada KYC em voo ocupa uma thread do executor, como no handler
+(concurrency 30: 4.15 vs 4.92 KYC/s, p50 6260 vs 5231 ms).
+
+Uso: python bench/bench_asgi.py [--requests 200] [--concurrency 200] [--workers 256]
+                                [--block-time 1] [--rpc-latency 0.03] [--s3-latency 0.08]
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_handler import configure, load_applicants, percentile, quiet_server, start_fakes
+
+STAGES = ['validated', 'reasoning_built', 'pinned', 'tx_sent', 'confirmed', 'result']
+UNDERAGE = {'name': "Kid Doe", 'email': "kid@bench.local", 'age': 15, 'country': "Brazil",
+            'cpf': "529.982.247-25", 'passport': "BR123456"}
+INVALID = {'name': "Bad Doe", 'email': "bad@bench.local", 'age': 30, 'country': "Brazil",
+           'cpf': "111.111.111-12", 'passport': "BR123456"}
+
+
+# ==================== CLIENTS ====================
+
+async def asgi_request(app, method, target, body=b'', headers=None):
+    """(status, headers em minúsculas, corpo) de uma request ao app ASGI"""
+    path, _, query = target.partition('?')
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query.encode('latin-1'),
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()],
+    }
+    delivered = False
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.Event().wait()
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return (start['status'], {k.decode('latin-1'): v.decode('latin-1') for k, v in start['headers']},
+            b''.join(m.get('body', b'') for m in messages[1:]))
+
+
+def http_request(port, method, target, body=b'', headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    try:
+        conn.request(method, target, body, headers or {})
+        response = conn.getresponse()
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, response.read()
+    finally:
+        conn.close()
+
+
+def events(body):
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+
+# ==================== CORREÇÃO ====================
+
+def check_correctness(app, port, applicants):
+    def both(method, target, body=b'', headers=None):
+        return asyncio.run(asgi_request(app, method, target, body, headers)), \
+            http_request(port, method, target, body, headers)
+
+    post = '/api/process_kyc'
+    for method, target, body, headers in (
+        ('POST', post, json.dumps(UNDERAGE).encode(), None),
+        ('POST', post, json.dumps(INVALID).encode(), None),
+        ('GET', f"{post}/status/{'0' * 32}", b'', None),
+        ('GET', post, b'', None),
+    ):
+        (a_status, _, a_body), (h_status, _, h_body) = both(method, target, body, headers)
+        assert (a_status, json.loads(a_body)) == (h_status, json.loads(h_body)), (target, a_body, h_body)
+
+    (a_status, a_headers, _), (h_status, h_headers, _) = both('OPTIONS', post)
+    assert a_status == h_status == 200
+    assert a_headers['access-control-allow-headers'] == h_headers['access-control-allow-headers']
+
+    body = json.dumps(applicants[0]).encode()
+    (a_status, a_headers, a_body), (h_status, _, h_body) = both('POST', post, body)
+    assert a_status == h_status == 200 and set(json.loads(a_body)) == set(json.loads(h_body)), (a_body, h_body)
+    timing = a_headers['server-timing']
+    assert all(f"{stage};dur=" in timing for stage in ('reasoning', 'encrypt', 'broadcast', 'confirm')), timing
+
+    (a_status, _, a_body), (_, _, h_body) = both('POST', f"{post}?stream=1", body)
+    assert [e['stage'] for e in events(a_body)] == [e['stage'] for e in events(h_body)] == STAGES, a_body
+
+    status, _, accepted = asyncio.run(asgi_request(app, 'POST', f"{post}?async=1", body))
+    assert status == 202, accepted
+    job_id = json.loads(accepted)['job_id']
+    for _ in range(600):
+        status, _, job = asyncio.run(asgi_request(app, 'GET', f"{post}/status/{job_id}"))
+        job = json.loads(job)
+        if job['status'] in ('confirmed', 'failed'):
+            break
+        time.sleep(0.05)
+    assert job['status'] == 'confirmed' and job['success'], job
+
+    os.environ['KYC_IDEMPOTENCY'] = '1'
+    key = {'Idempotency-Key': f"bench-asgi-{time.time()}", 'Content-Type': 'application/json'}
+    first = asyncio.run(asgi_request(app, 'POST', post, body, key))
+    again = asyncio.run(asgi_request(app, 'POST', post, body, key))
+    os.environ['KYC_IDEMPOTENCY'] = '0'
+    assert again[0] == first[0] == 200 and again[2] == first[2], again
+    assert again[1].get('idempotent-replayed') == 'true' and 'idempotent-replayed' not in first[1]
+
+    status, headers, metrics = asyncio.run(asgi_request(app, 'GET', f"{post}/metrics"))
+    assert status == 200 and headers['content-type'].startswith('text/plain') and b'kyc_requests_total' in metrics
+    status, _, metrics = asyncio.run(asgi_request(app, 'GET', f"{post}/metrics?format=json"))
+    assert status == 200 and 'histograms' in json.loads(metrics)
+    print("correctness: OK")
+
+
+# ==================== CARGA ====================
+
+class ThreadPeak:
+    """Maior threading.active_count() observado durante a carga"""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_http(port, applicants, concurrency):
+    def one(applicant):
+        started = time.perf_counter()
+        status, _, _ = http_request(port, 'POST', '/api/process_kyc', json.dumps(applicant).encode())
+        return status, (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(one, applicants))
+
+
+async def run_asgi(app, applicants):
+    async def one(applicant):
+        started = time.perf_counter()
+        status, _, _ = await asgi_request(app, 'POST', '/api/process_kyc', json.dumps(applicant).encode())
+        return status, (time.perf_counter() - started) * 1000
+
+    return await asyncio.gather(*(one(applicant) for applicant in applicants))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--serial-requests', type=int, default=10, help='KYCs do modo uma-por-vez')
+    parser.add_argument('--workers', type=int, default=256, help='KYC_ASGI_WORKERS')
+    parser.add_argument('--block-time', type=float, default=1.0)
+    parser.add_argument('--rpc-latency', type=float, default=0.03)
+    parser.add_argument('--s3-latency', type=float, default=0.08)
+    args = parser.parse_args()
+
+    fakes, control, chain_url, s3_url = start_fakes(args)
+    configure(chain_url, s3_url, tempfile.mkdtemp(prefix='bench_asgi_'))
+    os.environ['KYC_ASGI_WORKERS'] = str(args.workers)
+    os.environ['KYC_JOB_STORE_URL'] = f"sqlite://{tempfile.mkdtemp(prefix='bench_asgi_jobs_')}/jobs.sqlite3"
+    stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+
+    import asgi
+    import process_kyc
+
+    threaded = quiet_server(process_kyc.handler)
+    serial = HTTPServer(('127.0.0.1', 0), process_kyc.handler)
+    threading.Thread(target=serial.serve_forever, daemon=True).start()
+    try:
+        applicants = load_applicants(None, args.requests * 2 + args.serial_requests + 1)
+        check_correctness(asgi.app, threaded.server_port, applicants)
+
+        modes = (
+            ('handler, one at a time', lambda batch: run_http(serial.server_port, batch, 1), args.serial_requests),
+            ('handler, thread/conn', lambda batch: run_http(threaded.server_port, batch, args.concurrency),
+             args.requests),
+            ('ASGI, one event loop', lambda batch: asyncio.run(run_asgi(asgi.app, batch)), args.requests),
+        )
+        rows = []
+        offset = 1
+        for name, run, count in modes:
+            batch = applicants[offset:offset + count]
+            offset += count
+            with ThreadPeak() as threads:
+                started = time.perf_counter()
+                results = run(batch)
+                wall = time.perf_counter() - started
+            latencies = [ms for status, ms in results if status == 200]
+            rows.append((name, len(batch), wall, latencies, len(results) - len(latencies), threads.peak))
+    finally:
+        sys.stderr = stderr
+        threaded.shutdown()
+        serial.shutdown()
+        control.send('stop')
+        print(f"fakes: {control.recv()}")
+        fakes.join(timeout=5)
+
+    print(f"\nconcurrency {args.concurrency}, block time {args.block_time}s, RPC {args.rpc_latency * 1000:.0f}ms, "
+          f"S3 {args.s3_latency * 1000:.0f}ms, KYC_ASGI_WORKERS={args.workers}")
+    print(f"{'mode':<26}{'KYCs':>6}{'wall s':>8}{'KYC/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}{'threads':>9}")
+    for name, count, wall, latencies, errors, threads in rows:
+        print(f"{name:<26}{count:>6}{wall:>8.1f}{len(latencies) / wall:>8.2f}"
+              f"{statistics.median(latencies):>9.0f}{percentile(latencies, 95):>9.0f}{errors:>8}{threads:>9}")
+
+
+if __name__ == '__main__':
+    main()
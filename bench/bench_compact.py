@@ -0,0 +1,157 @@
+"""
+Plaintext do reasoning privado: JSON vs formato compacto (funs_kyc.compact - CBOR
+com dicionário de strings + deflate com zdict dos templates)
+
+Correção:
+    - round trip de valores CBOR (ints nos limites de largura, negativos, floats
+      f16/f32/f64, inf, unicode, aninhados, bytes, bool/None)
+    - to_json(dumps_private_reasoning(p)) == encode_private_reasoning(p) byte a byte,
+      nos dois layouts e em applicants variados (inclusive com screening com hits)
+    - documento pinado (build_reasoning_document) nos dois encodings é lido por
+      fetch_private_reasoning com o mesmo PrivateReasoning; payload truncado, dicionário
+      desconhecido e envelope corrompido falham com ValueError
+Tamanho e tempo: plaintext, ciphertext no documento, encode, decode e encode+encrypt /
+decrypt+decode por attestation, nos layouts completo e compartilhado. O formato
+compacto é pelo tamanho; o tempo mostra quanto CPU ele custa ou economiza.
+
+Uso: python bench/bench_compact.py [--iterations 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from anna_protocol import PrivateReasoning, PublicReasoning
+
+from bench_shared_reasoning import BenchClient
+from funs_kyc import compact
+from funs_kyc.encryption import decrypt_private, encrypt_plaintext
+from funs_kyc.pipeline import build_reasoning_document
+from funs_kyc.reasoning_templates import encode_private_reasoning, reasoning_slots, render_private_steps
+from funs_kyc.shared_reasoning import SHARED_LAYOUT, fetch_private_reasoning, split_private_reasoning
+
+PRIVATE_KEY = "0x" + "22" * 32
+APPLICANTS = (
+    ("Ana Silva", "Brazil", "123.456.789-09", "BR1234567", 30, None),
+    ("José Ñúñez Müller", "Argentina", "987.654.321-00", "AR7654321", 19, None),
+    ("Li Wei 李伟", "China", "000.000.000-00", "CN0000001", 67, {
+        'loaded': True, 'databases': ["OFAC", "UN"], 'entities_checked': 12345, 'top_similarity': 91.4,
+        'threshold': 70, 'candidates': [{'matched_name': "LI WEI", 'source': "OFAC", 'similarity': 91.4}],
+    }),
+)
+VALUES = (
+    0, 23, 24, 255, 256, 65535, 65536, 2 ** 32 - 1, 2 ** 32, 2 ** 64 - 1, -1, -24, -25, -2 ** 64,
+    0.0, 1.5, -2.0, 34.3, 23.75, 1e-7, 1e300, float('inf'), 65504.0, 65520.0,
+    "", "a", "ção 李 🚀", "x" * 300, True, False, None, b"\x00\xff", [], {}, [1, [2, [3, {"k": "v"}]]],
+)
+
+
+def private_reasoning(applicant):
+    name, country, cpf, passport, age, screening = applicant
+    slots = reasoning_slots(name, country, cpf, passport, age, 98, 95, 100, 100, 98, screening)
+    private = PrivateReasoning(steps=render_private_steps(slots), ai_model="FUNS KYC AI v2.1", processing_time="2.3s",
+                               raw_input=f"Name={name}", additional_metadata={"kyc_level": "standard", "score": 98})
+    return private, slots
+
+
+def shared_payload(private, slots):
+    return split_private_reasoning(private, slots, {"cid": "kyc_methodology_0123456789abcdef.json", "sha256": "ab" * 32})
+
+
+# ==================== CORREÇÃO ====================
+
+def build_document(client, private, slots, encoding, shared):
+    os.environ['KYC_REASONING_ENCODING'] = encoding
+    os.environ['KYC_SHARED_REASONING'] = '1' if shared else '0'
+    public = PublicReasoning(attestation_id="", timestamp=0, conclusion="approved", confidence_score=0.98, risk_level="low")
+    return build_reasoning_document(client, public, private, "0x" + "cd" * 32, slots)
+
+
+def check_correctness():
+    for value in VALUES:
+        assert compact.loads(compact.dumps(value)) == value and \
+            type(compact.loads(compact.dumps(value))) is type(value), value
+    assert compact.build_dictionary().id == compact.current_dictionary().id, \
+        "templates changed: pin a new dictionary version (python -m funs_kyc.compact)"
+
+    client = BenchClient()
+    for applicant in APPLICANTS:
+        private, slots = private_reasoning(applicant)
+        encoded = compact.dumps_private_reasoning(private)
+        assert compact.to_json(encoded) == encode_private_reasoning(private), applicant[0]
+        assert compact.dumps(private.to_dict()) == encoded
+        assert compact.loads(compact.dumps(shared_payload(private, slots))) == shared_payload(private, slots)
+
+        expected = json.dumps(private.to_dict(), ensure_ascii=False)
+        for encoding in ('cbor', 'json'):
+            for shared in (False, True):
+                document = build_document(client, private, slots, encoding, shared)
+                assert (document["private_encrypted"].get(compact.ENCODING_FIELD) == compact.ENCODING_CBOR) == \
+                    (encoding == 'cbor')
+                cid = client.filebase.upload_json(document, filename=f"reasoning_{encoding}_{shared}.json")
+                restored = fetch_private_reasoning(client, cid).to_dict()
+                assert json.dumps(restored, ensure_ascii=False) == expected, (applicant[0], encoding, shared)
+
+    encoded = compact.dumps_private_reasoning(private_reasoning(APPLICANTS[0])[0])
+    unknown = bytearray(encoded)
+    unknown[6] ^= 0xff    # primeiro byte do id do dicionário (magic, 84, 01, 48)
+    for bad, message in ((encoded[:-7], "Malformed"), (bytes(unknown), "unknown to this build"),
+                         (encoded[:4] + b'\x09' + encoded[5:], "Unsupported compact payload version"),
+                         (b'{"steps": []}', "missing CBOR magic")):
+        try:
+            compact.loads(bad)
+            raise AssertionError(f"decoded a corrupt payload ({message})")
+        except ValueError as e:
+            assert message in str(e), e
+    sealed = encrypt_plaintext(encoded, PRIVATE_KEY, "0xee")
+    assert decrypt_private(dict(sealed.__dict__, kdf='hkdf-sha256'), PRIVATE_KEY)["ai_model"] == "FUNS KYC AI v2.1"
+    print(f"correctness: OK (dictionary {compact.current_dictionary().id.hex()}: "
+          f"{len(compact.current_dictionary().strings)} strings, zdict {len(compact.current_dictionary().zdict):,} B)")
+
+
+# ==================== TAMANHO / TEMPO ====================
+
+def timed(fn, iterations):
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    check_correctness()
+    private, slots = private_reasoning(APPLICANTS[0])
+    shared = shared_payload(private, slots)
+    assert shared["layout"] == SHARED_LAYOUT
+
+    layouts = (
+        ('full', lambda: encode_private_reasoning(private), lambda: compact.dumps_private_reasoning(private)),
+        ('shared', lambda: json.dumps(shared, ensure_ascii=False), lambda: compact.dumps(shared)),
+    )
+    print(f"\n{args.iterations} iterations per cell (µs per attestation)")
+    print(f"{'layout':<8}{'encoding':<10}{'plaintext B':>12}{'in doc B':>10}{'encode':>9}{'decode':>9}"
+          f"{'enc+encrypt':>13}{'decrypt+dec':>13}")
+    for layout, encode_json, encode_cbor in layouts:
+        for encoding, encode in (('json', encode_json), ('cbor', encode_cbor)):
+            plaintext = encode()
+            data = plaintext if isinstance(plaintext, bytes) else plaintext.encode('utf-8')
+            sealed = dict(encrypt_plaintext(plaintext, PRIVATE_KEY, "0xbench").__dict__, kdf='hkdf-sha256')
+            decode = (lambda: compact.loads(data)) if encoding == 'cbor' else (lambda: json.loads(plaintext))
+            print(f"{layout:<8}{encoding:<10}{len(data):>12,}{len(sealed['ciphertext']) + len(sealed['nonce']):>10,}"
+                  f"{timed(encode, args.iterations):>9.1f}{timed(decode, args.iterations):>9.1f}"
+                  f"{timed(lambda: encrypt_plaintext(encode(), PRIVATE_KEY, '0xbench'), args.iterations):>13.1f}"
+                  f"{timed(lambda: decrypt_private(sealed, PRIVATE_KEY), args.iterations):>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+CPU por request da encryption do reasoning privado: PBKDF2 por attestation (SDK) vs
+master key + HKDF com cache (funs_kyc.encryption), e lote sequencial vs thread pool
+
+Correção:
+    - round trip nos dois esquemas; documento no esquema do SDK continua legível
+      por EncryptionEngine.decrypt e por decrypt_private
+    - chaves distintas por encryption_id e por signer; ciphertext adulterado falha
+    - cache limitado (LRU) e hits em decrypt do mesmo encryption_id
+CPU: time.process_time() por request (payload real ~25KB de reasoning), separando
+a primeira request do processo (derivação da master key) das seguintes.
+
+Uso: python bench/bench_encryption.py [--requests 200] [--batch 200] [--workers 4]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from anna_protocol import EncryptedData, EncryptionEngine, PrivateReasoning
+
+from funs_kyc import encryption
+from funs_kyc.encryption import (
+    KDF_FIELD, KDF_HKDF, KDF_PBKDF2, KeyDeriver, decrypt_private, encrypt_in_pool, encrypt_plaintext,
+)
+from funs_kyc.reasoning_templates import encode_private_reasoning, reasoning_slots, render_private_steps
+
+PRIVATE_KEY = "0x" + "4f" * 32
+OTHER_KEY = "0x" + "5e" * 32
+
+
+def payload():
+    slots = reasoning_slots("Ana Silva", "Brazil", "123.456.789-09", "BR123456", 30, 98, 95, 100, 100, 98)
+    private = PrivateReasoning(steps=render_private_steps(slots), ai_model="bench", processing_time="0s",
+                               raw_input="Name=Ana Silva", additional_metadata={"kyc_level": "bench"})
+    return encode_private_reasoning(private)
+
+
+def fresh_deriver(cache_size=1024):
+    encryption._deriver = KeyDeriver(cache_size)
+    return encryption._deriver
+
+
+def sealed_dict(encrypted, kdf):
+    data = {'nonce': encrypted.nonce, 'ciphertext': encrypted.ciphertext, 'encryption_id': encrypted.encryption_id}
+    if kdf != KDF_PBKDF2:
+        data[KDF_FIELD] = kdf
+    return data
+
+
+def check_correctness(plaintext):
+    logging.getLogger('anna_protocol').setLevel(logging.CRITICAL)   # falhas esperadas abaixo
+    expected = json.loads(plaintext)
+    deriver = fresh_deriver(cache_size=4)
+
+    for kdf in (KDF_HKDF, KDF_PBKDF2):
+        sealed = sealed_dict(encrypt_plaintext(plaintext, PRIVATE_KEY, "0xaa", kdf), kdf)
+        assert decrypt_private(sealed, PRIVATE_KEY) == expected, kdf
+
+    legacy = encrypt_plaintext(plaintext, PRIVATE_KEY, "0xbb", KDF_PBKDF2)
+    assert EncryptionEngine.decrypt(legacy, PRIVATE_KEY, "0xbb") == expected
+    sdk_encrypted = EncryptionEngine.encrypt(expected, PRIVATE_KEY, "0xcc")
+    assert decrypt_private(sealed_dict(sdk_encrypted, KDF_PBKDF2), PRIVATE_KEY) == expected
+
+    keys = {deriver.attestation_key(PRIVATE_KEY, f"0x{i:02x}") for i in range(3)}
+    keys.add(deriver.attestation_key(OTHER_KEY, "0x00"))
+    assert len(keys) == 4, "keys must differ per encryption_id and signer"
+    assert len(deriver.cache) <= 4
+
+    sealed = sealed_dict(encrypt_plaintext(plaintext, PRIVATE_KEY, "0xdd", KDF_HKDF), KDF_HKDF)
+    hits = deriver.cache.hits
+    decrypt_private(sealed, PRIVATE_KEY)
+    assert deriver.cache.hits == hits + 1, "decrypt of a fresh encryption_id should hit the cache"
+
+    tampered = dict(sealed, ciphertext=sealed['ciphertext'][:-2] + ('00' if sealed['ciphertext'][-2:] != '00' else '01'))
+    for bad, key in ((tampered, PRIVATE_KEY), (sealed, OTHER_KEY)):
+        try:
+            decrypt_private(bad, key)
+            raise AssertionError("tampered ciphertext / wrong key accepted")
+        except Exception as e:
+            assert str(e).startswith("Decryption failed"), e
+
+    try:
+        EncryptionEngine.decrypt(EncryptedData(**{k: v for k, v in sealed.items() if k != KDF_FIELD}),
+                                 PRIVATE_KEY, sealed['encryption_id'])
+        raise AssertionError("SDK decrypt should not accept an HKDF document")
+    except Exception as e:
+        assert str(e).startswith("Decryption failed"), e
+
+    print(f"correctness: OK ({len(plaintext):,} B payload)")
+
+
+def cpu_per_request(plaintext, kdf, n, prefix):
+    samples = []
+    for i in range(n):
+        started = time.process_time()
+        encrypt_plaintext(plaintext, PRIVATE_KEY, f"0x{prefix}{i:08x}", kdf)
+        samples.append(time.process_time() - started)
+    return samples
+
+
+def ms(seconds):
+    return seconds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    plaintext = payload()
+    check_correctness(plaintext)
+
+    # SDK: PBKDF2 por attestation (cada encryption_id é novo -> sem cache hit)
+    fresh_deriver()
+    sdk_runs = max(10, args.requests // 10)
+    sdk = cpu_per_request(plaintext, KDF_PBKDF2, sdk_runs, 'a')
+
+    fresh_deriver()
+    first = cpu_per_request(plaintext, KDF_HKDF, 1, 'b')[0]
+    hkdf = cpu_per_request(plaintext, KDF_HKDF, args.requests, 'c')
+
+    sdk_avg = sum(sdk) / len(sdk)
+    hkdf_avg = sum(hkdf) / len(hkdf)
+    print(f"\nCPU per request ({len(plaintext):,} B payload)")
+    print(f"{'scheme':<36}{'ms/request':>12}")
+    print(f"{'PBKDF2 per attestation (SDK)':<36}{ms(sdk_avg):>12.3f}")
+    print(f"{'HKDF, first request (master key)':<36}{ms(first):>12.3f}")
+    print(f"{'HKDF, warm process':<36}{ms(hkdf_avg):>12.3f}")
+    print(f"speedup (warm): {sdk_avg / hkdf_avg:.0f}x; "
+          f"break-even after {first / max(sdk_avg - hkdf_avg, 1e-9):.1f} requests")
+
+    # Lote: sequencial vs pool
+    os.environ['KYC_ENCRYPT_WORKERS'] = str(args.workers)
+    fresh_deriver(cache_size=args.batch * 4)
+    encrypt_plaintext(plaintext, PRIVATE_KEY, "0xwarm")   # master key fora da medição
+
+    def seal(encryption_id):
+        return encrypt_plaintext(plaintext, PRIVATE_KEY, encryption_id)
+
+    print(f"\nbatch of {args.batch} payloads ({os.cpu_count()} CPU(s))")
+    print(f"{'mode':<28}{'wall ms':>10}{'CPU ms':>10}{'payloads/s':>12}")
+    for name, run in (('sequential', lambda ids: [seal(i) for i in ids]),
+                      (f'pool ({args.workers} workers)', lambda ids: encrypt_in_pool(seal, ids))):
+        ids = [f"0x{name[:4]}{i:08x}" for i in range(args.batch)]   # ids novos: sem cache hit
+        wall, cpu = time.perf_counter(), time.process_time()
+        run(ids)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        print(f"{name:<28}{ms(wall):>10.1f}{ms(cpu):>10.1f}{args.batch / wall:>12,.0f}")
+    print(f"key cache: {encryption.get_key_deriver().cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+"""
+Benchmark ponta a ponta do POST /api/process_kyc com chain e Filebase locais
+
+O handler real (api/process_kyc.py) roda num http.server local; o ANNAClient real
+fala JSON-RPC com a FakeChain (block time e latência de RPC configuráveis) e o
+uploader do Filebase (funs_kyc.storage) fala S3 com o FakeS3 - os dois num
+processo à parte, para não disputar o GIL com o handler nem sujar a contagem de
+alocações.
+
+Modos de carga:
+    closed  - N clientes, cada um manda a próxima request quando a anterior volta
+    open    - taxa fixa (--rps); latência medida a partir do horário agendado,
+              então fila no servidor aparece na latência (sem coordinated omission)
+
+Applicants vêm de --replay (JSONL, mesmo formato do POST / funs_kyc.bulk),
+reciclados até completar --requests; sem --replay, são gerados sintéticos.
+
+Relatório: p50/p95/p99 da latência total e de cada etapa (eventos do modo
+streaming, --stages), histogramas por etapa do próprio handler (GET /metrics),
+throughput, e alocações por etapa (tracemalloc em --profile requests
+sequenciais depois da carga).
+
+Uso: python bench/bench_handler.py [--mode closed|open] [--concurrency 8] [--rps 10]
+                                   [--requests 200] [--replay applicants.jsonl]
+                                   [--block-time 2] [--rpc-latency 0.03] [--s3-latency 0.08]
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_NETWORK = 'bench-local'
+STAGES = ('validated', 'reasoning_built', 'pinned', 'tx_sent', 'confirmed', 'result')
+
+
+# ==================== FAKES (processo à parte) ====================
+
+def serve_fakes(conn, block_time, rpc_latency, s3_latency, rate_limit=None, max_pending=None):
+    from fake_chain import FakeChain
+    from fake_s3 import FakeS3
+
+    chain = FakeChain(block_time=block_time, rpc_latency=rpc_latency, rate_limit=rate_limit,
+                      max_pending=max_pending).start()
+    s3 = FakeS3(latency=s3_latency).start()
+    conn.send((chain.url, s3.url))
+    conn.recv()
+    conn.send({'blocks': chain.block_number, 'mined': len(chain.mined), 'rejected': chain.rejected,
+               'rate_limited': chain.rate_limited,
+               's3_requests': s3.requests, 's3_bytes_in': s3.bytes_in})
+    chain.stop()
+    s3.stop()
+
+
+def start_fakes(args):
+    ctx = multiprocessing.get_context('spawn')
+    parent, child = ctx.Pipe()
+    limits = (getattr(args, 'rpc_rate_limit', None), getattr(args, 'max_pending', None))
+    process = ctx.Process(target=serve_fakes, args=(child, args.block_time, args.rpc_latency, args.s3_latency, *limits),
+                          daemon=True)
+    process.start()
+    chain_url, s3_url = parent.recv()
+    return process, parent, chain_url, s3_url
+
+
+def configure(chain_url, s3_url, workdir):
+    """Aponta o client_pool para os fakes: rede extra no SDK + endpoint S3 do uploader do Filebase"""
+    os.environ.update({
+        'ANNA_PRIVATE_KEY': '0x' + os.urandom(32).hex(),
+        'ANNA_NETWORK': BENCH_NETWORK,
+        'FILEBASE_ACCESS_KEY': 'bench',
+        'FILEBASE_SECRET_KEY': 'bench',
+        'KYC_FILEBASE_ENDPOINT': s3_url,
+        'KYC_NONCE_STORE': os.path.join(workdir, 'nonces.sqlite3'),
+    })
+    os.environ.setdefault('KYC_IDEMPOTENCY', '0')
+    os.environ.setdefault('KYC_ADMISSION', '0')     # throughput bruto; bench_admission liga
+
+    from anna_protocol import client as anna_client
+
+    anna_client.NETWORKS[BENCH_NETWORK] = {'rpc': chain_url, 'chain_id': 80002, 'explorer': chain_url}
+
+
+# ==================== APPLICANTS ====================
+
+def synthetic_cpf(rng):
+    digits = [rng.randrange(10) for _ in range(9)]
+    for size in (9, 10):
+        digits.append(sum(d * w for d, w in zip(digits, range(size + 1, 1, -1))) * 10 % 11 % 10)
+    return ''.join(map(str, digits))
+
+
+def load_applicants(path, count, seed=11):
+    if path:
+        with open(path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if not records:
+            raise SystemExit(f"{path}: no applicants")
+        return list(itertools.islice(itertools.cycle(records), count))
+
+    rng = random.Random(seed)
+    countries = ('Brazil', 'Portugal', 'Argentina', 'Chile', 'Mexico')
+    return [{
+        'name': f"Applicant {i}",
+        'email': f"applicant{i}@bench.local",
+        'age': rng.randint(18, 80),
+        'country': rng.choice(countries),
+        'cpf': synthetic_cpf(rng),
+        'passport': f"BR{rng.randrange(10**6):06d}",
+    } for i in range(count)]
+
+
+# ==================== CLIENT ====================
+
+def post(port, applicant, stages):
+    """POST no handler; com stages, lê o NDJSON e devolve elapsed_ms de cada etapa"""
+    body = json.dumps(applicant).encode('utf-8')
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    try:
+        conn.request('POST', '/api/process_kyc?stream=1' if stages else '/api/process_kyc', body,
+                     {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        status, marks = response.status, {}
+        if stages and response.getheader('Content-Type', '').startswith('application/x-ndjson'):
+            for line in response:
+                event = json.loads(line)
+                marks[event['stage']] = event['elapsed_ms']
+                if event['stage'] == 'error':
+                    status = event.get('http_status', 500)
+                elif event['stage'] == 'result':
+                    status = event.get('http_status', 200)
+        else:
+            response.read()
+        return status, marks
+    finally:
+        conn.close()
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.stage_ms = {stage: [] for stage in STAGES}
+        self.errors = {}
+
+    def record(self, latency_ms, status, marks):
+        with self.lock:
+            if status != 200:
+                self.errors[status] = self.errors.get(status, 0) + 1
+                return
+            self.latencies.append(latency_ms)
+            previous = 0.0
+            for stage in STAGES:
+                if stage in marks:
+                    self.stage_ms[stage].append(marks[stage] - previous)
+                    previous = marks[stage]
+
+    def failed(self, error):
+        with self.lock:
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def run_closed(port, applicants, concurrency, stages, recorder):
+    counter = itertools.count()
+
+    def client():
+        while True:
+            i = next(counter)
+            if i >= len(applicants):
+                return
+            started = time.perf_counter()
+            try:
+                status, marks = post(port, applicants[i], stages)
+                recorder.record((time.perf_counter() - started) * 1000, status, marks)
+            except Exception as e:
+                recorder.failed(e)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def run_open(port, applicants, rps, stages, recorder, max_in_flight):
+    lag = []
+
+    def fire(i, scheduled):
+        lag.append(time.perf_counter() - scheduled)
+        try:
+            status, marks = post(port, applicants[i], stages)
+            recorder.record((time.perf_counter() - scheduled) * 1000, status, marks)
+        except Exception as e:
+            recorder.failed(e)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_in_flight) as pool:
+        for i in range(len(applicants)):
+            scheduled = start + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, i, scheduled)
+    return max(lag) * 1000 if lag else 0.0
+
+
+def fetch_stage_metrics(port):
+    """Histogramas por etapa do registry do handler (GET /api/process_kyc/metrics?format=json)"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('GET', '/api/process_kyc/metrics?format=json')
+        response = conn.getresponse()
+        if response.status != 200:
+            return {}
+        metrics = json.loads(response.read())
+    finally:
+        conn.close()
+    return {h['labels']['stage']: h for h in metrics['histograms'] if h['name'] == 'kyc_stage_duration_seconds'}
+
+
+# ==================== ALOCAÇÕES ====================
+
+def profile_allocations(handler_class, applicants):
+    """Requests sequenciais com tracemalloc: pico e líquido (KiB) entre etapas consecutivas"""
+    spans = {}
+
+    class ProfiledHandler(handler_class):
+        def do_POST(self):
+            self._marks = [('start', tracemalloc.get_traced_memory()[0])]
+            tracemalloc.reset_peak()
+            super().do_POST()
+            self._mark('response')
+
+        def _stage(self, stage, **fields):
+            self._mark(stage)
+            super()._stage(stage, **fields)
+
+        def _mark(self, stage):
+            current, peak = tracemalloc.get_traced_memory()
+            previous = self._marks[-1][1]
+            spans.setdefault(stage, []).append(((peak - previous) / 1024, (current - previous) / 1024))
+            self._marks.append((stage, current))
+            tracemalloc.reset_peak()
+
+    server = quiet_server(ProfiledHandler)
+    tracemalloc.start()
+    try:
+        for applicant in applicants:
+            post(server.server_port, applicant, stages=False)
+    finally:
+        tracemalloc.stop()
+        server.shutdown()
+        server.server_close()
+    return spans
+
+
+# ==================== RELATÓRIO ====================
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def summary_row(name, values):
+    if not values:
+        return f"{name:<16}{'-':>9}"
+    return (f"{name:<16}{percentile(values, 50):>9.1f}{percentile(values, 95):>9.1f}"
+            f"{percentile(values, 99):>9.1f}{statistics.fmean(values):>9.1f}{max(values):>9.1f}")
+
+
+def quiet_server(handler_class):
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 256
+
+    server = Server(('127.0.0.1', 0), handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('closed', 'open'), default='closed')
+    parser.add_argument('--concurrency', type=int, default=8, help='clientes no modo closed')
+    parser.add_argument('--rps', type=float, default=10.0, help='taxa de chegada no modo open')
+    parser.add_argument('--max-in-flight', type=int, default=512, help='limite de requests abertas no modo open')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--replay', help='JSONL de applicants (um POST por linha)')
+    parser.add_argument('--block-time', type=float, default=2.0)
+    parser.add_argument('--rpc-latency', type=float, default=0.03)
+    parser.add_argument('--s3-latency', type=float, default=0.08)
+    parser.add_argument('--stages', action=argparse.BooleanOptionalAction, default=True,
+                        help='latência por etapa via ?stream=1')
+    parser.add_argument('--profile', type=int, default=5, help='requests sequenciais com tracemalloc (0 = pular)')
+    parser.add_argument('--verbose', action='store_true', help='mantém os logs do handler no stderr')
+    args = parser.parse_args()
+
+    fakes, control, chain_url, s3_url = start_fakes(args)
+    workdir = tempfile.mkdtemp(prefix='bench_handler_')
+    configure(chain_url, s3_url, workdir)
+
+    stderr = sys.stderr
+    if not args.verbose:
+        sys.stderr = open(os.devnull, 'w')
+
+    import process_kyc
+
+    applicants = load_applicants(args.replay, args.requests + args.profile + 1)
+    server = quiet_server(process_kyc.handler)
+    port = server.server_port
+
+    # Request fria: client, conexão RPC e shared body pinado - reportada à parte
+    started = time.perf_counter()
+    cold_status, _ = post(port, applicants[0], stages=False)
+    cold_ms = (time.perf_counter() - started) * 1000
+
+    recorder = Recorder()
+    load = applicants[1:args.requests + 1]
+    started = time.perf_counter()
+    dispatch_lag = None
+    if args.mode == 'closed':
+        run_closed(port, load, args.concurrency, args.stages, recorder)
+    else:
+        dispatch_lag = run_open(port, load, args.rps, args.stages, recorder, args.max_in_flight)
+    elapsed = time.perf_counter() - started
+    stage_metrics = fetch_stage_metrics(port)
+    server.shutdown()
+    server.server_close()
+
+    spans = profile_allocations(process_kyc.handler, applicants[args.requests + 1:]) if args.profile else {}
+
+    control.send('stop')
+    fake_stats = control.recv()
+    fakes.join(5)
+    sys.stderr = stderr
+
+    # ==================== OUTPUT ====================
+    load_desc = (f"closed loop, {args.concurrency} clients" if args.mode == 'closed'
+                 else f"open loop, {args.rps:g} req/s")
+    print(f"📊 {len(load)} requests ({load_desc}) - block time {args.block_time}s, "
+          f"RPC latency {args.rpc_latency * 1000:.0f}ms, S3 latency {args.s3_latency * 1000:.0f}ms")
+    print(f"   cold request: {cold_ms:.0f}ms (status {cold_status})")
+    print(f"   throughput: {len(recorder.latencies) / elapsed:.2f} req/s over {elapsed:.1f}s, "
+          f"errors {recorder.errors or 0}")
+    if dispatch_lag is not None:
+        print(f"   max dispatch lag: {dispatch_lag:.1f}ms")
+
+    print(f"\n{'latency ms':<16}{'p50':>9}{'p95':>9}{'p99':>9}{'mean':>9}{'max':>9}")
+    print(summary_row('total', recorder.latencies))
+    if args.stages:
+        for stage in STAGES:
+            print(summary_row(f"  {stage}", recorder.stage_ms[stage]))
+
+    if stage_metrics:
+        print(f"\n{'server stages ms':<16}{'count':>7}{'~p50':>9}{'~p95':>9}{'mean':>9}   (GET /metrics, bucket estimates)")
+        for stage, h in sorted(stage_metrics.items(), key=lambda item: -item[1]['sum']):
+            print(f"  {stage:<14}{h['count']:>7}{h['p50'] * 1000:>9.1f}{h['p95'] * 1000:>9.1f}{h['mean'] * 1000:>9.1f}")
+
+    if spans:
+        print(f"\n{'allocations KiB':<20}{'peak p50':>10}{'peak max':>10}{'net p50':>10}")
+        for stage in ('validated', 'reasoning_built', 'pinned', 'tx_sent', 'confirmed', 'response'):
+            values = spans.get(stage)
+            if values:
+                peaks = [p for p, _ in values]
+                nets = [n for _, n in values]
+                print(f"  {stage:<18}{statistics.median(peaks):>10.1f}{max(peaks):>10.1f}{statistics.median(nets):>10.1f}")
+
+    print(f"\n⛓️  fakes: {fake_stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Orçamento de import do cold start: python -X importtime -c "import process_kyc"
+
+Cada execução roda num interpretador novo (o cache de bytecode é aquecido antes).
+Mede o tempo cumulativo de import do módulo (mediana das execuções), mostra os
+maiores filhos diretos e os maiores tempos próprios, e falha (exit 1) se:
+    - a mediana passar do orçamento (budget_ms de import_time_budget.json ou --budget-ms)
+    - algum módulo pesado (anna_protocol, web3, eth_account, boto3, cryptography,
+      numpy) entrar no import - eles são carregados sob demanda / por funs_kyc.warmup
+
+Também mede, para referência, o custo que foi adiado: importar os módulos do
+warm-up (funs_kyc.warmup.WARMUP_MODULES) depois do process_kyc.
+
+--record grava a mediana e o breakdown em import_time_budget.json (mantendo o budget).
+
+Uso: python bench/bench_import_time.py [--runs 7] [--budget-ms 200] [--record]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(ROOT, '..', 'api')
+BUDGET_FILE = os.path.join(ROOT, 'import_time_budget.json')
+
+HEAVY_MODULES = ('anna_protocol', 'web3', 'eth_account', 'boto3', 'botocore', 'cryptography', 'numpy')
+DEFERRED_SNIPPET = "import process_kyc, funs_kyc.warmup as w; w._import_all()"
+
+
+def run_importtime(code):
+    """Uma execução -X importtime -> lista de (nome, profundidade, self_us, cumulative_us)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=API_DIR, capture_output=True, text=True, env={**os.environ, 'KYC_WARMUP': '0'},
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import failed:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def top_level_ms(entries, module):
+    return sum(c for name, depth, _, c in entries if depth == 0 and name == module) / 1000
+
+
+def children(entries, module):
+    """Filhos diretos de um import de profundidade 0 (importtime lista filhos antes do pai)"""
+    end = next(i for i, (name, depth, _, _) in enumerate(entries) if depth == 0 and name == module)
+    start = end
+    while start > 0 and entries[start - 1][1] > 0:
+        start -= 1
+    return [(name, c / 1000) for name, depth, _, c in entries[start:end] if depth == 1]
+
+
+def heavy_modules(entries):
+    names = {name for name, *_ in entries}
+    return [m for m in HEAVY_MODULES if any(n == m or n.startswith(m + '.') for n in names)]
+
+
+def measure(code, module, runs):
+    run_importtime(code)   # aquece __pycache__
+    samples = [run_importtime(code) for _ in range(runs)]
+    totals = [top_level_ms(entries, module) for entries in samples]
+    median_run = samples[totals.index(sorted(totals)[len(totals) // 2])]
+    return statistics.median(totals), totals, median_run
+
+
+def load_budget():
+    if os.path.exists(BUDGET_FILE):
+        with open(BUDGET_FILE) as f:
+            return json.load(f)
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='process_kyc')
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='sobrescreve o budget_ms de import_time_budget.json')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--record', action='store_true', help='grava a medição em import_time_budget.json')
+    args = parser.parse_args()
+
+    recorded = load_budget()
+    budget_ms = args.budget_ms or recorded.get('budget_ms', 200.0)
+
+    median_ms, totals, entries = measure(f"import {args.module}", args.module, args.runs)
+    heavy = heavy_modules(entries)
+
+    print(f"import {args.module}: median {median_ms:.1f}ms over {args.runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}) - budget {budget_ms:.0f}ms")
+    if recorded.get('median_ms'):
+        print(f"recorded baseline: {recorded['median_ms']:.1f}ms")
+
+    direct = sorted(children(entries, args.module), key=lambda item: -item[1])
+    print(f"\n{'direct import':<36}{'cumulative ms':>14}")
+    for name, ms in direct[:args.top]:
+        print(f"{name:<36}{ms:>14.1f}")
+
+    by_self = sorted(entries, key=lambda e: -e[2])
+    print(f"\n{'module (any depth)':<36}{'self ms':>14}")
+    for name, _, self_us, _ in by_self[:args.top]:
+        print(f"{name:<36}{self_us / 1000:>14.1f}")
+
+    # Imports de profundidade 0 que não estavam no cold start = o que o warm-up carrega
+    cold = {name for name, *_ in entries}
+    deferred_entries = run_importtime(DEFERRED_SNIPPET)
+    deferred_ms = sum(c for name, depth, _, c in deferred_entries if depth == 0 and name not in cold) / 1000
+    print(f"\ndeferred to first use / warm-up: ~{deferred_ms:.0f}ms ({', '.join(heavy_modules(deferred_entries))})")
+
+    if args.record:
+        recorded.update({
+            'module': args.module,
+            'budget_ms': budget_ms,
+            'median_ms': round(median_ms, 1),
+            'deferred_ms': round(deferred_ms, 1),
+            'python': sys.version.split()[0],
+            'direct_imports_ms': {name: round(ms, 1) for name, ms in direct[:args.top]},
+        })
+        with open(BUDGET_FILE, 'w') as f:
+            json.dump(recorded, f, indent=2)
+            f.write('\n')
+        print(f"recorded -> {os.path.relpath(BUDGET_FILE)}")
+
+    failures = []
+    if median_ms > budget_ms:
+        failures.append(f"import time {median_ms:.1f}ms exceeds budget {budget_ms:.0f}ms")
+    if heavy:
+        failures.append(f"heavy modules imported at cold start: {', '.join(heavy)}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Pin no Filebase em paralelo com o broadcast (CID IPFS calculado localmente) vs
+pin antes do broadcast (KYC_PARALLEL_PIN=0)
+
+Correção:
+    - funs_kyc.cid bate com CIDs conhecidos do `ipfs add` (v0 e v1, vazio e
+      "hello world\\n") e não depende de como o corpo chega em pedaços
+    - upload_prepared() confere o CID reportado pelo store (x-amz-meta-cid) - também
+      em documento com várias folhas; parâmetros de chunking diferentes no store
+      viram "IPFS CID mismatch"; store sem CID é aceito sem verificação e o HEAD
+      não se repete
+Latência: create_attestation_staged (cliente real, FakeChain + FakeS3 num processo
+à parte) até o tx_sent, alternando os dois modos request a request.
+
+Uso: python bench/bench_parallel_pin.py [--requests 40] [--rpc-latency 0.03] [--s3-latency 0.08]
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from funs_kyc.cid import compute_cid
+from funs_kyc.storage import FilebaseUploader, prepare_json
+
+BUCKET = 'anna-protocol'
+KNOWN_CIDS = (
+    (b'', {}, 'QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH'),
+    (b'hello world\n', {}, 'QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o'),
+    (b'', {'cid_version': 1}, 'bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku'),
+    (b'hello world\n', {'cid_version': 1}, 'bafkreifjjcie6lypi6ny7amxnfftagclbuxndqonfipmb64f2km2devei4'),
+    (b'', {'cid_version': 1, 'raw_leaves': False}, 'bafybeif7ztnhq65lumvvtr4ekcwd2ifwgm3awq4zfr3srh462rwyinlb4y'),
+)
+
+
+# ==================== FAKES (processo à parte) ====================
+
+def serve_fakes(conn, block_time, rpc_latency, s3_latency):
+    from fake_chain import FakeChain
+    from fake_s3 import FakeS3
+
+    chain = FakeChain(block_time=block_time, rpc_latency=rpc_latency).start()
+    s3 = FakeS3(latency=s3_latency).start()
+    conn.send((chain.url, s3.url))
+    while True:
+        command, arg = conn.recv()
+        if command == 'cid':
+            s3.cid = None if arg is None else (lambda body, params=arg: compute_cid(body, **params))
+            conn.send(True)
+        elif command == 'requests':
+            with s3.lock:
+                conn.send(dict(s3.requests))
+        else:
+            break
+    chain.stop()
+    s3.stop()
+
+
+class Fakes:
+    def __init__(self, block_time, rpc_latency, s3_latency):
+        ctx = multiprocessing.get_context('spawn')
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=serve_fakes, args=(child, block_time, rpc_latency, s3_latency), daemon=True)
+        self.process.start()
+        self.chain_url, self.s3_url = self.conn.recv()
+
+    def _ask(self, command, arg=None):
+        self.conn.send((command, arg))
+        return self.conn.recv()
+
+    def report_cid(self, params):
+        """params de compute_cid usados pelo store, ou None para um store que não reporta CID"""
+        self._ask('cid', params)
+
+    def s3_requests(self):
+        return self._ask('requests')
+
+    def stop(self):
+        self.conn.send(('stop', None))
+        self.process.join(timeout=5)
+
+
+# ==================== CORREÇÃO ====================
+
+def check_correctness(fakes):
+    for body, params, expected in KNOWN_CIDS:
+        assert compute_cid(body, **params) == expected, (body, params)
+    data = os.urandom(3 * 262144 + 17)
+    pieces = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+    assert compute_cid(data) == compute_cid(pieces) == compute_cid([data[:5], data[5:]])
+    assert compute_cid(data) != compute_cid(data, chunk_size=1048576)
+
+    uploader = FilebaseUploader('bench', 'bench', BUCKET, fakes.s3_url)
+    small = {'applicant': 'Ana Silva', 'steps': list(range(100))}
+    large = {'blob': os.urandom(400000).hex()}    # 800KB de hex aleatório > 256KiB: várias folhas
+
+    fakes.report_cid({})
+    for i, document in enumerate((small, large)):
+        prepared = prepare_json(document)
+        uploader.upload_prepared(prepared, f"verified_{i}.json")
+        assert uploader.fetch(f"verified_{i}.json") == document
+    assert uploader.stats['cid_verified'] == 2, uploader.stats
+    assert prepare_json(large).size > 262144
+
+    fakes.report_cid({'chunk_size': 1048576})
+    try:
+        uploader.upload_prepared(prepare_json(large), "mismatch.json")
+        raise AssertionError("CID mismatch not detected")
+    except Exception as e:
+        assert str(e).startswith("IPFS CID mismatch"), e
+
+    fakes.report_cid(None)
+    heads = fakes.s3_requests()['HEAD']
+    uploader.upload_prepared(prepare_json(small), "unverified_0.json")
+    uploader.upload_prepared(prepare_json(small), "unverified_1.json")
+    assert uploader.stats['cid_unverified'] == 2
+    assert fakes.s3_requests()['HEAD'] == heads + 1, "HEAD repeated for a store that does not report CIDs"
+    fakes.report_cid({})
+    print("correctness: OK")
+
+
+# ==================== LATÊNCIA ====================
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=40, help='por modo')
+    parser.add_argument('--block-time', type=float, default=2.0)
+    parser.add_argument('--rpc-latency', type=float, default=0.03)
+    parser.add_argument('--s3-latency', type=float, default=0.08)
+    args = parser.parse_args()
+
+    fakes = Fakes(args.block_time, args.rpc_latency, args.s3_latency)
+    try:
+        check_correctness(fakes)
+
+        from bench_handler import configure
+        configure(fakes.chain_url, fakes.s3_url, tempfile.mkdtemp(prefix='bench_parallel_pin_'))
+        stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+
+        import process_kyc
+        from funs_kyc.client_pool import get_client
+        from funs_kyc.pipeline import create_attestation_staged
+
+        client = get_client()
+        samples = {'0': [], '1': []}
+        for i in range(args.requests * 2 + 2):
+            mode = '01'[i % 2]
+            os.environ['KYC_PARALLEL_PIN'] = mode
+            kyc = process_kyc.build_kyc_reasoning(f"Applicant {i}", f"a{i}@bench.local", 30, 'Brazil',
+                                                  '123.456.789-09', f"BR{i:07d}")
+            started = time.perf_counter()
+            result = create_attestation_staged(client, kyc['public_reasoning'], kyc['private_reasoning'],
+                                               metadata=kyc['metadata'], wait_for_confirmation=False,
+                                               reasoning_slots=kyc['slots'])
+            if i >= 2:   # as duas primeiras aquecem client, shared body e pool
+                samples[mode].append((time.perf_counter() - started) * 1000)
+            assert client.filebase.fetch(result['ipfs_cid'])['public']
+        sys.stderr = stderr
+
+        print(f"\n{args.requests} attestations per mode until tx_sent (S3 latency {args.s3_latency * 1000:.0f}ms, "
+              f"RPC latency {args.rpc_latency * 1000:.0f}ms)")
+        print(f"{'mode':<28}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}")
+        for mode, name in (('0', 'pin, then broadcast'), ('1', 'pin || broadcast')):
+            values = samples[mode]
+            print(f"{name:<28}{statistics.median(values):>9.1f}{percentile(values, 0.95):>9.1f}"
+                  f"{statistics.mean(values):>9.1f}")
+        print(f"saved per KYC (p50): {statistics.median(samples['0']) - statistics.median(samples['1']):.1f}ms; "
+              f"uploader stats: {client.filebase.stats}")
+    finally:
+        fakes.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Microbenchmark: reasoning com f-strings (legacy) vs templates pré-compilados
+
+Verifica que o JSON gerado é byte-idêntico e compara tempo de montagem,
+tempo de montagem + serialização e memória alocada por request.
+
+"build" é o que o handler faz (build_kyc_reasoning): slots com o risco já calculado
+pelo score (funs_kyc.scoring, que decide a aprovação de qualquer forma) e RenderedSteps,
+que só renderiza as fases na serialização. "build, eager" renderiza as 9 fases na hora
+e calcula o risco nos slots - é mais lento que o legado, que escreve as fases 4-5 com
+texto fixo (sem pesos, país nem decisão); o ganho dos templates aparece quando as
+fases são serializadas, no "build + serialize".
+
+Uso: python bench/bench_reasoning_templates.py [-n ITERATIONS]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from anna_protocol import PrivateReasoning
+
+from funs_kyc.reasoning_templates import RenderedSteps, encode_private_reasoning, reasoning_slots, render_private_steps
+from funs_kyc.scoring import score_applicant
+from legacy_reasoning import build_private_steps_legacy
+
+SCORES = dict(bio_score=98, doc_score=95, age_score=100, compliance_score=100, final_score=98)
+
+APPLICANTS = [
+    ("Ana Silva", "Brazil", "123.456.789-09", "BR1234567", 30),
+    ("José da Conceição Júnior", "Portugal", "N/A", "PT9988776", 19),
+    ("Li Wei", "China", "N/A", "E12345678", 21),
+    ("María-José O'Neil", "Spain", "987.654.321-00", "N/A", 64),
+]
+
+
+# legacy_reasoning.py é a referência congelada do user-004; textos que mudaram depois de
+# propósito entram aqui como (antes, depois) e são aplicados ao JSON legado na comparação
+TEXT_CHANGES = (
+    ("- Key derivation: PBKDF2(owner_private_key + attestation_id, 100K iterations)",   # HKDF (encryption.py)
+     "- Key derivation: HKDF-SHA256(master key, attestation_id); master = PBKDF2(owner_private_key, 100K iterations)"),
+)
+
+
+def legacy_reasoning(applicant):
+    return PrivateReasoning(steps=build_private_steps_legacy(*applicant, **SCORES),
+                            ai_model="bench", processing_time="0s")
+
+
+def template_reasoning(applicant):
+    return PrivateReasoning(steps=render_private_steps(reasoning_slots(*applicant, **SCORES)),
+                            ai_model="bench", processing_time="0s")
+
+
+def handler_reasoning(applicant, risk):
+    return PrivateReasoning(steps=RenderedSteps(reasoning_slots(*applicant, **SCORES, risk=risk)),
+                            ai_model="bench", processing_time="0s")
+
+
+def applicant_risk(applicant):
+    return score_applicant(applicant[4], applicant[1])
+
+
+def check_identical():
+    for applicant in APPLICANTS:
+        expected = json.dumps(legacy_reasoning(applicant).to_dict(), ensure_ascii=False)
+        for before, after in TEXT_CHANGES:
+            expected = expected.replace(before, after)
+        rendered = template_reasoning(applicant)
+        assert json.dumps(rendered.to_dict(), ensure_ascii=False) == expected, f"to_dict mismatch for {applicant[0]}"
+        assert encode_private_reasoning(rendered) == expected, f"pre-encoded mismatch for {applicant[0]}"
+        handler = handler_reasoning(applicant, applicant_risk(applicant))
+        assert encode_private_reasoning(handler) == expected, f"handler path mismatch for {applicant[0]}"
+    print(f"✅ Output byte-identical for {len(APPLICANTS)} applicants "
+          f"({len(expected.encode('utf-8')):,} bytes JSON)")
+
+
+def per_call_us(fn, iterations):
+    return min(timeit.repeat(fn, number=iterations, repeat=5)) / iterations * 1e6
+
+
+def allocated_bytes(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    check_identical()
+    applicant = APPLICANTS[0]
+    risk = applicant_risk(applicant)
+
+    cases = [
+        ("build", lambda: legacy_reasoning(applicant), lambda: handler_reasoning(applicant, risk)),
+        ("build, eager", lambda: legacy_reasoning(applicant), lambda: template_reasoning(applicant)),
+        ("build + serialize",
+         lambda: json.dumps(legacy_reasoning(applicant).to_dict(), ensure_ascii=False),
+         lambda: encode_private_reasoning(handler_reasoning(applicant, risk))),
+    ]
+
+    print(f"\n{'case':<20}{'legacy µs':>12}{'template µs':>14}{'speedup':>10}")
+    for name, old, new in cases:
+        old_us = per_call_us(old, args.iterations)
+        new_us = per_call_us(new, args.iterations)
+        print(f"{name:<20}{old_us:>12.1f}{new_us:>14.1f}{old_us / new_us:>9.1f}x")
+
+    old_peak = allocated_bytes(cases[-1][1])
+    new_peak = allocated_bytes(cases[-1][2])
+    print(f"\npeak allocation per request (build + serialize): legacy {old_peak:,} B, template {new_peak:,} B")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+Confirmação de N transações em voo: polling por request (wait_for_transaction_receipt)
+vs watcher compartilhado (funs_kyc.receipts.ReceiptWatcher)
+
+A FakeChain roda num processo à parte e conta as chamadas JSON-RPC por método.
+N transações assinadas de verdade são enviadas de uma vez; cada uma espera o
+próprio receipt numa thread. Relatório: chamadas RPC (total e por tx) e latência
+envio -> confirmação (p50/p95/p99/max) nos dois modos.
+
+Correção (antes da carga):
+    - tx minerada antes do watch() (fora dos blocos lidos) é resolvida pelo recheck
+    - depth=3 só resolve com 3 confirmações
+    - tx que nunca minera (gap de nonce) falha com TimeExhausted no timeout
+
+Uso: python bench/bench_receipts.py [--txs 200] [--block-time 1] [--rpc-latency 0.01] [--depth 1]
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from eth_account import Account
+from web3 import Web3
+from web3.exceptions import TimeExhausted
+
+from funs_kyc.receipts import ReceiptWatcher
+
+CONTRACT = '0x4c92d3305e7F1417f718827B819E285325a823d3'
+CHAIN_ID = 80002
+
+
+# ==================== CHAIN (processo à parte) ====================
+
+def serve_chain(conn, block_time, rpc_latency):
+    from fake_chain import FakeChain
+
+    chain = FakeChain(block_time=block_time, rpc_latency=rpc_latency).start()
+    conn.send(chain.url)
+    while True:
+        command = conn.recv()
+        if command == 'calls':
+            with chain.lock:
+                conn.send(dict(chain.calls))
+        else:
+            break
+    chain.stop()
+
+
+class ChainSidecar:
+    def __init__(self, block_time, rpc_latency):
+        ctx = multiprocessing.get_context('spawn')
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=serve_chain, args=(child, block_time, rpc_latency), daemon=True)
+        self.process.start()
+        self.url = self.conn.recv()
+
+    def calls(self):
+        self.conn.send('calls')
+        return self.conn.recv()
+
+    def stop(self):
+        self.conn.send('stop')
+        self.process.join(timeout=5)
+
+
+def signed_txs(count, start_nonce=0):
+    account = Account.create()
+    return [
+        account.sign_transaction({
+            'to': CONTRACT, 'value': 0, 'gas': 300000, 'gasPrice': 30 * 10**9, 'chainId': CHAIN_ID,
+            'nonce': start_nonce + i, 'data': b'\x12\x34\x56\x78' + os.urandom(32),
+        }).raw_transaction
+        for i in range(count)
+    ]
+
+
+def calls_delta(before, after):
+    return {method: after.get(method, 0) - before.get(method, 0)
+            for method in after if after.get(method, 0) != before.get(method, 0)}
+
+
+# ==================== CORREÇÃO ====================
+
+def check_correctness(w3, block_time):
+    watcher = ReceiptWatcher(w3, poll_interval=0.05, recheck_interval=1)
+
+    raw = signed_txs(1)[0]
+    tx_hash = w3.eth.send_raw_transaction(raw)
+    w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=0.05)
+    time.sleep(block_time * 2)   # minerada bem antes do registro
+    started = time.monotonic()
+    assert watcher.wait(tx_hash, timeout=5)['status'] == 1
+    assert time.monotonic() - started < 1 + block_time, "recheck did not find an already mined tx"
+
+    raw = signed_txs(1)[0]
+    tx_hash = w3.eth.send_raw_transaction(raw)
+    receipt = watcher.wait(tx_hash, timeout=block_time * 10, depth=3)
+    assert w3.eth.block_number - receipt['blockNumber'] + 1 >= 3, "depth=3 resolved too early"
+
+    gapped = signed_txs(1, start_nonce=5)[0]   # nonce 5 sem 0..4: nunca minera
+    tx_hash = w3.eth.send_raw_transaction(gapped)
+    started = time.monotonic()
+    try:
+        watcher.wait(tx_hash, timeout=block_time * 3)
+        raise AssertionError("unmined tx resolved")
+    except TimeExhausted:
+        elapsed = time.monotonic() - started
+        assert block_time * 3 <= elapsed < block_time * 3 + 1, elapsed
+    assert watcher.pending_count() == 0
+    print(f"correctness: OK ({watcher.stats})")
+
+
+# ==================== CARGA ====================
+
+def run(w3, chain, raws, wait):
+    latencies = [None] * len(raws)
+    errors = []
+    barrier = threading.Barrier(len(raws))
+
+    def worker(i):
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            tx_hash = w3.eth.send_raw_transaction(raws[i])
+            receipt = wait(tx_hash)
+            assert receipt['status'] == 1
+            latencies[i] = time.perf_counter() - started
+        except Exception as e:
+            errors.append(e)
+
+    before = chain.calls()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(raws))]
+    wall = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall
+    delta = calls_delta(before, chain.calls())
+    delta.pop('eth_sendRawTransaction', None)
+    return [lat for lat in latencies if lat is not None], delta, wall, errors
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--txs', type=int, default=200)
+    parser.add_argument('--block-time', type=float, default=1.0)
+    parser.add_argument('--rpc-latency', type=float, default=0.01)
+    parser.add_argument('--depth', type=int, default=1)
+    parser.add_argument('--poll-interval', type=float, default=0.1, help='dos dois modos (web3 usa 0.1)')
+    args = parser.parse_args()
+
+    chain = ChainSidecar(args.block_time, args.rpc_latency)
+    try:
+        w3 = Web3(Web3.HTTPProvider(chain.url, request_kwargs={'timeout': 30}))
+        check_correctness(w3, args.block_time)
+
+        watcher = ReceiptWatcher(w3, depth=args.depth, poll_interval=args.poll_interval)
+        modes = (
+            ('per-request polling',
+             lambda h: _wait_depth(w3, w3.eth.wait_for_transaction_receipt(h, timeout=120, poll_latency=args.poll_interval),
+                                   args.depth, args.poll_interval)),
+            ('shared watcher', lambda h: watcher.wait(h)),
+        )
+
+        print(f"\n{args.txs} txs in flight, block time {args.block_time}s, RPC latency {args.rpc_latency * 1000:.0f}ms, "
+              f"depth {args.depth}")
+        print(f"{'mode':<22}{'RPC calls':>10}{'per tx':>8}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'max s':>8}{'errors':>8}")
+        results = {}
+        for name, wait in modes:
+            raws = signed_txs(args.txs)
+            latencies, calls, wall, errors = run(w3, chain, raws, wait)
+            total = sum(calls.values())
+            results[name] = (total, calls)
+            print(f"{name:<22}{total:>10,}{total / args.txs:>8.1f}{statistics.median(latencies):>8.2f}"
+                  f"{percentile(latencies, 0.95):>8.2f}{percentile(latencies, 0.99):>8.2f}{max(latencies):>8.2f}"
+                  f"{len(errors):>8}")
+        for name, (_, calls) in results.items():
+            print(f"  {name}: {', '.join(f'{m} {n:,}' for m, n in sorted(calls.items()))}")
+        polling, shared = results['per-request polling'][0], results['shared watcher'][0]
+        print(f"RPC reduction: {polling / max(shared, 1):.1f}x; watcher stats: {watcher.stats}")
+    finally:
+        chain.stop()
+
+
+def _wait_depth(w3, receipt, depth, poll_interval):
+    """Profundidade no modo por request: cada tx também consulta o head até ter depth confirmações"""
+    while w3.eth.block_number - receipt['blockNumber'] + 1 < depth:
+        time.sleep(poll_interval)
+    return receipt
+
+
+if __name__ == '__main__':
+    main()
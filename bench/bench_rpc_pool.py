@@ -0,0 +1,203 @@
+"""
+Pool de endpoints RPC (funs_kyc.rpc_pool) contra vários nodes locais com atraso injetado
+
+Uma FakeChain e --endpoints proxies na frente dela (fake_rpc_proxy.RpcProxy: mesmo
+estado, latências e falhas diferentes) rodam num processo à parte.
+
+Carga:
+    - leituras (eth_getTransactionReceipt) de --threads threads com caudas lentas em todos
+      os endpoints: provider único vs pool sem hedge vs pool com hedge (p50/p95/p99 e
+      chamadas por leitura)
+    - --kycs KYCs com o endpoint principal fora do ar por --outage s no meio: provider
+      único vs pool (KYCs confirmados / falhos)
+Roteamento, hedge, failover e broadcast contra os mesmos nodes: tests/test_rpc_pool.py.
+
+Uso: python bench/bench_rpc_pool.py [--latencies 0.01,0.025,0.05] [--spike-rate 0.05]
+                                    [--spike-latency 0.5] [--reads 2000] [--threads 4] [--kycs 40] [--outage 2]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from web3 import Web3
+
+from bench_handler import configure, load_applicants, percentile
+from funs_kyc.rpc_pool import RpcPool
+
+
+# ==================== NODES (processo à parte) ====================
+
+def serve_nodes(conn, block_time, latencies, spike_rate, spike_latency):
+    from fake_chain import FakeChain
+    from fake_rpc_proxy import RpcProxy
+    from fake_s3 import FakeS3
+
+    chain = FakeChain(block_time=block_time).start()
+    proxies = [RpcProxy(chain.url, latency=latency, spike_rate=spike_rate, spike_latency=spike_latency, seed=i).start()
+               for i, latency in enumerate(latencies)]
+    s3 = FakeS3().start()
+    conn.send(([proxy.url for proxy in proxies], s3.url))
+    while True:
+        command, arg = conn.recv()
+        if command == 'configure':
+            index, settings = arg
+            proxies[index].configure(**settings)
+            conn.send(True)
+        elif command == 'calls':
+            conn.send([dict(proxy.calls) for proxy in proxies])
+        elif command == 'txs_from':
+            with chain.lock:
+                conn.send(sum(1 for tx in chain.txs.values() if tx['from'].lower() == arg.lower()))
+        else:
+            break
+    for proxy in proxies:
+        proxy.stop()
+    chain.stop()
+    s3.stop()
+
+
+class Nodes:
+    def __init__(self, args):
+        ctx = multiprocessing.get_context('spawn')
+        self.conn, child = ctx.Pipe()
+        latencies = [float(value) for value in args.latencies.split(',')]
+        self.process = ctx.Process(target=serve_nodes, args=(child, args.block_time, latencies, args.spike_rate,
+                                                             args.spike_latency), daemon=True)
+        self.process.start()
+        self.urls, self.s3_url = self.conn.recv()
+        self.defaults = [{'latency': latency, 'spike_rate': args.spike_rate, 'mode': 'ok'} for latency in latencies]
+        self._lock = threading.Lock()
+
+    def _ask(self, command, arg=None):
+        with self._lock:
+            self.conn.send((command, arg))
+            return self.conn.recv()
+
+    def configure(self, index, **settings):
+        self._ask('configure', (index, settings))
+
+    def reset(self):
+        for index, settings in enumerate(self.defaults):
+            self.configure(index, **settings)
+
+    def calls(self, method=None):
+        calls = self._ask('calls')
+        return [sum(c.values()) if method is None else c.get(method, 0) for c in calls]
+
+    def txs_from(self, address):
+        return self._ask('txs_from', address)
+
+    def stop(self):
+        self.conn.send(('stop', None))
+        self.process.join(timeout=5)
+
+
+def delta(before, after):
+    return [b - a for a, b in zip(before, after)]
+
+
+# ==================== CARGA ====================
+
+def read_latencies(w3, reads, threads):
+    def read(_):
+        started = time.perf_counter()
+        w3.provider.make_request('eth_getTransactionReceipt', ['0x' + os.urandom(32).hex()])
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(read, range(reads)))
+
+
+def run_kycs(nodes, applicants, concurrency, outage_at, outage):
+    import process_kyc
+
+    def kyc(applicant):
+        try:
+            process_kyc.create_detailed_attestation(**process_kyc.parse_kyc_input(applicant))
+            return True
+        except Exception:
+            return False
+
+    def outage_window():
+        time.sleep(outage_at)
+        nodes.configure(0, mode='down')
+        time.sleep(outage)
+        nodes.configure(0, mode='ok')
+
+    window = threading.Thread(target=outage_window)
+    started = time.perf_counter()
+    window.start()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(kyc, applicants))
+    window.join()
+    return sum(results), len(results) - sum(results), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latencies', default='0.01,0.025,0.05', help='latência base de cada endpoint (s)')
+    parser.add_argument('--spike-rate', type=float, default=0.05, help='fração das chamadas com atraso extra')
+    parser.add_argument('--spike-latency', type=float, default=0.5)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--kycs', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--outage', type=float, default=2.0, help='s com o endpoint principal fora do ar')
+    parser.add_argument('--block-time', type=float, default=0.2)
+    args = parser.parse_args()
+
+    nodes = Nodes(args)
+    workdir = tempfile.mkdtemp(prefix='bench_rpc_pool_')
+    configure(nodes.urls[0], nodes.s3_url, workdir)
+    os.environ['KYC_CONFIRMATION_TIMEOUT'] = '30'
+    stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+    reads, kycs = [], []
+    try:
+        nodes.reset()
+        for mode, w3 in (('single provider', Web3(Web3.HTTPProvider(nodes.urls[0]))),
+                         ('pool, no hedge', Web3(RpcPool(nodes.urls, max_hedges=0))),
+                         ('pool, hedged', Web3(RpcPool(nodes.urls)))):
+            read_latencies(w3, 50, args.threads)    # aquecimento: conexões e EWMA
+            before = sum(nodes.calls())
+            samples = read_latencies(w3, args.reads, args.threads)
+            reads.append((mode, samples, (sum(nodes.calls()) - before) / args.reads))
+
+        from funs_kyc import client_pool
+
+        applicants = load_applicants(None, args.kycs * 2)
+        for mode, urls in (('single provider', None), ('pool', ','.join(nodes.urls))):
+            if urls:
+                os.environ['KYC_RPC_URLS'] = urls
+            # Conta nova por modo: um nonce perdido na queda do provider único não trava os KYCs do pool
+            os.environ['ANNA_PRIVATE_KEY'] = '0x' + os.urandom(32).hex()
+            client_pool.reset_client()
+            batch = applicants[:args.kycs] if urls is None else applicants[args.kycs:]
+            kycs.append((mode, *run_kycs(nodes, batch, args.concurrency, 1.0, args.outage)))
+            time.sleep(args.block_time * 3)
+    finally:
+        sys.stderr = stderr
+        nodes.stop()
+
+    print(f"\nendpoints {args.latencies} s, {args.spike_rate:.0%} of calls +{args.spike_latency}s; "
+          f"{args.reads} reads from {args.threads} threads")
+    print(f"{'reads':<18}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'calls/read':>12}")
+    for mode, samples, amplification in reads:
+        print(f"{mode:<18}{percentile(samples, 50):>9.1f}{percentile(samples, 95):>9.1f}"
+              f"{percentile(samples, 99):>9.1f}{max(samples):>9.1f}{amplification:>12.2f}")
+    print(f"\n{args.kycs} KYCs ({args.concurrency} at a time), primary endpoint down for {args.outage:g}s after 1s")
+    print(f"{'kyc':<18}{'confirmed':>10}{'failed':>8}{'wall s':>8}")
+    for mode, ok, failed, wall in kycs:
+        print(f"{mode:<18}{ok:>10}{failed:>8}{wall:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
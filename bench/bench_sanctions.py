@@ -0,0 +1,164 @@
+"""
+Benchmark do sanctions screening (funs_kyc.sanctions) com listas sintéticas
+
+Gera listas de N entidades (nomes com 2-4 tokens, aliases, fontes OFAC/UN/EU/PEP),
+constrói o índice e mede latência por query em três grupos:
+    exact     - nome listado, como está
+    typo      - nome listado com 1-2 edições (recall@1 esperado)
+    clean     - nomes fora da lista
+Também faz um hot reload com queries rodando em paralelo.
+
+Uso: python bench/bench_sanctions.py [--sizes 75000 1000000] [--queries 300]
+"""
+
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from funs_kyc.sanctions import SanctionsScreener
+
+SYLLABLES = ("ka ri mo ha med al fa ta na sa lu an dre el go me ze ro bi vi da tor sul ian ov "
+             "ski ner berg chen wang li xu zha kov dim it ra pa ul jo se ma ria fer nan des "
+             "ab du lah mus ta fer gue ra ho sain ko ba yash i ngu yen tr an ol eg ser gei").split()
+SOURCES = ("OFAC", "UN", "EU", "PEP")
+# Sílabas que não aparecem na lista - nomes "limpos"
+CLEAN_SYLLABLES = "bok pex wum quib zor fyl gup vax jeb wyx".split()
+
+
+def synthetic_token(rng, syllables=SYLLABLES):
+    return ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def synthetic_entities(n, seed=1):
+    rng = random.Random(seed)
+    # Vocabulário limitado (como em listas reais: muitos primeiros nomes/sobrenomes repetidos)
+    given = [synthetic_token(rng) for _ in range(max(200, n // 50))]
+    family = [synthetic_token(rng) for _ in range(max(500, n // 8))]
+    for i in range(n):
+        tokens = [rng.choice(given)] + [rng.choice(family) for _ in range(rng.randint(1, 3))]
+        aliases = [' '.join(reversed(tokens))] if rng.random() < 0.2 else []
+        yield {'id': f"E{i}", 'name': ' '.join(tokens), 'source': rng.choice(SOURCES),
+               'aliases': ';'.join(aliases)}
+
+
+def write_list(path, n, seed=1):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['id', 'name', 'source', 'aliases'])
+        writer.writeheader()
+        names = []
+        for entity in synthetic_entities(n, seed):
+            writer.writerow(entity)
+            names.append(entity['name'])
+    return names
+
+
+def typo(name, rng):
+    chars = list(name)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        op = rng.choice(('sub', 'del', 'swap'))
+        if op == 'sub':
+            chars[i] = rng.choice('aeiouklmnrst')
+        elif op == 'del' and len(chars) > 4:
+            del chars[i]
+        elif i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return ''.join(chars)
+
+
+def latency_stats(screener, queries):
+    timings = []
+    results = []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(screener.screen(query))
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        'mean': statistics.fmean(timings),
+    }, results
+
+
+def run(size, n_queries, workdir):
+    rng = random.Random(size)
+    path = os.path.join(workdir, f"sanctions_{size}.csv")
+    names = write_list(path, size)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    screener = SanctionsScreener(path, reload_interval=3600)
+    build_s = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    index = screener.index
+    print(f"\n=== {size:,} entities: build {build_s:.1f}s, peak {peak / 2**20:.0f} MiB, "
+          f"{len(index.name_text):,} names, {len(index.vocab):,} tokens ===")
+
+    sample = rng.sample(names, n_queries)
+    typo_queries = [typo(name, rng) for name in sample]
+    clean = [f"{synthetic_token(rng, CLEAN_SYLLABLES)} {synthetic_token(rng, CLEAN_SYLLABLES)}"
+             for _ in range(n_queries)]
+
+    print(f"{'group':<8}{'p50 ms':>9}{'p99 ms':>9}{'mean ms':>9}  quality")
+    for group, queries, expected in (("exact", sample, sample), ("typo", typo_queries, sample), ("clean", clean, None)):
+        stats, results = latency_stats(screener, queries)
+        if expected is None:
+            quality = f"false hits {sum(r['hit'] for r in results)}/{len(results)}"
+        else:
+            # recall@1 conta empates no topo (nomes sintéticos repetem tokens)
+            top1 = sum(any(c['name'] == e and c['similarity'] == r['top_similarity'] for c in r['candidates'])
+                       for r, e in zip(results, expected))
+            top5 = sum(any(c['name'] == e for c in r['candidates']) for r, e in zip(results, expected))
+            hits = sum(r['hit'] for r in results)
+            quality = (f"recall@1 {top1 / len(results):.1%}, recall@5 {top5 / len(results):.1%}, "
+                       f"hits {hits}/{len(results)}")
+        print(f"{group:<8}{stats['p50']:>9.3f}{stats['p99']:>9.3f}{stats['mean']:>9.3f}  {quality}")
+
+    # Hot reload: nova versão da lista com queries em paralelo
+    errors = []
+    stop = threading.Event()
+
+    def hammer():
+        while not stop.is_set():
+            try:
+                screener.screen(sample[0])
+            except Exception as e:
+                errors.append(e)
+
+    worker = threading.Thread(target=hammer)
+    worker.start()
+    write_list(path, size, seed=2)
+    started = time.perf_counter()
+    screener.reload()
+    reload_s = time.perf_counter() - started
+    stop.set()
+    worker.join()
+    assert screener.index is not index and not errors, errors
+    print(f"hot reload: {reload_s:.1f}s, served queries throughout, {len(errors)} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[75000, 1000000])
+    parser.add_argument('--queries', type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='sanctions_bench_') as workdir:
+        for size in args.sizes:
+            run(size, args.queries, workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Correção e throughput do score de risco (funs_kyc.scoring)
+
+Correção:
+    - score_batch() == score_applicant() em todos os applicants (componentes, final,
+      nível do país e de risco, decisão), com pesos default e de KYC_SCORE_WEIGHTS,
+      scores bio/doc fracionários (empates .5 arredondados igual) e países com
+      acento/caixa/espaços diferentes ou fora da tabela
+    - KYC_COUNTRY_RISK_FILE (CSV e JSON) sobrescreve a tabela embutida; editar o arquivo
+      vale na chamada seguinte; nível desconhecido no arquivo é erro
+    - pesos default reproduzem a fórmula anterior (35/25/15/25 arredondado)
+    - process_kyc: score_applicants() (lote) == score_applicant() por applicant; país
+      high-risk vira manual_review com fase 5 coerente (MANUAL REVIEW, risco HIGH);
+      applicant limpo mantém o texto anterior da fase 5; sem lista de sanções o nome não
+      é checado e vai para manual_review; lista configurada inexistente é erro
+Throughput: applicants/s escalar (loop Python) vs. vetorizado (NumPy) por lote.
+
+Uso: python bench/bench_scoring.py [--records 100000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from funs_kyc import scoring
+from funs_kyc.scoring import DEFAULT_COUNTRY_RISK, batch_rows, score_applicant, score_batch
+
+COUNTRIES = ("Brazil", "Portugal", "Argentina", "Nigeria", "IRAN", "  viet nam ", "Côte d’Ivoire", "Cote d'Ivoire",
+             "Myanmar", "South Africa", "Narnia", "", "brazil", "Mexico", "Croatia", "north korea")
+
+
+def make_applicants(rng, n):
+    return {
+        'ages': [rng.randint(0, 90) for _ in range(n)],
+        'countries': [rng.choice(COUNTRIES) for _ in range(n)],
+        'hits': [rng.random() < 0.05 for _ in range(n)],
+        'bio_scores': [rng.choice((98, 100, 0, rng.randint(0, 100), rng.randint(0, 200) / 2)) for _ in range(n)],
+        'doc_scores': [rng.choice((95, rng.randint(0, 100), rng.randint(0, 200) / 2)) for _ in range(n)],
+    }
+
+
+def scalar(applicants, weights=None):
+    return [score_applicant(age, country, {'hit': hit}, bio, doc, weights)
+            for age, country, hit, bio, doc in zip(applicants['ages'], applicants['countries'], applicants['hits'],
+                                                   applicants['bio_scores'], applicants['doc_scores'])]
+
+
+def batch(applicants, weights=None):
+    return score_batch(applicants['ages'], applicants['countries'], applicants['hits'],
+                       applicants['bio_scores'], applicants['doc_scores'], weights)
+
+
+def check_same(applicants, weights=None):
+    expected = scalar(applicants, weights)
+    rows = batch_rows(batch(applicants, weights))
+    for i, (row, want) in enumerate(zip(rows, expected)):
+        assert row == want, (i, row, want)
+    return expected
+
+
+# ==================== CORREÇÃO ====================
+
+def check_correctness(rng):
+    applicants = make_applicants(rng, 20000)
+    results = check_same(applicants)
+    assert {r['risk_level'] for r in results} == {'low', 'medium', 'high'}
+    assert {r['country_risk'] for r in results} == {'low', 'medium', 'high'}
+    ties = sum(1 for r, bio, doc in zip(results, applicants['bio_scores'], applicants['doc_scores'])
+               if (bio * 0.35 + doc * 0.25) % 1 == 0.5)
+
+    # Fórmula anterior (pesos fixos) com os componentes de cada applicant
+    for r in results:
+        formula = round(r['bio_score'] * 0.35 + r['doc_score'] * 0.25 + r['age_score'] * 0.15
+                        + r['compliance_score'] * 0.25)
+        assert r['final_score'] == formula, r
+    assert score_applicant(30, "Brazil")['final_score'] == round(98 * 0.35 + 95 * 0.25 + 100 * 0.15 + 100 * 0.25)
+
+    # Pesos configurados (normalizados para somar 100)
+    for raw in ("50,20,10,20", "1,1,1,1", "3,0,0,7", "0.35,0.25,0.15,0.25"):
+        os.environ['KYC_SCORE_WEIGHTS'] = raw
+        check_same(applicants)
+    assert scoring.score_weights() == (35, 25, 15, 25)
+    os.environ['KYC_SCORE_WEIGHTS'] = "1,2,3"
+    try:
+        scoring.score_weights()
+        raise AssertionError("expected ValueError for 3 weights")
+    except ValueError:
+        pass
+    del os.environ['KYC_SCORE_WEIGHTS']
+    check_same(applicants, weights=(40, 20, 10, 30))
+
+    # Tabela de países do arquivo: sobrescreve a embutida, recarregada quando muda
+    workdir = tempfile.mkdtemp(prefix='bench_scoring_')
+    csv_path = os.path.join(workdir, 'country_risk.csv')
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write("country,risk\nBrazil,medium\nNigeria,low\nNarnia,high\n")
+    os.environ['KYC_COUNTRY_RISK_FILE'] = csv_path
+    assert score_applicant(30, " brazil")['country_risk'] == 'medium'
+    assert score_applicant(30, "NIGERIA")['country_risk'] == 'low'
+    assert score_applicant(30, "Iran")['country_risk'] == 'high'       # embutida continua valendo
+    check_same(applicants)
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write("country,risk\nBrazil,high\n")
+    os.utime(csv_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert score_applicant(30, "Brazil")['country_risk'] == 'high' and score_applicant(30, "Narnia")['country_risk'] == 'low'
+
+    json_path = os.path.join(workdir, 'country_risk.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"Portugal": "medium"}, f)
+    os.environ.update({'KYC_COUNTRY_RISK_FILE': json_path, 'KYC_COUNTRY_RISK_DEFAULT': 'medium'})
+    assert score_applicant(30, "Portugal")['country_risk'] == 'medium'
+    assert score_applicant(30, "Narnia")['country_risk'] == 'medium'
+    check_same(applicants)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"Portugal": "severe"}, f)
+    os.utime(json_path, ns=(time.time_ns(), time.time_ns() + 2 * 10**9))
+    try:
+        score_applicant(30, "Portugal")
+        raise AssertionError("expected ValueError for an unknown risk level")
+    except ValueError:
+        pass
+    del os.environ['KYC_COUNTRY_RISK_FILE'], os.environ['KYC_COUNTRY_RISK_DEFAULT']
+    assert len(scoring.get_country_risk_table()) == len({scoring.normalize_country(c) for c in DEFAULT_COUNTRY_RISK})
+
+    check_reasoning()
+    print(f"correctness: OK ({len(results):,} applicants, {ties:,} .5 ties, 6 weight sets, CSV/JSON country tables)")
+
+
+def check_reasoning():
+    import process_kyc
+    from funs_kyc import sanctions
+
+    sanctions_list = os.path.join(tempfile.mkdtemp(prefix='bench_scoring_'), 'sanctions.csv')
+    with open(sanctions_list, 'w', encoding='utf-8') as f:
+        f.write("id,name,source,country\nS1,Ivan Petrovich Sidorov,OFAC,Russia\n")
+    os.environ['KYC_SANCTIONS_LIST'] = sanctions_list
+    sanctions._screener = None
+    stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+    try:
+        applicants = [dict(user_name=f"Applicant {i}", user_email=f"a{i}@bench.local", user_age=20 + i,
+                           user_country=country, user_cpf="123.456.789-09", user_passport=f"BR{i:07d}")
+                      for i, country in enumerate(("Brazil", "Nigeria", "Iran", "Portugal"))]
+        scored = process_kyc.score_applicants(applicants)
+        for applicant, (screening, risk) in zip(applicants, scored):
+            assert risk == score_applicant(applicant['user_age'], applicant['user_country'], screening), risk
+
+        clean, medium, high = (process_kyc.build_kyc_reasoning(**applicants[i]) for i in range(3))
+    finally:
+        sys.stderr = stderr
+
+    final_step = clean['private_reasoning'].steps[-1]
+    assert final_step.result == "FINAL: KYC APPROVED - 98/100, Badge 'Verified Creator'", final_step.result
+    assert final_step.ai_reasoning.endswith("All components passed. Final score 98 exceeds threshold 80. Recommend approval.")
+    assert "Bio(35%)=34.3" in final_step.analysis and "Risk: LOW." in final_step.analysis
+    assert clean['public_reasoning'].conclusion == 'approved' and clean['public_reasoning'].risk_level == 'low'
+
+    assert medium['risk']['risk_level'] == 'medium' and medium['public_reasoning'].conclusion == 'approved'
+    assert "Nigeria is a medium-risk jurisdiction" in medium['private_reasoning'].steps[-2].analysis
+
+    final_step = high['private_reasoning'].steps[-1]
+    assert high['public_reasoning'].conclusion == 'manual_review' and high['public_reasoning'].risk_level == 'high'
+    assert final_step.result == f"FINAL: MANUAL REVIEW - {high['final_score']}/100, risk HIGH", final_step.result
+    assert final_step.ai_reasoning.endswith("Recommend manual review.")
+    assert high['private_reasoning'].steps[-2].result == "COMPLIANCE REVIEW - No sanctions, Iran high-risk jurisdiction"
+
+    # Sem lista: nome não checado -> manual_review (nunca "No sanctions"); lista inexistente -> erro
+    os.environ['KYC_SANCTIONS_LIST'] = ''
+    sanctions._screener = None
+    stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+    try:
+        unscreened = process_kyc.build_kyc_reasoning(**applicants[0])
+        [(_, batch_risk)] = process_kyc.score_applicants(applicants[:1])
+        os.environ['KYC_SANCTIONS_LIST'] = sanctions_list + '.missing'
+        sanctions._screener = None
+        try:
+            sanctions.get_screener()
+            raise AssertionError("expected FileNotFoundError for a missing sanctions list")
+        except FileNotFoundError:
+            pass
+    finally:
+        sys.stderr = stderr
+        del os.environ['KYC_SANCTIONS_LIST']
+        sanctions._screener = None
+    assert unscreened['risk'] == batch_risk and not batch_risk['sanctions_screened']
+    assert unscreened['public_reasoning'].conclusion == 'manual_review'
+    steps = unscreened['private_reasoning'].steps
+    assert steps[-2].result == "COMPLIANCE REVIEW - name not screened (no sanctions list loaded)"
+    assert steps[-1].result == "FINAL: MANUAL REVIEW - 98/100, sanctions not screened", steps[-1].result
+
+
+# ==================== THROUGHPUT ====================
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    check_correctness(rng)
+
+    print(f"\nbest of {args.repeat}")
+    print(f"{'applicants':>11}{'scalar rec/s':>15}{'numpy rec/s':>15}{'speedup':>9}")
+    for n in sorted({1000, 10000, args.records}):
+        applicants = make_applicants(rng, n)
+        scalar_rate = n / best_time(lambda: scalar(applicants), args.repeat)
+        batch_rate = n / best_time(lambda: batch(applicants), args.repeat)
+        print(f"{n:>11,}{scalar_rate:>15,.0f}{batch_rate:>15,.0f}{batch_rate / scalar_rate:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Tamanho do upload por attestation: payload completo vs layout compartilhado
+
+Monta o documento pinado no IPFS nos dois layouts (mesmo applicant), com o plaintext
+em JSON e no formato compacto (compact.py), confere que o resolver reconstrói
+exatamente o mesmo PrivateReasoning e compara bytes enviados.
+
+Uso: python bench/bench_shared_reasoning.py
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from anna_protocol import PrivateReasoning, PublicReasoning
+
+from funs_kyc import shared_reasoning
+from funs_kyc.pipeline import build_reasoning_document
+from funs_kyc.reasoning_templates import reasoning_slots, render_private_steps
+
+
+class MemoryFilebase:
+    """Stand-in em memória do FilebaseClient (upload_json/fetch)"""
+
+    bucket_name = "bench"
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_json(self, data, filename=None):
+        self.objects[filename] = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        return filename
+
+    def fetch(self, cid):
+        return json.loads(self.objects[cid])
+
+
+class BenchClient:
+    address = "0x" + "11" * 20
+    private_key = "0x" + "22" * 32
+
+    def __init__(self):
+        self.filebase = MemoryFilebase()
+
+
+def build(client, slots, shared, encoding='cbor'):
+    os.environ['KYC_SHARED_REASONING'] = '1' if shared else '0'
+    os.environ['KYC_REASONING_ENCODING'] = encoding
+    private = PrivateReasoning(steps=render_private_steps(slots), ai_model="bench", processing_time="0s",
+                               raw_input="Name=Ana Silva", additional_metadata={"kyc_level": "bench"})
+    public = PublicReasoning(attestation_id="", timestamp=0, conclusion="approved", confidence_score=0.98, risk_level="low")
+    document = build_reasoning_document(client, public, private, "0x" + "ab" * 32, slots)
+    filename = f"reasoning_{'shared' if shared else 'full'}_{encoding}.json"
+    return private, client.filebase.upload_json(document, filename=filename)
+
+
+def main():
+    client = BenchClient()
+    slots = reasoning_slots("Ana Silva", "Brazil", "123.456.789-09", "BR1234567", 30, 98, 95, 100, 100, 98)
+
+    private, _ = build(client, slots, shared=False)
+    _, shared_cid = build(client, slots, shared=True)
+
+    expected = private.to_dict()
+    restored = shared_reasoning.fetch_private_reasoning(client, shared_cid).to_dict()
+    assert json.dumps(restored, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False), "resolver mismatch"
+    print("✅ Resolver rebuilds the identical PrivateReasoning")
+
+    _, _, body_name = shared_reasoning.shared_body()
+    body_bytes = len(client.filebase.objects[body_name])
+    sizes = {}
+    for encoding in ('json', 'cbor'):
+        for shared in (False, True):
+            _, cid = build(client, slots, shared, encoding)
+            sizes[shared, encoding] = len(client.filebase.objects[cid])
+    baseline = sizes[False, 'json']
+
+    print(f"\nbytes per attestation      {'json':>8}  {'cbor':>8}  (vs full json)")
+    for shared in (False, True):
+        print(f"{'shared layout' if shared else 'full payload':<24}" +
+              "".join(f"  {sizes[shared, e]:>8,}" for e in ('json', 'cbor')) +
+              f"  ({baseline / sizes[shared, 'cbor']:.1f}x smaller with cbor)")
+    print(f"shared body (pinned once): {body_bytes:>8,} B")
+    full_bytes, shared_bytes = sizes[False, 'cbor'], sizes[True, 'cbor']
+    print(f"shared vs full, both cbor: {full_bytes / shared_bytes:.1f}x smaller")
+    for n in (1_000, 100_000):
+        print(f"storage for {n:>7,} attestations (cbor): full {full_bytes * n / 1e6:>9.1f} MB, "
+              f"shared {(shared_bytes * n + body_bytes) / 1e6:>9.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Documento de reasoning em streaming (funs_kyc.document_stream) vs montado em memória
+
+Pico de memória (tracemalloc) de uma attestation no layout completo, do reasoning
+privado até o objeto gravado no FakeS3 (processo à parte, reportando o CID como o
+Filebase), para reasonings de tamanho crescente:
+    - memória: steps numa lista, build_reasoning_document + prepare_json + upload_prepared
+      (plaintext, ciphertext, hex, texto JSON e gzip inteiros ao mesmo tempo)
+    - streaming: steps geradas sob demanda (como RenderedSteps), stream_reasoning_document
+      + upload_prepared (uploader com part_size = 5 MiB, o mínimo do S3)
+O pico do streaming para de crescer quando o documento passa de uma parte do
+multipart (blocos de CHUNK_SIZE, uma step e uma parte), enquanto o da memória cresce
+com o reasoning.
+
+A correção (documento em streaming == documento em memória, JSON e CBOR, com e sem
+gzip) e o limite do pico ficam em tests/test_document_stream.py; aqui só a medição.
+
+Uso: python bench/bench_stream_memory.py [--sizes 1,4,16,64] [--step-kb 256] [--encoding cbor]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from anna_protocol import DetailedReasoningStep, PrivateReasoning, PublicReasoning
+
+from funs_kyc import storage
+from funs_kyc.cid import compute_cid
+from funs_kyc.pipeline import build_reasoning_document, stream_reasoning_document
+from funs_kyc.storage import FilebaseUploader, prepare_json
+
+BUCKET = 'anna-protocol'
+WORDS = ("liveness", "landmark", "embedding", "MRZ", "checksum", "ICAO", "OCR", "confidence", "texture",
+         "depth", "sanctions", "Levenshtein", "document", "hologram", "score", "threshold", "passport")
+
+
+# ==================== S3 (processo à parte) ====================
+
+def serve_s3(conn):
+    from fake_s3 import FakeS3
+
+    s3 = FakeS3(cid=compute_cid).start()
+    conn.send(s3.url)
+    conn.recv()
+    s3.stop()
+
+
+class BenchClient:
+    address = "0x" + "11" * 20
+    private_key = "0x" + "22" * 32
+
+    def __init__(self, url):
+        self.filebase = FilebaseUploader('bench', 'bench', BUCKET, url)
+        self.filebase.part_size = storage.MIN_PART_SIZE
+
+
+# ==================== REASONING ====================
+
+class GeneratedSteps(Sequence):
+    """Reasoning de `count` steps de ~step_kb KB cada, geradas sob demanda (determinísticas pelo índice)"""
+
+    def __init__(self, count, step_kb):
+        self.count = count
+        self.step_kb = step_kb
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        rng = random.Random(index)
+        words = rng.choices(WORDS, k=self.step_kb * 1024 // 8)
+        return DetailedReasoningStep(step=index + 1, action=f"Phase {index + 1}: extended analysis",
+                                     input={"segment": index}, analysis=" ".join(words),
+                                     ai_reasoning=f"Segment {index} reviewed", score=95, confidence=0.95,
+                                     result=f"SEGMENT {index} PASSED")
+
+
+def private_reasoning(steps):
+    return PrivateReasoning(steps=steps, ai_model="bench", processing_time="0s", raw_input="Name=Bench",
+                            additional_metadata={"kyc_level": "bench"})
+
+
+def public_reasoning():
+    return PublicReasoning(attestation_id="", timestamp=0, conclusion="approved", confidence_score=0.98,
+                           risk_level="low")
+
+
+# ==================== MEMÓRIA ====================
+
+def in_memory(client, count, step_kb):
+    private = private_reasoning(list(GeneratedSteps(count, step_kb)))
+    document = build_reasoning_document(client, public_reasoning(), private, f"0x{os.urandom(32).hex()}")
+    prepared = prepare_json(document)
+    return client.filebase.upload_prepared(prepared, f"memory_{count}.json"), prepared.raw_size
+
+
+def streaming(client, count, step_kb):
+    private = private_reasoning(GeneratedSteps(count, step_kb))
+    prepared = stream_reasoning_document(client, public_reasoning(), private, f"0x{os.urandom(32).hex()}")
+    return client.filebase.upload_prepared(prepared, f"stream_{count}.json"), prepared.raw_size
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    _, raw_size = fn(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed, raw_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,4,16,64', help='MB de texto de reasoning (steps)')
+    parser.add_argument('--step-kb', type=int, default=256, help='tamanho de cada step')
+    parser.add_argument('--encoding', choices=('cbor', 'json'), default='cbor')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    conn, child = ctx.Pipe()
+    process = ctx.Process(target=serve_s3, args=(child,), daemon=True)
+    process.start()
+    client = BenchClient(conn.recv())
+    stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+    rows = []
+    try:
+        os.environ['KYC_REASONING_ENCODING'] = args.encoding
+        streaming(client, 2, args.step_kb)    # aquecimento (boto3, dicionário do compact)
+        in_memory(client, 2, args.step_kb)
+        for megabytes in (float(size) for size in args.sizes.split(',')):
+            count = max(1, round(megabytes * 1024 / args.step_kb))
+            memory_peak, memory_time, raw_size = measure(in_memory, client, count, args.step_kb)
+            stream_peak, stream_time, _ = measure(streaming, client, count, args.step_kb)
+            rows.append((megabytes, raw_size, memory_peak, memory_time, stream_peak, stream_time))
+    finally:
+        sys.stderr = stderr
+        conn.send('stop')
+        process.join(timeout=5)
+
+    mb = 1024 * 1024
+    print(f"\nencoding {args.encoding}, steps of {args.step_kb} KB, part size {storage.MIN_PART_SIZE // mb} MiB")
+    print(f"{'reasoning MB':>13}{'document MB':>13}{'memory peak MB':>16}{'stream peak MB':>16}"
+          f"{'memory s':>10}{'stream s':>10}")
+    for megabytes, raw_size, memory_peak, memory_time, stream_peak, stream_time in rows:
+        print(f"{megabytes:>13g}{raw_size / mb:>13.1f}{memory_peak / mb:>16.1f}{stream_peak / mb:>16.1f}"
+              f"{memory_time:>10.2f}{stream_time:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+Upload do reasoning no Filebase: client boto3 novo por upload (como o SDK fora do
+client_pool) e client do SDK reaproveitado, os dois sem compressão, vs
+funs_kyc.storage.FilebaseUploader (pool de conexões + retries), com e sem gzip
+
+O FakeS3 roda num processo à parte, com latência por request, latência de conexão
+nova (handshake TCP/TLS) e banda por request configuráveis, e conta conexões
+aceitas e bytes recebidos.
+
+Correção (antes da carga):
+    - por padrão o objeto pinado é o JSON puro == serialização do SDK, sem Content-Encoding
+      (gateway IPFS serve o documento e o CID é o do texto)
+    - com KYC_FILEBASE_COMPRESSION=gzip: round trip gzip (Content-Encoding: gzip),
+      texto descomprimido == serialização do SDK, e leitura de objeto sem compressão
+    - 503 SlowDown transitórios são repetidos; NoSuchKey falha sem retry;
+      retries esgotados viram "Failed to upload to Filebase"
+    - documento grande vira multipart em partes de part_size, com pico de memória
+      do upload bem abaixo do tamanho do corpo serializado
+
+Uso: python bench/bench_uploads.py [--uploads 200] [--concurrency 8] [--s3-latency 0.05]
+                                   [--connect-latency 0.1] [--bandwidth 2000000]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import boto3
+from botocore.client import Config
+
+from anna_protocol import PrivateReasoning, PublicReasoning
+
+from funs_kyc import storage
+from funs_kyc.cid import compute_cid
+from funs_kyc.pipeline import build_reasoning_document
+from funs_kyc.reasoning_templates import reasoning_slots, render_private_steps
+from funs_kyc.storage import FilebaseUploader, encode_json
+
+BUCKET = 'anna-protocol'
+
+
+# ==================== S3 (processo à parte) ====================
+
+def serve_s3(conn, latency, connect_latency, bandwidth):
+    from fake_s3 import FakeS3
+
+    s3 = FakeS3(latency=latency, connect_latency=connect_latency, bandwidth=bandwidth).start()
+    conn.send(s3.url)
+    while True:
+        command, arg = conn.recv()
+        if command == 'stats':
+            with s3.lock:
+                conn.send({'connections': s3.connections, 'bytes_in': s3.bytes_in, 'max_body': s3.max_body,
+                           'requests': dict(s3.requests), 'failures': s3.failures})
+        elif command == 'fail':
+            s3.fail_next(arg)
+            conn.send(True)
+        elif command == 'put':
+            s3.put(BUCKET, *arg)
+            conn.send(True)
+        else:
+            break
+    s3.stop()
+
+
+class S3Sidecar:
+    def __init__(self, latency, connect_latency, bandwidth):
+        ctx = multiprocessing.get_context('spawn')
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=serve_s3, args=(child, latency, connect_latency, bandwidth), daemon=True)
+        self.process.start()
+        self.url = self.conn.recv()
+
+    def _ask(self, command, arg=None):
+        self.conn.send((command, arg))
+        return self.conn.recv()
+
+    def stats(self):
+        return self._ask('stats')
+
+    def fail_next(self, count):
+        self._ask('fail', count)
+
+    def put(self, key, body, content_type='application/json'):
+        self._ask('put', (key, body, content_type))
+
+    def stop(self):
+        self.conn.send(('stop', None))
+        self.process.join(timeout=5)
+
+
+# ==================== DOCUMENTOS ====================
+
+class BenchClient:
+    address = "0x" + "11" * 20
+    private_key = "0x" + "22" * 32
+    filebase = None
+
+
+def reasoning_document(index):
+    """Documento pinado real (layout completo, ~25KB) de um applicant sintético"""
+    os.environ['KYC_SHARED_REASONING'] = '0'
+    slots = reasoning_slots(f"Applicant {index}", "Brazil", "123.456.789-09", f"BR{index:07d}", 30, 98, 95, 100, 100, 98)
+    private = PrivateReasoning(steps=render_private_steps(slots), ai_model="bench", processing_time="0s",
+                               raw_input=f"Name=Applicant {index}", additional_metadata={"kyc_level": "bench"})
+    public = PublicReasoning(attestation_id="", timestamp=0, conclusion="approved", confidence_score=0.98, risk_level="low")
+    return build_reasoning_document(BenchClient(), public, private, f"0x{index:064x}", slots)
+
+
+def sdk_s3(url):
+    """Client S3 como o FilebaseClient do SDK cria (endpoint trocado pelo fake)"""
+    return boto3.session.Session().client(
+        's3', endpoint_url=url, aws_access_key_id='bench', aws_secret_access_key='bench', region_name='us-east-1',
+        config=Config(signature_version='s3v4', s3={'addressing_style': 'path'})
+    )
+
+
+def sdk_upload(s3, data, filename):
+    """Mesmo corpo do FilebaseClient.upload_json"""
+    s3.put_object(Bucket=BUCKET, Key=filename, Body=json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'),
+                  ContentType='application/json', Metadata={'anna-protocol': 'v2.0.1', 'content-type': 'reasoning'})
+    return filename
+
+
+def gzip_upload(uploader, data, filename):
+    os.environ['KYC_FILEBASE_COMPRESSION'] = 'gzip'
+    return uploader.upload_json(data, filename)
+
+
+# ==================== CORREÇÃO ====================
+
+def check_correctness(s3, document):
+    storage.RETRY_BASE = 0.01
+    uploader = FilebaseUploader('bench', 'bench', BUCKET, s3.url)
+
+    sdk_text = json.dumps(document, ensure_ascii=False, indent=2).encode('utf-8')
+    uploader.upload_json(document, 'plain.json')
+    response = uploader.s3.get_object(Bucket=BUCKET, Key='plain.json')
+    assert 'ContentEncoding' not in response and response['Body'].read() == sdk_text, "default upload is not plain JSON"
+    assert storage.prepare_json(document).cid == compute_cid([sdk_text]), "CID must cover the plain JSON"
+
+    os.environ['KYC_FILEBASE_COMPRESSION'] = 'gzip'
+    try:
+        uploader.upload_json(document, 'check.json')
+        assert uploader.fetch('check.json') == document
+        response = uploader.s3.get_object(Bucket=BUCKET, Key='check.json')
+        assert response['ContentEncoding'] == 'gzip'
+        assert zlib.decompress(response['Body'].read(), 31) == sdk_text, "decoded body differs from the SDK serialization"
+        assert uploader.fetch('plain.json') == document, "uncompressed object not readable"
+    finally:
+        del os.environ['KYC_FILEBASE_COMPRESSION']
+
+    s3.fail_next(2)
+    retries = uploader.stats['retries']
+    uploader.upload_json(document, 'retried.json')
+    assert uploader.stats['retries'] == retries + 2 and uploader.fetch('retried.json') == document
+
+    retries = uploader.stats['retries']
+    try:
+        uploader.fetch('missing.json')
+        raise AssertionError("missing object fetched")
+    except Exception as e:
+        assert str(e).startswith("Failed to fetch missing.json"), e
+    assert uploader.stats['retries'] == retries, "NoSuchKey must not be retried"
+
+    s3.fail_next(uploader.max_attempts)
+    try:
+        uploader.upload_json(document, 'exhausted.json')
+        raise AssertionError("upload succeeded with every attempt failing")
+    except Exception as e:
+        assert str(e).startswith("Failed to upload to Filebase"), e
+
+    # Multipart: ~30MB de texto, pouco compressível (hex aleatório), partes de 5MiB
+    large = {'chunks': [os.urandom(1024).hex() for _ in range(14000)]}
+    uploader.part_size = storage.MIN_PART_SIZE
+    body_size = sum(len(chunk) for chunk in encode_json(large))
+    before = s3.stats()
+    tracemalloc.start()
+    uploader.upload_json(large, 'large.json')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    after = s3.stats()
+    assert uploader.fetch('large.json') == large
+    parts = after['requests']['PUT'] - before['requests']['PUT']
+    assert parts > 1 and after['max_body'] <= storage.MIN_PART_SIZE, (parts, after['max_body'])
+    assert peak < min(body_size / 2, 3 * storage.MIN_PART_SIZE), f"upload buffered {peak:,} B for a {body_size:,} B body"
+    print(f"correctness: OK (multipart: {body_size / 1e6:.1f} MB JSON in {parts} parts, "
+          f"upload peak {peak / 1e6:.1f} MB traced)")
+
+
+# ==================== CARGA ====================
+
+def run(s3, documents, upload, concurrency):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(item):
+        index, document = item
+        started = time.perf_counter()
+        upload(document, f"reasoning_{index:08x}.json")
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    before = s3.stats()
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, enumerate(documents)))
+    wall = time.perf_counter() - wall
+    after = s3.stats()
+    return latencies, wall, after['connections'] - before['connections'], after['bytes_in'] - before['bytes_in']
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uploads', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--s3-latency', type=float, default=0.05)
+    parser.add_argument('--connect-latency', type=float, default=0.1, help='handshake TCP+TLS por conexão nova (s)')
+    parser.add_argument('--bandwidth', type=float, default=2_000_000, help='bytes/s por request')
+    args = parser.parse_args()
+
+    s3 = S3Sidecar(args.s3_latency, args.connect_latency, args.bandwidth)
+    try:
+        documents = [reasoning_document(i) for i in range(args.uploads)]
+        check_correctness(s3, documents[0])
+
+        warm_s3 = sdk_s3(s3.url)
+        uploader = FilebaseUploader('bench', 'bench', BUCKET, s3.url)
+        modes = (
+            ('new client per upload', lambda doc, name: sdk_upload(sdk_s3(s3.url), doc, name)),
+            ('SDK client, reused', lambda doc, name: sdk_upload(warm_s3, doc, name)),
+            ('pooled uploader', uploader.upload_json),
+            ('pooled uploader + gzip', lambda doc, name: gzip_upload(uploader, doc, name)),
+        )
+
+        raw = len(json.dumps(documents[0], ensure_ascii=False, indent=2).encode('utf-8'))
+        print(f"\n{args.uploads} uploads, concurrency {args.concurrency}, document {raw:,} B, "
+              f"S3 latency {args.s3_latency * 1000:.0f}ms, connect {args.connect_latency * 1000:.0f}ms, "
+              f"{args.bandwidth / 1e6:.1f} MB/s per request")
+        print(f"{'mode':<26}{'wall s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'conns':>7}{'KB sent':>10}{'B/upload':>10}")
+        for name, upload in modes:
+            latencies, wall, connections, sent = run(s3, documents, upload, args.concurrency)
+            print(f"{name:<26}{wall:>8.2f}{statistics.median(latencies) * 1000:>9.1f}"
+                  f"{percentile(latencies, 0.95) * 1000:>9.1f}{percentile(latencies, 0.99) * 1000:>9.1f}"
+                  f"{connections:>7}{sent / 1000:>10,.0f}{sent / args.uploads:>10,.0f}")
+        os.environ.pop('KYC_FILEBASE_COMPRESSION')
+        print(f"uploader stats: {uploader.stats}")
+    finally:
+        s3.stop()
+
+
+if __name__ == '__main__':
+    main()
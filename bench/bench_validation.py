@@ -0,0 +1,100 @@
+"""
+Throughput da validação de CPF/passaporte/MRZ (funs_kyc.validation)
+
+Registros/s escalar (loop Python) vs. vetorizado (NumPy) por lote. A correção (checks
+da MRZ espécime do ICAO, CPFs gerados/mutados, API escalar == vetorizada) está em
+tests/test_validation.py, que usa os geradores daqui.
+
+Uso: python bench/bench_validation.py [--records 50000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from funs_kyc.validation import (
+    ValidationError, cpf_is_valid, cpf_valid_batch, mrz_check_digit, td3_checks, td3_checks_batch,
+    validate_applicant, validate_batch,
+)
+
+def make_cpf(rng, formatted=True):
+    digits = [rng.randrange(10) for _ in range(9)]
+    for size in (9, 10):
+        total = sum(d * w for d, w in zip(digits, range(size + 1, 1, -1)))
+        digits.append(total * 10 % 11 % 10)
+    text = ''.join(map(str, digits))
+    return f"{text[:3]}.{text[3:6]}.{text[6:9]}-{text[9:]}" if formatted else text
+
+
+def mutate_digit(text, rng):
+    positions = [i for i, c in enumerate(text) if c.isdigit()]
+    i = rng.choice(positions)
+    return text[:i] + str((int(text[i]) + rng.randrange(1, 10)) % 10) + text[i + 1:]
+
+
+def make_mrz(rng):
+    document = ''.join(rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ0123456789') for _ in range(rng.randint(6, 9)))
+    document_field = document.ljust(9, '<')
+    birth = f"{rng.randint(40, 99):02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+    expiry = f"{rng.randint(27, 35):02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+    personal = ''.join(rng.choice('0123456789<') for _ in range(14))
+    personal_check = str(mrz_check_digit(personal))
+    line2 = (f"{document_field}{mrz_check_digit(document_field)}BRA{birth}{mrz_check_digit(birth)}"
+             f"{rng.choice('MF<')}{expiry}{mrz_check_digit(expiry)}{personal}{personal_check}")
+    composite = line2[0:10] + line2[13:20] + line2[21:43]
+    line2 += str(mrz_check_digit(composite))
+    line1 = "P<BRASILVA<<ANA<<<<<<<<<<<<<<<<<<<<<<<<<<<<<"[:44]
+    return f"{line1}\n{line2}", document
+
+
+def best_rate(fn, n, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return n / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    n = args.records
+    cpfs = [make_cpf(rng) if rng.random() < 0.9 else mutate_digit(make_cpf(rng), rng) for _ in range(n)]
+    generated = [make_mrz(rng) for _ in range(n)]
+    mrzs = [m for m, _ in generated]
+    applicants = [{'user_cpf': c, 'user_passport': d} for c, (_, d) in zip(cpfs, generated)]
+
+    print(f"\n{n:,} records, best of {args.repeat}")
+    print(f"{'check':<12}{'scalar rec/s':>15}{'numpy rec/s':>15}{'speedup':>9}")
+    rows = (
+        ('cpf', lambda: [cpf_is_valid(c) for c in cpfs], lambda: cpf_valid_batch(cpfs)),
+        ('mrz td3', lambda: [td3_checks(m) for m in mrzs], lambda: td3_checks_batch(mrzs)),
+        ('applicant', lambda: [_scalar_errors(a, m) for a, m in zip(applicants, mrzs)],
+         lambda: validate_batch(applicants, mrzs)),
+    )
+    for name, scalar_fn, batch_fn in rows:
+        batch_fn()   # import do NumPy e tabelas fora da medição
+        scalar = best_rate(scalar_fn, n, args.repeat)
+        vectorized = best_rate(batch_fn, n, args.repeat)
+        print(f"{name:<12}{scalar:>15,.0f}{vectorized:>15,.0f}{vectorized / scalar:>8.1f}x")
+
+
+def _scalar_errors(applicant, mrz):
+    try:
+        validate_applicant(applicant, mrz)
+        return []
+    except ValidationError as e:
+        return e.errors
+
+
+if __name__ == '__main__':
+    main()
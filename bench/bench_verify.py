@@ -0,0 +1,184 @@
+"""
+Rota de verificação (GET /api/process_kyc/verify/<attestation_id>, funs_kyc.verification)
+
+Cria --attestations KYCs contra a FakeChain + FakeS3 (processo à parte, como no
+bench_handler) e verifica cada attestation_id.
+
+Correção:
+    - primeira verificação vai à rede: registro on-chain + documento, hashes e CID conferidos
+      (checks todos True), reasoning público igual ao pinado
+    - repetição sai do LRU em memória sem chamar get_client(); outro cache com o mesmo
+      SQLite responde do disco; com status_ttl=0 só o registro on-chain é relido
+    - id desconhecido -> 404, id malformado -> 400; documento adulterado -> verified False
+      (fora do cache, Cache-Control: no-store)
+    - handler e app ASGI: mesmo status e corpo
+Tempo por verificação: rede (eth_call + GET + CID + keccak), disco (SQLite), memória
+(lookup) e GET completo no handler (http.server local) com cache quente.
+
+Uso: python bench/bench_verify.py [--attestations 20] [--iterations 20000] [--rpc-latency 0.03]
+                                  [--s3-latency 0.08]
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_handler import configure, load_applicants, quiet_server, start_fakes
+
+
+def offline():
+    raise AssertionError("cache hit should not need a client")
+
+
+def get(port, target):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        conn.request('GET', target)
+        response = conn.getresponse()
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, response.read()
+    finally:
+        conn.close()
+
+
+# ==================== CORREÇÃO ====================
+
+def check_correctness(attestations, port, workdir):
+    import asgi
+    import process_kyc
+    from bench_asgi import asgi_request
+    from funs_kyc.client_pool import get_client
+    from funs_kyc.verification import VerificationCache
+
+    path = os.path.join(workdir, 'verify.sqlite3')
+    cache = VerificationCache(path=path)
+    client = get_client()
+    for attestation_id, ipfs_cid in attestations:
+        result, source = cache.lookup(attestation_id, get_client)
+        assert source == 'network' and result['verified'], result
+        assert result['checks'] == {'content_hash': True, 'reasoning_hash': True, 'ipfs_cid': True}, result['checks']
+        assert result['status'] == 'pending' and not result['final'] and result['ipfs_cid'] == ipfs_cid
+        assert result['public_reasoning'] == client.filebase.fetch(ipfs_cid)['public']
+        assert cache.lookup(attestation_id, offline) == (result, 'memory')
+
+    attestation_id = attestations[0][0]
+    assert VerificationCache(path=path).lookup(attestation_id, offline)[1] == 'disk'
+    stale = VerificationCache(path=path, status_ttl=0)
+    assert stale.lookup(attestation_id, get_client)[1] == 'refresh'
+
+    status, _, body = get(port, f"/api/process_kyc/verify/{attestation_id}")
+    assert status == 200 and json.loads(body)['verified'], body
+    for target, expected in ((f"/api/process_kyc/verify?attestation_id={attestation_id}", 200),
+                             (f"/api/process_kyc/verify/0x{'ab' * 32}", 404),
+                             ("/api/process_kyc/verify/0x1234", 400)):
+        handler_status, handler_headers, handler_body = get(port, target)
+        asgi_status, asgi_headers, asgi_body = asyncio.run(asgi_request(asgi.app, 'GET', target))
+        assert handler_status == asgi_status == expected, (target, handler_body)
+        handler_json, asgi_json = json.loads(handler_body), json.loads(asgi_body)
+        handler_json.pop('cache', None), asgi_json.pop('cache', None)
+        assert handler_json == asgi_json, target
+        assert handler_headers.get('cache-control') == asgi_headers.get('cache-control')
+
+    # Documento adulterado no Filebase: verificação falha e não entra no cache
+    attestation_id, ipfs_cid = attestations[-1]
+    document = client.filebase.fetch(ipfs_cid)
+    document['public']['risk_level'] = 'none'
+    client.filebase.upload_json(document, filename=ipfs_cid)
+    tampered = VerificationCache()
+    result, _ = tampered.lookup(attestation_id, get_client)
+    assert not result['verified'] and result['checks'] == \
+        {'content_hash': False, 'reasoning_hash': False, 'ipfs_cid': False}, result['checks']
+    assert tampered.cached(attestation_id) is None
+    status, body, headers = process_kyc.get_verification(attestation_id)
+    assert status == 200 and not body['verified'] and headers['Cache-Control'] == 'no-store', headers
+    print("correctness: OK")
+
+
+# ==================== TEMPO ====================
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--attestations', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--http-iterations', type=int, default=500)
+    parser.add_argument('--block-time', type=float, default=0.2)
+    parser.add_argument('--rpc-latency', type=float, default=0.03)
+    parser.add_argument('--s3-latency', type=float, default=0.08)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_verify_')
+    fakes, control, chain_url, s3_url = start_fakes(args)
+    configure(chain_url, s3_url, workdir)
+    os.environ['KYC_VERIFY_STORE'] = os.path.join(workdir, 'handler_verify.sqlite3')
+    stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+
+    import process_kyc
+    from funs_kyc.client_pool import get_client
+    from funs_kyc.verification import VerificationCache
+
+    server = quiet_server(process_kyc.handler)
+    try:
+        attestations = []
+        for applicant in load_applicants(None, args.attestations + 1):
+            result = process_kyc.create_detailed_attestation(**process_kyc.parse_kyc_input(applicant))
+            attestations.append((result['attestation_id'], result['ipfs_cid']))
+        check_correctness(attestations, server.server_port, workdir)
+
+        ids = [attestation_id for attestation_id, _ in attestations[:-1]]
+        path = os.path.join(workdir, 'timing.sqlite3')
+        network = []
+        for attestation_id in ids:
+            started = time.perf_counter()
+            VerificationCache(path=path).lookup(attestation_id, get_client)
+            network.append((time.perf_counter() - started) * 1e6)
+
+        disk_cache = [None]
+
+        def disk():
+            disk_cache[0] = VerificationCache(path=path) if disk_cache[0] is None else disk_cache[0]
+            disk_cache[0]._entries.clear()
+            disk_cache[0].lookup(ids[0], offline)
+
+        memory = VerificationCache(path=path)
+        memory.lookup(ids[0], offline)
+        target = f"/api/process_kyc/verify/{ids[0]}"
+        get(server.server_port, target)
+        rows = (
+            ('network (cold)', statistics.median(network)),
+            ('disk (SQLite)', timed(disk, min(args.iterations, 2000))),
+            ('memory (LRU)', timed(lambda: memory.lookup(ids[0], offline), args.iterations)),
+            ('memory + response', timed(lambda: process_kyc.get_verification(ids[0]), args.iterations)),
+            ('handler GET (HTTP)', timed(lambda: get(server.server_port, target), args.http_iterations)),
+        )
+    finally:
+        sys.stderr = stderr
+        server.shutdown()
+        control.send('stop')
+        print(f"fakes: {control.recv()}")
+        fakes.join(timeout=5)
+
+    print(f"\n{len(ids)} attestations; RPC {args.rpc_latency * 1000:.0f}ms, S3 {args.s3_latency * 1000:.0f}ms")
+    print(f"{'path':<22}{'median µs':>12}")
+    for name, micros in rows:
+        print(f"{name:<22}{micros:>12,.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""
+Stand-in local de uma chain EVM (JSON-RPC sobre HTTP) para benchmarks e harnesses
+
+Aceita transações assinadas de verdade (eth_sendRawTransaction), aplica as regras de
+nonce do mempool (nonce too low / already known / replacement underpriced) e minera
+a cada block_time as txs com nonces contíguos por conta. Pode descartar txs do
+mempool (drop_rate) para simular txs que somem do node e deixam gaps.
+Limites de provider opcionais: rate_limit (requests/s; excedente -> HTTP 429 com erro
+-32005, como Alchemy/Infura) e max_pending (txs pendentes por conta; além disso
+eth_sendRawTransaction falha com 'txpool is full', exceto para preencher gaps).
+
+Métodos: web3_clientVersion, net_version, eth_chainId, eth_blockNumber, eth_gasPrice,
+eth_getTransactionCount, eth_sendRawTransaction, eth_getTransactionByHash,
+eth_getTransactionReceipt, eth_getBlockByNumber (só hashes das txs), eth_call
+(só attestations(bytes32)). Chamadas contadas por método em calls.
+
+Chamadas a contrato (tx com 'to' e calldata) geram um log no receipt, com
+topics [keccak(seletor), keccak(tx)] - o topic[1] faz o papel do attestationId
+do evento AttestationSubmitted. submitAttestation minerado grava o registro
+(status pending) lido por attestations(id); setAttestationTxHash preenche o txHash.
+
+Uso:
+    chain = FakeChain(block_time=0.2, drop_rate=0.02).start()
+    w3 = Web3(Web3.HTTPProvider(chain.url))
+    ...
+    chain.stop()
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rlp
+from eth_abi import decode as abi_decode, encode as abi_encode
+from eth_account import Account
+from web3 import Web3
+
+CHAIN_ID = 80002
+GAS_PRICE = 30 * 10**9
+
+SUBMIT_SELECTOR = Web3.keccak(text='submitAttestation(bytes32,bytes32,string,string,uint256,bytes)')[:4]
+SUBMIT_TYPES = ['bytes32', 'bytes32', 'string', 'string', 'uint256', 'bytes']
+SET_TXHASH_SELECTOR = Web3.keccak(text='setAttestationTxHash(bytes32,bytes32)')[:4]
+ATTESTATIONS_SELECTOR = Web3.keccak(text='attestations(bytes32)')[:4]
+ATTESTATION_TYPES = ['bytes32', 'bytes32', 'address', 'string', 'uint256', 'uint8', 'uint256', 'address',
+                     'uint256', 'string', 'bytes32']
+ZERO_ADDRESS = '0x' + '00' * 20
+
+
+class RPCError(Exception):
+    pass
+
+
+class FakeChain:
+    def __init__(self, block_time=0.2, drop_rate=0.0, rpc_latency=0.0, seed=None, rate_limit=None, max_pending=None):
+        self.block_time = block_time
+        self.drop_rate = drop_rate
+        self.rpc_latency = rpc_latency
+        self.rate_limit = rate_limit
+        self.max_pending = max_pending
+        self.rate_limited = 0
+        self._tokens = rate_limit or 0.0
+        self._tokens_at = time.monotonic()
+        self.random = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.block_number = 0
+        self.nonces = {}        # address -> próximo nonce minerado
+        self.mempool = {}       # address -> {nonce: tx}
+        self.txs = {}           # hash -> tx (mempool + minerados)
+        self.receipts = {}      # hash -> receipt
+        self.mined = []         # txs na ordem de mineração
+        self.dropped = []       # hashes descartados
+        self.rejected = {}      # mensagem de erro -> contagem
+        self.blocks = {}        # número -> {'hash', 'timestamp', 'transactions'}
+        self.attestations = {}  # attestationId (bytes) -> campos de attestations(bytes32)
+        self.calls = {}         # método JSON-RPC -> contagem
+
+        self._stop = threading.Event()
+        self._server = None
+
+    # ==================== STATE ====================
+
+    def _count(self, address, block):
+        address = Web3.to_checksum_address(address)
+        mined = self.nonces.get(address, 0)
+        if block != 'pending':
+            return mined
+        pool = self.mempool.get(address, {})
+        while mined in pool:
+            mined += 1
+        return mined
+
+    def send_raw(self, raw_hex):
+        raw = bytes.fromhex(raw_hex[2:] if raw_hex.startswith('0x') else raw_hex)
+        sender = Account.recover_transaction(raw)
+        fields = rlp.decode(raw)
+        nonce = int.from_bytes(fields[0], 'big')
+        to = Web3.to_checksum_address(fields[3]) if fields[3] else None
+        data = fields[5]
+        tx_hash = Web3.to_hex(Web3.keccak(raw))
+
+        with self.lock:
+            if nonce < self.nonces.get(sender, 0):
+                self._reject('nonce too low')
+            pool = self.mempool.setdefault(sender, {})
+            if self.max_pending is not None and len(pool) >= self.max_pending and nonce > max(pool):
+                self._reject('txpool is full')
+            if nonce in pool:
+                self._reject('already known' if pool[nonce]['hash'] == tx_hash else 'replacement transaction underpriced')
+
+            tx = {'hash': tx_hash, 'from': sender, 'to': to, 'data': data, 'nonce': nonce, 'raw': raw,
+                  'blockNumber': None}
+            if self.random.random() < self.drop_rate:
+                # Aceita o broadcast mas a tx nunca chega a um bloco (node reiniciou, evicted...)
+                self.dropped.append(tx_hash)
+                return tx_hash
+            pool[nonce] = tx
+            self.txs[tx_hash] = tx
+            return tx_hash
+
+    def _take_token(self):
+        """Token bucket do rate limit (rajada = 1s de requests)"""
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._tokens_at) * self.rate_limit)
+            self._tokens_at = now
+            if self._tokens < 1:
+                self.rate_limited += 1
+                return False
+            self._tokens -= 1
+            return True
+
+    def _reject(self, message):
+        self.rejected[message] = self.rejected.get(message, 0) + 1
+        raise RPCError(message)
+
+    def mine_block(self):
+        with self.lock:
+            self.block_number += 1
+            block_hash = '0x' + self.block_number.to_bytes(32, 'big').hex()
+            included = []
+            for sender, pool in self.mempool.items():
+                nonce = self.nonces.get(sender, 0)
+                while nonce in pool:
+                    tx = pool.pop(nonce)
+                    tx['blockNumber'] = self.block_number
+                    included.append(tx['hash'])
+                    self.receipts[tx['hash']] = {
+                        'transactionHash': tx['hash'],
+                        'transactionIndex': hex(0),
+                        'blockNumber': hex(self.block_number),
+                        'blockHash': block_hash,
+                        'from': sender,
+                        'to': tx['to'],
+                        'cumulativeGasUsed': hex(21000),
+                        'gasUsed': hex(21000),
+                        'effectiveGasPrice': hex(GAS_PRICE),
+                        'contractAddress': None,
+                        'logs': self._logs(tx, block_hash),
+                        'logsBloom': '0x' + '00' * 256,
+                        'status': hex(1),
+                        'type': hex(0),
+                    }
+                    self.mined.append(tx)
+                    self._apply(tx)
+                    nonce += 1
+                self.nonces[sender] = nonce
+            self.blocks[self.block_number] = {'hash': block_hash, 'timestamp': int(time.time()),
+                                              'transactions': included}
+
+    def _logs(self, tx, block_hash):
+        """Um log por chamada a contrato: topics [keccak(seletor), keccak(raw tx)]"""
+        if not tx['to'] or len(tx['data']) < 4:
+            return []
+        return [{
+            'address': tx['to'],
+            'topics': [Web3.to_hex(Web3.keccak(tx['data'][:4])), Web3.to_hex(Web3.keccak(tx['raw']))],
+            'data': '0x',
+            'blockNumber': hex(self.block_number),
+            'blockHash': block_hash,
+            'transactionHash': tx['hash'],
+            'transactionIndex': hex(0),
+            'logIndex': hex(0),
+            'removed': False,
+        }]
+
+    def _apply(self, tx):
+        """Efeito de submitAttestation / setAttestationTxHash no estado do contrato"""
+        selector, args = tx['data'][:4], tx['data'][4:]
+        if selector == SUBMIT_SELECTOR:
+            content_hash, reasoning_hash, model_version, category, timestamp, _ = abi_decode(SUBMIT_TYPES, args)
+            self.attestations[bytes(Web3.keccak(tx['raw']))] = [
+                content_hash, reasoning_hash, tx['from'], model_version, timestamp, 0, 0, ZERO_ADDRESS, 0,
+                category, b'\x00' * 32,
+            ]
+        elif selector == SET_TXHASH_SELECTOR:
+            attestation_id, tx_hash = abi_decode(['bytes32', 'bytes32'], args)
+            if attestation_id in self.attestations:
+                self.attestations[attestation_id][10] = tx_hash
+
+    def _eth_call(self, call):
+        data = bytes.fromhex(call.get('data', call.get('input', '0x'))[2:])
+        if data[:4] != ATTESTATIONS_SELECTOR:
+            raise RPCError("execution reverted")
+        attestation_id, = abi_decode(['bytes32'], data[4:])
+        with self.lock:
+            record = self.attestations.get(attestation_id)
+        if record is None:    # mapping vazio: struct zerado
+            record = [b'\x00' * 32, b'\x00' * 32, ZERO_ADDRESS, '', 0, 0, 0, ZERO_ADDRESS, 0, '', b'\x00' * 32]
+        return Web3.to_hex(abi_encode(ATTESTATION_TYPES, record))
+
+    def _miner(self):
+        while not self._stop.wait(self.block_time):
+            self.mine_block()
+
+    # ==================== JSON-RPC ====================
+
+    def call(self, method, params):
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+
+        if method == 'web3_clientVersion':
+            return 'FakeChain/1.0'
+        if method == 'net_version':
+            return str(CHAIN_ID)
+        if method == 'eth_chainId':
+            return hex(CHAIN_ID)
+        if method == 'eth_blockNumber':
+            return hex(self.block_number)
+        if method == 'eth_gasPrice':
+            return hex(GAS_PRICE)
+        if method == 'eth_getTransactionCount':
+            with self.lock:
+                return hex(self._count(params[0], params[1] if len(params) > 1 else 'latest'))
+        if method == 'eth_sendRawTransaction':
+            return self.send_raw(params[0])
+        if method == 'eth_getTransactionByHash':
+            with self.lock:
+                tx = self.txs.get(params[0])
+                if tx is None:
+                    return None
+                block = tx['blockNumber']
+                return {
+                    'hash': tx['hash'], 'from': tx['from'], 'nonce': hex(tx['nonce']),
+                    'blockNumber': hex(block) if block else None,
+                    'blockHash': None, 'transactionIndex': None, 'to': tx['to'],
+                    'value': hex(0), 'gas': hex(21000), 'gasPrice': hex(GAS_PRICE),
+                    'input': Web3.to_hex(tx['data']),
+                }
+        if method == 'eth_call':
+            return self._eth_call(params[0])
+        if method == 'eth_getTransactionReceipt':
+            with self.lock:
+                return self.receipts.get(params[0])
+        if method == 'eth_getBlockByNumber':
+            with self.lock:
+                number = self.block_number if params[0] == 'latest' else int(params[0], 16)
+                block = self.blocks.get(number)
+                if block is None:
+                    return None
+                return {
+                    'number': hex(number), 'hash': block['hash'],
+                    'parentHash': self.blocks.get(number - 1, {}).get('hash', '0x' + '00' * 32),
+                    'timestamp': hex(block['timestamp']), 'transactions': list(block['transactions']),
+                    'gasLimit': hex(30_000_000), 'gasUsed': hex(21000 * len(block['transactions'])),
+                    'extraData': '0x' + '00' * 97,   # PoA (Polygon): mais de 32 bytes
+                }
+        raise RPCError(f"method not supported: {method}")
+
+    def start(self, host='127.0.0.1', port=0):
+        chain = self
+
+        class RPCHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                response = {'jsonrpc': '2.0', 'id': request.get('id')}
+                status = 200
+                if chain.rate_limit and not chain._take_token():
+                    status = 429
+                    response['error'] = {'code': -32005, 'message': 'rate limit exceeded'}
+                else:
+                    self._call(request, response)
+                body = json.dumps(response).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _call(self, request, response):
+                try:
+                    response['result'] = chain.call(request['method'], request.get('params', []))
+                except RPCError as e:
+                    response['error'] = {'code': -32000, 'message': str(e)}
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), RPCHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._miner, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
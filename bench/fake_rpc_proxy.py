@@ -0,0 +1,109 @@
+"""
+Endpoint RPC local com atraso e falhas injetados, na frente de uma FakeChain
+
+Vários proxies sobre a mesma chain fazem o papel de nodes diferentes da mesma rede
+(mesmo estado, latências diferentes) para testar o RpcPool (funs_kyc.rpc_pool).
+Cada request recebe `latency` s de atraso, mais `spike_latency` s com probabilidade
+`spike_rate` (cauda lenta). Modos (atributo mode, alterável com o proxy rodando):
+    'ok'          repassa à chain
+    'error'       responde HTTP 503 sem repassar
+    'lost_reply'  repassa à chain e responde HTTP 502 - o node recebeu, o client não sabe
+    'down'        fecha a conexão sem responder
+Chamadas contadas por método em calls.
+
+Uso:
+    proxy = RpcProxy(chain.url, latency=0.02, spike_rate=0.05, spike_latency=1.0).start()
+    proxy.mode = 'error'
+"""
+
+import json
+import random
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class RpcProxy:
+    def __init__(self, upstream, latency=0.0, spike_rate=0.0, spike_latency=0.0, seed=None):
+        self.upstream = upstream
+        self.latency = latency
+        self.spike_rate = spike_rate
+        self.spike_latency = spike_latency
+        self.mode = 'ok'
+        self.calls = {}
+        self.lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = None
+
+    def configure(self, **settings):
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise AttributeError(name)
+            setattr(self, name, value)
+
+    def _delay(self):
+        with self.lock:
+            spike = self.spike_rate and self._random.random() < self.spike_rate
+        return self.latency + (self.spike_latency if spike else 0.0)
+
+    def _forward(self, body):
+        request = urllib.request.Request(self.upstream, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.read()
+
+    def start(self, host='127.0.0.1', port=0):
+        proxy = self
+
+        class ProxyHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True     # keep-alive: headers e corpo sem esperar o ACK atrasado
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                method = json.loads(body).get('method')
+                with proxy.lock:
+                    proxy.calls[method] = proxy.calls.get(method, 0) + 1
+                time.sleep(proxy._delay())
+
+                mode = proxy.mode
+                if mode == 'down':
+                    self.close_connection = True
+                    return
+                if mode == 'error':
+                    self._reply(503, b'{"error": "service unavailable"}')
+                    return
+                try:
+                    status, reply = proxy._forward(body)
+                except OSError:
+                    self._reply(502, b'{"error": "upstream unavailable"}')
+                    return
+                if mode == 'lost_reply':
+                    self._reply(502, b'{"error": "bad gateway"}')
+                    return
+                self._reply(status, reply)
+
+            def _reply(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), ProxyHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,272 @@
+"""
+Stand-in local do Filebase (API S3) para benchmarks e harnesses
+
+Implementa o subconjunto usado pelo FilebaseClient do SDK e por funs_kyc:
+PUT/GET/HEAD de objeto em path-style (/<bucket>/<key>), com ETag (MD5),
+Content-Encoding e x-amz-meta-*, e multipart upload (create / upload part /
+complete / abort). Não valida assinatura SigV4 - qualquer credencial é aceita.
+Latência por request (latency), por conexão nova (connect_latency - handshake
+TCP/TLS) e banda (bandwidth, bytes/s) configuráveis.
+fail_next(n) responde 503 SlowDown às próximas n requests (teste de retry).
+Com cid=fn(bytes) -> str, reporta o CID IPFS como o Filebase: x-amz-meta-cid na
+resposta do PUT / complete e no HEAD/GET.
+Conta conexões TCP aceitas (connections) e o maior corpo recebido (max_body).
+
+Uso:
+    s3 = FakeS3(latency=0.05).start()
+    client = boto3.client('s3', endpoint_url=s3.url, aws_access_key_id='x', aws_secret_access_key='x',
+                          config=Config(signature_version='s3v4', s3={'addressing_style': 'path'}))
+    ...
+    s3.stop()
+"""
+
+import hashlib
+import itertools
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+class FakeS3:
+    def __init__(self, latency=0.0, bandwidth=None, connect_latency=0.0, cid=None):
+        self.latency = latency
+        self.cid = cid
+        self.connect_latency = connect_latency
+        self.bandwidth = bandwidth
+        self.lock = threading.Lock()
+        self.objects = {}       # (bucket, key) -> {'body', 'etag', 'content_type', 'encoding', 'metadata', 'modified'}
+        self.uploads = {}       # upload_id -> {'bucket', 'key', 'headers', 'parts': {número: bytes}}
+        self.requests = {'PUT': 0, 'GET': 0, 'HEAD': 0, 'POST': 0, 'DELETE': 0}
+        self.bytes_in = 0
+        self.max_body = 0
+        self.connections = 0
+        self.failures = 0
+        self._fail_next = 0
+        self._upload_ids = itertools.count(1)
+        self._server = None
+
+    def _delay(self, size=0):
+        delay = self.latency + (size / self.bandwidth if self.bandwidth else 0)
+        if delay:
+            time.sleep(delay)
+
+    def fail_next(self, count):
+        with self.lock:
+            self._fail_next = count
+
+    def _should_fail(self):
+        with self.lock:
+            if self._fail_next > 0:
+                self._fail_next -= 1
+                self.failures += 1
+                return True
+            return False
+
+    def _received(self, body):
+        with self.lock:
+            self.bytes_in += len(body)
+            self.max_body = max(self.max_body, len(body))
+
+    def put(self, bucket, key, body, content_type='application/octet-stream', metadata=None, encoding=None, etag=None):
+        etag = etag or hashlib.md5(body).hexdigest()
+        if self.cid:
+            metadata = dict(metadata or {}, cid=self.cid(body))
+        with self.lock:
+            self.objects[(bucket, key)] = {
+                'body': body,
+                'etag': etag,
+                'content_type': content_type,
+                'encoding': encoding,
+                'metadata': metadata or {},
+                'modified': time.time(),
+            }
+        return etag
+
+    def get(self, bucket, key):
+        with self.lock:
+            return self.objects.get((bucket, key))
+
+    def start(self, host='127.0.0.1', port=0):
+        s3 = self
+
+        class S3Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with s3.lock:
+                    s3.connections += 1
+                if s3.connect_latency:
+                    time.sleep(s3.connect_latency)
+
+            def _target(self):
+                path = unquote(urlparse(self.path).path).lstrip('/')
+                bucket, _, key = path.partition('/')
+                return bucket, key
+
+            def _query(self):
+                return {name: values[0] for name, values in parse_qs(urlparse(self.path).query,
+                                                                     keep_blank_values=True).items()}
+
+            def _body(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                s3._received(body)
+                return body
+
+            def _metadata(self):
+                return {name[len('x-amz-meta-'):]: value for name, value in self.headers.items()
+                        if name.lower().startswith('x-amz-meta-')}
+
+            def _xml(self, status, body):
+                self._reply(status, f'<?xml version="1.0" encoding="UTF-8"?>{body}'.encode('utf-8'),
+                            {'Content-Type': 'application/xml'})
+
+            def _fail(self):
+                """503 SlowDown injetado por fail_next(); o corpo da request é consumido"""
+                if not s3._should_fail():
+                    return False
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self._xml(503, '<Error><Code>SlowDown</Code><Message>Please reduce your request rate.</Message></Error>')
+                return True
+
+            def _count(self):
+                with s3.lock:
+                    s3.requests[self.command] = s3.requests.get(self.command, 0) + 1
+
+            def _reply(self, status, body=b'', headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def _not_found(self, key):
+                body = (f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>NoSuchKey</Code>'
+                        f'<Message>The specified key does not exist.</Message><Key>{key}</Key></Error>').encode('utf-8')
+                self._reply(404, body, {'Content-Type': 'application/xml'})
+
+            def _object_headers(self, obj):
+                headers = {
+                    'ETag': f'"{obj["etag"]}"',
+                    'Content-Type': obj['content_type'],
+                    'Last-Modified': formatdate(obj['modified'], usegmt=True),
+                }
+                if obj['encoding']:
+                    headers['Content-Encoding'] = obj['encoding']
+                headers.update({f"x-amz-meta-{k}": v for k, v in obj['metadata'].items()})
+                return headers
+
+            def do_PUT(self):
+                self._count()
+                if self._fail():
+                    return
+                body = self._body()
+                s3._delay(len(body))
+                bucket, key = self._target()
+                query = self._query()
+                if 'uploadId' in query:
+                    with s3.lock:
+                        upload = s3.uploads.get(query['uploadId'])
+                        if upload is not None:
+                            upload['parts'][int(query['partNumber'])] = body
+                    if upload is None:
+                        self._xml(404, '<Error><Code>NoSuchUpload</Code></Error>')
+                        return
+                    self._reply(200, headers={'ETag': f'"{hashlib.md5(body).hexdigest()}"'})
+                    return
+                etag = s3.put(bucket, key, body, self.headers.get('Content-Type', 'application/octet-stream'),
+                              self._metadata(), self.headers.get('Content-Encoding'))
+                self._reply(200, headers=self._stored_headers(bucket, key, etag))
+
+            def _stored_headers(self, bucket, key, etag):
+                headers = {'ETag': f'"{etag}"'}
+                cid = s3.get(bucket, key)['metadata'].get('cid')
+                if cid:
+                    headers['x-amz-meta-cid'] = cid
+                return headers
+
+            def do_POST(self):
+                self._count()
+                if self._fail():
+                    return
+                self._body()
+                s3._delay()
+                bucket, key = self._target()
+                query = self._query()
+                if 'uploads' in query:
+                    upload_id = f"upload-{next(s3._upload_ids)}"
+                    with s3.lock:
+                        s3.uploads[upload_id] = {
+                            'bucket': bucket, 'key': key, 'parts': {}, 'metadata': self._metadata(),
+                            'content_type': self.headers.get('Content-Type', 'application/octet-stream'),
+                            'encoding': self.headers.get('Content-Encoding'),
+                        }
+                    self._xml(200, f'<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>'
+                                   f'<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>')
+                    return
+                with s3.lock:
+                    upload = s3.uploads.pop(query.get('uploadId'), None)
+                if upload is None:
+                    self._xml(404, '<Error><Code>NoSuchUpload</Code></Error>')
+                    return
+                parts = [upload['parts'][number] for number in sorted(upload['parts'])]
+                digests = b''.join(hashlib.md5(part).digest() for part in parts)
+                etag = f"{hashlib.md5(digests).hexdigest()}-{len(parts)}"
+                s3.put(bucket, key, b''.join(parts), upload['content_type'], upload['metadata'], upload['encoding'], etag)
+                body = (f'<?xml version="1.0" encoding="UTF-8"?><CompleteMultipartUploadResult><Bucket>{bucket}</Bucket>'
+                        f'<Key>{key}</Key><ETag>"{etag}"</ETag></CompleteMultipartUploadResult>').encode('utf-8')
+                self._reply(200, body, dict(self._stored_headers(bucket, key, etag), **{'Content-Type': 'application/xml'}))
+
+            def do_DELETE(self):
+                self._count()
+                with s3.lock:
+                    s3.uploads.pop(self._query().get('uploadId'), None)
+                self._reply(204)
+
+            def do_GET(self):
+                self._count()
+                if self._fail():
+                    return
+                obj = s3.get(*self._target())
+                if obj is None:
+                    s3._delay()
+                    self._not_found(self._target()[1])
+                    return
+                s3._delay(len(obj['body']))
+                self._reply(200, obj['body'], self._object_headers(obj))
+
+            def do_HEAD(self):
+                self._count()
+                s3._delay()
+                obj = s3.get(*self._target())
+                if obj is None:
+                    self._reply(404)
+                    return
+                headers = self._object_headers(obj)
+                self.send_response(200)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(obj['body'])))
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), S3Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,571 @@
+"""
+Referência congelada: montagem do reasoning com f-strings, como em api/process_kyc.py
+antes dos templates pré-compilados. Usada apenas pelos benchmarks para comparar
+velocidade e garantir que a saída dos templates é byte-idêntica.
+"""
+
+from anna_protocol import DetailedReasoningStep
+
+
+def build_private_steps_legacy(user_name, user_country, user_cpf, user_passport, user_age,
+                               bio_score=98, doc_score=95, age_score=100, compliance_score=100, final_score=98):
+    private_steps = [
+        # STEP 1: BIOMETRIC ANALYSIS (ULTRA-DETAILED)
+        DetailedReasoningStep(
+            step=1,
+            action="Phase 1A: Face Detection & Localization",
+            input={
+                "image_file": "selfie_2025_01_08_xyz.jpg",
+                "image_dimensions": "1920x1080 pixels (2.07 MP)",
+                "file_size": "1.2 MB",
+                "format": "JPEG",
+                "color_space": "RGB",
+                "bit_depth": "24-bit",
+                "exif_data": {
+                    "camera_model": "iPhone 14 Pro",
+                    "capture_timestamp": "2025-01-08T14:23:45Z",
+                    "gps_location": "redacted",
+                    "focal_length": "26mm",
+                    "aperture": "f/1.78",
+                    "iso": "320",
+                    "flash": "off"
+                }
+            },
+            analysis="IMAGE PREPROCESSING: Loaded RGB image with dimensions 1920x1080. Performed color space validation - confirmed sRGB color space. "
+                    "Checked for common image manipulations: JPEG compression artifacts analysis shows authentic camera capture (no re-compression detected). "
+                    "ELA (Error Level Analysis) shows uniform error distribution (no evidence of splicing/editing). "
+                    "Histogram analysis: balanced distribution across RGB channels, no clipping in highlights/shadows. "
+                    "\n\nFACE DETECTION: Applied Multi-Task Cascaded Convolutional Networks (MTCNN) face detector. "
+                    "Stage 1 (P-Net): Scanned image at multiple scales, generated 1,247 candidate windows. "
+                    "Stage 2 (R-Net): Refined candidates to 38 proposals. "
+                    "Stage 3 (O-Net): Final classification yielded 1 high-confidence face detection. "
+                    "Face bounding box: [x:456, y:198, w:712, h:856]. Face area: 609,472 pixels (31.2% of total image). "
+                    "Optimal face size detected (recommended 25-40% of frame). "
+                    "\n\nFACE QUALITY ASSESSMENT: Computed face quality metrics - "
+                    "Pose quality: 0.94 (frontal face, minimal rotation). "
+                    "Illumination quality: 0.91 (well-lit, no harsh shadows). "
+                    "Resolution quality: 0.96 (sufficient detail for recognition). "
+                    "Sharpness: 0.93 (high focus, minimal blur). "
+                    "Overall quality score: 0.935/1.0 (EXCELLENT). "
+                    "\n\nOCCLUSION DETECTION: Analyzed face for occlusions using segmentation network. "
+                    "No sunglasses detected. No face mask detected. No hand occlusion. No hair occlusion over eyes. "
+                    "Visibility of key regions: Eyes 100%, Nose 100%, Mouth 100%, Forehead 98%, Chin 100%. "
+                    "CONCLUSION: Clean, unoccluded facial image suitable for high-assurance biometric matching.",
+            ai_reasoning="ALGORITHM ARCHITECTURE - FACE DETECTION:\n"
+                        "Using MTCNN (Multi-Task Cascaded CNN) - Zhang et al., 2016 implementation.\n"
+                        "Architecture: 3-stage cascaded CNN for joint face detection and alignment.\n"
+                        "- P-Net (Proposal Network): 12-layer shallow CNN, ~7k parameters\n"
+                        "- R-Net (Refine Network): Deeper network with 24 layers, ~50k parameters\n"
+                        "- O-Net (Output Network): Complex network with 48 layers, ~400k parameters\n\n"
+                        "DETECTION PROCESS:\n"
+                        "1. Image Pyramid: Created 12 scaled versions from 1920x1080 to 96x54\n"
+                        "2. P-Net Sliding Window: 12x12 kernel, stride 2, generated 1,247 candidates\n"
+                        "3. Non-Maximum Suppression (NMS): Threshold 0.7, reduced to 38 proposals\n"
+                        "4. R-Net Refinement: 24x24 input, refined bounding boxes\n"
+                        "5. NMS again: Threshold 0.7, reduced to 8 candidates\n"
+                        "6. O-Net Final: 48x48 input, outputs face/non-face classification + bbox regression + 5 facial landmarks\n"
+                        "7. Final NMS: Threshold 0.7, confidence >0.95, yielded 1 detection\n\n"
+                        "DETECTION METRICS:\n"
+                        "Face confidence score: 0.9847 (threshold: 0.90)\n"
+                        "Bounding box IoU with ground truth: 0.94 (excellent localization)\n"
+                        "Processing time: 127ms (real-time capable)\n\n"
+                        "QUALITY CONTROL:\n"
+                        "Implemented ISO/IEC 19794-5 quality assessment framework.\n"
+                        "Checked 14 quality attributes: pose, expression, illumination, resolution, focus, compression, "
+                        "dynamic range, interlacing, pixelation, JPEG blocking, unnatural color, ghosting, motion blur, exposure.\n"
+                        "All attributes passed minimum thresholds for identity verification use case.\n\n"
+                        "ANTI-SPOOFING PRE-CHECK:\n"
+                        "Analyzed image metadata for manipulation indicators:\n"
+                        "- EXIF data intact and consistent with claimed device (iPhone 14 Pro)\n"
+                        "- No evidence of screen moire patterns (would indicate photo-of-screen attack)\n"
+                        "- No edge artifacts suggesting photo-of-photo attack\n"
+                        "- Sensor noise pattern consistent with iPhone 14 Pro sensor (Sony IMX803)\n\n"
+                        "DECISION: APPROVED for biometric feature extraction\n"
+                        "Rationale: High-quality frontal face detected with excellent pose, lighting, and resolution. "
+                        "No occlusions or quality issues detected. Image passes anti-spoofing pre-screening.",
+            score=99,
+            confidence=0.98,
+            result="PHASE 1A PASSED: Face detected with 98.47% confidence, quality score 93.5%, no occlusions, anti-spoofing pre-check passed"
+        ),
+        
+        DetailedReasoningStep(
+            step=2,
+            action="Phase 1B: Facial Landmark Detection & Alignment",
+            input={
+                "face_roi": "456x198+712x856 pixels",
+                "landmark_model": "Dlib 68-point shape predictor",
+                "alignment_method": "similarity_transform"
+            },
+            analysis="LANDMARK DETECTION: Applied Dlib 68-point facial landmark predictor (trained on iBUG 300-W dataset). "
+                    "Detected all 68 landmarks with high confidence. "
+                    "Landmarks grouped by facial region: Jaw (17 points: 0-16), Right eyebrow (5 points: 17-21), "
+                    "Left eyebrow (5 points: 22-26), Nose bridge (4 points: 27-30), Nose tip (5 points: 31-35), "
+                    "Right eye (6 points: 36-41), Left eye (6 points: 42-47), Outer lip (12 points: 48-59), Inner lip (8 points: 60-67). "
+                    "\n\nKEY LANDMARKS COORDINATES (normalized):\n"
+                    "Left eye center: (0.382, 0.421) | Right eye center: (0.618, 0.418)\n"
+                    "Nose tip: (0.501, 0.612) | Left mouth corner: (0.394, 0.756)\n"
+                    "Right mouth corner: (0.606, 0.753) | Chin center: (0.498, 0.952)\n\n"
+                    "GEOMETRIC ANALYSIS:\n"
+                    "Inter-pupillary distance (IPD): 184 pixels (normalized: 0.236)\n"
+                    "Eye-to-nose ratio: 1.42 (within normal range 1.3-1.6)\n"
+                    "Nose-to-mouth ratio: 0.89 (within normal range 0.8-1.0)\n"
+                    "Face width-to-height ratio: 0.83 (within normal range 0.75-0.90)\n"
+                    "Facial symmetry score: 0.96 (high symmetry, normal for real faces)\n\n"
+                    "ALIGNMENT PROCESS:\n"
+                    "Computed similarity transformation (rotation + scale + translation) to align face to canonical pose. "
+                    "Rotation angle: -2.3° (slight head tilt corrected). "
+                    "Scale factor: 1.12 (normalized face to 160x160 standard). "
+                    "Translation: (-12px, +8px) to center face in frame. "
+                    "Applied bilinear interpolation for rotation/scaling (preserves facial texture). "
+                    "Aligned face dimensions: 160x160 pixels (FaceNet standard input size). "
+                    "\n\nLANDMARK CONFIDENCE SCORES:\n"
+                    "Average landmark confidence: 0.947. Jaw: 0.92, Eyebrows: 0.95, Eyes: 0.98, "
+                    "Nose: 0.96, Mouth: 0.94. All landmarks exceed 0.85 threshold (high quality). "
+                    "\n\nCONCLUSION: All 68 landmarks successfully detected with high confidence. "
+                    "Face successfully aligned to canonical frontal pose. Ready for embedding extraction.",
+            ai_reasoning="LANDMARK DETECTION ALGORITHM:\n"
+                        "Model: Dlib shape_predictor_68_face_landmarks.dat (Kazemi & Sullivan, 2014)\n"
+                        "Architecture: Ensemble of Regression Trees (ERT)\n"
+                        "Training: iBUG 300-W dataset (3,148 images, 68 landmarks per face)\n"
+                        "Inference: Cascade of 10 regressors, each with 500 regression trees\n\n"
+                        "HOW IT WORKS:\n"
+                        "1. Initialize landmarks at face bounding box center\n"
+                        "2. For each regressor (1-10):\n"
+                        "   a. Extract local image features around current landmark estimates (HOG descriptors)\n"
+                        "   b. Predict displacement vectors for each landmark using regression trees\n"
+                        "   c. Update landmark positions based on predictions\n"
+                        "3. Final landmarks = sum of all displacement predictions\n\n"
+                        "LANDMARK PRECISION:\n"
+                        "Mean error: 2.1 pixels (excellent precision for 712x856 face)\n"
+                        "Normalized mean error (NME): 0.029 (threshold <0.06 for acceptable quality)\n"
+                        "Worst landmark error: 4.3 pixels (still well within tolerance)\n\n"
+                        "ALIGNMENT MATHEMATICS:\n"
+                        "Computed 2D similarity transform: T(x,y) = s*R*[x,y]^T + t\n"
+                        "Where: s = scale (1.12), R = rotation matrix (θ=-2.3°), t = translation (-12, +8)\n"
+                        "Rotation matrix R = [[cos(θ), -sin(θ)], [sin(θ), cos(θ)]]\n"
+                        "Applied to all pixels using bilinear interpolation for sub-pixel accuracy\n\n"
+                        "ANTHROPOMETRIC VALIDATION:\n"
+                        "Verified face follows human facial proportions (Farkas, 1994):\n"
+                        "- IPD / Face width: 0.284 (normal range: 0.26-0.32) ✓\n"
+                        "- Eye height / Face height: 0.421 (normal range: 0.40-0.48) ✓\n"
+                        "- Nose width / Face width: 0.212 (normal range: 0.18-0.25) ✓\n"
+                        "- Mouth width / Face width: 0.418 (normal range: 0.38-0.50) ✓\n"
+                        "All proportions fall within normal human ranges (rules out AI-generated/manipulated faces)\n\n"
+                        "DECISION: APPROVED for embedding extraction\n"
+                        "Rationale: All 68 landmarks detected with high precision. Face successfully aligned. "
+                        "Anthropometric proportions confirm real human face. Ready for deep feature extraction.",
+            score=98,
+            confidence=0.95,
+            result="PHASE 1B PASSED: 68 landmarks detected, alignment completed, anthropometric validation passed"
+        ),
+        
+        DetailedReasoningStep(
+            step=3,
+            action="Phase 1C: Deep Feature Embedding & Face Matching",
+            input={
+                "selfie_aligned": "160x160x3 RGB tensor",
+                "document_photo_aligned": "160x160x3 RGB tensor",
+                "embedding_model": "FaceNet Inception-ResNet-v1",
+                "distance_metric": "cosine_similarity"
+            },
+            analysis="EMBEDDING EXTRACTION:\n"
+                    "Processed both images (selfie + document photo) through FaceNet neural network. "
+                    "Each face converted to 128-dimensional embedding vector (compact representation of facial features). "
+                    "\nSelfie embedding (first 10 dims): [0.142, -0.089, 0.234, -0.156, 0.078, 0.201, -0.112, 0.167, -0.091, 0.188...]\n"
+                    "Document embedding (first 10 dims): [0.138, -0.084, 0.229, -0.151, 0.081, 0.198, -0.108, 0.172, -0.087, 0.184...]\n"
+                    "Embedding L2 norm: 1.0000 (both embeddings normalized to unit sphere)\n\n"
+                    "SIMILARITY COMPUTATION:\n"
+                    "Cosine similarity = dot_product(embedding1, embedding2) = 0.9847\n"
+                    "Euclidean distance = ||embedding1 - embedding2|| = 0.1753\n"
+                    "Angular distance = arccos(0.9847) = 10.1° (very small angle = high similarity)\n\n"
+                    "FEATURE-LEVEL ANALYSIS:\n"
+                    "Decomposed embeddings into semantic regions using activation analysis:\n"
+                    "Eye region features (dims 0-25): similarity 0.972\n"
+                    "Nose region features (dims 26-50): similarity 0.991\n"
+                    "Mouth region features (dims 51-75): similarity 0.968\n"
+                    "Face shape features (dims 76-100): similarity 0.987\n"
+                    "Texture features (dims 101-128): similarity 0.982\n"
+                    "All regions show strong similarity (>0.95), indicating genuine match across all facial features.\n\n"
+                    "THRESHOLD ANALYSIS:\n"
+                    "FaceNet verification threshold: 0.75 (conservative for high-security applications)\n"
+                    "Observed similarity: 0.9847 (WELL ABOVE threshold by 23.5%)\n"
+                    "False Accept Rate (FAR) at this threshold: 0.001% (1 in 100,000)\n"
+                    "False Reject Rate (FRR) at this threshold: 2.3% (acceptable for user experience)\n\n"
+                    "STATISTICAL CONFIDENCE:\n"
+                    "Probability of random match: <0.0001% (extremely unlikely)\n"
+                    "Probability of genuine match: 99.99% (extremely likely)\n"
+                    "Z-score: 8.7 (8.7 standard deviations above random similarity mean)\n\n"
+                    "CONCLUSION: STRONG BIOMETRIC MATCH CONFIRMED. "
+                    "Selfie and document photo belong to same individual with very high confidence.",
+            ai_reasoning="FACENET ARCHITECTURE:\n"
+                        "Model: Inception-ResNet-v1 (Szegedy et al., 2017)\n"
+                        "Training: Triplet loss on VGGFace2 (3.31M images, 9,131 identities) + MS-Celeb-1M (10M images)\n"
+                        "Parameters: 22.8 million trainable parameters\n"
+                        "Output: 128-dimensional L2-normalized embedding\n\n"
+                        "NETWORK LAYERS:\n"
+                        "1. Stem: 3 conv blocks (3x3, 3x3, 3x3) with batch norm + ReLU\n"
+                        "2. Inception-ResNet-A blocks (5x): mixed convolutions (1x1, 3x3, 5x5) with residual connections\n"
+                        "3. Reduction-A: strided convolutions for downsampling\n"
+                        "4. Inception-ResNet-B blocks (10x): deeper mixed convolutions\n"
+                        "5. Reduction-B: second downsampling\n"
+                        "6. Inception-ResNet-C blocks (5x): final feature extraction\n"
+                        "7. Global Average Pooling: 1x1 spatial dimension\n"
+                        "8. Fully Connected: 128 units with L2 normalization\n\n"
+                        "TRIPLET LOSS TRAINING:\n"
+                        "Loss function: L = max(||f(a) - f(p)||² - ||f(a) - f(n)||² + α, 0)\n"
+                        "Where: a=anchor, p=positive (same person), n=negative (different person), α=margin (0.2)\n"
+                        "Training enforces: distance(same person) < distance(different person) - margin\n"
+                        "Effective embedding space: embeddings of same person cluster tightly, different people spread apart\n\n"
+                        "VERIFICATION PERFORMANCE (LFW benchmark):\n"
+                        "Accuracy: 99.63% on Labeled Faces in the Wild dataset\n"
+                        "TAR@FAR=0.001: 99.12% (True Accept Rate at 0.1% False Accept Rate)\n"
+                        "Rank-1 identification accuracy: 98.97%\n\n"
+                        "SIMILARITY SCORE INTERPRETATION:\n"
+                        "0.9847 similarity places this match in top 0.5% of genuine matches\n"
+                        "Empirical analysis of 1M genuine pairs: mean=0.87, std=0.08, 95th percentile=0.96\n"
+                        "Score 0.9847 = 1.4 std above mean genuine match (very strong match)\n"
+                        "Impostor distribution: mean=0.23, std=0.15 (current score 5.2 std above impostor mean)\n\n"
+                        "ROBUSTNESS ANALYSIS:\n"
+                        "Tested matching under variations:\n"
+                        "- Pose variation: ±15° rotation → similarity 0.91-0.98 (robust)\n"
+                        "- Lighting changes: ±30% brightness → similarity 0.90-0.98 (robust)\n"
+                        "- Expression changes: neutral↔smile → similarity 0.88-0.96 (robust)\n"
+                        "- Age progression: ±5 years → similarity 0.85-0.95 (acceptable)\n"
+                        "Current match 0.9847 significantly above minimum robust threshold (0.85)\n\n"
+                        "DECISION: VERIFIED MATCH\n"
+                        "Rationale: Similarity score 0.9847 far exceeds verification threshold 0.75. "
+                        "All facial regions show strong similarity. Statistical analysis confirms genuine match with 99.99% confidence. "
+                        "No indication of presentation attack or identity fraud.",
+            score=98,
+            confidence=0.98,
+            result="PHASE 1C PASSED: Face match 98.47%, verified same person, statistical confidence 99.99%"
+        ),
+        
+        DetailedReasoningStep(
+            step=4,
+            action="Phase 1D: Multi-Modal Liveness Detection",
+            input={
+                "video_frames": 24,
+                "frame_rate": "8 fps",
+                "duration": "3 seconds",
+                "liveness_tests": ["blink", "texture", "depth", "motion"]
+            },
+            analysis="LIVENESS TEST 1 - BLINK DETECTION:\n"
+                    "Analyzed 24 frames over 3 seconds for spontaneous eye blinks. "
+                    "Computed Eye Aspect Ratio (EAR) for each frame:\n"
+                    "Frame sequence: [0.18, 0.18, 0.17, 0.06, 0.05, 0.18, 0.18, 0.17, 0.16, 0.05, 0.06, 0.18, ...]\n"
+                    "EAR threshold for closed eye: <0.12. Detected 3 blink events (frames 4-5, 10-11, 19-20). "
+                    "Blink rate: 1.0 blinks/second (normal human range: 0.5-1.5 blinks/sec). "
+                    "Blink duration: 125-167ms (normal range: 100-300ms). "
+                    "INTERPRETATION: Natural spontaneous blinking detected. Printed photos/screens cannot blink. TEST PASSED.\n\n"
+                    "LIVENESS TEST 2 - TEXTURE ANALYSIS:\n"
+                    "Extracted Local Binary Patterns (LBP) from facial region. "
+                    "LBP histogram: [bins showing high complexity texture pattern]. "
+                    "Texture complexity score: 0.847 (real skin: 0.7-0.9, printed photo: 0.3-0.6, screen: 0.4-0.7). "
+                    "High-frequency texture analysis: Detected pores, fine lines, skin irregularities (characteristic of real skin). "
+                    "Fourier analysis: Strong high-frequency components (>200 cycles/face) indicating 3D surface texture. "
+                    "Moire pattern detection: No moire patterns (would indicate photo-of-screen attack). "
+                    "INTERPRETATION: Texture analysis confirms real human skin, not flat reproduction. TEST PASSED.\n\n"
+                    "LIVENESS TEST 3 - DEPTH ESTIMATION:\n"
+                    "Applied monocular depth estimation neural network (MiDaS v3.0) to compute depth map. "
+                    "Depth range detected: 85mm from nose tip (closest) to ears (farthest). "
+                    "Average human facial depth: 75-95mm - MATCHES EXPECTED RANGE. "
+                    "Depth gradient analysis: Smooth continuous gradient (nose→cheeks→ears) consistent with 3D face. "
+                    "Flat surfaces (photos/screens) show <5mm depth variation - CURRENT: 85mm (17x threshold). "
+                    "Depth map shows realistic facial geometry with nose prominence, eye sockets, facial contours. "
+                    "INTERPRETATION: Depth analysis confirms 3D real face, rules out 2D attacks. TEST PASSED.\n\n"
+                    "LIVENESS TEST 4 - MOTION CONSISTENCY:\n"
+                    "Tracked facial landmarks across 24 frames, analyzed motion patterns. "
+                    "Detected micro-movements: Average displacement 2.8 pixels/frame (range: 1.2-4.5 pixels). "
+                    "Motion frequency analysis: Dominant frequencies 8-12 Hz (matches human physiological tremor). "
+                    "Motion pattern: Organic, non-linear, subtle (characteristic of involuntary micro-tremors). "
+                    "Replay attack detection: No frame-to-frame repetition patterns (would indicate video replay). "
+                    "Temporal consistency: Smooth motion transitions, no sudden jumps (rules out video splicing). "
+                    "INTERPRETATION: Natural involuntary movements detected. Static/replay attacks show no motion. TEST PASSED.\n\n"
+                    "AGGREGATE LIVENESS SCORE:\n"
+                    "Blink test: PASS (weight 25%) | Texture test: PASS (weight 25%) | "
+                    "Depth test: PASS (weight 30%) | Motion test: PASS (weight 20%)\n"
+                    "Combined liveness confidence: 96.2% (threshold: 85% for high-assurance)\n"
+                    "Presentation attack probability: 3.8% (acceptably low)\n\n"
+                    "CONCLUSION: REAL PERSON VERIFIED. All 4 liveness tests passed. No presentation attack indicators detected.",
+            ai_reasoning="MULTI-MODAL LIVENESS DETECTION RATIONALE:\n\n"
+                        "THREAT MODEL - PRESENTATION ATTACKS:\n"
+                        "1. Printed photo attack: High-res photo of legitimate user\n"
+                        "2. Digital screen attack: Photo/video displayed on phone/tablet screen\n"
+                        "3. Video replay attack: Pre-recorded video of user\n"
+                        "4. 3D mask attack: Physical mask replicating face shape\n"
+                        "5. Deepfake attack: AI-generated synthetic video\n\n"
+                        "DEFENSE STRATEGY: Multi-modal approach (each test defends against different attack types)\n\n"
+                        "TEST 1 - BLINK DETECTION:\n"
+                        "Defends against: Printed photos, static digital displays\n"
+                        "Algorithm: Eye Aspect Ratio (EAR) computation\n"
+                        "EAR = (||p2-p6|| + ||p3-p5||) / (2 × ||p1-p4||)\n"
+                        "Where p1-p6 are eye landmark coordinates (Soukupová & Čech, 2016)\n"
+                        "Threshold: EAR < 0.12 indicates closed eye\n"
+                        "Validation: Detected 3 blinks with proper timing (125-167ms duration)\n"
+                        "Attack resilience: Printed photos cannot blink (static). Screens cannot simulate natural blink physics.\n\n"
+                        "TEST 2 - TEXTURE ANALYSIS:\n"
+                        "Defends against: Printed photos, low-quality screens, masks\n"
+                        "Algorithm: Local Binary Patterns + Fourier analysis\n"
+                        "LBP encoding: For each pixel, compare with 8 neighbors, create binary code\n"
+                        "Real skin shows complex LBP patterns (pores, wrinkles, irregularities)\n"
+                        "Printed photos show uniform patterns (printer dithering creates regular patterns)\n"
+                        "Fourier analysis: Real skin has strong high-frequency components (fine details)\n"
+                        "Validation: Texture complexity 0.847 in real skin range (0.7-0.9)\n"
+                        "Attack resilience: Photo reproduction loses high-frequency details. Masks show artificial texture.\n\n"
+                        "TEST 3 - DEPTH ESTIMATION:\n"
+                        "Defends against: All 2D attacks (photos, screens), deepfakes\n"
+                        "Algorithm: MiDaS v3.0 monocular depth estimation (Ranftl et al., 2020)\n"
+                        "Network: Transformer-based dense prediction, trained on 12 diverse datasets\n"
+                        "Output: Per-pixel depth map (relative depth values)\n"
+                        "Real faces show 75-95mm depth variation (nose prominence, facial contours)\n"
+                        "Flat surfaces (photos/screens) show <5mm depth variation\n"
+                        "Validation: Measured 85mm depth range - consistent with real face geometry\n"
+                        "Attack resilience: 2D reproductions lack depth dimension. Even 3D masks show unnatural depth gradients.\n\n"
+                        "TEST 4 - MOTION ANALYSIS:\n"
+                        "Defends against: Static attacks, video replay, deepfakes\n"
+                        "Algorithm: Optical flow tracking + frequency analysis\n"
+                        "Tracked 68 landmarks across frames, computed displacement vectors\n"
+                        "Real humans exhibit physiological micro-tremor (8-12 Hz, 1-5 pixel amplitude)\n"
+                        "Replay attacks show no micro-movements (frozen) or artificial movements\n"
+                        "Deepfakes often have temporal inconsistencies (jitter, artifacts)\n"
+                        "Validation: Detected organic micro-movements matching human physiology\n"
+                        "Attack resilience: Static attacks show zero motion. Replays lack natural tremor. Deepfakes show temporal artifacts.\n\n"
+                        "COMBINED DECISION LOGIC:\n"
+                        "Require ALL 4 tests to pass (conservative approach for high security)\n"
+                        "Each test targets different attack vectors - multi-modal defense\n"
+                        "Even if attacker bypasses 1 test, other 3 provide backup detection\n"
+                        "Current result: 4/4 tests passed → HIGH CONFIDENCE in real person\n\n"
+                        "COMPLIANCE:\n"
+                        "ISO/IEC 30107-3: Biometric presentation attack detection (PAD)\n"
+                        "- Level 2 PAD capability: Defends against unsophisticated and some sophisticated attacks\n"
+                        "- APCER (Attack Presentation Classification Error Rate): 3.8%\n"
+                        "- BPCER (Bona fide Presentation Classification Error Rate): 1.2%\n"
+                        "NIST/NISTIR 7859: Evaluation of presentation attack detection\n\n"
+                        "DECISION: APPROVE LIVENESS\n"
+                        "Rationale: All 4 independent liveness tests passed. Multi-modal evidence confirms real person. "
+                        "Attack probability 3.8% well below 10% threshold. Compliant with ISO 30107-3 Level 2.",
+            score=96,
+            confidence=0.96,
+            result="PHASE 1D PASSED: 4/4 liveness tests passed, 96.2% confidence real person, presentation attack probability 3.8%"
+        ),
+        
+        # STEP 2: DOCUMENT VERIFICATION (ULTRA-DETAILED)
+        DetailedReasoningStep(
+            step=5,
+            action="Phase 2A: Document Image Preprocessing & Quality Assessment",
+            input={
+                "document_scan": "id_document_front.jpg",
+                "scan_resolution": "2400x1600 (3.84 MP)",
+                "file_size": "2.8 MB",
+                "document_type_claimed": "passport",
+                "issuing_country": user_country
+            },
+            analysis="IMAGE QUALITY ASSESSMENT:\n"
+                    "Resolution: 2400x1600 pixels (300 DPI equivalent) - EXCELLENT (minimum 150 DPI for OCR). "
+                    "File format: JPEG with quality factor 95% - minimal compression artifacts. "
+                    "Color space: sRGB with proper color profile - suitable for document analysis. "
+                    "Brightness analysis: Mean luminance 142/255 - well-lit (optimal range 120-180). "
+                    "Contrast: Standard deviation 48 - good contrast for text readability. "
+                    "Sharpness (Laplacian variance): 1580 - sharp focus (threshold >500 for acceptable). "
+                    "Noise level: SNR 32 dB - low noise, clean scan. "
+                    "Overall quality score: 94/100 (EXCELLENT)\n\n"
+                    "DOCUMENT TYPE DETECTION:\n"
+                    "Applied document classification CNN to identify document type. "
+                    "Predicted class: PASSPORT (confidence 97.8%). "
+                    f"Expected issuing country: {user_country}. "
+                    "Document dimensions: 125mm x 88mm (standard passport card size ISO/IEC 7810 ID-3). "
+                    "Aspect ratio: 1.42 (matches passport standard). "
+                    "Color scheme: Burgundy/red background (common for many countries). "
+                    "Layout analysis: Detected machine-readable zone (MRZ) at bottom - confirms passport. "
+                    "\n\nGEOMETRIC CORRECTION:\n"
+                    "Detected document corners using Hough transform + RANSAC. "
+                    "Computed perspective transformation to correct for viewing angle. "
+                    "Original capture angle: 8° skew, 12° tilt (minor perspective distortion). "
+                    "Applied homography matrix to de-warp document to rectangular form. "
+                    "Result: Perfectly rectangular document, ready for feature extraction. "
+                    "\n\nCONCLUSION: High-quality document scan suitable for detailed analysis. Document confirmed as passport.",
+            ai_reasoning=f"DOCUMENT PREPROCESSING PIPELINE:\n\n"
+                        "STEP 1 - QUALITY VALIDATION:\n"
+                        "Checked document image meets minimum requirements for automated processing:\n"
+                        "- Resolution ≥150 DPI: ✓ (300 DPI detected)\n"
+                        "- Color depth ≥24-bit: ✓ (24-bit RGB)\n"
+                        "- Compression quality ≥70%: ✓ (95% quality)\n"
+                        "- Sharpness score >500: ✓ (1580 score)\n"
+                        "- Adequate lighting: ✓ (brightness 142/255)\n\n"
+                        "STEP 2 - DOCUMENT LOCALIZATION:\n"
+                        "Edge detection: Canny edge detector with hysteresis thresholding\n"
+                        "Line detection: Hough transform to find straight lines\n"
+                        "Corner detection: Intersection of lines → 4 corner points\n"
+                        "Validation: Corners form quadrilateral with proper aspect ratio\n\n"
+                        "STEP 3 - PERSPECTIVE CORRECTION:\n"
+                        "Perspective distortion causes non-rectangular appearance\n"
+                        "Computed homography matrix H (3x3) mapping distorted → ideal rectangle\n"
+                        "Using 4 corner correspondences (minimum needed)\n"
+                        "Applied transformation: p' = H × p for each pixel p\n"
+                        "Interpolation: Bilinear to preserve document texture\n\n"
+                        "STEP 4 - DOCUMENT CLASSIFICATION:\n"
+                        "Neural network: ResNet-50 trained on 500K government ID documents\n"
+                        "Input: 224x224 RGB document thumbnail\n"
+                        "Output: Probability distribution over document types\n"
+                        "Classes: Passport (97.8%), National ID (1.2%), Driver License (0.6%), Other (0.4%)\n"
+                        "Prediction: PASSPORT with very high confidence\n\n"
+                        f"STEP 5 - COUNTRY-SPECIFIC VALIDATION:\n"
+                        f"Issuing country: {user_country}\n"
+                        f"Loaded {user_country} passport template from database\n"
+                        f"Expected features: MRZ format, security watermarks, color scheme, layout\n"
+                        f"Validation: Document structure matches {user_country} passport specification\n\n"
+                        "DECISION: Document preprocessing successful\n"
+                        "Rationale: High-quality scan with excellent resolution and lighting. "
+                        "Document correctly identified as passport. Geometric distortions corrected. Ready for OCR and security feature analysis.",
+            score=97,
+            confidence=0.97,
+            result=f"PHASE 2A PASSED: Passport identified (97.8%), quality 94/100, {user_country} template matched"
+        ),
+        
+        DetailedReasoningStep(
+            step=6,
+            action="Phase 2B: OCR Data Extraction + Sensitive Information Processing",
+            input={
+                "document_region": "full_passport_front",
+                "ocr_engine": "Tesseract 5.0 + custom passport model",
+                "mrz_reader": "ICAO 9303 compliant",
+                "sensitive_fields": ["name", "passport_number", "cpf", "date_of_birth"]
+            },
+            analysis=f"OCR EXTRACTION - VISUAL TEXT ZONE (VIZ):\n"
+                    f"Tesseract OCR confidence: 99.4% (excellent). "
+                    f"Extracted fields:\n"
+                    f"- Full Name: {user_name} (confidence: 99.8%)\n"
+                    f"- Date of Birth: [REDACTED] (confidence: 99.2%)\n"
+                    f"- Place of Birth: [REDACTED] (confidence: 98.1%)\n"
+                    f"- Gender: [REDACTED] (confidence: 99.9%)\n"
+                    f"- Nationality: {user_country} (confidence: 100.0%)\n"
+                    f"- Passport Number: {user_passport} (confidence: 99.6%) **SENSITIVE**\n"
+                    f"- Issue Date: [REDACTED] (confidence: 98.9%)\n"
+                    f"- Expiry Date: [REDACTED] (confidence: 99.1%)\n"
+                    f"- Tax ID (CPF): {user_cpf} (confidence: 99.3%) **SENSITIVE**\n\n"
+                    f"OCR EXTRACTION - MACHINE READABLE ZONE (MRZ):\n"
+                    f"MRZ format: TD3 (2 lines, 44 characters each) - standard for passports. "
+                    f"MRZ Line 1: P<{user_country[:3]}{''.join(user_name.split()).upper()}<<[REDACTED]\n"
+                    f"MRZ Line 2: {user_passport}[REDACTED]M[REDACTED]{user_country[:3]}<<<<<<<<<\n"
+                    f"MRZ checksum validation:\n"
+                    f"- Passport number checksum: VALID ✓\n"
+                    f"- Date of birth checksum: VALID ✓\n"
+                    f"- Expiry date checksum: VALID ✓\n"
+                    f"- Composite checksum: VALID ✓\n"
+                    f"All MRZ checksums passed - document integrity verified.\n\n"
+                    f"CROSS-VALIDATION: VIZ vs MRZ:\n"
+                    f"Passport number: VIZ='{user_passport}' vs MRZ='{user_passport}' → MATCH ✓\n"
+                    f"Name: VIZ='{user_name}' vs MRZ='{''.join(user_name.split()).upper()}' → MATCH ✓\n"
+                    f"Nationality: VIZ='{user_country}' vs MRZ='{user_country[:3]}' → MATCH ✓\n"
+                    f"No discrepancies detected. VIZ and MRZ data fully consistent.\n\n"
+                    f"SENSITIVE DATA HANDLING:\n"
+                    f"**CRITICAL**: Following fields classified as PII and will be encrypted:\n"
+                    f"1. Passport Number: {user_passport} - Unique identifier, can be used for identity theft\n"
+                    f"2. Tax ID (CPF): {user_cpf} - Sensitive financial/tax information\n"
+                    f"3. Date of Birth: [REDACTED] - Reduces to age only for verification\n"
+                    f"Encryption: AES-256-GCM with owner's private key\n"
+                    f"Storage: IPFS with encrypted payload\n"
+                    f"Access: Only owner can decrypt with private key\n"
+                    f"Privacy guarantee: These fields NEVER appear in public reasoning or on-chain\n\n"
+                    f"AGE CALCULATION:\n"
+                    f"Extracted DOB: [REDACTED]\n"
+                    f"Current date: 2025-01-08\n"
+                    f"Calculated age: {user_age} years (matches user claim) ✓\n\n"
+                    f"CONCLUSION: OCR extraction successful. All checksums valid. Sensitive data identified and will be encrypted.",
+            ai_reasoning=f"OCR ALGORITHM DETAILS:\n\n"
+                        f"ENGINE: Tesseract 5.0 (Google open-source OCR)\n"
+                        f"Language model: English + {user_country} specific\n"
+                        f"Page segmentation mode: PSM 6 (uniform block of text)\n"
+                        f"Character whitelist: A-Z, 0-9, <> (for passport-specific characters)\n"
+                        f"Training data: LSTM neural network trained on government documents\n\n"
+                        f"PREPROCESSING FOR OCR:\n"
+                        f"1. Grayscale conversion (color not needed for text)\n"
+                        f"2. Adaptive thresholding (Otsu's method) → binary image\n"
+                        f"3. Morphological operations: remove noise, connect broken characters\n"
+                        f"4. Deskewing: correct text rotation (<2° detected and corrected)\n\n"
+                        f"MRZ PARSING:\n"
+                        f"ICAO 9303 standard: Machine Readable Zone specification\n"
+                        f"TD3 format: 2 lines × 44 characters (passport card)\n"
+                        f"Structure: Document type, Country, Name, Passport#, DOB, Gender, Expiry, checksums\n"
+                        f"Checksums: Modulo 10 algorithm with weights 7-3-1 repeating\n"
+                        f"Checksum formula: Σ(digit × weight) mod 10\n"
+                        f"Example passport# check: {user_passport} → computed checksum matches printed checksum\n\n"
+                        f"CROSS-VALIDATION IMPORTANCE:\n"
+                        f"VIZ (Visual Inspection Zone) = human-readable text\n"
+                        f"MRZ (Machine Readable Zone) = structured barcode-like format\n"
+                        f"Forgers often alter VIZ but forget to update MRZ\n"
+                        f"Our validation: Extract from BOTH, compare, flag discrepancies\n"
+                        f"Current result: Perfect match → authentic document\n\n"
+                        f"SENSITIVE DATA PROTECTION:\n"
+                        f"GDPR Article 9: Special categories of personal data\n"
+                        f"- Passport number: Unique identifier (can enable identity theft)\n"
+                        f"- Tax ID/CPF: Financial identifier (enables tax fraud, account access)\n"
+                        f"- Full DOB: Combined with name enables impersonation\n"
+                        f"Protection strategy: Encrypt before IPFS storage, never expose publicly\n"
+                        f"Encryption: AES-256-GCM (authenticated encryption)\n"
+                        f"- Key derivation: PBKDF2(owner_private_key + attestation_id, 100K iterations)\n"
+                        f"- Nonce: 96-bit random (unique per encryption)\n"
+                        f"- Authentication tag: 128-bit (prevents tampering)\n"
+                        f"Access control: Only owner (with private key) can decrypt\n"
+                        f"Compliance: GDPR, LGPD (Brazilian data protection), CCPA\n\n"
+                        f"DECISION: OCR extraction approved\n"
+                        f"Rationale: High-confidence text extraction (99.4% avg). All MRZ checksums valid. "
+                        f"VIZ-MRZ cross-validation passed. Sensitive data identified and marked for encryption.",
+            score=95,
+            confidence=0.99,
+            result=f"PHASE 2B PASSED: OCR 99.4%, MRZ checksums valid, VIZ-MRZ match, sensitive data ({user_cpf}, {user_passport}) encrypted"
+        ),
+        
+        # STEP 3-5: Simplificados mas mantendo estrutura
+        DetailedReasoningStep(
+            step=7,
+            action="Phase 3: Age Verification & Cross-Validation",
+            input={
+                "document_dob": "[REDACTED]",
+                "declared_age": user_age,
+                "facial_age_estimate": user_age - 2 if user_age > 20 else user_age + 1,
+                "minimum_age": 18
+            },
+            analysis=f"Document age: {user_age} years. Declared age: {user_age} years. Facial estimate: {user_age-2 if user_age>20 else user_age+1} years (±3y tolerance). Age check: {user_age} ≥ 18 = TRUE.",
+            ai_reasoning=f"Age verification using 3 independent sources: document DOB extraction, user declaration, AI facial age estimation. All sources agree within acceptable tolerance. Age requirement met.",
+            score=age_score,
+            confidence=1.0,
+            result=f"AGE VERIFIED - {user_age} years, meets 18+ requirement"
+        ),
+        
+        DetailedReasoningStep(
+            step=8,
+            action="Phase 4: Compliance & Sanctions Screening",
+            input={
+                "name": user_name,
+                "country": user_country,
+                "databases": ["OFAC", "UN", "EU", "Interpol", "PEP"],
+                "entities_checked": 75000
+            },
+            analysis=f"Screened against 75,000+ sanctioned entities. Fuzzy matching (Levenshtein + Soundex). Highest similarity: 42% (threshold 70%). {user_country} is FATF-compliant. No matches.",
+            ai_reasoning=f"Comprehensive sanctions screening using fuzzy name matching algorithms. No hits above threshold. Country risk assessment: {user_country} low-risk jurisdiction.",
+            score=compliance_score,
+            confidence=1.0,
+            result=f"COMPLIANCE APPROVED - No sanctions, {user_country} allowed"
+        ),
+        
+        DetailedReasoningStep(
+            step=9,
+            action="Phase 5: Final Risk Assessment & Decision",
+            input={
+                "bio_score": bio_score,
+                "doc_score": doc_score,
+                "age_score": age_score,
+                "compliance_score": compliance_score,
+                "threshold": 80
+            },
+            analysis=f"Weighted score: Bio(35%)={bio_score*0.35:.1f}, Doc(25%)={doc_score*0.25:.1f}, Age(15%)={age_score*0.15:.1f}, Compliance(25%)={compliance_score*0.25:.1f}. Total={final_score}/100. Risk: LOW.",
+            ai_reasoning=f"Multi-factor risk assessment using weighted scoring model. All components passed. Final score {final_score} exceeds threshold 80. Recommend approval.",
+            score=final_score,
+            confidence=0.98,
+            result=f"FINAL: KYC APPROVED - {final_score}/100, Badge 'Verified Creator'"
+        )
+    ]
+    
+    return private_steps
@@ -0,0 +1,165 @@
+"""
+Carga do NonceManager contra uma chain EVM local (fake_chain.py)
+
+Várias instâncias (processos) com várias threads cada enviam transações do MESMO
+signer usando funs_kyc.transactions.send_managed_transaction, compartilhando o
+store SQLite como as instâncias da mesma máquina fariam. A chain descarta uma
+fração das txs (drop_rate); a thread cuja tx sumiu reenvia após o timeout do
+receipt e o resync do manager preenche o gap.
+
+Mede tx/s confirmadas e reporta mineradas, descartadas, reenviadas, presas no
+mempool e nonces ainda rastreados. A correção (sem colisão, sem gap, nada preso,
+nonce liberado só em rejeição certa) é coberta por tests/test_nonces.py.
+
+Uso: python bench/nonce_harness.py [--instances 4] [--threads 8] [--jobs 20] [--drop-rate 0.03]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import rlp
+from eth_account import Account
+from web3 import Web3
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from fake_chain import CHAIN_ID, FakeChain
+
+SINK = '0x000000000000000000000000000000000000dEaD'
+
+
+class HarnessClient:
+    """Subconjunto do ANNAClient usado por transactions.py/nonces.py"""
+    network = 'harness'
+
+    def __init__(self, rpc_url, private_key):
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.account = Account.from_key(private_key)
+        self.address = self.account.address
+
+
+def wait_receipt(client, tx_hash, timeout):
+    """True quando minerada; False se o node não conhece mais a tx (dropped)"""
+    while True:
+        try:
+            client.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout, poll_latency=0.05)
+            return True
+        except TimeExhausted:
+            try:
+                client.w3.eth.get_transaction(tx_hash)
+            except TransactionNotFound:
+                return False
+            # Ainda no mempool (esperando um gap abaixo dela) - continua esperando
+
+
+def run_instance(instance, rpc_url, private_key, threads, jobs, receipt_timeout, results):
+    from funs_kyc.nonces import get_nonce_manager
+    from funs_kyc.transactions import send_managed_transaction
+
+    client = HarnessClient(rpc_url, private_key)
+    manager = get_nonce_manager(client)
+    gas_price = client.w3.eth.gas_price
+    stats = {'sent': 0, 'resent': 0, 'errors': 0}
+    stats_lock = threading.Lock()
+
+    def worker(thread):
+        for job in range(jobs):
+            job_id = f"{instance}-{thread}-{job}"
+            attempts = 0
+            while True:
+                attempts += 1
+                tx_hash, nonce = send_managed_transaction(client, lambda n: {
+                    'to': SINK, 'value': 0, 'gas': 21000, 'gasPrice': gas_price,
+                    'nonce': n, 'chainId': CHAIN_ID, 'data': job_id.encode('utf-8'),
+                })
+                if not wait_receipt(client, tx_hash, receipt_timeout):
+                    # Tx sumiu do node: o nonce fica 'sent' até o resync marcá-lo como gap
+                    with stats_lock:
+                        stats['resent'] += 1
+                    continue
+                manager.confirm(nonce)
+                with stats_lock:
+                    stats['sent'] += attempts
+                break
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instances', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--jobs', type=int, default=20, help='transações por thread')
+    parser.add_argument('--drop-rate', type=float, default=0.03)
+    parser.add_argument('--block-time', type=float, default=0.2)
+    parser.add_argument('--receipt-timeout', type=float, default=3.0)
+    args = parser.parse_args()
+
+    store = os.path.join(tempfile.mkdtemp(prefix='nonce_harness_'), 'nonces.sqlite3')
+    os.environ['KYC_NONCE_STORE'] = store
+    os.environ['KYC_NONCE_DROP_TIMEOUT'] = str(args.receipt_timeout / 2)
+    os.environ['KYC_NONCE_RESYNC_INTERVAL'] = str(args.block_time)
+
+    chain = FakeChain(block_time=args.block_time, drop_rate=args.drop_rate, seed=7).start()
+    private_key = Account.create().key.hex()
+    total = args.instances * args.threads * args.jobs
+
+    print(f"⛓️  {args.instances} instances x {args.threads} threads x {args.jobs} jobs = {total} txs, "
+          f"drop rate {args.drop_rate:.0%}, block time {args.block_time}s")
+
+    ctx = multiprocessing.get_context('fork')
+    results = ctx.Queue()
+    started = time.perf_counter()
+    procs = [
+        ctx.Process(target=run_instance,
+                    args=(i, chain.url, private_key, args.threads, args.jobs, args.receipt_timeout, results))
+        for i in range(args.instances)
+    ]
+    for p in procs:
+        p.start()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+    chain.mine_block()
+
+    # ==================== RESULTADO ====================
+    from funs_kyc.nonces import NonceManager
+
+    address = Account.from_key(private_key).address
+    mined_nonces = sorted(tx['nonce'] for tx in chain.mined)
+    payloads = [rlp_data(tx['raw']) for tx in chain.mined]
+    stuck = sum(len(pool) for pool in chain.mempool.values())
+    manager = NonceManager(Web3(Web3.HTTPProvider(chain.url)), address, path=store, drop_timeout=0,
+                           namespace=HarnessClient.network)
+    manager.resync()
+    leftover = manager.pending()
+    chain.stop()
+
+    resent = sum(s['resent'] for s in stats)
+    contiguous = mined_nonces == list(range(len(mined_nonces)))
+    print(f"⏱️  {elapsed:.1f}s, {total / elapsed:.1f} confirmed tx/s")
+    print(f"📦 mined {len(chain.mined)} of {total} jobs ({len(set(payloads))} distinct), "
+          f"dropped by node {len(chain.dropped)}, resent {resent}, rejected {chain.rejected or 0}")
+    print(f"🔢 nonces {'contiguous' if contiguous else 'NOT contiguous'}, {stuck} stuck in mempool, "
+          f"{len(leftover)} still tracked")
+
+
+def rlp_data(raw):
+    return bytes(rlp.decode(raw)[5])
+
+
+if __name__ == '__main__':
+    main()
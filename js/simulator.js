@@ -20,12 +20,26 @@ let currentAttestationId = '';
 let currentTxHash = '';
 let currentIpfsCid = '';
 
+// Idempotency key for the current submission (double-clicks/retries reuse it)
+let submissionKey = null;
+
+function newSubmissionKey() {
+    return window.crypto && crypto.randomUUID
+        ? crypto.randomUUID()
+        : `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+}
+
 // Form submit handler
 kycForm.addEventListener('submit', async (e) => {
     e.preventDefault();
     await processKYC();
 });
 
+// Editing the form starts a new submission
+kycForm.addEventListener('input', () => {
+    submissionKey = null;
+});
+
 async function processKYC() {
     // Collect form data
     const formData = {
@@ -43,39 +57,61 @@ async function processKYC() {
         passport: '***ENCRYPTED***'
     });
 
+    submissionKey = submissionKey || newSubmissionKey();
+
     // Show loading
     formSection.classList.add('hidden');
     loadingSection.classList.remove('hidden');
 
-    // Animate loading steps
-    animateLoadingSteps();
-
     try {
         console.log('📡 Sending request to:', API_URL);
         
-        const response = await fetch(API_URL, {
+        const response = await fetch(`${API_URL}?stream=1`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'Accept': 'application/x-ndjson',
+                'Idempotency-Key': submissionKey,
             },
             body: JSON.stringify(formData)
         });
 
         console.log('📥 Response status:', response.status);
 
+        if (response.status === 400) {
+            // Rejected before any work (invalid CPF / passport / MRZ check digits)
+            const invalid = await response.json();
+            loadingSection.classList.add('hidden');
+            formSection.classList.remove('hidden');
+            alert(`Please check your data:\n\n${(invalid.errors || [invalid.error]).join('\n')}`);
+            return;
+        }
+
         if (!response.ok) {
             const errorText = await response.text();
             console.error('❌ Error response:', errorText);
             throw new Error(`HTTP ${response.status}: ${errorText}`);
         }
 
-        const result = await response.json();
+        let result;
+        if ((response.headers.get('Content-Type') || '').includes('application/x-ndjson') && response.body) {
+            result = await readProgressStream(response);
+        } else {
+            // Server without streaming support: plain JSON + timed animation
+            animateLoadingSteps();
+            result = await response.json();
+        }
         console.log('✅ Success response:', result);
 
         if (result.success && result.kyc_approved) {
+            submissionKey = null;
             displaySuccessResult(result);
+        } else if (result.success) {
+            // Processed but not approved: manual review (attested, no badge) or rejected (under 18)
+            submissionKey = null;
+            displayNotApproved(result);
         } else {
-            throw new Error(result.reason || 'KYC not approved');
+            throw new Error(result.error || 'KYC failed');
         }
 
     } catch (error) {
@@ -86,6 +122,59 @@ async function processKYC() {
     }
 }
 
+// Pipeline stage -> loading steps it completes
+const STAGE_STEPS = {
+    validated: ['step1'],
+    reasoning_built: ['step2'],
+    pinned: ['step3', 'step4'],
+    confirmed: ['step5']
+};
+
+function markStepDone(id) {
+    const element = document.getElementById(id);
+    element.classList.remove('text-gray-500');
+    element.classList.add('text-green-400');
+    element.querySelector('i').className = 'fas fa-check-circle text-green-400';
+}
+
+async function readProgressStream(response) {
+    // NDJSON: one event per line, last one is 'result' or 'error'
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let final = null;
+
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        const event = JSON.parse(line);
+        console.log(`⏱️  ${event.stage} (+${event.elapsed_ms}ms)`, event);
+        (STAGE_STEPS[event.stage] || []).forEach(markStepDone);
+        if (event.stage === 'tx_sent') {
+            document.getElementById('txHashDisplay').textContent = event.tx_hash;
+        }
+        if (event.stage === 'result') {
+            final = event;
+        } else if (event.stage === 'error') {
+            throw new Error(`HTTP ${event.http_status}: ${event.error}`);
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+
+    if (!final) {
+        throw new Error('Stream ended before result');
+    }
+    return final;
+}
+
 function animateLoadingSteps() {
     const steps = [
         { id: 'step1', delay: 500 },
@@ -96,15 +185,21 @@ function animateLoadingSteps() {
     ];
 
     steps.forEach(step => {
-        setTimeout(() => {
-            const element = document.getElementById(step.id);
-            element.classList.remove('text-gray-500');
-            element.classList.add('text-green-400');
-            element.querySelector('i').className = 'fas fa-check-circle text-green-400';
-        }, step.delay);
+        setTimeout(() => markStepDone(step.id), step.delay);
     });
 }
 
+function displayNotApproved(result) {
+    loadingSection.classList.add('hidden');
+    formSection.classList.remove('hidden');
+
+    if (result.kyc_status === 'manual_review') {
+        alert(`KYC sent to manual review:\n\n${result.reason}\n\nScore: ${result.score}/100\nAttestation: ${result.attestation_id}`);
+    } else {
+        alert(`KYC not approved:\n\n${result.reason}`);
+    }
+}
+
 function displaySuccessResult(result) {
     // Hide loading
     loadingSection.classList.add('hidden');
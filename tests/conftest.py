@@ -0,0 +1,13 @@
+"""
+Testes do funs_kyc - rodam com `python -m pytest` na raiz do repo
+
+api/ no sys.path como no handler (process_kyc, funs_kyc) e bench/ para os stand-ins
+locais (fake_chain, fake_s3, fake_rpc_proxy), os mesmos usados nos benchmarks.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
@@ -0,0 +1,43 @@
+"""Modo assíncrono só onde o job continua rodando depois do 202"""
+
+import pytest
+
+import process_kyc
+from funs_kyc import jobs
+
+
+class Request:
+    """O que handler._wants_async lê da request"""
+
+    def __init__(self, path, prefer=None):
+        self.path = path
+        self.headers = {'Prefer': prefer} if prefer else {}
+
+    _wants_async = process_kyc.handler._wants_async
+
+
+@pytest.fixture
+def short_lived(monkeypatch):
+    monkeypatch.delenv('KYC_ASYNC_JOBS', raising=False)
+    monkeypatch.setattr(jobs, '_long_lived', False)
+
+
+def test_serverless_handler_falls_back_to_sync(short_lived):
+    assert not jobs.async_jobs_enabled()
+    assert not Request('/api/process_kyc?async=1')._wants_async()
+    assert not Request('/api/process_kyc', prefer='respond-async')._wants_async()
+
+
+def test_long_lived_process_accepts_async(short_lived):
+    jobs.mark_long_lived()
+    assert Request('/api/process_kyc?async=1')._wants_async()
+    assert Request('/api/process_kyc', prefer='respond-async')._wants_async()
+    assert not Request('/api/process_kyc')._wants_async()
+
+
+def test_env_overrides_the_process_kind(short_lived, monkeypatch):
+    monkeypatch.setenv('KYC_ASYNC_JOBS', '1')
+    assert Request('/api/process_kyc?async=1')._wants_async()
+    jobs.mark_long_lived()
+    monkeypatch.setenv('KYC_ASYNC_JOBS', '0')
+    assert not Request('/api/process_kyc?async=1')._wants_async()
@@ -0,0 +1,106 @@
+"""Retomada do bulk: interrupção no meio da leitura, linha parcial no fim do JSONL e --retry-failed"""
+
+import json
+
+import pytest
+
+from bench_handler import load_applicants
+from funs_kyc import bulk
+
+TOTAL = 50
+CHUNK_SIZE = 5
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    monkeypatch.setenv('KYC_IDEMPOTENCY', '0')
+    input_path = tmp_path / 'applicants.jsonl'
+    input_path.write_text(''.join(json.dumps(a) + '\n' for a in load_applicants(None, TOTAL)), encoding='utf-8')
+    return str(input_path), str(tmp_path / 'results.jsonl')
+
+
+class StubAttest:
+    """attest sem chain/IPFS: registra o applicant e falha (retryable) nos nomes em failing"""
+
+    def __init__(self):
+        self.calls = []
+        self.failing = set()
+
+    def __call__(self, applicant, kyc):
+        self.calls.append(applicant['user_name'])
+        if applicant['user_name'] in self.failing:
+            raise ConnectionError("RPC unavailable")
+        return {'success': True, 'kyc_approved': True, 'user_name': applicant['user_name']}
+
+
+@pytest.fixture
+def attested(monkeypatch):
+    stub = StubAttest()
+    monkeypatch.setattr(bulk, 'attest', stub)
+    return stub
+
+
+def interrupt_after(monkeypatch, chunks):
+    read_chunks = bulk._read_chunks
+
+    def interrupted(*args):
+        for i, chunk in enumerate(read_chunks(*args)):
+            if i == chunks:
+                raise KeyboardInterrupt
+            yield chunk
+
+    monkeypatch.setattr(bulk, '_read_chunks', interrupted)
+    return lambda: monkeypatch.setattr(bulk, '_read_chunks', read_chunks)
+
+
+def process(input_path, output_path, **kwargs):
+    return bulk.BulkProcessor(input_path, output_path, workers=1, io_concurrency=4, chunk_size=CHUNK_SIZE,
+                              checkpoint_every=4, **kwargs).run()
+
+
+def read_output(output_path):
+    with open(output_path, encoding='utf-8') as f:
+        return [json.loads(raw) for raw in f]
+
+
+def test_interrupted_run_resumes_without_duplicates(paths, attested, monkeypatch):
+    input_path, output_path = paths
+    restore = interrupt_after(monkeypatch, 3)
+    with pytest.raises(KeyboardInterrupt):
+        process(input_path, output_path)
+    restore()
+    first = read_output(output_path)
+    assert sorted(r['line'] for r in first) == list(range(3 * CHUNK_SIZE))
+
+    # Queda antes de qualquer checkpoint, no meio da escrita de um resultado
+    checkpoint = bulk.Checkpoint(f"{output_path}.checkpoint.json", input_path)
+    checkpoint.save(0)
+    with open(output_path, 'ab') as f:
+        f.write(b'{"success": true, "kyc_approved": true, "line": 1')
+
+    summary = process(input_path, output_path)
+    assert summary['written'] == TOTAL - len(first)
+    records = read_output(output_path)     # parcial truncada: toda linha do arquivo é JSON completo
+    assert sorted(r['line'] for r in records) == list(range(TOTAL))
+    assert sorted(attested.calls) == sorted(f"Applicant {i}" for i in range(TOTAL))
+    assert all(r['user_name'] == f"Applicant {r['line']}" for r in records)
+
+
+def test_retry_failed_only_redoes_retryable_lines(paths, attested):
+    input_path, output_path = paths
+    attested.failing = {f"Applicant {i}" for i in (3, 17, 42)}
+    summary = process(input_path, output_path)
+    assert summary['failed'] == 3 and summary['approved'] == TOTAL - 3
+    failed = [r for r in read_output(output_path) if r.get('retryable')]
+    assert sorted(r['line'] for r in failed) == [3, 17, 42]
+
+    attested.calls.clear()
+    assert process(input_path, output_path)['written'] == 0
+    assert not attested.calls
+
+    attested.failing = set()
+    summary = process(input_path, output_path, retry_failed=True)
+    assert summary['written'] == summary['approved'] == 3
+    assert sorted(attested.calls) == ["Applicant 17", "Applicant 3", "Applicant 42"]
+    done = [r['line'] for r in read_output(output_path) if not r.get('retryable')]
+    assert sorted(done) == list(range(TOTAL))
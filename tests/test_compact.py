@@ -0,0 +1,50 @@
+"""Dicionários do formato compacto: fixados por id, versões anteriores continuam legíveis"""
+
+import pytest
+
+from funs_kyc import compact, compact_dictionaries
+
+
+def encode_with(dictionary, value):
+    out = []
+    compact._encode(value, out, dictionary.refs)
+    return compact._envelope(b''.join(out), dictionary, compress=True)
+
+
+def test_pinned_dictionaries_match_their_ids():
+    for dictionary_id in compact_dictionaries.DICTIONARIES:
+        assert compact.get_dictionary(bytes.fromhex(dictionary_id)).id.hex() == dictionary_id
+    assert compact.current_dictionary().id.hex() == compact_dictionaries.CURRENT
+
+
+def test_current_templates_are_pinned():
+    # Falha quando os templates mudam sem uma versão nova em compact_dictionaries.py
+    assert compact.build_dictionary().id == compact.current_dictionary().id, \
+        "templates changed: pin a new dictionary version (python -m funs_kyc.compact)"
+
+
+@pytest.mark.parametrize('dictionary_id', sorted(compact_dictionaries.DICTIONARIES))
+def test_every_version_decodes(dictionary_id):
+    dictionary = compact.get_dictionary(bytes.fromhex(dictionary_id))
+    payload = {'steps': [{'step': 9, 'action': dictionary.strings[-1], 'score': 98, 'confidence': 0.98}],
+               'slots': {'user_name': 'Ana Silva'}}
+    assert compact.loads(encode_with(dictionary, payload)) == payload
+
+
+def test_edited_or_unknown_dictionary_fails(monkeypatch):
+    with pytest.raises(ValueError, match="unknown to this build"):
+        compact.loads(encode_with(compact.Dictionary(['other'], b'zdict'), {'a': 1}))
+
+    strings, zdict = compact_dictionaries.DICTIONARIES[compact_dictionaries.CURRENT]
+    monkeypatch.setitem(compact_dictionaries.DICTIONARIES, compact_dictionaries.CURRENT, (strings[:-1], zdict))
+    monkeypatch.setattr(compact, 'DICTIONARIES', {})
+    with pytest.raises(ValueError, match="was edited"):
+        compact.current_dictionary()
+
+
+def test_exact_and_subclassed_types_round_trip():
+    class Name(str):
+        pass
+
+    value = {Name('user_name'): Name('Ana'), 'n': True, 'xs': (1, -2, 2.5)}
+    assert compact.loads(compact.dumps(value)) == {'user_name': 'Ana', 'n': True, 'xs': [1, -2, 2.5]}
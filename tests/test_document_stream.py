@@ -0,0 +1,113 @@
+"""Documento de reasoning em streaming: mesmo objeto do documento em memória, pico de memória limitado"""
+
+import multiprocessing
+import os
+import tracemalloc
+
+import pytest
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from web3 import Web3
+
+from bench_stream_memory import (
+    BenchClient, GeneratedSteps, in_memory, private_reasoning, public_reasoning, serve_s3, streaming
+)
+from funs_kyc import compact
+from funs_kyc.cid import compute_cid
+from funs_kyc.encryption import decrypt_private, encrypt_chunks
+from funs_kyc.pipeline import build_reasoning_document, stream_reasoning_document
+from funs_kyc.reasoning_templates import RenderedSteps, reasoning_slots, render_private_steps
+from funs_kyc.shared_reasoning import fetch_private_reasoning
+from funs_kyc.storage import decode_body
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(scope='module')
+def client():
+    # FakeS3 em outro processo: os objetos guardados não entram no tracemalloc
+    ctx = multiprocessing.get_context('spawn')
+    conn, child = ctx.Pipe()
+    process = ctx.Process(target=serve_s3, args=(child,), daemon=True)
+    process.start()
+    try:
+        yield BenchClient(conn.recv())
+    finally:
+        conn.send('stop')
+        process.join(timeout=5)
+
+
+@pytest.fixture
+def slots():
+    return reasoning_slots("Ana Souza", "Brazil", "123.456.789-09", "BR1234567", 30, 98, 95, 100, 100, 98)
+
+
+def test_encrypt_chunks_matches_one_shot_encrypt():
+    key, nonce = os.urandom(32), os.urandom(12)
+    plaintext = os.urandom(300_000)
+    pieces = [plaintext[i:i + 7000] for i in range(0, len(plaintext), 7000)]
+    assert b''.join(encrypt_chunks(pieces, key, nonce)) == AESGCM(key).encrypt(nonce, plaintext, None)
+
+
+def test_rendered_steps_match_eager_render(slots):
+    rendered, eager = RenderedSteps(slots), render_private_steps(slots)
+    assert list(rendered) == eager and rendered[-1] == eager[-1]
+    lazy, eager = private_reasoning(rendered), private_reasoning(eager)
+    assert lazy.to_dict() == eager.to_dict()
+    assert compact.loads(b''.join(compact.iter_dumps_private_reasoning(lazy))) == \
+        compact.loads(compact.dumps_private_reasoning(eager)) == eager.to_dict()
+
+
+@pytest.mark.parametrize('encoding', ['cbor', 'json'])
+@pytest.mark.parametrize('compression', ['gzip', 'none'])
+@pytest.mark.parametrize('size', ['kyc', 'large'])
+def test_streamed_document_matches_in_memory(client, slots, monkeypatch, encoding, compression, size):
+    monkeypatch.setenv('KYC_REASONING_ENCODING', encoding)
+    monkeypatch.setenv('KYC_FILEBASE_COMPRESSION', compression)
+    private = private_reasoning(RenderedSteps(slots) if size == 'kyc' else GeneratedSteps(64, 128))
+    key = f"test_{encoding}_{compression}_{size}.json"
+
+    streamed = stream_reasoning_document(client, public_reasoning(), private, f"0x{os.urandom(32).hex()}",
+                                         digest=True)
+    assert (streamed._kept is None) == (size == 'large')   # documento grande é gerado de novo no upload
+    client.filebase.upload_prepared(streamed, key)
+
+    stored, content_encoding = client.filebase.fetch_raw(key)
+    text = decode_body(stored, content_encoding)
+    assert content_encoding == streamed.content_encoding
+    assert compute_cid(stored) == streamed.cid and len(stored) == streamed.size and len(text) == streamed.raw_size
+    assert streamed.keccak == bytes(Web3.keccak(text))
+
+    document = client.filebase.fetch(key)
+    encryption_id = document['private_encrypted']['encryption_id']
+    expected = build_reasoning_document(client, public_reasoning(), private, encryption_id)
+    for field in ('nonce', 'ciphertext'):
+        assert document['private_encrypted'].pop(field) and expected['private_encrypted'].pop(field)
+    assert document == expected
+
+    document = client.filebase.fetch(key)
+    assert decrypt_private(document['private_encrypted'], client.private_key) == private.to_dict()
+    fetched = fetch_private_reasoning(client, key)
+    assert fetched.steps == list(private.steps) and fetched.additional_metadata == private.additional_metadata
+
+
+def peak_memory(fn, *args):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_streaming_peak_does_not_grow_with_the_reasoning(client, monkeypatch):
+    monkeypatch.setenv('KYC_REASONING_ENCODING', 'cbor')
+    streaming(client, 2, 256)    # aquecimento (boto3, dicionário do compact)
+
+    # 16 MB e 48 MB de reasoning em steps de 256 KB
+    memory_peak = peak_memory(in_memory, client, 64, 256)
+    small_peak = peak_memory(streaming, client, 64, 256)
+    large_peak = peak_memory(streaming, client, 192, 256)
+    assert small_peak < memory_peak / 3, (small_peak, memory_peak)
+    # Limitado pela parte do multipart (5 MiB), CHUNK_SIZE e a maior step, não pelo documento
+    assert large_peak < 16 * MB and large_peak < small_peak * 1.2, (small_peak, large_peak)
@@ -0,0 +1,39 @@
+"""Chave de idempotência: quem pode receber a resposta guardada de quem"""
+
+import pytest
+
+from funs_kyc.idempotency import IdempotencyCache, IdempotencyKeyReused, request_key
+
+
+def applicant(**fields):
+    base = {'user_name': 'Ana Silva', 'user_email': 'ana@example.com', 'user_age': 30, 'user_country': 'Brazil',
+            'user_cpf': '529.982.247-25', 'user_passport': 'BR1234567'}
+    base.update(fields)
+    return base
+
+
+def test_no_implicit_key_without_identity():
+    anonymous = dict(user_email='', user_cpf='N/A', user_passport='N/A')
+    assert request_key(None, applicant(**anonymous))[0] is None
+    assert request_key(None, applicant(user_name='Bruno Costa', **anonymous))[0] is None
+    assert request_key('client-key-1', applicant(**anonymous))[0] is not None
+
+
+def test_implicit_key_covers_every_field():
+    key, _ = request_key(None, applicant())
+    assert request_key(None, applicant(user_email=' ANA@example.com ', user_cpf='52998224725'))[0] == key
+    for changed in ({'user_name': 'Bruno Costa'}, {'user_age': 31}, {'user_country': 'Portugal'},
+                    {'user_passport': 'BR7654321'}):
+        assert request_key(None, applicant(**changed))[0] != key
+
+
+def test_header_key_reused_for_another_applicant():
+    cache = IdempotencyCache()
+    key, fingerprint = request_key('client-key-1', applicant())
+    response = (200, {'attestation_id': '0x1'})
+    assert cache.execute(key, fingerprint, lambda: response) == (response, False)
+
+    other_key, other_fingerprint = request_key('client-key-1', applicant(user_name='Bruno Costa'))
+    assert other_key == key
+    with pytest.raises(IdempotencyKeyReused):
+        cache.execute(other_key, other_fingerprint, lambda: (200, {'attestation_id': '0x2'}))
@@ -0,0 +1,90 @@
+"""Decisão do KYC na resposta: approved, manual_review (sem badge, com motivo) e rejected"""
+
+import pytest
+
+import process_kyc
+from bench_handler import load_applicants
+from funs_kyc import batch, client_pool, sanctions
+from funs_kyc.scoring import score_applicant
+
+ANCHORED = {'attestation_id': '0xa1', 'tx_hash': '0xb2', 'ipfs_cid': 'bafy', 'ipfs_url': 'https://ipfs.io/ipfs/bafy'}
+
+
+@pytest.fixture
+def screened(tmp_path, monkeypatch):
+    path = tmp_path / 'sanctions.csv'
+    path.write_text("id,name,source,country\nS1,Ivan Petrovich Sidorov,OFAC,Russia\n", encoding='utf-8')
+    monkeypatch.setenv('KYC_SANCTIONS_LIST', str(path))
+    monkeypatch.setattr(sanctions, '_screener', None)
+    yield sanctions.get_screener()
+    sanctions._screener = None
+
+
+def response(user_name, user_country, screener):
+    screening = screener.screen(user_name)
+    risk = score_applicant(30, user_country, screening)
+    return process_kyc.format_kyc_response(process_kyc.format_attestation_result(
+        ANCHORED, risk['final_score'], 30, user_country, screening, risk
+    ))
+
+
+def test_approved_applicant_gets_the_badge(screened):
+    result = response("Ana Silva", "Brazil", screened)
+    assert result['kyc_approved'] and result['kyc_status'] == 'approved'
+    assert result['badge'] == 'Verified Creator' and result['reason'] is None
+
+
+@pytest.mark.parametrize('user_name, user_country, reason', [
+    ("Ana Silva", "Iran", "Iran is a high-risk jurisdiction"),
+    ("Ivan Petrovich Sidorov", "Brazil", "Sanctions list match (100%)"),
+])
+def test_manual_review_has_no_badge_and_a_reason(screened, user_name, user_country, reason):
+    result = response(user_name, user_country, screened)
+    assert not result['kyc_approved'] and result['kyc_status'] == 'manual_review'
+    assert result['badge'] is None and result['reason'] == reason
+    assert result['reasoning_preview']['steps_summary'][-1].startswith(f"9. Final: {result['score']}/100 MANUAL REVIEW")
+
+
+def test_unscreened_applicant_is_not_approved(monkeypatch):
+    monkeypatch.setenv('KYC_SANCTIONS_LIST', '')
+    monkeypatch.setattr(sanctions, '_screener', None)
+    try:
+        result = response("Ana Silva", "Brazil", sanctions.get_screener())
+    finally:
+        sanctions._screener = None
+    assert result['kyc_status'] == 'manual_review' and result['badge'] is None
+    assert result['reason'] == "Name not screened (no sanctions list loaded)"
+
+
+def test_batch_anchors_only_approved_applicants(screened, monkeypatch):
+    anchored = []
+
+    def create_batch_attestation(client, kyc_items):
+        anchored.extend(kyc_items)
+        return {
+            'merkle_root': '0xroot', 'tx_hash': '0xtx', 'batch_attestation_id': '0xbatch', 'manifest_cid': 'bafym',
+            'applicants': [dict(ANCHORED, leaf_index=i, proof=[], batch_attestation_id='0xbatch')
+                           for i in range(len(kyc_items))],
+        }
+
+    monkeypatch.setattr(batch, 'create_batch_attestation', create_batch_attestation)
+    monkeypatch.setattr(client_pool, 'get_client', lambda: object())
+    monkeypatch.setenv('KYC_ADMISSION', '0')
+
+    records = load_applicants(None, 4)
+    records[0].update(country='Brazil')
+    records[1].update(country='Iran')
+    records[2].update(name='Ivan Petrovich Sidorov', country='Brazil')
+    records[3].update(age=16)
+    summary = process_kyc.create_batch_kyc(records)
+
+    assert (summary['total'], summary['approved'], summary['manual_review']) == (4, 1, 2)
+    assert [kyc['risk']['approved'] for kyc in anchored] == [True]
+    approved, high_risk, sanctioned, minor = summary['results']
+    assert approved['kyc_status'] == 'approved' and approved['leaf_index'] == 0
+    for result in (high_risk, sanctioned):
+        assert result['kyc_status'] == 'manual_review' and not result['kyc_approved'] and result['badge'] is None
+        assert 'leaf_index' not in result and 'attestation_id' not in result
+    assert high_risk['reason'] == "Iran is a high-risk jurisdiction"
+    assert sanctioned['reason'].startswith("Sanctions list match")
+    assert minor == dict(process_kyc.UNDER_AGE_RESPONSE, index=3)
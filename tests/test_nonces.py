@@ -0,0 +1,167 @@
+"""NonceManager + send_managed_transaction contra a FakeChain local"""
+
+import threading
+
+import pytest
+from eth_account import Account
+from web3 import Web3
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from fake_chain import CHAIN_ID, FakeChain
+from fake_rpc_proxy import RpcProxy
+from funs_kyc import nonces
+from funs_kyc.nonces import NonceManager
+from funs_kyc.transactions import send_managed_transaction
+
+SINK = '0x000000000000000000000000000000000000dEaD'
+
+
+class ChainClient:
+    """Subconjunto do ANNAClient usado por transactions.py/nonces.py"""
+    network = 'test'
+
+    def __init__(self, rpc_url, private_key):
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.account = Account.from_key(private_key)
+        self.address = self.account.address
+
+
+@pytest.fixture
+def chain():
+    chain = FakeChain(block_time=0.05, seed=7).start()
+    yield chain
+    chain.stop()
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    """Client + NonceManager registrado para ele (store SQLite temporário)"""
+    monkeypatch.setattr(nonces, '_managers', {})
+    private_key = Account.create().key.hex()
+
+    def make(url, drop_timeout=120, resync_interval=0.0):
+        client = ChainClient(url, private_key)
+        manager = NonceManager(client.w3, client.address, path=str(tmp_path / 'nonces.sqlite3'),
+                               drop_timeout=drop_timeout, resync_interval=resync_interval, namespace=client.network)
+        nonces._managers[(client.address, client.network)] = manager
+        return client, manager
+    return make
+
+
+def transfer(data, gas_price=10**9):
+    return lambda nonce: {'to': SINK, 'value': 0, 'gas': 21000, 'gasPrice': gas_price, 'nonce': nonce,
+                          'chainId': CHAIN_ID, 'data': data}
+
+
+def wait_receipt(client, tx_hash, timeout):
+    """True quando minerada; False se o node não conhece mais a tx (dropped)"""
+    while True:
+        try:
+            client.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout, poll_latency=0.02)
+            return True
+        except TimeExhausted:
+            try:
+                client.w3.eth.get_transaction(tx_hash)
+            except TransactionNotFound:
+                return False
+
+
+def test_release_of_last_nonce_leaves_no_gap(chain, make_client):
+    _, manager = make_client(chain.url)
+    first, second, third = manager.allocate(), manager.allocate(), manager.allocate()
+
+    assert manager.release(second) is True                  # txs acima: gap a preencher
+    assert manager.release(third) is False                  # último: contador recua sobre o gap
+    assert manager.pending() == [(first, 'reserved', None)]
+    assert manager.allocate() == second
+
+
+def test_rejected_send_in_the_middle_is_filled(chain, make_client):
+    client, manager = make_client(chain.url)
+    send_raw = client.w3.eth.send_raw_transaction
+    later = {}
+
+    def reject_marked(raw):
+        if b'reject-me' in bytes(raw):
+            raise ValueError({'code': -32000, 'message': 'insufficient funds for gas * price + value'})
+        return send_raw(raw)
+    client.w3.eth.send_raw_transaction = reject_marked
+
+    def build_rejected(nonce):
+        # Outra thread aloca e envia o nonce seguinte enquanto esta ainda monta a tx
+        later['tx_hash'], later['nonce'] = send_managed_transaction(client, transfer(b'later'))
+        return transfer(b'reject-me')(nonce)
+
+    with pytest.raises(ValueError, match='insufficient funds'):
+        send_managed_transaction(client, build_rejected)
+
+    assert wait_receipt(client, later['tx_hash'], timeout=5)
+    assert later['nonce'] == 1
+    filler = next(tx for tx in chain.mined if tx['nonce'] == 0)
+    assert filler['to'] == client.address and filler['data'] == b''
+    manager.resync()
+    assert manager.pending() == []
+
+
+@pytest.mark.parametrize('mode', ['lost_reply', 'error'])
+def test_uncertain_broadcast_keeps_nonce(chain, make_client, mode):
+    """Erro de transporte: o nonce fica 'sent' com o hash local e o resync decide"""
+    proxy = RpcProxy(chain.url).start()
+    try:
+        client, manager = make_client(proxy.url, drop_timeout=0, resync_interval=60)
+        manager.resync()                    # allocate() não vai à chain: só o envio passa pelo proxy
+        proxy.mode = mode
+        with pytest.raises(OSError):
+            send_managed_transaction(client, transfer(b'maybe'))
+        proxy.mode = 'ok'
+        [(nonce, status, tx_hash)] = manager.pending()
+        assert (nonce, status) == (0, 'sent') and tx_hash.startswith('0x')
+
+        if mode == 'lost_reply':
+            # O node recebeu: nonce coberto pelo pending count, não vira gap nem é reutilizado
+            assert wait_receipt(client, tx_hash, timeout=5)
+            assert send_managed_transaction(client, transfer(b'next'))[1] == 1
+        else:
+            # O node nunca viu a tx: o resync devolve o nonce e o próximo envio o usa
+            manager.resync()
+            assert manager.pending() == [(0, 'released', tx_hash)]
+            assert send_managed_transaction(client, transfer(b'next'))[1] == 0
+    finally:
+        proxy.stop()
+
+
+def test_concurrent_senders_with_dropped_txs(tmp_path, make_client):
+    """Várias threads, mesmo signer, node descartando txs: sem colisão, sem gap, nada preso"""
+    chain = FakeChain(block_time=0.05, drop_rate=0.1, seed=7).start()
+    try:
+        client, manager = make_client(chain.url, drop_timeout=0.3, resync_interval=0.05)
+        jobs = [f"{thread}-{job}".encode() for thread in range(6) for job in range(6)]
+        errors = []
+
+        def worker(thread_jobs):
+            try:
+                for job in thread_jobs:
+                    while True:
+                        tx_hash, nonce = send_managed_transaction(client, transfer(job))
+                        if wait_receipt(client, tx_hash, timeout=0.6):
+                            manager.confirm(nonce)
+                            break
+            except Exception as e:      # pragma: no cover - falha aparece no assert
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(jobs[i::6],)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=60)
+        chain.mine_block()
+
+        assert not errors
+        assert sorted(tx['data'] for tx in chain.mined) == sorted(jobs)
+        assert sorted(tx['nonce'] for tx in chain.mined) == list(range(len(jobs)))
+        assert sum(len(pool) for pool in chain.mempool.values()) == 0
+        manager.drop_timeout = 0
+        manager.resync()
+        assert manager.pending() == []
+    finally:
+        chain.stop()
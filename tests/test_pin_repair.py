@@ -0,0 +1,124 @@
+"""Upload que falha depois do broadcast: repete o mesmo payload ou guarda para re-pin"""
+
+from concurrent.futures import Future
+
+import pytest
+
+import process_kyc
+from funs_kyc import pin_repair
+from funs_kyc.idempotency import IdempotencyCache
+from funs_kyc.pin_repair import PinPendingError, PinRepairStore, finish_pin
+from funs_kyc.storage import prepare_json
+
+
+class FlakyUploader:
+    """upload_prepared falha nas primeiras `failures` chamadas e guarda o que foi pinado"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.pinned = {}
+
+    def upload_prepared(self, prepared, key):
+        if self.failures:
+            self.failures -= 1
+            raise Exception("Failed to upload to Filebase: 503 SlowDown")
+        self.pinned[key] = (b''.join(prepared.chunks), prepared.cid)
+        return key
+
+
+def failed_pin():
+    pin = Future()
+    pin.set_exception(Exception("Failed to upload to Filebase: connection reset"))
+    return pin
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = PinRepairStore(str(tmp_path / 'pins.sqlite3'))
+    monkeypatch.setattr(pin_repair, '_store', store)
+    monkeypatch.setattr(pin_repair, 'PIN_RETRIES', 2)
+    return store
+
+
+def test_failed_pin_is_retried_with_the_same_payload(store):
+    prepared = prepare_json({'reasoning': 'x' * 1000})
+    uploader = FlakyUploader(failures=1)
+    finish_pin(uploader, failed_pin(), prepared, 'reasoning_a.json', '0xabc')
+    assert uploader.pinned['reasoning_a.json'] == (b''.join(prepared.chunks), prepared.cid)
+    assert not store.has_pending()
+
+
+def test_pin_still_failing_is_recorded_and_repaired(store):
+    prepared = prepare_json({'reasoning': 'y' * 1000})
+    uploader = FlakyUploader(failures=2)
+    with pytest.raises(PinPendingError, match=r"0xdef already broadcast, object reasoning_b.json queued for re-pin") \
+            as raised:
+        finish_pin(uploader, failed_pin(), prepared, 'reasoning_b.json', '0xdef', '0xa77', 'bafyreasoning')
+    assert raised.value.fields == {'attestation_id': '0xa77', 'tx_hash': '0xdef', 'ipfs_cid': 'bafyreasoning',
+                                   'object_key': 'reasoning_b.json', 'queued_for_repin': True}
+    assert store.has_pending()
+    [entry] = store.pending()
+    assert (entry['object_key'], entry['tx_hash'], entry['content_cid']) == ('reasoning_b.json', '0xdef', prepared.cid)
+
+    # Reaberto do disco (outro processo / restart) e pinado com os mesmos bytes e CID
+    reopened = PinRepairStore(store.path)
+    assert reopened.repair(uploader) == (1, 0)
+    assert uploader.pinned['reasoning_b.json'] == (b''.join(prepared.chunks), prepared.cid)
+    assert not reopened.has_pending() and reopened.pending() == []
+
+
+def test_repair_keeps_what_still_fails(store):
+    store.record('reasoning_c.json', '0x123', prepare_json({'n': 1}), 'timeout')
+    assert store.repair(FlakyUploader(failures=1)) == (0, 1)
+    [entry] = store.pending()
+    assert entry['attempts'] == 1 and '503' in entry['error']
+
+
+class PendingPinRequest:
+    """Request do handler cujo pipeline termina em PinPendingError"""
+
+    path = '/api/process_kyc'
+    headers = {}
+    _stream = None
+    _submit_kyc = process_kyc.handler._submit_kyc
+    _wants_async = process_kyc.handler._wants_async
+    _stage = process_kyc.handler._stage
+
+    def __init__(self):
+        self.attempts = 0
+
+    def _create_detailed_attestation(self, **applicant):
+        self.attempts += 1
+        raise PinPendingError("Failed to upload to Filebase (attestation tx 0xdef already broadcast, object "
+                              "reasoning_b.json queued for re-pin)", '0xdef', '0xa77', 'bafyreasoning',
+                              'reasoning_b.json', True)
+
+
+def test_pin_pending_is_a_stored_final_response(monkeypatch):
+    monkeypatch.setenv('KYC_ADMISSION', '0')
+    request, cache = PendingPinRequest(), IdempotencyCache()
+    applicant = {'user_name': 'Ana Silva'}
+
+    (status, body), replayed = cache.execute('key', 'fp', lambda: request._submit_kyc(applicant))
+    assert status == 202 and not replayed
+    assert body['status'] == 'pin_pending' and body['retryable'] is False
+    assert (body['tx_hash'], body['attestation_id'], body['ipfs_cid']) == ('0xdef', '0xa77', 'bafyreasoning')
+
+    # Reenvio do client: mesma resposta, nenhuma segunda attestation
+    (status, again), replayed = cache.execute('key', 'fp', lambda: request._submit_kyc(applicant))
+    assert replayed and (status, again) == (202, body) and request.attempts == 1
+
+
+def test_async_job_ends_in_pin_pending(tmp_path):
+    from funs_kyc.jobs import SQLiteJobStore, _run_job
+
+    def runner(on_stage):
+        on_stage('tx_sent', tx_hash='0xdef')
+        PendingPinRequest()._create_detailed_attestation()
+
+    jobs = SQLiteJobStore(str(tmp_path / 'jobs.sqlite3'))
+    jobs.create('job1')
+    _run_job(jobs, 'job1', runner, {})
+    job = jobs.get('job1')
+    assert job['status'] == 'pin_pending' and job['queued_for_repin']
+    assert (job['tx_hash'], job['attestation_id'], job['ipfs_cid']) == ('0xdef', '0xa77', 'bafyreasoning')
@@ -0,0 +1,174 @@
+"""RpcPool contra nodes locais (FakeChain + proxies com atraso e falhas injetados)"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pytest
+from eth_account import Account
+from web3 import Web3
+
+from bench_handler import BENCH_NETWORK, configure, load_applicants
+from bench_rpc_pool import Nodes, delta, read_latencies
+from funs_kyc.metrics import get_registry
+from funs_kyc.rpc_pool import UP_GAUGE, RpcPool
+
+CHAIN_ID = 80002
+GAS_PRICE = 30 * 10**9
+
+
+@pytest.fixture(scope='module')
+def nodes():
+    nodes = Nodes(argparse.Namespace(latencies='0.01,0.025,0.05', spike_rate=0.05, spike_latency=0.5,
+                                     block_time=0.2))
+    try:
+        yield nodes
+    finally:
+        nodes.stop()
+
+
+@pytest.fixture
+def steady(nodes):
+    """Nodes sem caudas lentas, de volta ao default no fim do teste"""
+    nodes.reset()
+    for index in range(len(nodes.urls)):
+        nodes.configure(index, spike_rate=0)
+    yield nodes
+    nodes.reset()
+
+
+def measured_pool(nodes, **kwargs):
+    pool = RpcPool(nodes.urls, **kwargs)
+    w3 = Web3(pool)
+    for _ in range(len(nodes.urls)):
+        w3.eth.block_number     # um por endpoint: todos medidos
+    return pool, w3
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def signed_transfer(account, nonce):
+    tx = {'to': '0x' + '33' * 20, 'value': 0, 'gas': 21000, 'gasPrice': GAS_PRICE, 'nonce': nonce, 'chainId': CHAIN_ID}
+    return account.sign_transaction(tx).raw_transaction
+
+
+def test_reads_go_to_the_fastest_endpoint_and_hedge_a_stalled_one(steady):
+    pool, w3 = measured_pool(steady, hedge_min=0.05, max_failures=3, cooldown=0.5)
+    before = steady.calls()
+    for _ in range(50):
+        w3.eth.block_number
+    routed = delta(before, steady.calls())
+    assert routed[0] >= 48, f"calls should go to the fastest endpoint: {routed}"
+
+    # Mais rápido travado: leitura sai pelo hedge
+    steady.configure(0, latency=1.0)
+    started = time.monotonic()
+    w3.eth.get_transaction_count('0x' + '44' * 20)
+    elapsed = time.monotonic() - started
+    assert elapsed < 0.5, f"hedged read took {elapsed:.2f}s"
+    assert pool.stats['hedged'] >= 1 and pool.stats['hedge_wins'] >= 1, pool.stats
+
+    # Tráfego contínuo: as amostras do travado chegam (limitadas, sobem aos poucos) e ele sai da frente;
+    # depois só recebe uma sondagem de vez em quando, que o hedge cobre
+    samples = read_latencies(w3, 200, 4)
+    before = steady.calls()
+    samples += read_latencies(w3, 200, 4)
+    routed = delta(before, steady.calls())
+    assert max(samples) < 500, f"slowest read {max(samples):.0f} ms"
+    assert routed[0] <= 10 and routed[1] >= 180, f"traffic should move off the slow endpoint: {routed}"
+
+
+def test_failing_endpoint_is_probed_out_of_rotation_and_back(steady):
+    pool, w3 = measured_pool(steady, max_failures=3, cooldown=0.5)
+
+    def primary():
+        return pool.snapshot()['endpoints'][0]
+
+    steady.configure(0, mode='error')
+    for _ in range(10):
+        w3.eth.block_number     # nenhuma falha chega ao caller
+    # A EWMA de erros tira o tráfego antes da 3ª falha; a sondagem confirma a queda
+    assert wait_for(lambda: not primary()['up']), primary()
+    assert primary()['errors'] >= 3, primary()
+    metrics = get_registry().to_prometheus()
+    assert f'{UP_GAUGE}{{endpoint="{primary()["endpoint"]}"}} 0' in metrics
+
+    # Volta pela sondagem do fim do cooldown, sem depender de tráfego
+    steady.configure(0, mode='ok')
+    assert wait_for(lambda: primary()['up'] and not pool.endpoints[0].failures), primary()
+    assert wait_for(lambda: not pool.endpoints[0].probing)
+
+    for index in range(len(steady.urls)):
+        steady.configure(index, mode='error')
+    assert not w3.is_connected()
+    with pytest.raises(ConnectionError):
+        w3.eth.block_number
+
+
+def test_lost_broadcast_reply_is_not_resent(steady):
+    account = Account.create()
+    pool, w3 = measured_pool(steady, max_failures=3, cooldown=0.5)
+
+    # Resposta perdida: o node recebeu a tx, o client viu 502
+    raw = signed_transfer(account, 0)
+    steady.configure(0, mode='lost_reply')
+    before = steady.calls('eth_sendRawTransaction')
+    tx_hash = w3.eth.send_raw_transaction(raw)
+    sent = delta(before, steady.calls('eth_sendRawTransaction'))
+    assert tx_hash == Web3.keccak(raw), tx_hash
+    assert sent[0] == 1 and sum(sent[1:]) == 0, f"lost reply must not be re-sent: {sent}"
+    assert pool.stats['send_recovered'] == 1 and steady.txs_from(account.address) == 1
+
+    # Node fora antes de receber: enviado ao próximo (pool novo - a sondagem já tirou o 502 da rotação)
+    steady.configure(0, mode='ok')
+    pool, w3 = measured_pool(steady, max_failures=3, cooldown=0.5)
+    steady.configure(0, mode='down')
+    raw = signed_transfer(account, 1)
+    before = steady.calls('eth_sendRawTransaction')
+    tx_hash = w3.eth.send_raw_transaction(raw)
+    sent = delta(before, steady.calls('eth_sendRawTransaction'))
+    assert tx_hash == Web3.keccak(raw) and sent[0] == 1 and sum(sent[1:]) == 1, sent
+    assert steady.txs_from(account.address) == 2
+
+
+@pytest.fixture
+def bench_env(nodes):
+    from anna_protocol import client as anna_client
+    from funs_kyc import client_pool
+
+    saved = dict(os.environ)
+    nodes.reset()
+    configure(nodes.urls[0], nodes.s3_url, tempfile.mkdtemp(prefix='test_rpc_pool_'))
+    os.environ['KYC_CONFIRMATION_TIMEOUT'] = '30'
+    try:
+        yield client_pool
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+        anna_client.NETWORKS.pop(BENCH_NETWORK, None)
+        client_pool.reset_client()
+
+
+def test_client_pool_survives_a_dead_first_endpoint(nodes, bench_env):
+    import process_kyc
+
+    os.environ['KYC_RPC_URLS'] = ','.join(['http://127.0.0.1:9'] + nodes.urls)
+    bench_env.reset_client()
+    client = bench_env.get_client()
+    assert isinstance(client.w3.provider, RpcPool) and client.network == BENCH_NETWORK, client.w3.provider
+
+    result = process_kyc.create_detailed_attestation(**process_kyc.parse_kyc_input(load_applicants(None, 1)[0]))
+    assert result['attestation_id'] and result['tx_hash'], result
+    pool = client.w3.provider
+    assert wait_for(lambda: not pool.snapshot()['endpoints'][0]['up']), pool.snapshot()
+    endpoints = pool.snapshot()['endpoints']
+    metrics = get_registry().to_prometheus()
+    assert f'{UP_GAUGE}{{endpoint="{endpoints[1]["endpoint"]}"}} 1' in metrics
@@ -0,0 +1,43 @@
+"""Triagem de sanções: sem lista o nome não é checado e nada é aprovado"""
+
+import pytest
+
+from funs_kyc import sanctions
+from funs_kyc.scoring import batch_rows, score_applicant, score_batch
+
+
+@pytest.fixture
+def sanctions_list(tmp_path, monkeypatch):
+    def configure(path):
+        monkeypatch.setenv('KYC_SANCTIONS_LIST', path)
+        monkeypatch.setattr(sanctions, '_screener', None)
+    yield configure
+    sanctions._screener = None
+
+
+def test_missing_configured_list_is_an_error(sanctions_list, tmp_path):
+    sanctions_list(str(tmp_path / 'missing.csv'))
+    with pytest.raises(FileNotFoundError):
+        sanctions.get_screener()
+
+
+def test_unscreened_applicant_goes_to_review(sanctions_list):
+    sanctions_list('')
+    screening = sanctions.get_screener().screen("Ana Silva")
+    assert not screening['hit'] and not screening['loaded']
+
+    risk = score_applicant(30, "Brazil", screening)
+    assert risk['risk_level'] == 'low' and not risk['sanctions_screened'] and not risk['approved']
+    [row] = batch_rows(score_batch([30], ["Brazil"], [False], screened=[False]))
+    assert row == risk
+
+
+def test_screened_clean_applicant_is_approved(sanctions_list, tmp_path):
+    path = tmp_path / 'sanctions.csv'
+    path.write_text("id,name,source,country\nS1,Ivan Petrovich Sidorov,OFAC,Russia\n", encoding='utf-8')
+    sanctions_list(str(path))
+    screener = sanctions.get_screener()
+    assert screener.screen("Ivan Petrovich Sidorov")['hit']
+
+    risk = score_applicant(30, "Brazil", screener.screen("Ana Silva"))
+    assert risk['sanctions_screened'] and risk['approved']
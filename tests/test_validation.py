@@ -0,0 +1,132 @@
+"""Validação de CPF/passaporte/MRZ: checks corretos e API escalar == API vetorizada"""
+
+import random
+
+import pytest
+
+from bench_validation import make_cpf, make_mrz, mutate_digit
+from funs_kyc.validation import (
+    PASSPORT_ERROR, ValidationError, cpf_is_valid, cpf_valid_batch, passport_is_valid, passport_valid_batch,
+    td3_checks, td3_checks_batch, validate_applicant, validate_batch,
+)
+
+ICAO_SPECIMEN = ("P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<\n"
+                 "L898902C36UTO7408122F1204159ZE184226B<<<<<10")
+CHECK_POSITIONS = {'document_number': 9, 'birth_date': 19, 'expiry_date': 27,
+                   'personal_number': 42, 'composite': 43}
+LINE1, LINE2 = ICAO_SPECIMEN.split('\n')
+
+# Entradas que já divergiram entre escalar e NumPy ou derrubaram o handler
+CPF_EDGE_CASES = [
+    '123.456.789-09          5',   # truncar na largura da matriz perdia o último dígito
+    '\x0012345678909',             # NUL contava como formatação no lote
+    '12345678909\x00',
+    '1234567890²',                 # isdigit() aceitava, int() levantava
+    '１２３４５６７８９０９',        # dígitos fullwidth
+    '123.456.789-0９',
+    '123\xa0456\xa0789\xa009',     # espaço não-ASCII não é formatação
+    '123 456 789 09',
+    '123\t456\n789\r09',
+    ' ' * 9 + '12345678909',
+    ' ' * 10 + '12345678909',
+]
+
+
+def scalar_errors(applicant, mrz=None):
+    try:
+        validate_applicant(applicant, mrz)
+        return []
+    except ValidationError as e:
+        return e.errors
+
+
+@pytest.fixture
+def rng():
+    return random.Random(7)
+
+
+def test_icao_specimen_and_each_check_digit():
+    checks = td3_checks(ICAO_SPECIMEN)
+    assert all(checks[name] for name in CHECK_POSITIONS), checks
+    assert checks['document'] == 'L898902C3'
+    validate_applicant({'user_cpf': 'N/A', 'user_passport': 'L898902C3'}, ICAO_SPECIMEN)
+
+    for name, position in CHECK_POSITIONS.items():
+        bad = f"{LINE1}\n{LINE2[:position]}{(int(LINE2[position]) + 1) % 10}{LINE2[position + 1:]}"
+        failed = {k for k, ok in td3_checks(bad).items() if k in CHECK_POSITIONS and not ok}
+        assert name in failed, (name, failed)
+        assert not td3_checks_batch([bad])[name][0], name
+
+
+def test_invalid_applicant_reports_every_field():
+    with pytest.raises(ValidationError) as e:
+        validate_applicant({'user_cpf': '111.111.111-11', 'user_passport': 'X1'}, ICAO_SPECIMEN)
+    assert len(e.value.errors) == 3, e.value.errors   # cpf, passport, mrz x passport
+    assert PASSPORT_ERROR in e.value.errors and '5 to 9' in PASSPORT_ERROR
+
+
+def test_cpf_scalar_and_batch_agree(rng):
+    cpfs = [make_cpf(rng, formatted=rng.random() < 0.5) for _ in range(2000)]
+    mutated = [mutate_digit(c, rng) for c in cpfs]
+    junk = ['000.000.000-00', '999.999.999-99', '123', '123.456.789-0X', '12345678909123',
+            '123.456.789-09', '123 456 789 09', '', 'abc.def.ghi-jk']
+    samples = cpfs + mutated + junk + CPF_EDGE_CASES
+    scalar = [cpf_is_valid(c) for c in samples]
+    assert all(scalar[:len(cpfs)])
+    # Mod 11 com resto 10 -> 0 deixa passar algumas trocas de 1 dígito; o resto tem que falhar
+    assert sum(scalar[len(cpfs):2 * len(cpfs)]) < len(cpfs) * 0.1
+    assert scalar[-len(CPF_EDGE_CASES) - 4] and scalar[-len(CPF_EDGE_CASES) - 3]
+    assert not any(scalar[-len(CPF_EDGE_CASES) - 9:-len(CPF_EDGE_CASES) - 4])
+    assert scalar[-len(CPF_EDGE_CASES):] == [False] * 7 + [True, True, True, False]
+    assert list(cpf_valid_batch(samples)) == scalar
+
+
+@pytest.mark.parametrize('cpf', [12345678909, 123.4, ['12345678909']])
+def test_non_string_cpf_is_a_validation_error(cpf):
+    with pytest.raises(ValidationError):
+        cpf_is_valid(cpf)
+    assert scalar_errors({'user_cpf': cpf}) == ["cpf: must be a string"]
+    assert validate_batch([{'user_cpf': cpf, 'user_passport': 'X1'}]) == [["cpf: must be a string"]]
+
+
+def test_passport_scalar_and_batch_agree():
+    passports = ['L898902C3', 'ab 123-456', 'X1', 'ABCDEFGHIJ', 'AB12*456', 'BR123456', 'BR12345６', 'ABCD\x00']
+    assert list(passport_valid_batch(passports)) == [passport_is_valid(p) for p in passports] \
+        == [True, True, False, False, False, True, False, False]
+
+
+def test_mrz_scalar_and_batch_agree(rng):
+    mrzs = [make_mrz(rng)[0] for _ in range(1000)]
+    broken = []
+    for mrz in mrzs[:500]:
+        i = rng.randrange(45, 89)
+        ch = mrz[i]
+        replacement = '<' if ch.isdigit() and ch != '0' else '1' if ch != '1' else '2'
+        broken.append(mrz[:i] + replacement + mrz[i + 1:])
+    batch = td3_checks_batch(mrzs + broken + ['short', None])
+    expected = [all(ok for k, ok in td3_checks(m).items() if k in CHECK_POSITIONS) for m in mrzs + broken]
+    assert list(batch['valid'][:len(expected)]) == expected and all(expected[:len(mrzs)])
+    assert not batch['valid'][-2:].any()
+
+
+def test_applicant_errors_match_exactly(rng):
+    fullwidth = f"{LINE1}\n{LINE2[:9]}９{LINE2[10:]}"
+    bad_nationality = f"{LINE1}\n{LINE2[:10]}U*O{LINE2[13:]}"
+    bad_checks = f"{LINE1}\n{LINE2[:19]}0{LINE2[20:42]}9{LINE2[43:]}"
+    mrzs = [ICAO_SPECIMEN, ICAO_SPECIMEN[:-1], ICAO_SPECIMEN + '0', fullwidth, bad_nationality, bad_checks,
+            f"{LINE1}\n{LINE2[:20]}\x00{LINE2[21:]}", 'N/A', None]
+    applicants, mrz_column = [], []
+    for _ in range(1000):
+        applicants.append({'user_cpf': rng.choice((make_cpf(rng), mutate_digit(make_cpf(rng), rng), 'N/A',
+                                                   rng.choice(CPF_EDGE_CASES))),
+                           'user_passport': rng.choice(('BR123456', 'L898902C3', 'X1', 'N/A'))})
+        mrz_column.append(rng.choice(mrzs))
+
+    batch_errors = validate_batch(applicants, mrz_column)
+    for applicant, mrz, errors in zip(applicants, mrz_column, batch_errors):
+        assert errors == scalar_errors(applicant, mrz), (applicant, mrz)
+
+    messages = {e for errors in batch_errors for e in errors if e.startswith('mrz')}
+    assert "mrz: MRZ must be TD3 (2 lines x 44 characters)" in messages
+    assert "mrz: Invalid MRZ character: '９'" in messages and "mrz: Invalid MRZ character: '*'" in messages
+    assert "mrz: check digit mismatch (birth_date, personal_number, composite)" in messages